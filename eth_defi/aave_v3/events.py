@@ -180,6 +180,57 @@ def decode_reserve_data_updated(
     return result
 
 
+def decode_reserve_data_updated_columns(
+    aave_network_name: str,
+    columns: "eth_defi.event_reader.columnar.LogColumns",
+    aave_version: AaveVersion,
+) -> "pandas.DataFrame":
+    """Process a chunk of ReserveDataUpdated events at once.
+
+    - Columnar counterpart of :py:func:`decode_reserve_data_updated`, without per-log dict allocations
+    - Logs from other contracts and logs without the reserve topic are dropped
+    - Rates and indexes are exact Python ints
+    - Reserve addresses are checksummed and token names resolved once per unique reserve
+    - Use :py:func:`eth_defi.event_reader.columnar.iterate_log_columns` to get the chunks
+
+    :param columns:
+        Logs of ReserveDataUpdated events only
+
+    :return:
+        DataFrame with the same columns as :py:func:`decode_reserve_data_updated` results
+    """
+    import numpy as np
+
+    if aave_version == AaveVersion.V2:
+        pool_address = AAVE_V2_NETWORKS[aave_network_name.lower()].pool_address
+    else:
+        pool_address = AAVE_V3_NETWORKS[aave_network_name.lower()].pool_address
+
+    mask = (columns.address == bytes.fromhex(pool_address[2:])) & (columns.topic_count >= 2)
+    columns = columns.filter(mask)
+
+    df = columns.to_pandas().rename(columns={"transaction_hash": "tx_hash", "address": "contract_address"})
+    if columns.timestamp is not None:
+        df["timestamp"] = df["timestamp"].dt.strftime("%Y-%m-%dT%H:%M:%S")
+
+    unique_reserves, inverse = np.unique(columns.get_word_address(1, topic=True), return_inverse=True)
+    reserves = [Web3.to_checksum_address(r.ljust(20, b"\0")) for r in unique_reserves.tolist()]
+    df["reserve"] = [reserves[i] for i in inverse]
+
+    if aave_version == AaveVersion.V3:
+        tokens = [aave_v3_get_token_name_by_deposit_address(r) for r in reserves]
+        df["token"] = [tokens[i] for i in inverse]
+    else:
+        df["token"] = None
+
+    df["liquidity_rate"] = columns.get_word_int(0)
+    df["stable_borrow_rate"] = columns.get_word_int(1)
+    df["variable_borrow_rate"] = columns.get_word_int(2)
+    df["liquidity_index"] = columns.get_word_int(3)
+    df["variable_borrow_index"] = columns.get_word_int(4)
+    return df
+
+
 def aave_v3_fetch_events_to_csv(
     json_rpc_url: str,
     state: ScanState,
@@ -16,6 +16,7 @@ from web3.types import BlockIdentifier
 
 from eth_defi.abi import ZERO_ADDRESS_STR
 from eth_defi.erc_4626.core import ERC4626Feature
+from eth_defi.event_reader.call_cache import CallCache
 from eth_defi.event_reader.multicall_batcher import EncodedCall, EncodedCallResult, read_multicall_chunked
 from eth_defi.event_reader.web3factory import Web3Factory
 from eth_defi.vault.base import VaultBase, VaultSpec
@@ -547,9 +548,15 @@ def probe_vaults(
     block_identifier: BlockIdentifier,
     max_workers=8,
     progress_bar_desc: str | None = None,
+    call_cache: CallCache | None = None,
 ) -> Iterable[VaultFeatureProbe]:
     """Perform multicalls against each vault address to extract the features of the vault smart contract.
 
+    :param call_cache:
+        Reuse probe results from the previous runs when probing at a finalised block.
+
+        See :py:class:`eth_defi.event_reader.call_cache.CallCache`.
+
     :return:
         Iterator of what vault smart contract features we detected for each potential vault address
     """
@@ -569,6 +576,7 @@ def probe_vaults(
         block_identifier=block_identifier,
         progress_bar_desc=progress_bar_desc,
         max_workers=max_workers,
+        call_cache=call_cache,
     ):
         address = call_result.call.address
         address_calls = results_per_address[address]
@@ -16,6 +16,7 @@ from tqdm_loggable.auto import tqdm
 
 from eth_defi.erc_4626.discovery_base import get_vault_discovery_events, LeadScanReport
 from eth_defi.erc_4626.discovery_base import VaultDiscoveryBase, PotentialVaultMatch
+from eth_defi.event_reader.log_cache import LogCache
 from eth_defi.event_reader.reader import read_events_concurrent
 from eth_defi.event_reader.web3factory import Web3Factory
 from eth_defi.event_reader.web3worker import create_thread_pool_executor
@@ -42,6 +43,7 @@ class JSONRPCVaultDiscover(VaultDiscoveryBase):
         web3factory: Web3Factory,
         max_workers: int = 8,
         max_getlogs_range: int | None = None,
+        log_cache: LogCache | None = None,
     ):
         """Create vault discover.
 
@@ -53,6 +55,11 @@ class JSONRPCVaultDiscover(VaultDiscoveryBase):
 
         :param max_workers:
             How many worker processes use in multicall probing
+
+        :param log_cache:
+            Serve already scanned, finalised blocks from a disk cache on reruns.
+
+            See :py:class:`eth_defi.event_reader.log_cache.LogCache`.
         """
 
         super().__init__(max_workers=max_workers)
@@ -60,6 +67,7 @@ class JSONRPCVaultDiscover(VaultDiscoveryBase):
         self.web3 = web3
         self.web3factory = web3factory
         self.max_getlogs_range = max_getlogs_range
+        self.log_cache = log_cache
 
     def build_query(self, executor: ThreadPoolExecutor, start_block: int, end_block: int) -> dict:
         """Create a read_events_concurrent arguments to discover new vaults.
@@ -74,6 +82,7 @@ class JSONRPCVaultDiscover(VaultDiscoveryBase):
             "events": get_vault_discovery_events(self.web3),
             "chunk_size": self.max_getlogs_range or get_logs_max_block_range(self.web3),  # Allow command line override for crappy supported chains like TAC
             "extract_timestamps": None,  # We only need timestamps for first event per vault
+            "log_cache": self.log_cache,
         }
 
     def fetch_leads(
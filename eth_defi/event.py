@@ -1,6 +1,6 @@
 """Solidity events scalable fetch and reading."""
 
-from typing import Iterable, Optional, Type
+from typing import TYPE_CHECKING, Iterable, Optional, Type
 
 from eth_abi.codec import ABICodec
 from eth_typing import BlockNumber, HexAddress
@@ -9,8 +9,12 @@ from web3._utils.events import get_event_data
 from web3._utils.filters import construct_event_filter_params
 from web3.contract.contract import ContractEvent
 from web3.datastructures import AttributeDict
+from web3._utils.method_formatters import log_entry_formatter
 from eth_defi.chain import WEB3_PY_V7
 
+if TYPE_CHECKING:
+    from eth_defi.event_reader.log_cache import LogCache
+
 
 def fetch_all_events(
     web3: Web3,
@@ -19,6 +23,7 @@ def fetch_all_events(
     argument_filters: Optional[dict] = None,
     from_block: Optional[BlockNumber] = 1,
     to_block: Optional[BlockNumber] = None,
+    log_cache: Optional["LogCache"] = None,
 ) -> Iterable[AttributeDict]:
     """Get events using eth_getLogs API.
 
@@ -42,6 +47,9 @@ def fetch_all_events(
     :param argument_filters: Filters based on the event structure, e.g. `to` field `IERC20.events.Transfer`
     :param from_block: Limit block range. Set to `1` to get all the events, ever.
     :param to_block: Limit block range
+    :param log_cache:
+        Serve finalised blocks from a disk cache, see :py:class:`eth_defi.event_reader.log_cache.LogCache`.
+        Needs numeric `from_block` and `to_block`.
     """
 
     # Currently no way to poke this using a public Web3.py API.
@@ -67,7 +75,17 @@ def fetch_all_events(
         data_filter_set, event_filter_params = construct_event_filter_params(abi, codec, address=address, argument_filters=argument_filters, fromBlock=from_block, toBlock=to_block)
     # Call JSON-RPC API on your Ethereum node.
     # get_logs() returns raw AttributedDict entries
-    logs = web3.eth.get_logs(event_filter_params)
+    if log_cache is not None:
+        assert type(from_block) == int and type(to_block) == int, f"log_cache needs a fixed block range, got {from_block} - {to_block}"
+
+        def _get_logs(start: int, end: int) -> list[dict]:
+            params = event_filter_params | {"fromBlock": hex(start), "toBlock": hex(end)}
+            return web3.manager.request_blocking("eth_getLogs", (params,))
+
+        raw_logs = log_cache.fetch_logs(web3, event_filter_params.get("address"), event_filter_params.get("topics"), from_block, to_block, _get_logs)
+        logs = [log_entry_formatter(dict(log)) for log in raw_logs]
+    else:
+        logs = web3.eth.get_logs(event_filter_params)
 
     # Convert raw binary data to Python proxy objects as described by ABI
     for log in logs:
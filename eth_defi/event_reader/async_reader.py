@@ -0,0 +1,679 @@
+"""Asyncio based event and multicall reader.
+
+- :py:func:`~eth_defi.event_reader.reader.read_events_concurrent` uses a thread pool and
+  :py:func:`~eth_defi.event_reader.multicall_batcher.read_multicall_historical` uses loky worker processes.
+  Both are almost entirely waiting for the network, and each worker carries its own Web3 connection and memory.
+
+- This module runs many in-flight ``eth_getLogs`` and ``eth_call`` requests from a single process
+  using :py:mod:`asyncio` and :py:mod:`aiohttp` keep-alive connection pools
+
+- Concurrency is limited per RPC provider, with a failover to the next provider on retryable errors,
+  like :py:class:`~eth_defi.provider.fallback.FallbackProvider`
+
+- Output is the same as with the sync readers: :py:class:`~eth_defi.event_reader.logresult.LogResult` dicts
+  and :py:class:`~eth_defi.event_reader.multicall_batcher.CombinedEncodedCallResult` objects, in block order
+
+Example:
+
+.. code-block:: python
+
+    from eth_defi.event_reader.async_reader import read_events_asyncio
+
+    for log_result in read_events_asyncio(
+        json_rpc_url,
+        start_block,
+        end_block,
+        events=[Factory.events.PairCreated],
+        max_concurrency=32,
+    ):
+        print(log_result["blockNumber"], log_result["transactionHash"])
+
+Use :py:class:`AsyncJSONRPCClient` with :py:func:`read_events_async` and :py:func:`read_multicall_historical_async`
+directly if your application is already async.
+"""
+
+import asyncio
+import logging
+from collections import Counter, defaultdict, deque
+from typing import Any, AsyncIterator, Awaitable, Callable, Collection, Iterable, TypeVar
+
+import aiohttp
+import ujson
+from eth_abi import decode, encode
+from eth_utils import keccak
+from tqdm_loggable.auto import tqdm
+from web3.contract.contract import ContractEvent
+
+from eth_defi.compat import native_datetime_utc_fromtimestamp
+from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.event_reader.filter import Filter
+from eth_defi.event_reader.logresult import LogContext, LogResult
+from eth_defi.event_reader.multicall_batch_size import classify_multicall_failure
+from eth_defi.event_reader.multicall_batcher import (
+    MULTICALL_CHAIN_ADDRESSES,
+    MULTICALL_DEPLOY_ADDRESS,
+    CombinedEncodedCallResult,
+    EncodedCall,
+    EncodedCallResult,
+    BISECT_FAILURES,
+    MulticallNonRetryable,
+    MulticallRetryable,
+    get_multicall_block_number,
+    get_multicall_gas_hint,
+)
+from eth_defi.event_reader.reader import ProgressUpdate, TimestampNotFound, create_filter_params, prepare_filter
+from eth_defi.middleware import DEFAULT_RETRYABLE_HTTP_STATUS_CODES, DEFAULT_RETRYABLE_RPC_ERROR_CODES, ProbablyNodeHasNoBlock, is_retryable_http_exception
+from eth_defi.provider.fallback import ExtraValueError
+from eth_defi.utils import get_url_domain
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+#: Multicall3 ``tryBlockAndAggregate(bool,(address,bytes)[])``
+TRY_BLOCK_AND_AGGREGATE_SELECTOR = keccak(text="tryBlockAndAggregate(bool,(address,bytes)[])")[0:4]
+
+
+class AsyncJSONRPCClient:
+    """Minimal asyncio JSON-RPC client for high throughput reads.
+
+    - One :py:class:`aiohttp.ClientSession` with keep-alive connections
+    - At most ``max_concurrency`` in-flight requests per provider
+    - Retries with backoff and switches to the next provider on retryable errors
+    - Only raw JSON-RPC results, no Web3 middleware or formatters
+
+    Use as an async context manager:
+
+    .. code-block:: python
+
+        async with AsyncJSONRPCClient(json_rpc_url, max_concurrency=32) as client:
+            block_number = int(await client.request("eth_blockNumber", []), 16)
+    """
+
+    def __init__(
+        self,
+        json_rpc_urls: str | list[str],
+        max_concurrency: int = 16,
+        timeout: float = 60.0,
+        retries: int = 6,
+        sleep: float = 1.0,
+        backoff: float = 1.6,
+        retryable_status_codes: Collection[int] = DEFAULT_RETRYABLE_HTTP_STATUS_CODES,
+        retryable_rpc_error_codes: Collection[int] = DEFAULT_RETRYABLE_RPC_ERROR_CODES,
+    ):
+        """
+        :param json_rpc_urls:
+            List of RPC URLs, or a space separated configuration line as with
+            :py:func:`~eth_defi.provider.multi_provider.create_multi_provider_web3`.
+
+            ``mev+`` transaction endpoints are ignored.
+
+        :param max_concurrency:
+            Max in-flight requests per provider
+
+        :param timeout:
+            HTTP request timeout, seconds
+
+        :param retries:
+            How many retries we attempt before giving up
+
+        :param sleep:
+            Seconds between retries
+
+        :param backoff:
+            Multiplier to increase sleep
+        """
+        if isinstance(json_rpc_urls, str):
+            json_rpc_urls = json_rpc_urls.split()
+
+        self.urls = [url for url in json_rpc_urls if not url.startswith("mev+")]
+        assert self.urls, f"No call endpoints configured: {json_rpc_urls}"
+
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.sleep = sleep
+        self.backoff = backoff
+        self.retryable_status_codes = retryable_status_codes
+        self.retryable_rpc_error_codes = retryable_rpc_error_codes
+
+        #: Currently active provider
+        self.currently_active_provider = 0
+
+        #: provider number -> API name -> call count mappings
+        self.api_call_counts = defaultdict(Counter)
+
+        self.retry_count = 0
+
+        self.session: aiohttp.ClientSession | None = None
+        self.semaphores = [asyncio.Semaphore(max_concurrency) for _ in self.urls]
+        self.request_id = 0
+
+    def __repr__(self):
+        names = [get_url_domain(url) for url in self.urls]
+        return f"<AsyncJSONRPCClient {', '.join(names)}, max concurrency {self.max_concurrency}>"
+
+    async def __aenter__(self) -> "AsyncJSONRPCClient":
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def open(self):
+        """Create the HTTP connection pool.
+
+        Must be called within the event loop doing the requests.
+        """
+        if self.session is None:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_concurrency * len(self.urls),
+                limit_per_host=self.max_concurrency,
+                keepalive_timeout=60,
+            )
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={"Content-Type": "application/json"},
+            )
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    def has_multiple_providers(self) -> bool:
+        return len(self.urls) >= 2
+
+    def switch_provider(self):
+        """Switch to next available provider."""
+        old = get_url_domain(self.urls[self.currently_active_provider])
+        self.currently_active_provider = (self.currently_active_provider + 1) % len(self.urls)
+        logger.warning("Switched RPC providers %s -> %s", old, get_url_domain(self.urls[self.currently_active_provider]))
+
+    def is_retryable(self, e: Exception, method: str, params: Any) -> bool:
+        """Can we retry the request after this exception."""
+        if isinstance(e, aiohttp.ClientResponseError):
+            return e.status in self.retryable_status_codes
+        if isinstance(e, (aiohttp.ClientError, asyncio.TimeoutError)):
+            return True
+        return is_retryable_http_exception(
+            e,
+            retryable_rpc_error_codes=self.retryable_rpc_error_codes,
+            retryable_status_codes=self.retryable_status_codes,
+            retryable_exceptions=(ProbablyNodeHasNoBlock,),
+            method=method,
+            params=params,
+        )
+
+    async def _post(self, provider_idx: int, method: str, params: Any) -> dict:
+        if self.session is None:
+            await self.open()
+
+        self.request_id += 1
+        payload = ujson.dumps({"jsonrpc": "2.0", "id": self.request_id, "method": method, "params": params})
+
+        async with self.semaphores[provider_idx]:
+            async with self.session.post(self.urls[provider_idx], data=payload) as response:
+                response.raise_for_status()
+                body = await response.read()
+
+        return ujson.loads(body)
+
+    async def request(self, method: str, params: Any, non_retryable: Callable[[Exception], bool] | None = None) -> Any:
+        """Perform a JSON-RPC request.
+
+        :param non_retryable:
+            Raise errors matching this check immediately, without retries.
+
+            E.g. EVM reverts that fail the same way on every retry.
+
+        :return:
+            The raw ``result`` field of the response
+
+        :raise ValueError:
+            JSON-RPC error that cannot be retried
+        """
+        current_sleep = self.sleep
+        for i in range(self.retries + 1):
+            provider_idx = self.currently_active_provider
+            try:
+                response = await self._post(provider_idx, method, params)
+
+                error_json_payload = response.get("error")
+                if error_json_payload:
+                    raise ExtraValueError(
+                        error_json_payload,
+                        extra_help=f"Error in JSON-RPC response:\n{error_json_payload}\nMethod: {method}\nParams: {params}\nProvider: {get_url_domain(self.urls[provider_idx])}",
+                    )
+
+                result = response["result"]
+                _check_faulty_result(method, params, result)
+
+                self.api_call_counts[provider_idx][method] += 1
+                return result
+
+            except Exception as e:
+                if not self.is_retryable(e, method, params) or i >= self.retries:
+                    raise
+
+                if non_retryable is not None and non_retryable(e):
+                    raise
+
+                # Other in-flight requests may have already switched away
+                if self.has_multiple_providers() and provider_idx == self.currently_active_provider:
+                    self.switch_provider()
+
+                logger.info("Encountered JSON-RPC retryable error %s when calling %s, retrying in %f seconds, retry #%d / %d", e, method, current_sleep, i + 1, self.retries)
+                self.retry_count += 1
+                await asyncio.sleep(current_sleep)
+                current_sleep *= self.backoff
+
+        raise AssertionError("Should never be reached")
+
+    async def get_block_timestamp(self, block_number: int) -> tuple[str, int]:
+        """Read a block header.
+
+        :return:
+            Block hash, UNIX timestamp
+        """
+        raw_result = await self.request("eth_getBlockByNumber", [hex(block_number), False])
+        return raw_result["hash"], convert_jsonrpc_value_to_int(raw_result["timestamp"])
+
+
+def _check_faulty_result(method: str, params: Any, result: Any):
+    """Detect nodes that do not yet have the block we asked for.
+
+    See :py:func:`eth_defi.provider.fallback._check_faulty_rpc_response`.
+    """
+    if method == "eth_call":
+        block_identifier = params[1]
+        if block_identifier != "latest" and result in ("0x", ""):
+            raise ProbablyNodeHasNoBlock(f"Empty 0x response for eth_call at block {block_identifier}")
+
+    if method in ("eth_getBlockByNumber", "eth_getBlockByHash"):
+        if result in ("0x", None):
+            raise ProbablyNodeHasNoBlock(f"Node did not have data for block {params[0]}")
+
+
+async def _ordered_in_flight(aws: Iterable[Awaitable[T]], max_in_flight: int) -> AsyncIterator[T]:
+    """Run awaitables concurrently, but give out the results in the input order.
+
+    At most ``max_in_flight`` awaitables are scheduled at once.
+    """
+    pending = deque()
+    try:
+        for aw in aws:
+            pending.append(asyncio.ensure_future(aw))
+            if len(pending) >= max_in_flight:
+                yield await pending.popleft()
+
+        while pending:
+            yield await pending.popleft()
+    finally:
+        for task in pending:
+            task.cancel()
+        # Let the cancelled tasks finish, so their connections are released
+        # and exceptions do not end up as "never retrieved" warnings
+        await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def read_events_async(
+    client: AsyncJSONRPCClient,
+    start_block: int,
+    end_block: int,
+    events: list[ContractEvent] | None = None,
+    notify: ProgressUpdate | None = None,
+    chunk_size: int = 100,
+    context: LogContext | None = None,
+    extract_timestamps: bool = True,
+    filter: Filter | None = None,
+    max_in_flight: int = 16,
+) -> AsyncIterator[LogResult]:
+    """Read events with many concurrent ``eth_getLogs`` calls.
+
+    - Asyncio counterpart of :py:func:`~eth_defi.event_reader.reader.read_events_concurrent`
+
+    - Logs are given out in the block order
+
+    - Block timestamps are fetched only for blocks having matching logs
+
+    :param client:
+        Connection pool
+
+    :param start_block:
+        First block to process (inclusive)
+
+    :param end_block:
+        Last block to process (inclusive)
+
+    :param events:
+        List of Web3.py contract event classes to scan for
+
+    :param notify:
+        Optional callback called after each chunk with events
+
+    :param chunk_size:
+        How many blocks to scan in one eth_getLogs call
+
+    :param context:
+        Passed to the all generated logs
+
+    :param extract_timestamps:
+        Set ``timestamp`` of the logs from block headers.
+
+        Otherwise ``timestamp`` is ``None``.
+
+    :param filter:
+        Pass a custom event filter for the readers
+
+    :param max_in_flight:
+        How many chunks are read concurrently
+    """
+
+    if filter is None:
+        assert events is not None, "Cannot pass both filter and events"
+        filter = prepare_filter(events)
+
+    async def _read_chunk(chunk_start: int, chunk_end: int) -> tuple[int, list[LogResult]]:
+        logs = await client.request("eth_getLogs", [create_filter_params(filter, chunk_start, chunk_end)])
+
+        timestamps = {}
+        if extract_timestamps and logs:
+            block_numbers = sorted({convert_jsonrpc_value_to_int(log["blockNumber"]) for log in logs})
+            headers = await asyncio.gather(*[client.get_block_timestamp(b) for b in block_numbers])
+            timestamps = dict(headers)
+
+        for log in logs:
+            block_hash = log["blockHash"]
+            log["context"] = context
+            log["event"] = filter.topics[log["topics"][0]]
+            log["blockNumber"] = convert_jsonrpc_value_to_int(log["blockNumber"])
+            log["chunk_id"] = chunk_start
+
+            if extract_timestamps:
+                try:
+                    log["timestamp"] = timestamps[block_hash]
+                except KeyError as e:
+                    raise TimestampNotFound(f"Async event reader cannot match timestamp.\nTimestamp missing for block number {log['blockNumber']:,}, hash {block_hash}.\nChain tip reorganisation?") from e
+            else:
+                log["timestamp"] = None
+
+        return chunk_start, logs
+
+    chunks = ((chunk_start, min(chunk_start + chunk_size - 1, end_block)) for chunk_start in range(start_block, end_block + 1, chunk_size))
+
+    total_events = 0
+    async for chunk_start, logs in _ordered_in_flight((_read_chunk(s, e) for s, e in chunks), max_in_flight):
+        for log in logs:
+            total_events += 1
+            yield log
+
+        # Ping our master, only when we have an event hit
+        if notify is not None and logs:
+            notify(chunk_start, start_block, end_block, chunk_size, total_events, logs[-1]["timestamp"], context)
+
+
+def _encode_try_block_and_aggregate(calls: list[tuple[str, bytes]]) -> str:
+    return "0x" + (TRY_BLOCK_AND_AGGREGATE_SELECTOR + encode(["bool", "(address,bytes)[]"], [False, calls])).hex()
+
+
+def _is_broken_call_error(e: Exception) -> bool:
+    """A call in the multicall batch failed at the EVM level, see :py:data:`~eth_defi.event_reader.multicall_batcher.BISECT_FAILURES`."""
+    return isinstance(e, ValueError) and classify_multicall_failure(e) in BISECT_FAILURES
+
+
+async def _multicall_batch(
+    client: AsyncJSONRPCClient,
+    chain_id: int,
+    block_number: int,
+    calls: list[EncodedCall],
+    bisect_failures: bool,
+) -> list[tuple[bool, bytes, bool]]:
+    """Perform one Multicall3 batch.
+
+    - With ``bisect_failures``, EVM-level failures split the batch right away,
+      while transport and node errors are retried by the client and never split
+
+    :return:
+        List of (success, result, quarantined) tuples
+    """
+    multicall_address = MULTICALL_CHAIN_ADDRESSES.get(chain_id, MULTICALL_DEPLOY_ADDRESS)
+    tx = {
+        "to": multicall_address,
+        "data": _encode_try_block_and_aggregate([(c.address, c.data) for c in calls]),
+    }
+    gas = get_multicall_gas_hint(chain_id)
+    if gas:
+        tx["gas"] = hex(gas)
+
+    params = [tx, hex(block_number)]
+    try:
+        raw_result = await client.request("eth_call", params, non_retryable=_is_broken_call_error if bisect_failures else None)
+    except ValueError as e:
+        if not bisect_failures:
+            # Retryable errors have been already retried by the client
+            raise MulticallNonRetryable(f"Multicall failed for chain {chain_id}, block {block_number:,}, batch size: {len(calls)}: {e}") from e
+
+        if client.is_retryable(e, "eth_call", params) and not _is_broken_call_error(e):
+            # Out of retries for a node error, splitting the batch does not help
+            raise MulticallRetryable(f"Multicall failed for chain {chain_id}, block {block_number:,}, batch size: {len(calls)}: {e}") from e
+
+        if len(calls) == 1:
+            logger.warning("Multicall call %s failed at block %d: %s", calls[0], block_number, e)
+            return [(False, b"", True)]
+
+        # Split the batch to isolate the broken calls
+        middle = len(calls) // 2
+        left, right = await asyncio.gather(
+            _multicall_batch(client, chain_id, block_number, calls[:middle], bisect_failures),
+            _multicall_batch(client, chain_id, block_number, calls[middle:], bisect_failures),
+        )
+        return left + right
+
+    _, _, results = decode(["uint256", "bytes32", "(bool,bytes)[]"], bytes.fromhex(raw_result[2:]))
+    return [(success, output, False) for success, output in results]
+
+
+async def read_multicall_historical_async(
+    client: AsyncJSONRPCClient,
+    chain_id: int,
+    calls: Iterable[EncodedCall],
+    start_block: int,
+    end_block: int,
+    step: int,
+    batch_size: int = 40,
+    max_in_flight: int = 16,
+    bisect_failures: bool = False,
+) -> AsyncIterator[CombinedEncodedCallResult]:
+    """Read historical data with many concurrent multicalls.
+
+    - Asyncio counterpart of :py:func:`~eth_defi.event_reader.multicall_batcher.read_multicall_historical`
+
+    - All multicall batches of a block are sent concurrently
+
+    - Results are given out in the block order
+
+    :param chain_id:
+        Which chain we are targeting with calls.
+
+    :param start_block:
+        Block range to scoop
+
+    :param end_block:
+        Block range to scoop, exclusive like in the multiprocess reader
+
+    :param step:
+        How many blocks we iterate at once
+
+    :param batch_size:
+        How many calls we pack into one Multicall3 call
+
+    :param max_in_flight:
+        How many blocks are read concurrently
+
+    :param bisect_failures:
+        Split failing multicall batches to isolate broken calls, instead of failing the whole read.
+
+        The broken calls are returned with :py:attr:`~eth_defi.event_reader.multicall_batcher.EncodedCallResult.quarantined` set.
+    """
+
+    calls = list(calls)
+    multicall_block_number = get_multicall_block_number(chain_id)
+
+    async def _read_block(block_number: int) -> CombinedEncodedCallResult:
+        timestamp_task = asyncio.ensure_future(client.get_block_timestamp(block_number))
+
+        valid_calls = [c for c in calls if c.is_valid_for_block(block_number)]
+        if multicall_block_number is not None and block_number < multicall_block_number:
+            # Multicall not yet deployed
+            valid_calls = []
+
+        batches = [valid_calls[i : i + batch_size] for i in range(0, len(valid_calls), batch_size)]
+        batch_results = await asyncio.gather(*[_multicall_batch(client, chain_id, block_number, batch, bisect_failures) for batch in batches])
+
+        _, unix_timestamp = await timestamp_task
+        timestamp = native_datetime_utc_fromtimestamp(unix_timestamp)
+
+        results = []
+        for batch, outputs in zip(batches, batch_results):
+            for call, (success, output, quarantined) in zip(batch, outputs):
+                results.append(
+                    EncodedCallResult(
+                        call=call,
+                        success=success,
+                        result=output,
+                        block_identifier=block_number,
+                        timestamp=timestamp,
+                        quarantined=quarantined,
+                    )
+                )
+
+        return CombinedEncodedCallResult(
+            block_number=block_number,
+            timestamp=timestamp,
+            results=results,
+        )
+
+    async for result in _ordered_in_flight((_read_block(b) for b in range(start_block, end_block, step)), max_in_flight):
+        yield result
+
+
+def run_async_iterator(factory: Callable[[], AsyncIterator[T]]) -> Iterable[T]:
+    """Consume an async iterator from sync code.
+
+    - Runs a private event loop, so the async iterator is created within it
+    - In-flight requests progress only while the consumer waits for the next item
+
+    :param factory:
+        Creates the async iterator to consume
+    """
+    loop = asyncio.new_event_loop()
+    async_iter = None
+    try:
+        async_iter = factory()
+        while True:
+            try:
+                yield loop.run_until_complete(async_iter.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        if async_iter is not None:
+            loop.run_until_complete(async_iter.aclose())
+        loop.close()
+
+
+def read_events_asyncio(
+    json_rpc_url: str,
+    start_block: int,
+    end_block: int,
+    events: list[ContractEvent] | None = None,
+    notify: ProgressUpdate | None = None,
+    chunk_size: int = 100,
+    context: LogContext | None = None,
+    extract_timestamps: bool = True,
+    filter: Filter | None = None,
+    max_concurrency: int = 16,
+) -> Iterable[LogResult]:
+    """Read events using asyncio from sync code.
+
+    - Drop-in for :py:func:`~eth_defi.event_reader.reader.read_events_concurrent`
+      without a thread pool, see :py:func:`read_events_async` for parameters
+
+    :param json_rpc_url:
+        RPC configuration line, can contain multiple fallback providers
+    """
+
+    async def _gen():
+        async with AsyncJSONRPCClient(json_rpc_url, max_concurrency=max_concurrency) as client:
+            async for log in read_events_async(
+                client,
+                start_block,
+                end_block,
+                events=events,
+                notify=notify,
+                chunk_size=chunk_size,
+                context=context,
+                extract_timestamps=extract_timestamps,
+                filter=filter,
+                max_in_flight=max_concurrency,
+            ):
+                yield log
+
+    yield from run_async_iterator(_gen)
+
+
+def read_multicall_historical_asyncio(
+    chain_id: int,
+    json_rpc_url: str,
+    calls: Iterable[EncodedCall],
+    start_block: int,
+    end_block: int,
+    step: int,
+    max_concurrency: int = 16,
+    batch_size: int = 40,
+    display_progress: bool | str = True,
+    bisect_failures: bool = False,
+) -> Iterable[CombinedEncodedCallResult]:
+    """Read historical multicall data using asyncio from sync code.
+
+    - Drop-in for :py:func:`~eth_defi.event_reader.multicall_batcher.read_multicall_historical`
+      without worker processes, see :py:func:`read_multicall_historical_async` for parameters
+
+    :param json_rpc_url:
+        RPC configuration line, can contain multiple fallback providers
+
+    :param max_concurrency:
+        Max in-flight requests per provider
+    """
+
+    total = len(range(start_block, end_block, step))
+
+    if display_progress:
+        desc = display_progress if type(display_progress) == str else f"Reading chain data w/asyncio multicall, {total} tasks, {max_concurrency} in-flight requests"
+        progress_bar = tqdm(total=total, desc=desc)
+    else:
+        progress_bar = None
+
+    async def _gen():
+        async with AsyncJSONRPCClient(json_rpc_url, max_concurrency=max_concurrency) as client:
+            async for result in read_multicall_historical_async(
+                client,
+                chain_id,
+                calls,
+                start_block,
+                end_block,
+                step,
+                batch_size=batch_size,
+                max_in_flight=max_concurrency,
+                bisect_failures=bisect_failures,
+            ):
+                yield result
+
+    for result in run_async_iterator(_gen):
+        if progress_bar:
+            progress_bar.update(1)
+        yield result
+
+    if progress_bar:
+        progress_bar.close()
@@ -0,0 +1,301 @@
+"""Bounded, array-backed block header storage for reorganisation monitors.
+
+- :py:class:`~eth_defi.event_reader.reorganisation_monitor.ReorganisationMonitor` only needs the last
+  ``check_depth`` blocks to detect chain reorganisations, but a dict of :py:class:`~eth_defi.event_reader.block_header.BlockHeader`
+  objects grows for the whole lifetime of a live process
+
+- :py:class:`BlockHeaderWindow` keeps the latest headers in a fixed-size ring of
+  (block number, 32 bytes hash, timestamp) arrays
+
+- Older headers are spilled to a :py:class:`~eth_defi.event_reader.parquet_block_data_store.ParquetDatasetBlockDataStore`
+  one complete partition at a time, or dropped if no store is given
+
+Example:
+
+.. code-block:: python
+
+    store = ParquetDatasetBlockDataStore(Path("/tmp/polygon-headers"), partition_size=100_000)
+    reorg_mon = JSONRPCReorganisationMonitor(
+        web3,
+        check_depth=250,
+        block_map=BlockHeaderWindow(capacity=1_000, store=store),
+    )
+"""
+
+import logging
+from collections.abc import MutableMapping
+from typing import TYPE_CHECKING, Iterator
+
+import numpy as np
+
+from eth_defi.event_reader.block_header import BlockHeader, Timestamp
+
+if TYPE_CHECKING:
+    from eth_defi.event_reader.parquet_block_data_store import ParquetDatasetBlockDataStore
+
+logger = logging.getLogger(__name__)
+
+
+def encode_block_hash(block_hash: str) -> bytes:
+    """Convert 0x prefixed block hash to 32 bytes.
+
+    - Shorter hashes, like the ones used in tests, are zero padded
+    """
+    return bytes.fromhex(block_hash[2:].rjust(64, "0"))
+
+
+def is_same_block_hash(a: str, b: str) -> bool:
+    """Compare block hashes regardless of the case and zero padding."""
+    return a == b or encode_block_hash(a) == encode_block_hash(b)
+
+
+class BlockHeaderWindow(MutableMapping):
+    """Fixed-size ring buffer of block headers.
+
+    - Behaves like the ``block number -> BlockHeader`` dict of
+      :py:attr:`~eth_defi.event_reader.reorganisation_monitor.ReorganisationMonitor.block_map`
+
+    - Headers must be added in order, without gaps, like the reorganisation monitor does
+
+    - O(1) lookups, inserts and truncation, no per-block Python objects
+
+    - Iteration and ``len()`` cover the in-memory window only
+
+    - Lookups of older blocks are served from the spill store, one cached partition at a time
+    """
+
+    def __init__(
+        self,
+        capacity: int = 1024,
+        store: "ParquetDatasetBlockDataStore | None" = None,
+        cached_partitions: int = 2,
+    ):
+        """
+        :param capacity:
+            How many latest headers we keep in memory.
+
+            Must be larger than the ``check_depth`` of the reorganisation monitor.
+
+        :param store:
+            Write headers falling out of the window here, one complete partition at a time.
+
+            The partition the window starts in is not written, as it is not complete.
+
+        :param cached_partitions:
+            How many partitions loaded back from the store we keep in memory for lookups
+        """
+        assert capacity > 0
+        self.capacity = capacity
+        self.store = store
+        self.cached_partitions = cached_partitions
+
+        self.numbers = np.full(capacity, -1, dtype=np.int64)
+        self.hashes = np.zeros((capacity, 32), dtype=np.uint8)
+        self.timestamps = np.zeros(capacity, dtype=np.int64)
+
+        #: First and last block in the window, inclusive, or ``None`` if empty
+        self.first_block: int | None = None
+        self.last_block: int | None = None
+
+        # Headers evicted from the window since the current partition start,
+        # waiting for the partition to complete
+        if store is not None:
+            self.spill_numbers = np.full(store.partition_size, -1, dtype=np.int64)
+            self.spill_hashes = np.zeros((store.partition_size, 32), dtype=np.uint8)
+            self.spill_timestamps = np.zeros(store.partition_size, dtype=np.int64)
+        self.spill_start: int | None = None
+
+        #: partition start -> (hashes, timestamps) loaded back from the store
+        self.partition_cache: dict[int, tuple[np.ndarray, np.ndarray]] = {}
+
+        #: How many complete partitions we have written to the store
+        self.spilled_partitions = 0
+
+    def __repr__(self):
+        return f"<BlockHeaderWindow {self.first_block} - {self.last_block}, capacity {self.capacity:,}>"
+
+    def __len__(self) -> int:
+        if self.first_block is None:
+            return 0
+        return self.last_block - self.first_block + 1
+
+    def __iter__(self) -> Iterator[int]:
+        if self.first_block is None:
+            return iter(())
+        return iter(range(self.first_block, self.last_block + 1))
+
+    def __contains__(self, block_number: object) -> bool:
+        return self.first_block is not None and type(block_number) == int and self.first_block <= block_number <= self.last_block
+
+    def __getitem__(self, block_number: int) -> BlockHeader:
+        found = self.get_hash_and_timestamp(block_number)
+        if found is None:
+            raise KeyError(block_number)
+        block_hash, timestamp = found
+        return BlockHeader(block_number=block_number, block_hash="0x" + block_hash.hex(), timestamp=timestamp)
+
+    def __setitem__(self, block_number: int, header: BlockHeader):
+        assert header.block_number == block_number, f"Block number mismatch: {block_number}, {header}"
+        assert self.last_block is None or block_number == self.last_block + 1, f"Blocks must be added in order without gaps, last block {self.last_block}, got {block_number}"
+        self.append(block_number, encode_block_hash(header.block_hash), header.timestamp)
+
+    def __delitem__(self, block_number: int):
+        # Only the tail can be removed, see truncate()
+        if self.last_block is None or block_number != self.last_block:
+            raise KeyError(block_number)
+        self.truncate(block_number - 1)
+
+    def get_first_block(self) -> int | None:
+        """First block in the in-memory window."""
+        return self.first_block
+
+    def get_last_block(self) -> int | None:
+        """Last block in the in-memory window."""
+        return self.last_block
+
+    def is_evicted(self, block_number: int) -> bool:
+        """Is the block older than the in-memory window."""
+        return self.first_block is not None and block_number < self.first_block
+
+    def append(self, block_number: int, block_hash: bytes, timestamp: Timestamp):
+        """Add the next block.
+
+        - The oldest block falls out of the window when it is full
+        """
+        assert len(block_hash) == 32, f"Got hash {block_hash}"
+        idx = block_number % self.capacity
+
+        if self.first_block is not None and block_number - self.first_block >= self.capacity:
+            # Evict the oldest block, it shares the ring slot with the new block
+            self._spill(self.first_block, self.hashes[idx].tobytes(), int(self.timestamps[idx]))
+            self.first_block += 1
+
+        self.numbers[idx] = block_number
+        self.hashes[idx] = np.frombuffer(block_hash, dtype=np.uint8)
+        self.timestamps[idx] = timestamp
+
+        if self.first_block is None:
+            self.first_block = block_number
+        self.last_block = block_number
+
+    def truncate(self, latest_good_block: int):
+        """Delete all blocks after this block in O(1).
+
+        :param latest_good_block:
+            Keep this block (inclusive)
+        """
+        if self.first_block is None or latest_good_block >= self.last_block:
+            return
+
+        if latest_good_block < self.first_block:
+            self.clear()
+            return
+
+        # Ring slots of the deleted blocks are overwritten by the next appends
+        self.last_block = latest_good_block
+
+    def clear(self):
+        """Drop the in-memory window."""
+        self.numbers.fill(-1)
+        self.first_block = None
+        self.last_block = None
+        self.spill_start = None
+
+    def get_hash_and_timestamp(self, block_number: int) -> tuple[bytes, Timestamp] | None:
+        """Look up a block without creating a :py:class:`BlockHeader`.
+
+        :return:
+            (32 bytes hash, timestamp) or ``None``
+        """
+        if block_number in self:
+            idx = block_number % self.capacity
+            assert self.numbers[idx] == block_number, f"Ring slot {idx} has block {self.numbers[idx]}, expected {block_number}"
+            return self.hashes[idx].tobytes(), int(self.timestamps[idx])
+
+        if self.store is None or type(block_number) != int:
+            return None
+
+        # Evicted, waiting for the partition to complete
+        if self.spill_start is not None and self.spill_start <= block_number < (self.first_block or 0):
+            spill_idx = block_number - self.spill_start
+            if self.spill_numbers[spill_idx] == block_number:
+                return self.spill_hashes[spill_idx].tobytes(), int(self.spill_timestamps[spill_idx])
+
+        return self._get_from_store(block_number)
+
+    def get_timestamp(self, block_number: int) -> Timestamp | None:
+        """Look up a block timestamp."""
+        found = self.get_hash_and_timestamp(block_number)
+        return found[1] if found else None
+
+    def _spill(self, block_number: int, block_hash: bytes, timestamp: Timestamp):
+        """Move an evicted header to the spill buffer, write complete partitions to the store."""
+        if self.store is None:
+            return
+
+        partition_start = self.store.floor_block_number_to_partition_start(block_number)
+        base = block_number - block_number % self.store.partition_size
+        if self.spill_start != base:
+            self.spill_start = base
+            self.spill_numbers.fill(-1)
+
+        spill_idx = block_number - base
+        self.spill_numbers[spill_idx] = block_number
+        self.spill_hashes[spill_idx] = np.frombuffer(block_hash, dtype=np.uint8)
+        self.spill_timestamps[spill_idx] = timestamp
+
+        if spill_idx == self.store.partition_size - 1:
+            self._write_partition(partition_start, base)
+
+    def _write_partition(self, partition_start: int, base: int):
+        # The first partition starts at block 1, see floor_block_number_to_partition_start()
+        first_idx = partition_start - base
+        if (self.spill_numbers[first_idx:] == -1).any():
+            logger.info("Not writing incomplete block header partition starting at %d", partition_start)
+            return
+
+        has_zero = self.spill_numbers[0] == 0
+        start_idx = 0 if has_zero else first_idx
+        numbers = self.spill_numbers[start_idx:]
+        count = len(numbers)
+
+        # Optional dependency
+        import pandas as pd
+
+        df = pd.DataFrame(
+            {
+                "block_number": numbers,
+                "block_hash": ["0x" + h.tobytes().hex() for h in self.spill_hashes[start_idx:]],
+                "timestamp": self.spill_timestamps[start_idx:],
+                "partition": np.full(count, partition_start, dtype=np.uint32),
+            }
+        )
+        self.store.save(df, check_contains_all_blocks=False)
+        self.spilled_partitions += 1
+        logger.info("Spilled block headers %d - %d to %s", numbers[0], numbers[-1], self.store.path)
+
+    def _get_from_store(self, block_number: int) -> tuple[bytes, Timestamp] | None:
+        if self.store.is_virgin():
+            return None
+
+        partition_start = self.store.floor_block_number_to_partition_start(block_number)
+        base = block_number - block_number % self.store.partition_size
+        cached = self.partition_cache.get(partition_start)
+        if cached is None:
+            df = self.store.load_partition(partition_start)
+            if len(df) == 0:
+                return None
+            hashes = np.zeros((self.store.partition_size, 32), dtype=np.uint8)
+            timestamps = np.full(self.store.partition_size, -1, dtype=np.int64)
+            for number, block_hash, timestamp in zip(df["block_number"], df["block_hash"], df["timestamp"]):
+                hashes[number - base] = np.frombuffer(encode_block_hash(block_hash), dtype=np.uint8)
+                timestamps[number - base] = timestamp
+            while len(self.partition_cache) >= self.cached_partitions:
+                del self.partition_cache[next(iter(self.partition_cache))]
+            cached = self.partition_cache[partition_start] = (hashes, timestamps)
+
+        hashes, timestamps = cached
+        idx = block_number - base
+        if timestamps[idx] == -1:
+            return None
+        return hashes[idx].tobytes(), int(timestamps[idx])
@@ -0,0 +1,242 @@
+"""Persistent ``eth_call`` result cache for historical blocks.
+
+- The state of a finalised block never changes, so an ``eth_call`` with the same
+  sender, target, calldata and block number always returns the same result
+
+- Results are keyed by a hash of (chain id, sender, address, calldata, block number).
+  The sender matters, as many contracts answer based on ``msg.sender``.
+  Calls within a multicall are keyed with the Multicall3 contract as the sender.
+
+- Used by :py:meth:`eth_defi.event_reader.multicall_batcher.EncodedCall.call`,
+  :py:func:`eth_defi.event_reader.multicall_batcher.call_multicall_encoded`
+  and the multicall subprocess workers of :py:func:`eth_defi.event_reader.multicall_batcher.read_multicall_historical`
+  and :py:func:`eth_defi.event_reader.multicall_batcher.read_multicall_chunked`
+
+See :py:class:`CallCache`.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from eth_typing import HexAddress
+from web3 import Web3
+from web3.types import BlockIdentifier
+
+from eth_defi.abi import ZERO_ADDRESS_STR
+from eth_defi.sqlite_cache import DEFAULT_CACHE_MAX_BYTES, PersistentKeyValueStore
+
+logger = logging.getLogger(__name__)
+
+
+def get_call_cache_key(
+    chain_id: int,
+    address: HexAddress | str,
+    data: bytes,
+    block_number: int,
+    from_: HexAddress | str = ZERO_ADDRESS_STR,
+) -> str:
+    """Content address of an ``eth_call``.
+
+    :param from_:
+        The caller, ``msg.sender`` of the call
+
+    :return:
+        Hex digest
+    """
+    h = hashlib.blake2b(digest_size=20)
+    h.update(f"{chain_id}:{from_.lower()}:{address.lower()}:{block_number}:".encode())
+    h.update(data)
+    return h.hexdigest()
+
+
+class CallCache(PersistentKeyValueStore):
+    """Disk cache for ``eth_call`` results at finalised historical blocks.
+
+    - Only calls with an integer block number at least ``finality_depth`` blocks behind the chain tip are cached
+
+    - Only successful, non-empty results are cached. Reverts and empty ``0x`` replies
+      may be caused by a node lacking the historical state, so they are always asked again.
+
+    - Bounded to ``max_entries``, the oldest written entries are evicted first
+
+    - Can be passed to multicall subprocess workers: the cache pickles as its settings
+      and the worker opens its own SQLite connection
+
+    Example:
+
+    .. code-block:: python
+
+        call_cache = CallCache(Path("~/.cache/eth-defi-calls.sqlite"))
+
+        result = call.call(web3, block_identifier=20_000_000, cache=call_cache)
+
+        for result in read_multicall_historical(
+            chain_id,
+            web3factory,
+            calls,
+            start_block,
+            end_block,
+            step,
+            call_cache=call_cache,
+        ):
+            ...
+    """
+
+    DEFAULT_CALL_CACHE_PATH = Path("~/.cache/eth-defi-calls.sqlite")
+
+    def __init__(
+        self,
+        filename: Path = DEFAULT_CALL_CACHE_PATH,
+        finality_depth: int = 128,
+        max_entries: int = 5_000_000,
+        evict_interval: int = 10_000,
+        tip_refresh_interval: float = 60.0,
+        wal=True,
+        cache_max_bytes: int = DEFAULT_CACHE_MAX_BYTES,
+    ):
+        """
+        :param filename:
+            SQLite file
+
+        :param finality_depth:
+            How many blocks behind the chain tip we consider final and cacheable
+
+        :param max_entries:
+            Max number of cached results
+
+        :param evict_interval:
+            Check for eviction after this many writes
+
+        :param tip_refresh_interval:
+            How often we check the chain tip, seconds
+
+        :param wal:
+            Use SQLite write-ahead log, see :py:class:`~eth_defi.sqlite_cache.PersistentKeyValueStore`
+
+        :param cache_max_bytes:
+            In-process LRU cache size
+        """
+        assert isinstance(filename, Path), f"We got {filename}"
+        filename = filename.expanduser()
+        os.makedirs(filename.parent, exist_ok=True)
+        super().__init__(filename, wal=wal, cache_max_bytes=cache_max_bytes)
+        self.finality_depth = finality_depth
+        self.max_entries = max_entries
+        self.evict_interval = evict_interval
+        self.tip_refresh_interval = tip_refresh_interval
+
+        #: chain id -> (safe block, fetched at)
+        self.safe_blocks: dict[int, tuple[int, float]] = {}
+        self.tip_lock = threading.Lock()
+        self.writes_since_evict = 0
+
+        #: Results served from the cache
+        self.hits = 0
+
+        #: Results we had to ask from the RPC
+        self.misses = 0
+
+    def __repr__(self):
+        return f"<CallCache {self.filename} hits:{self.hits:,} misses:{self.misses:,}>"
+
+    def __reduce__(self):
+        # Ship settings, not the SQLite connections, to subprocesses
+        return (
+            self.__class__,
+            (self.filename, self.finality_depth, self.max_entries, self.evict_interval, self.tip_refresh_interval, self.wal, self.cache_max_bytes),
+        )
+
+    def is_cacheable(self, web3: Web3, chain_id: int, block_identifier: BlockIdentifier) -> bool:
+        """Is the block old enough so that its state cannot change anymore.
+
+        - The chain tip is refreshed every ``tip_refresh_interval`` seconds
+        """
+        if type(block_identifier) != int:
+            return False
+
+        with self.tip_lock:
+            now = time.time()
+            safe_block, fetched_at = self.safe_blocks.get(chain_id, (None, 0.0))
+            if safe_block is None or (block_identifier > safe_block and now - fetched_at > self.tip_refresh_interval):
+                safe_block = web3.eth.block_number - self.finality_depth
+                self.safe_blocks[chain_id] = (safe_block, now)
+
+        return block_identifier <= safe_block
+
+    def get_results(
+        self,
+        chain_id: int,
+        block_number: int,
+        calls: list[tuple[HexAddress, bytes]],
+        record_stats=True,
+        from_: HexAddress | str = ZERO_ADDRESS_STR,
+    ) -> dict[int, bytes]:
+        """Look up results for many calls at the same block.
+
+        :param calls:
+            List of (address, calldata)
+
+        :param from_:
+            The caller of all calls, the Multicall3 contract for multicalls
+
+        :param record_stats:
+            Update :py:attr:`hits` and :py:attr:`misses`.
+
+            Disable for look-ahead lookups.
+
+        :return:
+            Index in ``calls`` -> result, for the calls found in the cache
+        """
+        keys = [get_call_cache_key(chain_id, address, data, block_number, from_) for address, data in calls]
+        found = self.get_many(keys)
+        results = {idx: bytes.fromhex(found[key]) for idx, key in enumerate(keys) if key in found}
+        if record_stats:
+            self.hits += len(results)
+            self.misses += len(calls) - len(results)
+        return results
+
+    def set_results(
+        self,
+        chain_id: int,
+        block_number: int,
+        results: list[tuple[HexAddress, bytes, bytes]],
+        from_: HexAddress | str = ZERO_ADDRESS_STR,
+    ):
+        """Store results of many calls at the same block.
+
+        :param results:
+            List of (address, calldata, result).
+
+            Empty results are skipped.
+
+        :param from_:
+            The caller of all calls, the Multicall3 contract for multicalls
+        """
+        items = {get_call_cache_key(chain_id, address, data, block_number, from_): result.hex() for address, data, result in results if result}
+        if not items:
+            return
+        self.set_many(items)
+        self.writes_since_evict += len(items)
+        if self.writes_since_evict >= self.evict_interval:
+            self.evict()
+
+    def get_result(self, chain_id: int, address: HexAddress, data: bytes, block_number: int, from_: HexAddress | str = ZERO_ADDRESS_STR) -> bytes | None:
+        return self.get_results(chain_id, block_number, [(address, data)], from_=from_).get(0)
+
+    def set_result(self, chain_id: int, address: HexAddress, data: bytes, block_number: int, result: bytes, from_: HexAddress | str = ZERO_ADDRESS_STR):
+        self.set_results(chain_id, block_number, [(address, data, result)], from_=from_)
+
+    def evict(self):
+        """Drop the oldest written entries over ``max_entries``."""
+        self.writes_since_evict = 0
+        excess = len(self) - self.max_entries
+        if excess <= 0:
+            return
+        self.conn.execute("DELETE FROM kv WHERE rowid IN (SELECT rowid FROM kv ORDER BY rowid LIMIT ?)", (excess,))
+        self.commit()
+        self.clear_lru_cache()
+        logger.info("Evicted %d entries from %s", excess, self)
@@ -0,0 +1,339 @@
+"""Columnar, vectorised decoding of raw event logs.
+
+- :py:func:`eth_defi.event_reader.reader.extract_events` yields one :py:class:`~eth_defi.event_reader.logresult.LogResult`
+  dict per log and the ``decode_*`` helpers turn each log into another dict, one
+  hex string and one integer at a time. For large backfills this per-log Python work
+  dominates the CPU time, not the JSON-RPC.
+
+- :py:func:`decode_log_columns` takes a whole chunk of raw logs and turns it into NumPy arrays
+  in a single pass: all hex strings of a column are concatenated and decoded with one ``bytes.fromhex()`` call.
+
+- Fixed-size ABI words (ints, addresses) can then be converted for the whole column at once,
+  see :py:meth:`LogColumns.get_word_int64`, :py:meth:`LogColumns.get_word_float` and :py:meth:`LogColumns.get_word_address`.
+
+- Columns can be turned to Arrow tables for Parquet, or to a pandas DataFrame,
+  without creating intermediate dicts
+
+- Needs NumPy, and PyArrow for :py:meth:`LogColumns.to_arrow`
+
+Example:
+
+.. code-block:: python
+
+    from eth_defi.event_reader.columnar import iterate_log_columns
+
+    reader = MultithreadEventReader(json_rpc_url, max_threads=16)
+
+    for columns in iterate_log_columns(reader(web3, start_block, end_block, filter=filter), chunk_size=50_000):
+        # Uniswap v3 Swap(sender, recipient, amount0, amount1, sqrtPriceX96, liquidity, tick)
+        ticks = columns.get_word_int64(4, signed=True)
+        amount0 = columns.get_word_float(0, signed=True)
+        table = columns.to_arrow()
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Iterable
+
+import numpy as np
+from hexbytes import HexBytes
+
+from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.event_reader.logresult import LogResult
+
+logger = logging.getLogger(__name__)
+
+
+#: Topics per log, the maximum allowed by the EVM
+MAX_TOPICS = 4
+
+_ZERO_WORD_HEX = "0" * 64
+
+
+def _strip_hex(value: str | bytes | HexBytes) -> str:
+    """Normalise JSON-RPC and EthereumTester values to a hex string without 0x prefix."""
+    if type(value) == str:
+        return value[2:] if value.startswith("0x") else value
+    return bytes(value).hex()
+
+
+def _fromhex(hex_str: str, dtype: str, shape: tuple) -> np.ndarray:
+    return np.frombuffer(bytes.fromhex(hex_str), dtype=dtype).reshape(shape)
+
+
+@dataclass(slots=True)
+class LogColumns:
+    """A chunk of raw logs as NumPy columns.
+
+    - One row per log, in the order they were given
+    - Byte columns are fixed-width ``numpy.bytes_`` arrays, e.g. ``S20`` for addresses
+    - ABI words of the data section are kept as raw big-endian ``uint8`` arrays
+      until converted with ``get_word_*()`` methods
+    """
+
+    #: Block numbers, ``int64``
+    block_number: np.ndarray
+
+    #: Log index within the block, ``int64``
+    log_index: np.ndarray
+
+    #: UNIX timestamps, ``int64``.
+    #:
+    #: ``None`` if the event reader did not resolve timestamps.
+    timestamp: np.ndarray | None
+
+    #: Block hashes, ``S32``
+    block_hash: np.ndarray
+
+    #: Transaction hashes, ``S32``
+    transaction_hash: np.ndarray
+
+    #: Emitting contract addresses, ``S20``
+    address: np.ndarray
+
+    #: Topics, ``S32`` array of shape ``(n, 4)``, zero padded
+    topics: np.ndarray
+
+    #: How many topics each log has, ``int8``
+    topic_count: np.ndarray
+
+    #: Data section split to 32 byte words, ``uint8`` array of shape ``(n, words, 32)``, zero padded
+    data: np.ndarray
+
+    #: Length of the data section of each log in bytes, ``int64``
+    data_length: np.ndarray
+
+    def __len__(self):
+        return len(self.block_number)
+
+    @property
+    def word_count(self) -> int:
+        """Number of ABI words in the longest data section."""
+        return self.data.shape[1]
+
+    @property
+    def event_signature(self) -> np.ndarray:
+        """Topic 0 column."""
+        return self.topics[:, 0]
+
+    def filter(self, mask: np.ndarray) -> "LogColumns":
+        """Select rows, e.g. logs of a single event signature.
+
+        .. code-block:: python
+
+            swaps = columns.filter(columns.event_signature == bytes.fromhex(swap_topic[2:]))
+        """
+        return LogColumns(
+            block_number=self.block_number[mask],
+            log_index=self.log_index[mask],
+            timestamp=self.timestamp[mask] if self.timestamp is not None else None,
+            block_hash=self.block_hash[mask],
+            transaction_hash=self.transaction_hash[mask],
+            address=self.address[mask],
+            topics=self.topics[mask],
+            topic_count=self.topic_count[mask],
+            data=self.data[mask],
+            data_length=self.data_length[mask],
+        )
+
+    def _get_word_bytes(self, index: int, topic: bool) -> np.ndarray:
+        if topic:
+            assert 0 <= index < MAX_TOPICS, f"Bad topic index {index}"
+            return np.ascontiguousarray(self.topics[:, index]).view(np.uint8).reshape(len(self), 32)
+        assert 0 <= index < self.word_count, f"Data has {self.word_count} words, asked for {index}"
+        return self.data[:, index, :]
+
+    def get_word_int64(self, index: int, signed=False, topic=False) -> np.ndarray:
+        """Convert a data word, or an indexed topic, to ``int64`` / ``uint64`` for all rows.
+
+        For ``uint24``, ``int24``, ``uint64`` and similar small types.
+
+        :param index:
+            Word index in the data section, or topic index if ``topic`` is set
+
+        :raise OverflowError:
+            If any value does not fit in 64 bits
+        """
+        words = self._get_word_bytes(index, topic)
+        high = words[:, :24]
+        low = np.ascontiguousarray(words[:, 24:])
+        if signed:
+            values = low.view(">i8").reshape(-1).astype(np.int64)
+            extension = np.where(values < 0, 0xFF, 0).astype(np.uint8)
+            fits = (high == extension[:, None]).all(axis=1)
+        else:
+            values = low.view(">u8").reshape(-1).astype(np.uint64)
+            fits = (high == 0).all(axis=1)
+
+        if not fits.all():
+            row = int(np.argmin(fits))
+            raise OverflowError(f"Word {index} does not fit in 64 bits at block {self.block_number[row]:,}, log index {self.log_index[row]}")
+
+        return values
+
+    def get_word_float(self, index: int, signed=False, topic=False) -> np.ndarray:
+        """Convert a data word, or an indexed topic, to ``float64`` for all rows.
+
+        For token amounts and prices where the float precision is enough.
+        """
+        words = self._get_word_bytes(index, topic)
+        limbs = np.ascontiguousarray(words).view(">u8").reshape(len(self), 4).astype(np.uint64)
+
+        negative = None
+        if signed:
+            negative = limbs[:, 0] >= np.uint64(1 << 63)
+            # Two's complement: -x = ~x + 1, the +1 is done in the float domain
+            limbs = np.where(negative[:, None], ~limbs, limbs)
+
+        values = np.zeros(len(self), dtype=np.float64)
+        for i in range(4):
+            values = values * 18446744073709551616.0 + limbs[:, i].astype(np.float64)
+
+        if negative is not None:
+            values = np.where(negative, -(values + 1), values)
+
+        return values
+
+    def get_word_int(self, index: int, signed=False, topic=False) -> list[int]:
+        """Convert a data word, or an indexed topic, to exact Python ints for all rows."""
+        words = self._get_word_bytes(index, topic)
+        raw = np.ascontiguousarray(words).view("S32").reshape(-1)
+        # S32 strips trailing zero bytes, pad them back
+        return [int.from_bytes(b.ljust(32, b"\0"), "big", signed=signed) for b in raw.tolist()]
+
+    def get_word_address(self, index: int, topic=False) -> np.ndarray:
+        """Convert a data word, or an indexed topic, to ``S20`` addresses for all rows."""
+        words = self._get_word_bytes(index, topic)
+        return np.ascontiguousarray(words[:, 12:]).view("S20").reshape(-1)
+
+    def to_arrow(self) -> "pyarrow.Table":
+        """Convert to an Arrow table.
+
+        - Hashes, addresses, topics and data words are ``fixed_size_binary`` columns
+        - Topics missing from a log are nulls
+        """
+        import pyarrow as pa
+
+        def _fixed(arr: np.ndarray, width: int, valid: np.ndarray | None = None) -> pa.Array:
+            buffer = pa.py_buffer(np.ascontiguousarray(arr).tobytes())
+            mask = None
+            if valid is not None and not valid.all():
+                # Arrow validity bitmaps are little-endian bit order
+                mask = pa.py_buffer(np.packbits(valid, bitorder="little").tobytes())
+            return pa.FixedSizeBinaryArray.from_buffers(pa.binary(width), len(self), [mask, buffer])
+
+        columns = {
+            "block_number": pa.array(self.block_number),
+            "log_index": pa.array(self.log_index),
+            "timestamp": pa.array(self.timestamp) if self.timestamp is not None else pa.nulls(len(self), pa.int64()),
+            "block_hash": _fixed(self.block_hash, 32),
+            "transaction_hash": _fixed(self.transaction_hash, 32),
+            "address": _fixed(self.address, 20),
+        }
+
+        for i in range(MAX_TOPICS):
+            columns[f"topic_{i}"] = _fixed(self.topics[:, i], 32, valid=self.topic_count > i)
+
+        for i in range(self.word_count):
+            columns[f"word_{i}"] = _fixed(self.data[:, i, :], 32, valid=self.data_length >= (i + 1) * 32)
+
+        return pa.table(columns)
+
+    def to_pandas(self) -> "pandas.DataFrame":
+        """Convert the log metadata columns to a DataFrame.
+
+        - Addresses and hashes as ``0x`` prefixed lowercase hex strings
+        - Add decoded data words as new columns with ``get_word_*()`` methods
+        """
+        import pandas as pd
+
+        def _hex(arr: np.ndarray, width: int) -> list[str]:
+            # S columns strip trailing zero bytes
+            return ["0x" + b.ljust(width, b"\0").hex() for b in arr.tolist()]
+
+        return pd.DataFrame(
+            {
+                "block_number": self.block_number,
+                "log_index": self.log_index,
+                "timestamp": pd.to_datetime(self.timestamp, unit="s") if self.timestamp is not None else None,
+                "transaction_hash": _hex(self.transaction_hash, 32),
+                "address": _hex(self.address, 20),
+            }
+        )
+
+
+def decode_log_columns(logs: list[LogResult]) -> LogColumns:
+    """Decode a chunk of raw logs to columns in one pass.
+
+    :param logs:
+        Raw logs as returned by :py:func:`eth_defi.event_reader.reader.extract_events`.
+
+        Hex strings from JSON-RPC or bytes from EthereumTester are both accepted.
+
+    :return:
+        Columns, rows in the same order as the logs
+    """
+    n = len(logs)
+
+    block_number = np.fromiter((convert_jsonrpc_value_to_int(log["blockNumber"]) for log in logs), dtype=np.int64, count=n)
+    log_index = np.fromiter((convert_jsonrpc_value_to_int(log["logIndex"]) for log in logs), dtype=np.int64, count=n)
+
+    if n and all(log.get("timestamp") is not None for log in logs):
+        timestamp = np.fromiter((log["timestamp"] for log in logs), dtype=np.int64, count=n)
+    else:
+        timestamp = None
+
+    block_hash = _fromhex("".join(_strip_hex(log["blockHash"]) for log in logs), "S32", (n,))
+    transaction_hash = _fromhex("".join(_strip_hex(log["transactionHash"]) for log in logs), "S32", (n,))
+    address = _fromhex("".join(_strip_hex(log["address"]) for log in logs), "S20", (n,))
+
+    topic_count = np.fromiter((len(log["topics"]) for log in logs), dtype=np.int8, count=n)
+    topics_hex = "".join("".join(_strip_hex(t) for t in log["topics"]) + _ZERO_WORD_HEX * (MAX_TOPICS - len(log["topics"])) for log in logs)
+    topics = _fromhex(topics_hex, "S32", (n, MAX_TOPICS))
+
+    data_hex = [_strip_hex(log["data"]) for log in logs]
+    data_length = np.fromiter((len(d) // 2 for d in data_hex), dtype=np.int64, count=n)
+    max_length = int(data_length.max()) if n else 0
+    word_count = (max_length + 31) // 32
+    padded_width = word_count * 64
+    data = _fromhex("".join(d.ljust(padded_width, "0") for d in data_hex), np.uint8, (n, word_count, 32))
+
+    return LogColumns(
+        block_number=block_number,
+        log_index=log_index,
+        timestamp=timestamp,
+        block_hash=block_hash,
+        transaction_hash=transaction_hash,
+        address=address,
+        topics=topics,
+        topic_count=topic_count,
+        data=data,
+        data_length=data_length,
+    )
+
+
+def iterate_log_columns(logs: Iterable[LogResult], chunk_size: int = 10_000) -> Iterable[LogColumns]:
+    """Buffer logs from any event reader and decode them in columnar chunks.
+
+    Works with :py:func:`eth_defi.event_reader.reader.read_events`,
+    :py:class:`eth_defi.event_reader.multithread.MultithreadEventReader` and other
+    :py:class:`~eth_defi.event_reader.reader.Web3EventReader` implementations.
+
+    :param logs:
+        Raw log iterator
+
+    :param chunk_size:
+        Max rows per yielded chunk
+
+    :return:
+        Iterator of columnar chunks, in the order of the logs
+    """
+    buffer = []
+    for log in logs:
+        buffer.append(log)
+        if len(buffer) >= chunk_size:
+            yield decode_log_columns(buffer)
+            buffer = []
+
+    if buffer:
+        yield decode_log_columns(buffer)
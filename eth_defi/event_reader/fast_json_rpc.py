@@ -1,14 +1,18 @@
 """JSON-RPC decoding optimised for web3.py.
 
-Monkey-patches JSON decoder to use ujson.
+- Monkey-patches JSON decoder to use ujson.
+
+- JSON-RPC batch requests: many calls in a single HTTP POST,
+  see :py:func:`make_batch_request`.
 """
 
 import logging
 import threading
 from json import JSONDecodeError
-from typing import Any, cast
+from typing import Any, TypeAlias, cast
 
 import ujson
+from requests.exceptions import HTTPError
 from web3 import Web3
 from web3.providers import JSONBaseProvider
 from web3.providers.rpc import HTTPProvider
@@ -22,6 +26,44 @@ logger = logging.getLogger(__name__)
 last_headers_storage = threading.local()
 
 
+#: A list of (method, params) tuples sent in a single JSON-RPC batch
+BatchRequests: TypeAlias = list[tuple[RPCEndpoint, Any]]
+
+
+#: Error message fragments nodes use when a JSON-RPC batch has too many calls.
+#:
+#: Matched lowercase. Other whole-batch errors, like rate limits, do not lower the batch size.
+#:
+BATCH_SIZE_ERROR_MESSAGES = (
+    # Geth
+    # {'code': -32600, 'message': 'batch too large'}
+    "batch too large",
+    "batch response too large",
+    # Erigon
+    # 'batch limit 100 exceeded'
+    "batch limit",
+    # Alchemy, QuickNode, various load balancers
+    "batch size",
+    "max batch",
+    "maximum batch",
+    "too many requests in batch",
+    "batch is too large",
+)
+
+
+def is_batch_too_large_error(exc: BaseException) -> bool:
+    """Did the node reject a JSON-RPC batch because it had too many calls.
+
+    - HTTP 413 Payload Too Large
+
+    - Error messages in :py:data:`BATCH_SIZE_ERROR_MESSAGES`
+    """
+    if isinstance(exc, HTTPError) and exc.response is not None and exc.response.status_code == 413:
+        return True
+    message = str(exc).lower()
+    return any(m in message for m in BATCH_SIZE_ERROR_MESSAGES)
+
+
 class PartialHttpResponseException(JSONDecodeError):
     """IPCProvider expects JSONDecodeErrors, not value errors."""
 
@@ -64,10 +106,126 @@ def _make_request(self, method: RPCEndpoint, params: Any) -> RPCResponse:
         raise
 
 
+def _make_batch_request(self, batch_requests: BatchRequests) -> list[RPCResponse] | RPCResponse:
+    """Send a JSON-RPC batch as one HTTP POST.
+
+    :return:
+        Responses in the request order.
+
+        If the node rejects the whole batch, a single error response.
+    """
+
+    request_data = b"[" + b",".join(self.encode_rpc_request(method, params) for method, params in batch_requests) + b"]"
+    raw_response = get_response_from_post_request(
+        self.endpoint_uri,
+        data=request_data,
+        **self.get_request_kwargs(),
+    )
+    raw_response.raise_for_status()
+
+    decoded = _fast_decode_rpc_response(raw_response.content)
+    last_headers_storage.headers = {k: v for k, v in raw_response.headers.items()}
+
+    if not isinstance(decoded, list):
+        # Batch not supported, too large, rate limited, etc.
+        return decoded
+
+    # Nodes are free to reply in any order
+    return sorted(decoded, key=lambda r: r.get("id") or 0)
+
+
+def send_batch_request(provider: JSONBaseProvider, batch_requests: BatchRequests) -> list[RPCResponse] | RPCResponse:
+    """Send a JSON-RPC batch through a provider.
+
+    - Providers without batch support, like ``EthereumTesterProvider``,
+      get the requests one by one
+
+    - No error handling or retries, see :py:meth:`eth_defi.provider.fallback.FallbackProvider.make_batch_request`
+
+    :return:
+        Responses in the request order, or a single error response if the whole batch was rejected
+    """
+    make_batch_request = getattr(provider, "make_batch_request", None)
+    if make_batch_request is not None:
+        try:
+            return make_batch_request(batch_requests)
+        except NotImplementedError:
+            pass
+    return [provider.make_request(method, params) for method, params in batch_requests]
+
+
+def make_batch_request(
+    web3: Web3,
+    batch_requests: BatchRequests,
+    raise_on_error=True,
+) -> list[RPCResponse]:
+    """Perform many JSON-RPC calls in one round trip.
+
+    - With :py:class:`~eth_defi.provider.fallback.FallbackProvider`, large batches are split
+      and failed items retried, see :py:meth:`~eth_defi.provider.fallback.FallbackProvider.make_batch_request`
+
+    - With other providers, if the batch fails as a whole, the calls are sent one by one
+      through the middlewares, so the retry and API counter middlewares apply.
+      There is no retry logic of its own here: without a retry middleware, a transport error
+      of a single call is raised and the rest of the batch is not sent.
+
+    - Middlewares are not applied to successful batches, results are raw JSON-RPC values
+
+    Example:
+
+    .. code-block:: python
+
+        responses = make_batch_request(web3, [("eth_getBlockByNumber", (hex(n), False)) for n in range(1, 101)])
+        timestamps = [int(r["result"]["timestamp"], 16) for r in responses]
+
+    :param batch_requests:
+        List of (method, params) tuples
+
+    :param raise_on_error:
+        Raise ``ValueError`` if any of the calls returned an error.
+
+        Otherwise responses with ``error`` are returned as is.
+
+    :return:
+        Raw JSON-RPC responses in the request order
+    """
+    if not batch_requests:
+        return []
+
+    provider = web3.provider
+    responses = None
+    if getattr(provider, "handles_batch_errors", False):
+        # FallbackProvider retries, splits and switches providers itself
+        responses = send_batch_request(provider, batch_requests)
+    elif getattr(provider, "make_batch_request", None) is not None:
+        try:
+            responses = send_batch_request(provider, batch_requests)
+            if not isinstance(responses, list):
+                raise ValueError(f"JSON-RPC batch of {len(batch_requests)} requests rejected: {responses.get('error', responses)}")
+            assert len(responses) == len(batch_requests), f"Sent {len(batch_requests)} requests, got {len(responses)} responses"
+        except Exception as e:
+            logger.warning("JSON-RPC batch of %d requests failed: %s, sending them one by one", len(batch_requests), e)
+            responses = None
+
+    if responses is None:
+        # EthereumTesterProvider, failed batches and such, one by one through the middlewares
+        responses = [web3.manager._make_request(method, params) for method, params in batch_requests]
+
+    assert len(responses) == len(batch_requests), f"Sent {len(batch_requests)} requests, got {len(responses)} responses"
+
+    if raise_on_error:
+        for (method, params), response in zip(batch_requests, responses):
+            if "error" in response:
+                raise ValueError(f"JSON-RPC batch call {method} {params} failed: {response['error']}")
+
+    return responses
+
+
 def patch_provider(provider: JSONBaseProvider):
     """Monkey-patch web3.py provider for faster JSON decoding and additional logging."""
     if isinstance(provider, HTTPProvider):
         provider.make_request = _make_request.__get__(provider)
+        provider.make_batch_request = _make_batch_request.__get__(provider)
     provider.decode_rpc_response = _fast_decode_rpc_response
 
 
@@ -13,6 +13,7 @@ from eth_typing import HexStr
 from web3 import Web3
 from web3.types import BlockIdentifier
 
+from eth_defi.event_reader.timestamp_store import BlockTimestampStore
 from eth_defi.provider.named import get_provider_name
 
 logger = logging.getLogger(__name__)
@@ -39,6 +40,7 @@ class LazyTimestampContainer:
         start_block: int,
         end_block: int,
         callback: Callable = None,
+        timestamp_store: BlockTimestampStore | None = None,
     ):
         """
 
@@ -50,6 +52,12 @@ class LazyTimestampContainer:
 
         :param end_block:
             End block range, inclusive
+
+        :param timestamp_store:
+            Persistent block number -> timestamp store.
+
+            Block number lookups are served from the store without JSON-RPC calls,
+            and every block we fetch is written to the store.
         """
         self.web3 = web3
         self.start_block = start_block
@@ -64,6 +72,9 @@ class LazyTimestampContainer:
 
         self.callback = callback
 
+        self.timestamp_store = timestamp_store
+        self.chain_id = web3.eth.chain_id if timestamp_store is not None else None
+
     def update_block_hash(self, block_identifier: BlockIdentifier) -> int:
         """Internal function to get block timestamp from JSON-RPC and store it in the cache."""
         # Skip web3.py stack of slow result formatters
@@ -73,6 +84,13 @@ class LazyTimestampContainer:
 
         if type(block_identifier) == int:
             assert block_identifier > 0
+
+            if self.timestamp_store is not None:
+                timestamp = self.timestamp_store.get_timestamp(self.chain_id, block_identifier)
+                if timestamp is not None:
+                    self.cache_by_block_number[block_identifier] = timestamp
+                    return timestamp
+
             result = self.web3.manager.request_blocking("eth_getBlockByNumber", (hex(block_identifier), False))
         else:
             if isinstance(block_identifier, HexBytes):
@@ -101,11 +119,19 @@ class LazyTimestampContainer:
         self.cache_by_block_hash[hash] = timestamp
         self.cache_by_block_number[block_number] = timestamp
 
+        if self.timestamp_store is not None:
+            self.timestamp_store.add(self.chain_id, block_number, timestamp)
+
         if self.callback:
             self.callback(hash, block_number, timestamp)
 
         return timestamp
 
+    def flush(self):
+        """Write fetched timestamps to the persistent store, if we have one."""
+        if self.timestamp_store is not None:
+            self.timestamp_store.flush(self.chain_id)
+
     def __getitem__(self, block_hash: HexStr | HexBytes | str):
         """Get a timestamp of a block hash - v6/v7 compatible."""
         assert not type(block_hash) == int, f"Use block hashes, block numbers not supported, passed {block_hash}"
@@ -137,6 +163,7 @@ def extract_timestamps_json_rpc_lazy(
     start_block: int,
     end_block: int,
     fetch_boundaries=True,
+    timestamp_store: BlockTimestampStore | None = None,
 ) -> LazyTimestampContainer:
     """Create a cache container that instead of reading block timestamps upfront for the given range, only calls JSON-RPC API when requested
 
@@ -167,11 +194,16 @@ def extract_timestamps_json_rpc_lazy(
 
     - :py:class:`eth_defi.reorganisation_monitor.ReorganisationMonitor`
 
+    :param timestamp_store:
+        Persistent block number -> timestamp store shared across runs.
+
+        Call :py:meth:`LazyTimestampContainer.flush` to persist the fetched timestamps.
+
     :return:
         Wrapper object for block hash based timestamp access.
 
     """
-    container = LazyTimestampContainer(web3, start_block, end_block)
+    container = LazyTimestampContainer(web3, start_block, end_block, timestamp_store=timestamp_store)
     if fetch_boundaries:
         container.update_block_hash(start_block)
         container.update_block_hash(end_block)
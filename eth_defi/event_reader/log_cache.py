@@ -0,0 +1,284 @@
+"""Persistent disk cache for ``eth_getLogs`` responses.
+
+- Historical logs below the finality depth never change, so there is no need
+  to download them again when a notebook or a scanner is rerun
+
+- Logs are stored in block-aligned chunks, compressed, in SQLite,
+  keyed by (chain, address set, topic set, chunk)
+
+- A read is served from the cached chunks, sliced to the asked range,
+  and only the missing blocks go to the JSON-RPC
+
+See :py:class:`LogCache`.
+"""
+
+import base64
+import hashlib
+import logging
+import os
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Callable
+
+import ujson
+from web3 import Web3
+
+from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.sqlite_cache import PersistentKeyValueStore
+
+logger = logging.getLogger(__name__)
+
+
+#: Fetch raw logs for an inclusive block range
+LogFetcher = Callable[[int, int], list[dict]]
+
+
+def _json_default(value: Any) -> Any:
+    # web3.py AttributeDict and HexBytes leaking in from middleware
+    if isinstance(value, bytes):
+        return "0x" + value.hex()
+    return dict(value)
+
+
+def get_log_filter_key(address: str | list[str] | None, topics: list) -> str:
+    """Create a cache key for ``eth_getLogs`` address and topic filter.
+
+    - Address and topic OR-lists are order independent
+
+    :param address:
+        ``address`` parameter of ``eth_getLogs``
+
+    :param topics:
+        ``topics`` parameter of ``eth_getLogs``
+
+    :return:
+        Hex digest
+    """
+    if address is None:
+        addresses = []
+    elif isinstance(address, str):
+        addresses = [address.lower()]
+    else:
+        addresses = sorted(a.lower() for a in address)
+
+    normalised_topics = []
+    for topic in topics or []:
+        if isinstance(topic, (list, tuple)):
+            normalised_topics.append(sorted(str(t).lower() for t in topic))
+        else:
+            normalised_topics.append(str(topic).lower() if topic is not None else None)
+
+    payload = ujson.dumps([addresses, normalised_topics])
+    return hashlib.sha256(payload.encode()).hexdigest()[0:32]
+
+
+class LogCache(PersistentKeyValueStore):
+    """Disk cache for finalised ``eth_getLogs`` responses.
+
+    - Opt-in, pass to :py:func:`eth_defi.event_reader.reader.read_events`,
+      :py:func:`eth_defi.event_reader.reader.read_events_concurrent`,
+      :py:class:`eth_defi.event_reader.multithread.MultithreadEventReader` or
+      :py:func:`eth_defi.event.fetch_all_events` as ``log_cache``
+
+    - Only chunks at least ``finality_depth`` blocks behind the chain tip are stored
+
+    - Reads are never widened, as providers with a result limit could reject the wider range.
+      A chunk is stored when a read covers it fully, so use read ranges aligned
+      to ``chunk_size`` for the best hit rate.
+
+    - Thread safe, shares the SQLite connection per thread logic of :py:class:`~eth_defi.sqlite_cache.PersistentKeyValueStore`
+
+    Example:
+
+    .. code-block:: python
+
+        log_cache = LogCache(Path("~/.cache/eth-defi-logs.sqlite"), chain_id=web3.eth.chain_id)
+
+        for log in read_events(
+            web3,
+            start_block,
+            end_block,
+            filter=filter,
+            log_cache=log_cache,
+        ):
+            ...
+
+        print(f"Served {log_cache.hit_blocks:,} blocks from the cache, fetched {log_cache.miss_blocks:,}")
+    """
+
+    DEFAULT_LOG_CACHE_PATH = Path("~/.cache/eth-defi-logs.sqlite")
+
+    def __init__(
+        self,
+        filename: Path = DEFAULT_LOG_CACHE_PATH,
+        chain_id: int | None = None,
+        chunk_size: int = 1_000,
+        finality_depth: int = 128,
+        tip_refresh_interval: float = 60.0,
+        compression_level: int = 6,
+        wal=True,
+        cache_max_bytes: int = 0,
+    ):
+        """
+        :param filename:
+            SQLite file
+
+        :param chain_id:
+            Chain id, part of the cache key.
+
+            Must be given, so that one cache file can be shared across chains.
+
+        :param chunk_size:
+            Block-aligned chunk size we store.
+
+            Changing it for an existing cache file invalidates the cached data.
+
+        :param finality_depth:
+            How many blocks behind the chain tip we consider final and cacheable
+
+        :param tip_refresh_interval:
+            How often we check the chain tip, seconds
+
+        :param compression_level:
+            zlib compression level
+
+        :param wal:
+            Use SQLite write-ahead log, see :py:class:`~eth_defi.sqlite_cache.PersistentKeyValueStore`
+
+        :param cache_max_bytes:
+            In-process LRU cache size for compressed chunks
+        """
+        assert isinstance(filename, Path), f"We got {filename}"
+        assert type(chain_id) == int, f"chain_id must be given, got {chain_id}"
+        filename = filename.expanduser()
+        os.makedirs(filename.parent, exist_ok=True)
+        super().__init__(filename, wal=wal, cache_max_bytes=cache_max_bytes)
+        self.chain_id = chain_id
+        self.chunk_size = chunk_size
+        self.finality_depth = finality_depth
+        self.tip_refresh_interval = tip_refresh_interval
+        self.compression_level = compression_level
+
+        self.safe_block: int | None = None
+        self.safe_block_fetched_at = 0.0
+        self.tip_lock = threading.Lock()
+
+        #: Blocks served from the cache
+        self.hit_blocks = 0
+
+        #: Blocks fetched from JSON-RPC
+        self.miss_blocks = 0
+
+    def __repr__(self):
+        return f"<LogCache {self.filename} chain:{self.chain_id} hits:{self.hit_blocks:,} misses:{self.miss_blocks:,} blocks>"
+
+    def encode_value(self, value: list[dict]) -> str:
+        data = ujson.dumps(value, default=_json_default).encode()
+        return base64.b64encode(zlib.compress(data, self.compression_level)).decode()
+
+    def decode_value(self, value: str) -> list[dict]:
+        return ujson.loads(zlib.decompress(base64.b64decode(value)))
+
+    def get_chunk_key(self, filter_key: str, chunk_start: int) -> str:
+        return f"{self.chain_id}:{filter_key}:{self.chunk_size}:{chunk_start}"
+
+    def get_safe_block(self, web3: Web3) -> int:
+        """Get the last block we consider final.
+
+        - Refreshed every ``tip_refresh_interval`` seconds
+        """
+        with self.tip_lock:
+            now = time.time()
+            if self.safe_block is None or now - self.safe_block_fetched_at > self.tip_refresh_interval:
+                self.safe_block = web3.eth.block_number - self.finality_depth
+                self.safe_block_fetched_at = now
+            return self.safe_block
+
+    def fetch_logs(
+        self,
+        web3: Web3,
+        address: str | list[str] | None,
+        topics: list,
+        start_block: int,
+        end_block: int,
+        fetch: LogFetcher,
+    ) -> list[dict]:
+        """Get logs for a block range, using the cache for the finalised chunks.
+
+        - Contiguous missing blocks are fetched with a single ``fetch`` call over exactly
+          the asked blocks, so the range chosen by the caller or
+          :py:class:`~eth_defi.provider.log_block_range.AdaptiveLogRangePlanner` is respected
+
+        - Only the final chunks the fetched range fully covers are stored.
+          Partially read chunks are stored when a later read covers them.
+
+        :param address:
+            ``address`` parameter of ``eth_getLogs``
+
+        :param topics:
+            ``topics`` parameter of ``eth_getLogs``
+
+        :param start_block:
+            First block (inclusive)
+
+        :param end_block:
+            Last block (inclusive)
+
+        :param fetch:
+            Perform ``eth_getLogs`` over an inclusive block range
+
+        :return:
+            Raw logs in the chain order
+        """
+        filter_key = get_log_filter_key(address, topics)
+        safe_block = self.get_safe_block(web3)
+
+        chunk_starts = range(start_block - start_block % self.chunk_size, end_block + 1, self.chunk_size)
+        cacheable = [c for c in chunk_starts if c + self.chunk_size - 1 <= safe_block]
+        cached = self.get_many(self.get_chunk_key(filter_key, c) for c in cacheable)
+
+        logs = []
+        pending_start = None
+
+        def _flush(pending_end: int):
+            # Fetch the missing blocks and store the chunks we fully cover
+            fetched = fetch(pending_start, pending_end)
+            self.miss_blocks += pending_end - pending_start + 1
+
+            by_chunk = {}
+            for log in fetched:
+                block_number = convert_jsonrpc_value_to_int(log["blockNumber"])
+                by_chunk.setdefault(block_number - block_number % self.chunk_size, []).append(log)
+                logs.append(log)
+
+            to_store = {}
+            first_aligned = pending_start + (-pending_start % self.chunk_size)
+            for chunk_start in range(first_aligned, pending_end + 1, self.chunk_size):
+                chunk_end = chunk_start + self.chunk_size - 1
+                if chunk_end <= min(pending_end, safe_block):
+                    to_store[self.get_chunk_key(filter_key, chunk_start)] = by_chunk.get(chunk_start, [])
+            if to_store:
+                self.set_many(to_store)
+
+        for chunk_start in chunk_starts:
+            range_start = max(start_block, chunk_start)
+            range_end = min(end_block, chunk_start + self.chunk_size - 1)
+            chunk_logs = cached.get(self.get_chunk_key(filter_key, chunk_start))
+            if chunk_logs is None:
+                if pending_start is None:
+                    pending_start = range_start
+                continue
+
+            if pending_start is not None:
+                _flush(range_start - 1)
+                pending_start = None
+
+            self.hit_blocks += range_end - range_start + 1
+            logs.extend(log for log in chunk_logs if range_start <= convert_jsonrpc_value_to_int(log["blockNumber"]) <= range_end)
+
+        if pending_start is not None:
+            _flush(end_block)
+
+        return logs
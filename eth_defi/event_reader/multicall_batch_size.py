@@ -0,0 +1,415 @@
+"""Adaptive, self-tuning batch size for Multicall3 reads.
+
+- RPC providers have wildly different limits how much work one ``eth_call`` can do
+  before they give up with out of gas or timeout errors
+
+- Hand-tuned per-chain constants leave throughput unused on good RPCs
+  and keep failing on bad ones
+
+- :py:class:`AdaptiveBatchSizeController` tracks latency, payload size and failures
+  per ``(chain id, provider name)`` and tunes the batch size using
+  additive increase, multiplicative decrease (AIMD) rule:
+
+  - Halve the batch on gas and timeout errors
+  - Grow the batch slowly after several fast, healthy responses
+  - Shrink the batch mildly when responses are slow
+
+- The learnt batch sizes are saved to a JSON file, so they are shared
+  between :py:class:`~eth_defi.event_reader.multicall_batcher.MultiprocessMulticallReader`
+  worker processes and persist across runs
+
+Example:
+
+.. code-block:: python
+
+    from eth_defi.event_reader.multicall_batch_size import DEFAULT_BATCH_SIZE_STATE_FILE
+
+    results = read_multicall_historical(
+        chain_id=chain_id,
+        web3factory=web3factory,
+        calls=calls,
+        start_block=start_block,
+        end_block=end_block,
+        step=step,
+        adaptive_batch_size=DEFAULT_BATCH_SIZE_STATE_FILE,
+    )
+"""
+
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Literal, TypeAlias
+
+from filelock import FileLock
+from requests import HTTPError
+from requests.exceptions import ReadTimeout, ConnectionError
+from http.client import RemoteDisconnected
+
+from eth_defi.middleware import ProbablyNodeHasNoBlock
+
+logger = logging.getLogger(__name__)
+
+
+#: Where we store the learnt batch sizes by default
+DEFAULT_BATCH_SIZE_STATE_FILE = Path.home() / ".cache" / "tradingstrategy" / "multicall-batch-sizes.json"
+
+#: Classified failure of a multicall batch.
+#:
+#: - ``gas``: out of gas or other gas limit issue, the batch was too heavy
+#: - ``timeout``: the node gave up processing or the HTTP request timed out, the batch was too heavy
+#: - ``throttle``: HTTP 429 rate limiting, not related to the batch size
+#: - ``node``: node lacks the historical state or other node problems, not related to the batch size
+#: - ``revert``: the whole multicall reverted, usually caused by a single broken call in the batch
+#: - ``other``: unclassified
+FailureKind: TypeAlias = Literal["gas", "timeout", "throttle", "node", "revert", "other"]
+
+#: Failures that mean we should reduce the batch size
+SIZE_RELATED_FAILURES: set[FailureKind] = {"gas", "timeout"}
+
+#: (chain id, provider name)
+BatchSizeKey: TypeAlias = tuple[int, str]
+
+
+def classify_multicall_failure(e: Exception) -> FailureKind:
+    """Classify a multicall exception to a failure kind.
+
+    :param e:
+        Exception raised by ``tryBlockAndAggregate`` call
+
+    :return:
+        Failure kind
+    """
+    parsed_error = str(e)
+
+    if isinstance(e, HTTPError) and e.response is not None and e.response.status_code == 429:
+        return "throttle"
+
+    # fmt: off
+    if ("out of gas" in parsed_error) or \
+       ("intrinsic gas too low" in parsed_error) or \
+       ("intrinsic gas too high" in parsed_error) or \
+       ("exceeds block gas limit" in parsed_error) or \
+       ("gas required exceeds" in parsed_error):
+        return "gas"
+
+    if ("evm timeout" in parsed_error) or \
+       ("request timeout" in parsed_error) or \
+       ("request timed out" in parsed_error) or \
+       ("execution aborted" in parsed_error) or \
+       isinstance(e, (ReadTimeout, RemoteDisconnected)):
+        return "timeout"
+
+    if ("historical state" in parsed_error) or \
+       ("state histories haven't been fully indexed yet" in parsed_error) or \
+       isinstance(e, (ProbablyNodeHasNoBlock, ConnectionError)):
+        return "node"
+
+    if ("execution reverted" in parsed_error) or \
+       ("invalid opcode" in parsed_error) or \
+       ("stack limit reached" in parsed_error):
+        return "revert"
+    # fmt: on
+
+    return "other"
+
+
+@dataclass(slots=True)
+class ProviderBatchStats:
+    """Learnt batch size and health statistics of a single (chain, provider) pair."""
+
+    #: Current batch size, float so that we can grow in fractional steps
+    batch_size: float
+
+    #: Exponentially weighted moving average of a batch call latency, seconds
+    latency_ewma: float | None = None
+
+    #: Exponentially weighted moving average of input payload bytes per call
+    payload_bytes_per_call_ewma: float | None = None
+
+    #: Healthy responses in a row since the last resize
+    success_streak: int = 0
+
+    #: Total healthy responses
+    success_count: int = 0
+
+    #: Failure counts by :py:data:`FailureKind`
+    failures: dict[str, int] = field(default_factory=dict)
+
+    #: UNIX timestamp of the last update
+    updated_at: float = 0.0
+
+
+class AdaptiveBatchSizeController:
+    """Tune multicall batch size per (chain, provider) based on observed RPC behaviour.
+
+    - One instance lives in each :py:class:`~eth_defi.event_reader.multicall_batcher.MultiprocessMulticallReader`
+      worker process
+
+    - Instances in different processes share the learnt sizes through
+      a JSON state file protected with a file lock
+
+    - Not thread safe, use one instance per thread
+    """
+
+    def __init__(
+        self,
+        state_file: Path | None = DEFAULT_BATCH_SIZE_STATE_FILE,
+        min_batch_size=1,
+        max_batch_size=500,
+        target_latency=4.0,
+        slow_latency=15.0,
+        grow_after=3,
+        grow_factor=1.25,
+        shrink_factor=0.5,
+        slow_shrink_factor=0.8,
+        save_interval=30.0,
+        ewma_alpha=0.2,
+    ):
+        """Create a controller.
+
+        :param state_file:
+            JSON file where learnt sizes are stored.
+
+            Set ``None`` to only learn in-process.
+
+        :param min_batch_size:
+            Never go below this
+
+        :param max_batch_size:
+            Never go above this
+
+        :param target_latency:
+            Grow the batch if responses are faster than this many seconds
+
+        :param slow_latency:
+            Shrink the batch if responses are slower than this many seconds,
+            before the provider starts to time out
+
+        :param grow_after:
+            How many healthy responses in a row are needed before we grow the batch
+
+        :param grow_factor:
+            Multiplier when growing the batch. Grow at least by one call.
+
+        :param shrink_factor:
+            Multiplier on gas and timeout errors
+
+        :param slow_shrink_factor:
+            Multiplier on slow responses
+
+        :param save_interval:
+            How often we sync the state file, seconds
+
+        :param ewma_alpha:
+            Smoothing factor for latency and payload moving averages
+        """
+        assert 1 <= min_batch_size <= max_batch_size
+        assert 0 < shrink_factor < 1
+        assert grow_factor > 1
+        self.state_file = state_file
+        self.min_batch_size = min_batch_size
+        self.max_batch_size = max_batch_size
+        self.target_latency = target_latency
+        self.slow_latency = slow_latency
+        self.grow_after = grow_after
+        self.grow_factor = grow_factor
+        self.shrink_factor = shrink_factor
+        self.slow_shrink_factor = slow_shrink_factor
+        self.save_interval = save_interval
+        self.ewma_alpha = ewma_alpha
+
+        self.stats: dict[BatchSizeKey, ProviderBatchStats] = {}
+
+        #: Keys this process has updated since the last save
+        self.dirty: set[BatchSizeKey] = set()
+
+        self.last_saved_at = time.time()
+
+        if self.state_file is not None:
+            self.stats.update(self._read_state_file())
+
+    def __repr__(self):
+        return f"<AdaptiveBatchSizeController pid:{os.getpid()} tracked:{len(self.stats)} state file:{self.state_file}>"
+
+    def _get_lock(self) -> FileLock:
+        return FileLock(self.state_file.parent / (self.state_file.name + ".lock"), timeout=60)
+
+    def _read_state_file(self) -> dict[BatchSizeKey, ProviderBatchStats]:
+        """Read the shared state file.
+
+        - Damaged files are ignored, we will just relearn
+        """
+        if not self.state_file.exists():
+            return {}
+
+        try:
+            data = json.loads(self.state_file.read_text())
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning("Could not read batch size state file %s: %s", self.state_file, e)
+            return {}
+
+        result = {}
+        for chain_id, providers in data.items():
+            for provider_name, stats in providers.items():
+                result[(int(chain_id), provider_name)] = ProviderBatchStats(**stats)
+        return result
+
+    def _write_state_file(self, stats: dict[BatchSizeKey, ProviderBatchStats]):
+        data = {}
+        for (chain_id, provider_name), s in stats.items():
+            data.setdefault(str(chain_id), {})[provider_name] = asdict(s)
+
+        tmp_path = self.state_file.with_suffix(self.state_file.suffix + f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(data, indent=2))
+        tmp_path.replace(self.state_file)  # Atomic move
+
+    def save(self):
+        """Merge our learnt sizes with the shared state file.
+
+        - Keys updated by this process overwrite the stored values,
+          the other keys are refreshed from the file, so that we pick up
+          what other worker processes have learnt
+        """
+        self.last_saved_at = time.time()
+
+        if self.state_file is None:
+            return
+
+        self.state_file.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._get_lock():
+            stored = self._read_state_file()
+            for key in self.dirty:
+                stored[key] = self.stats[key]
+            self._write_state_file(stored)
+
+        for key, value in stored.items():
+            if key not in self.dirty:
+                self.stats[key] = value
+
+        logger.debug("Saved %d batch size updates to %s", len(self.dirty), self.state_file)
+        self.dirty.clear()
+
+    def _maybe_save(self):
+        if time.time() - self.last_saved_at >= self.save_interval:
+            self.save()
+
+    def _get_stats(self, chain_id: int, provider_name: str, default_batch_size: int) -> ProviderBatchStats:
+        key = (chain_id, provider_name)
+        stats = self.stats.get(key)
+        if stats is None:
+            stats = self.stats[key] = ProviderBatchStats(batch_size=float(self._clamp(default_batch_size)))
+        return stats
+
+    def _clamp(self, batch_size: float) -> float:
+        return max(self.min_batch_size, min(self.max_batch_size, batch_size))
+
+    def _update_ewma(self, old: float | None, new: float) -> float:
+        if old is None:
+            return new
+        return self.ewma_alpha * new + (1 - self.ewma_alpha) * old
+
+    def get_batch_size(self, chain_id: int, provider_name: str, default_batch_size: int) -> int:
+        """Get the current batch size for a provider.
+
+        :param default_batch_size:
+            Starting point if we have not learnt anything about this provider yet
+        """
+        stats = self._get_stats(chain_id, provider_name, default_batch_size)
+        return int(stats.batch_size)
+
+    def report_success(
+        self,
+        chain_id: int,
+        provider_name: str,
+        batch_size: int,
+        duration: float,
+        payload_bytes: int,
+    ):
+        """Record a healthy multicall response.
+
+        :param batch_size:
+            How many calls the batch had.
+
+            The last batch of a block is often partial, and we do not grow based on these.
+
+        :param duration:
+            How long the RPC call took, seconds
+
+        :param payload_bytes:
+            Input payload size
+        """
+        stats = self._get_stats(chain_id, provider_name, batch_size)
+        stats.latency_ewma = self._update_ewma(stats.latency_ewma, duration)
+        stats.payload_bytes_per_call_ewma = self._update_ewma(stats.payload_bytes_per_call_ewma, payload_bytes / max(batch_size, 1))
+        stats.success_count += 1
+        stats.updated_at = time.time()
+
+        current = int(stats.batch_size)
+
+        if duration >= self.slow_latency:
+            # Back off before we start to hit timeouts
+            stats.batch_size = self._clamp(stats.batch_size * self.slow_shrink_factor)
+            stats.success_streak = 0
+        elif batch_size >= current and duration < self.target_latency:
+            stats.success_streak += 1
+            if stats.success_streak >= self.grow_after:
+                stats.batch_size = self._clamp(max(stats.batch_size * self.grow_factor, stats.batch_size + 1))
+                stats.success_streak = 0
+
+        if int(stats.batch_size) != current:
+            logger.info(
+                "Multicall batch size for chain %d, provider %s changed %d -> %d, latency EWMA %.2fs",
+                chain_id,
+                provider_name,
+                current,
+                int(stats.batch_size),
+                stats.latency_ewma,
+            )
+
+        self.dirty.add((chain_id, provider_name))
+        self._maybe_save()
+
+    def report_failure(
+        self,
+        chain_id: int,
+        provider_name: str,
+        batch_size: int,
+        failure_kind: FailureKind,
+    ) -> int:
+        """Record a failed multicall.
+
+        - Only gas and timeout failures shrink the batch
+
+        :return:
+            The new batch size to try with
+        """
+        stats = self._get_stats(chain_id, provider_name, batch_size)
+        stats.failures[failure_kind] = stats.failures.get(failure_kind, 0) + 1
+        stats.success_streak = 0
+        stats.updated_at = time.time()
+
+        if failure_kind in SIZE_RELATED_FAILURES:
+            # Shrink relative to the batch that actually failed
+            current = int(stats.batch_size)
+            stats.batch_size = self._clamp(min(stats.batch_size, batch_size) * self.shrink_factor)
+            logger.info(
+                "Multicall batch size for chain %d, provider %s shrunk %d -> %d after %s failure",
+                chain_id,
+                provider_name,
+                current,
+                int(stats.batch_size),
+                failure_kind,
+            )
+
+        self.dirty.add((chain_id, provider_name))
+        # Persist shrinks immediately, so that other workers do not repeat our mistake
+        if failure_kind in SIZE_RELATED_FAILURES:
+            self.save()
+        else:
+            self._maybe_save()
+
+        return int(stats.batch_size)
@@ -16,17 +16,21 @@ import abc
 import datetime
 import logging
 import os
+import sys
 import threading
 import time
 import zlib
 
 from abc import abstractmethod
-from dataclasses import dataclass, field
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
 from http.client import RemoteDisconnected
 from itertools import islice
+from pathlib import Path
 from pprint import pformat
 from typing import TypeAlias, Iterable, Generator, Hashable, Any, Final, Callable
 
+import eth_abi
 from hexbytes import HexBytes
 from requests import HTTPError
 from tqdm_loggable.auto import tqdm
@@ -37,12 +41,17 @@ from joblib import Parallel, delayed
 from web3 import Web3
 from web3.contract import Contract
 from web3.contract.contract import ContractFunction
+from web3.types import RPCEndpoint
 
 from eth_defi.abi import get_deployed_contract, ZERO_ADDRESS, encode_function_call, ZERO_ADDRESS_STR, format_debug_instructions
 from eth_defi.chain import get_default_call_gas_limit
-from eth_defi.compat import native_datetime_utc_now
-from eth_defi.event_reader.fast_json_rpc import get_last_headers
+from eth_defi.compat import native_datetime_utc_fromtimestamp, native_datetime_utc_now
+from eth_defi.event_reader.call_cache import CallCache
+from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.event_reader.fast_json_rpc import get_last_headers, make_batch_request
+from eth_defi.event_reader.multicall_batch_size import AdaptiveBatchSizeController, classify_multicall_failure, SIZE_RELATED_FAILURES, FailureKind
 from eth_defi.event_reader.multicall_timestamp import fetch_block_timestamps_multiprocess
+from eth_defi.event_reader.multicall_transport import CallSetRegistration, PackedCallResults, load_call_set, pack_call_ids, register_call_set, release_call_set, unpack_call_ids
 from eth_defi.event_reader.web3factory import Web3Factory
 from eth_defi.middleware import ProbablyNodeHasNoBlock, is_retryable_http_exception
 from eth_defi.provider.fallback import FallbackProvider
@@ -58,6 +67,9 @@ CallData: TypeAlias = tuple[str | HexAddress, tuple]
 #: Default Multicall3 address
 MULTICALL_DEPLOY_ADDRESS: Final[str] = "0xca11bde05977b3631167028862be2a173976ca11"
 
+#: ``tryBlockAndAggregate(bool,(address,bytes)[])`` function selector
+TRY_BLOCK_AND_AGGREGATE_SELECTOR: Final[bytes] = bytes.fromhex("399542e9")
+
 #: Per-chain Multicall3 deployemnts
 MULTICALL_CHAIN_ADDRESSES = {
     324: "0xF9cda624FBC7e059355ce98a31693d299FACd963",  # https://zksync.blockscout.com/address/0xF9cda624FBC7e059355ce98a31693d299FACd963
@@ -99,6 +111,16 @@ class MulticallNonRetryable(Exception):
     """Need to take a manual look these errors."""
 
 
+#: Multicall failures where we split the batch to find a broken call.
+#:
+#: A single call that runs out of gas or reverts with an invalid opcode
+#: takes the whole ``tryBlockAndAggregate`` down.
+#:
+#: Timeouts are not included: they are usually transport or node load issues,
+#: and the calls must be retried, not quarantined.
+BISECT_FAILURES: set[FailureKind] = {"gas", "revert"}
+
+
 def get_multicall_block_number(chain_id: int) -> int | None:
     """When the multicall contract was deployed for a chain."""
     entry = MUTLICALL_DEPLOYED_AT.get(chain_id, None)
@@ -107,6 +129,23 @@ def get_multicall_block_number(chain_id: int) -> int | None:
     return None
 
 
+def get_multicall_gas_hint(chain_id: int) -> int | None:
+    """Gas limit override for multicalls on chains with non-standard gas limits.
+
+    - # https://docs.alchemy.com/reference/gas-limits-for-eth_call-and-eth_estimategas
+
+    :return:
+        Gas limit, or ``None`` to use the node default
+    """
+    if chain_id == 5000:
+        # Mantle: 1000B gas
+        # Block 61298003
+        # Address 0xca11bde05977b3631167028862be2a173976ca11
+        return 9_999_000_000_000
+    else:
+        return None
+
+
 def get_multicall_contract(
     web3: Web3,
     address: HexAddress | str | None = None,
@@ -178,11 +217,31 @@ def call_multicall_encoded(
     multicall_contract: Contract,
     calls: list["MulticallWrapper"],
     block_identifier: BlockIdentifier,
+    cache: CallCache | None = None,
 ) -> dict[Hashable, Any]:
-    """Call a multicall contract."""
+    """Call a multicall contract.
+
+    :param cache:
+        Serve results for finalised blocks from a disk cache, see :py:class:`eth_defi.event_reader.call_cache.CallCache`.
+    """
 
     assert all(isinstance(c, MulticallWrapper) for c in calls), f"Got: {calls}"
 
+    results = {}
+
+    cacheable = False
+    if cache is not None:
+        web3 = multicall_contract.w3
+        chain_id = web3.eth.chain_id
+        cacheable = cache.is_cacheable(web3, chain_id, block_identifier)
+        if cacheable:
+            cached = cache.get_results(chain_id, block_identifier, [c.get_address_and_data() for c in calls], from_=multicall_contract.address)
+            for idx, output in cached.items():
+                results[calls[idx].get_key()] = calls[idx].handle(True, output)
+            calls = [c for idx, c in enumerate(calls) if idx not in cached]
+            if not calls:
+                return results
+
     encoded_calls = [c.get_address_and_data() for c in calls]
 
     payload_size = sum(20 + len(c[1]) for c in encoded_calls)
@@ -201,10 +260,11 @@ def call_multicall_encoded(
     )
     _, _, calls_results = bound_func.call(block_identifier=block_identifier)
 
-    results = {}
-
     assert len(calls_results) == len(calls_results)
 
+    if cacheable:
+        cache.set_results(chain_id, block_identifier, [(address, data, output) for (address, data), (succeed, output) in zip(encoded_calls, calls_results) if succeed], from_=multicall_contract.address)
+
     out_size = sum(len(o[1]) for o in calls_results)
 
     for call, output_tuple in zip(calls, calls_results):
@@ -623,6 +683,7 @@ class EncodedCall:
         ignore_error=False,
         attempts: int = 3,
         retry_sleep=30.0,
+        cache: CallCache | None = None,
     ) -> bytes:
         """Return raw results of the call.
 
@@ -657,6 +718,11 @@ class EncodedCall:
 
             If not given, use 15M limit except for Mantle use 99M.
 
+        :param cache:
+            Serve results for finalised blocks from a disk cache.
+
+            See :py:class:`eth_defi.event_reader.call_cache.CallCache`.
+
         :return:
             Raw call results as bytes
 
@@ -664,6 +730,15 @@ class EncodedCall:
             If the call reverts
         """
 
+        cacheable = False
+        if cache is not None:
+            chain_id = web3.eth.chain_id
+            cacheable = cache.is_cacheable(web3, chain_id, block_identifier)
+            if cacheable:
+                cached = cache.get_result(chain_id, self.address, self.data, block_identifier, from_=from_)
+                if cached is not None:
+                    return HexBytes(cached)
+
         if gas is None:
             gas = get_default_call_gas_limit(web3.eth.chain_id)
 
@@ -687,6 +762,8 @@ class EncodedCall:
                     transaction=transaction,
                     block_identifier=block_identifier,
                 )
+                if cacheable:
+                    cache.set_result(chain_id, self.address, self.data, block_identifier, bytes(result), from_=from_)
                 return result
             except Exception as e:
                 msg = f"Call failed: {str(e)}\nBlock: {block_identifier}, chain: {web3.eth.chain_id}\nTransaction data:{pformat(transaction)}"
@@ -745,6 +822,7 @@ class EncodedCall:
         from_=ZERO_ADDRESS_STR,
         gas=99_000_000,
         ignore_error=False,
+        cache: CallCache | None = None,
     ) -> "EncodedCallResult":
         """Perform RPC call and return the result as an :py:class:`EncodedCallResult`.
 
@@ -760,6 +838,7 @@ class EncodedCall:
                 from_=from_,
                 gas=gas,
                 ignore_error=ignore_error,
+                cache=cache,
             )
 
             assert isinstance(raw_result, HexBytes), f"Expected HexBytes, got {type(raw_result)}: {raw_result.hex()}"
@@ -781,6 +860,196 @@ class EncodedCall:
             )
 
 
+@dataclass(slots=True, frozen=True)
+class CallMetadata:
+    """Human-readable metadata of a call, shared by many :py:class:`CompactEncodedCall` instances.
+
+    Get instances with :py:func:`intern_call_metadata`.
+    """
+
+    #: ABI function name for debugging purposes
+    func_name: str
+
+    #: Use this to match the reader
+    extra_data: dict | None
+
+    #: Skip calls for blocks that are earlier than this block number
+    first_block_number: int | None
+
+
+#: How many metadata instances :py:func:`intern_call_metadata` keeps around.
+#:
+#: Least recently used metadata is evicted first. Calls keep their metadata after eviction,
+#: but new calls with the same metadata no longer share the instance.
+CALL_METADATA_REGISTRY_MAX_SIZE = 100_000
+
+#: (func name, first block number, id of extra data) -> shared metadata, in LRU order.
+#:
+#: Holds a reference to the extra data, so the ids stay unique.
+_call_metadata_registry: OrderedDict[tuple, CallMetadata] = OrderedDict()
+
+
+def intern_call_metadata(
+    func_name: str,
+    extra_data: dict | None = None,
+    first_block_number: int | None = None,
+) -> CallMetadata:
+    """Get a shared metadata instance.
+
+    - Calls that pass the same ``extra_data`` dict object share one metadata instance
+
+    - Metadata instances are shared within a pickle payload, so they are copied only once
+      to multicall worker processes
+
+    - The registry is bounded by :py:data:`CALL_METADATA_REGISTRY_MAX_SIZE`
+    """
+    key = (func_name, first_block_number, id(extra_data))
+    metadata = _call_metadata_registry.get(key)
+    if metadata is None:
+        metadata = _call_metadata_registry[key] = CallMetadata(
+            func_name=sys.intern(func_name),
+            extra_data=extra_data,
+            first_block_number=first_block_number,
+        )
+        while len(_call_metadata_registry) > CALL_METADATA_REGISTRY_MAX_SIZE:
+            _call_metadata_registry.popitem(last=False)
+    else:
+        _call_metadata_registry.move_to_end(key)
+    return metadata
+
+
+def clear_call_metadata_registry():
+    """Release the shared metadata, e.g. after a scan."""
+    _call_metadata_registry.clear()
+
+
+class CompactEncodedCall:
+    """Memory-compact alternative for :py:class:`EncodedCall`.
+
+    - Target address stored as 20 bytes, selector and arguments as one bytes buffer.
+      The checksummed address is computed once, when the call is created.
+
+    - Function name, extra data and first block are moved to a shared :py:class:`CallMetadata`
+
+    - Has the same read attributes as :py:class:`EncodedCall`, so result handlers work with both
+
+    - Supported by :py:func:`read_multicall_historical` and :py:func:`read_multicall_historical_stateful`
+      with ``packed_transport``. Worker processes turn the calls to :py:class:`EncodedCall` once.
+
+    Example:
+
+    .. code-block:: python
+
+        metadata = intern_call_metadata("convertToShares", extra_data={"vault": vault_id})
+        call = CompactEncodedCall.from_keccak_signature(
+            address=vault_address,
+            signature=Web3.keccak(text="convertToShares(uint256)")[0:4],
+            data=eth_abi.encode(["uint256"], [share_probe_amount]),
+            metadata=metadata,
+        )
+    """
+
+    __slots__ = ("target", "data", "metadata", "address", "_hash")
+
+    def __init__(self, target: bytes, data: bytes, metadata: CallMetadata, address: HexAddress | None = None):
+        """
+        :param target:
+            Contract address as 20 bytes
+
+        :param data:
+            Function selector and ABI-encoded arguments
+
+        :param metadata:
+            Shared metadata, see :py:func:`intern_call_metadata`
+
+        :param address:
+            Checksummed ``target``, if the caller already has it
+        """
+        assert type(target) == bytes and len(target) == 20, f"Got target: {target}"
+        assert type(data) == bytes, f"Got data: {data}"
+        assert isinstance(metadata, CallMetadata), f"Got metadata: {metadata}"
+        self.target = target
+        self.data = data
+        self.metadata = metadata
+        #: Contract address, checksummed like :py:attr:`EncodedCall.address`
+        self.address = address or Web3.to_checksum_address(target)
+        self._hash = None
+
+    def __repr__(self):
+        return f"<CompactEncodedCall {self.func_name} on {self.address}, data {self.data.hex()}>"
+
+    def __hash__(self):
+        if self._hash is None:
+            self._hash = zlib.crc32(self.target + self.data)
+        return self._hash
+
+    def __eq__(self, other):
+        # Unlike EncodedCall, the metadata is part of the equality,
+        # so the same call for two different readers is not mixed up
+        if not isinstance(other, CompactEncodedCall):
+            return NotImplemented
+        return self.target == other.target and self.data == other.data and (self.metadata is other.metadata or self.metadata == other.metadata)
+
+    def __reduce__(self):
+        # Slots without __dict__, the metadata is pickled once per payload through the pickle memo
+        return (CompactEncodedCall, (self.target, self.data, self.metadata, self.address))
+
+    @property
+    def selector(self) -> bytes:
+        """4 bytes function selector."""
+        return self.data[0:4]
+
+    @property
+    def func_name(self) -> str:
+        return self.metadata.func_name
+
+    @property
+    def extra_data(self) -> dict | None:
+        return self.metadata.extra_data
+
+    @property
+    def first_block_number(self) -> int | None:
+        return self.metadata.first_block_number
+
+    @staticmethod
+    def from_keccak_signature(
+        address: HexAddress | str,
+        signature: bytes,
+        data: bytes,
+        metadata: CallMetadata,
+    ) -> "CompactEncodedCall":
+        """Create a call from a raw function signature."""
+        assert isinstance(signature, bytes)
+        assert len(signature) == 4
+        assert isinstance(data, bytes)
+        return CompactEncodedCall(bytes.fromhex(address[2:]), signature + data, metadata)
+
+    @staticmethod
+    def from_encoded_call(call: EncodedCall) -> "CompactEncodedCall":
+        """Convert a :py:class:`EncodedCall`."""
+        return CompactEncodedCall(
+            bytes.fromhex(call.address[2:]),
+            call.data,
+            intern_call_metadata(call.func_name, call.extra_data, call.first_block_number),
+        )
+
+    def to_encoded_call(self) -> EncodedCall:
+        """Convert to :py:class:`EncodedCall` for performing the call."""
+        return EncodedCall(
+            func_name=self.func_name,
+            address=self.address,
+            data=self.data,
+            extra_data=self.extra_data,
+            first_block_number=self.first_block_number,
+        )
+
+    def is_valid_for_block(self, block_number: BlockIdentifier) -> bool:
+        first_block_number = self.metadata.first_block_number
+        if first_block_number is None or type(block_number) == str:
+            return True
+        return first_block_number <= block_number
+
+
 @dataclass(slots=True, frozen=False)
 class EncodedCallResult:
     """Result of an one multicall.
@@ -800,7 +1069,7 @@ class EncodedCallResult:
 
     """
 
-    call: EncodedCall
+    call: EncodedCall | CompactEncodedCall
     success: bool
     result: bytes
 
@@ -816,15 +1085,44 @@ class EncodedCallResult:
     #: Copy the state reference in stateful reading
     state: BatchCallState | None = None
 
+    #: The call was not performed, or it failed the whole multicall batch,
+    #: because it was quarantined as a broken call.
+    #:
+    #: See :py:meth:`MultiprocessMulticallReader.bisect_multicall`.
+    quarantined: bool = False
+
     def __repr__(self):
         return f"<Call {self.call} at block {self.block_identifier}, success {self.success}, result: {self.result.hex()}, result len {len(self.result)}>"
 
     def __post_init__(self):
-        assert isinstance(self.call, EncodedCall), f"Got: {self.call}"
+        assert isinstance(self.call, (EncodedCall, CompactEncodedCall)), f"Got: {self.call}"
         assert type(self.success) == bool, f"Got success: {self.success}"
         assert type(self.result) == bytes
 
 
+@dataclass(slots=True)
+class QuarantinedCall:
+    """A call that was isolated as the cause of a failing multicall batch."""
+
+    #: Contract address
+    address: HexAddress
+
+    #: ABI-encoded payload
+    data: bytes
+
+    #: First block where this call failed
+    first_failed_block: int
+
+    #: Last block where this call failed
+    last_failed_block: int
+
+    #: How many times bisection pointed to this call
+    failure_count: int
+
+    #: Error message of the last failure
+    reason: str
+
+
 @dataclass(slots=True, frozen=True)
 class CombinedEncodedCallResult:
     """Historical read result of multiple multicalls.
@@ -852,6 +1150,10 @@ class MultiprocessMulticallReader:
         batch_size=40,
         backswitch_threshold=100,
         too_many_requets_sleep=60.0,
+        batch_size_controller: AdaptiveBatchSizeController | None = None,
+        bisect_failures=False,
+        quarantine_blocks=50_000,
+        call_cache: CallCache | None = None,
     ):
         """Create subprocess worker instance.
 
@@ -863,6 +1165,26 @@ class MultiprocessMulticallReader:
 
             Manually tuned number if your RPC nodes start to crap out, as they hit their internal time limits.
 
+        :param batch_size_controller:
+            Learn the batch size per provider instead of using the manually tuned number.
+
+            The manually tuned number is used as the starting point.
+            See :py:mod:`eth_defi.event_reader.multicall_batch_size`.
+
+        :param bisect_failures:
+            If a multicall batch fails as a whole, recursively split it to isolate the broken calls.
+
+            The broken calls are quarantined, and the healthy calls in the batch still return results.
+            See :py:meth:`bisect_multicall`.
+
+        :param quarantine_blocks:
+            Skip a quarantined call for blocks this close to the block where it failed.
+
+        :param call_cache:
+            Serve results for finalised blocks from a disk cache.
+
+            See :py:class:`eth_defi.event_reader.call_cache.CallCache`.
+
         """
         if isinstance(web3factory, Web3):
             # Directly passed
@@ -892,6 +1214,22 @@ class MultiprocessMulticallReader:
 
         self.too_many_requets_sleep = too_many_requets_sleep
 
+        self.batch_size_controller = batch_size_controller
+
+        self.bisect_failures = bisect_failures
+        self.quarantine_blocks = quarantine_blocks
+
+        #: Broken calls found by bisection, keyed by (address, data)
+        self.quarantine: dict[tuple[HexAddress, bytes], QuarantinedCall] = {}
+
+        self.call_cache = call_cache
+
+        #: Multicall results fetched ahead for several blocks in one JSON-RPC batch.
+        #:
+        #: block number -> (address, data) -> (success, output).
+        #: See :py:meth:`prefetch_multi_block`.
+        self.prefetched: dict[int, dict[tuple[HexAddress, bytes], tuple[bool, bytes]]] = {}
+
     def __repr__(self):
         return f"<MultiprocessMulticallReader process: {os.getpid()}, thread: {threading.current_thread()}, chain: {self.web3.eth.chain_id}>"
 
@@ -903,34 +1241,126 @@ class MultiprocessMulticallReader:
 
         - # https://docs.alchemy.com/reference/gas-limits-for-eth_call-and-eth_estimategas
         """
-        if chain_id == 5000:
-            # Mantle: 1000B gas
-            # Block 61298003
-            # Address 0xca11bde05977b3631167028862be2a173976ca11
-            return 9_999_000_000_000
-        else:
-            return None
+        return get_multicall_gas_hint(chain_id)
 
-    def get_batch_size(self, web3: Web3, chain_id) -> int | None:
-        """Fix non-standard out of gas issues"""
-
-        provider = web3.provider
+    def get_active_provider_name(self) -> str:
+        """Get the name of the provider where the next call goes."""
+        provider = self.web3.provider
         if isinstance(provider, FallbackProvider):
             provider = provider.get_active_provider()
+        return get_provider_name(provider)
+
+    def is_quarantined(self, address: HexAddress, data: bytes, block_identifier: BlockIdentifier) -> bool:
+        """Is this call known to break multicall batches around this block."""
+        entry = self.quarantine.get((address, data))
+        if entry is None or type(block_identifier) != int:
+            return False
+        return entry.first_failed_block - self.quarantine_blocks <= block_identifier <= entry.last_failed_block + self.quarantine_blocks
+
+    def quarantine_call(self, address: HexAddress, data: bytes, block_identifier: BlockIdentifier, reason: str):
+        """Mark a call broken after bisection isolated it."""
+        block_number = block_identifier if type(block_identifier) == int else 0
+        entry = self.quarantine.get((address, data))
+        if entry is None:
+            entry = self.quarantine[(address, data)] = QuarantinedCall(
+                address=address,
+                data=data,
+                first_failed_block=block_number,
+                last_failed_block=block_number,
+                failure_count=0,
+                reason=reason,
+            )
+        entry.first_failed_block = min(entry.first_failed_block, block_number)
+        entry.last_failed_block = max(entry.last_failed_block, block_number)
+        entry.failure_count += 1
+        entry.reason = reason
+
+        logger.warning(
+            "Quarantined multicall call to %s at chain %d, block %s, failure count %d: %s\nData: %s",
+            address,
+            self.web3.eth.chain_id,
+            block_identifier,
+            entry.failure_count,
+            reason,
+            data.hex(),
+        )
+
+    def bisect_multicall(
+        self,
+        multicall_contract: Contract,
+        block_identifier: BlockIdentifier,
+        batch_calls: list[tuple[HexAddress, bytes]],
+        tx: dict,
+        reason: str,
+    ) -> list[tuple[bool, bytes]]:
+        """Recursively split a failing multicall batch to isolate broken calls.
+
+        - A single call that runs out of gas or reverts fails the whole ``tryBlockAndAggregate``
+
+        - Split the batch in halves and retry each half, until the failing halves are single calls
 
-        # name = get_provider_name(provider)
+        - Costs ``O(k log n)`` extra RPC calls for ``k`` broken calls in a batch of ``n``
+
+        - Broken calls are quarantined with :py:meth:`quarantine_call` and returned as failed
+
+        :param reason:
+            The error message of the batch that failed
+
+        :return:
+            Results for every call in ``batch_calls``, in the same order
+
+        :raise MulticallRetryable:
+            If a half fails with an error that is not caused by a broken call, like throttling or a timeout
+        """
+
+        if len(batch_calls) == 1:
+            address, data = batch_calls[0]
+            self.quarantine_call(address, data, block_identifier, reason)
+            return [(False, b"")]
+
+        mid = len(batch_calls) // 2
+        results = []
+        for half in (batch_calls[:mid], batch_calls[mid:]):
+            bound_func = multicall_contract.functions.tryBlockAndAggregate(
+                calls=half,
+                requireSuccess=False,
+            )
+            try:
+                _, _, half_results = bound_func.call(tx, block_identifier=block_identifier)
+                results += half_results
+            except (ValueError, ProbablyNodeHasNoBlock, HTTPError, ReadTimeout, ConnectionError, RemoteDisconnected) as e:
+                if classify_multicall_failure(e) not in BISECT_FAILURES:
+                    raise MulticallRetryable(f"Multicall bisection failed for chain {self.web3.eth.chain_id}, block {block_identifier}, batch size {len(half)}: {e}") from e
+                results += self.bisect_multicall(multicall_contract, block_identifier, half, tx, str(e))
+
+        return results
+
+    def get_batch_size(self, web3: Web3, chain_id) -> int | None:
+        """Fix non-standard out of gas issues
+
+        - If we have an adaptive batch size controller, use the manually tuned size as a starting point
+        """
 
         if chain_id == 5000:
             # Mantle argh
-            return 16
+            batch_size = 16
         elif chain_id == 100:
             # Gnosis chain argh
-            return 16
+            batch_size = 16
         elif chain_id == 1:
             # Boost mainnet scan
-            return 60
+            batch_size = 60
         else:
-            return self.batch_size
+            batch_size = self.batch_size
+
+        if self.batch_size_controller is not None:
+            batch_size = self.batch_size_controller.get_batch_size(
+                chain_id,
+                self.get_active_provider_name(),
+                default_batch_size=batch_size,
+            )
+
+        return batch_size
 
     def call_multicall_with_batch_size(
         self,
@@ -943,15 +1373,27 @@ class MultiprocessMulticallReader:
         """Communicate with Multicall3 contract.
 
         - Fail safes for ugly situations
+
+        - If we have an adaptive batch size controller, a batch failing with gas or timeout error
+          is retried with a smaller batch size, and healthy responses are reported to grow the batch size
         """
         payload_size = 0
         calls_results = []
         chain_id = self.web3.eth.chain_id
         batch_calls = []
-        for i in range(0, len(encoded_calls), batch_size):
+        prefetched = self.prefetched.get(block_identifier)
+        i = 0
+        while i < len(encoded_calls):
             batch_calls = encoded_calls[i : i + batch_size]
             # Calculate how many bytes we are going to use
-            payload_size += sum(20 + len(c[1]) for c in batch_calls)
+            batch_payload_size = sum(20 + len(c[1]) for c in batch_calls)
+
+            # Already fetched in a multi-block JSON-RPC batch
+            if prefetched is not None and all(c in prefetched for c in batch_calls):
+                payload_size += batch_payload_size
+                calls_results += [prefetched[c] for c in batch_calls]
+                i += len(batch_calls)
+                continue
 
             # Fix Mantle out of gas
             gas = self.get_gas_hint(chain_id=chain_id, batch_calls=batch_calls)
@@ -973,8 +1415,50 @@ class MultiprocessMulticallReader:
                 tx["ignore_error"] = True
 
                 # Perform multicall
+                call_started = time.time()
                 received_block_number, received_block_hash, batch_results = bound_func.call(tx, block_identifier=block_identifier)
+                call_duration = time.time() - call_started
             except (ValueError, ProbablyNodeHasNoBlock, HTTPError, ReadTimeout, ConnectionError, RemoteDisconnected) as e:
+                failure_kind = classify_multicall_failure(e)
+                bisect = self.bisect_failures and failure_kind in BISECT_FAILURES
+
+                # Bisecting handles a broken call without shrinking the shared batch size
+                # for all workers, so the controller only learns from the other failures
+                if self.batch_size_controller is not None and not bisect:
+                    new_batch_size = self.batch_size_controller.report_failure(
+                        chain_id,
+                        self.get_active_provider_name(),
+                        batch_size=len(batch_calls),
+                        failure_kind=failure_kind,
+                    )
+                    if failure_kind in SIZE_RELATED_FAILURES and len(batch_calls) > 1:
+                        # Retry the same calls with a smaller batch
+                        batch_size = min(new_batch_size, len(batch_calls) - 1)
+                        logger.warning(
+                            "Multicall %s failure at chain %d, block %s, batch size %d, retrying with batch size %d",
+                            failure_kind,
+                            chain_id,
+                            block_identifier,
+                            len(batch_calls),
+                            batch_size,
+                        )
+                        continue
+
+                if bisect:
+                    # Isolate the broken calls, get results for the healthy ones
+                    logger.warning(
+                        "Multicall failed at chain %d, block %s, batch size %d, bisecting to find broken calls: %s",
+                        chain_id,
+                        block_identifier,
+                        len(batch_calls),
+                        e,
+                    )
+                    batch_results = self.bisect_multicall(multicall_contract, block_identifier, batch_calls, tx, str(e))
+                    payload_size += batch_payload_size
+                    calls_results += batch_results
+                    i += len(batch_calls)
+                    continue
+
                 debug_data = format_debug_instructions(bound_func, block_identifier=block_identifier)
                 headers = get_last_headers()
                 name = get_provider_name(self.web3.provider)
@@ -1041,10 +1525,140 @@ class MultiprocessMulticallReader:
                         last_headers = get_last_headers()
                         raise MulticallStateProblem(f"Multicall gave empty result: at block {block_identifier} at chain {self.web3.eth.chain_id}.\nDebug data is:\n{debug_str}\nRPC is: {rpc_name}\nBatch result: {batch_results}\nBatch calls: {batch_calls}\nReceived block number: {received_block_number}\nResponse headers: {pformat(last_headers)}\nLive multicall readers are: {pformat(readers)}")
 
+            if self.batch_size_controller is not None:
+                self.batch_size_controller.report_success(
+                    chain_id,
+                    self.get_active_provider_name(),
+                    batch_size=len(batch_calls),
+                    duration=call_duration,
+                    payload_bytes=batch_payload_size,
+                )
+
+            payload_size += batch_payload_size
             calls_results += batch_results
+            i += len(batch_calls)
 
         return calls_results
 
+    def prefetch_multi_block(
+        self,
+        blocks: list[tuple[int, list[EncodedCall]]],
+        require_multicall_result=False,
+        fetch_timestamps=True,
+    ) -> dict[int, datetime.datetime]:
+        """Fetch multicall results for several historical blocks in one JSON-RPC batch.
+
+        - For cheap view calls the HTTP round trip dominates, so we send ``tryBlockAndAggregate``
+          for all blocks, and optionally their headers for timestamps, in one request
+
+        - Results are kept in :py:attr:`prefetched` and picked up by the following :py:meth:`process_calls`
+          for each block, so quarantine, call cache and result handling stay the same
+
+        - Failed batches are not stored, and :py:meth:`process_calls` does them again one block at a time
+          with the normal retry, batch size and bisection logic
+
+        - Clear with :py:meth:`clear_prefetched` after the blocks have been processed
+
+        :param blocks:
+            List of (block number, calls)
+
+        :param require_multicall_result:
+            Do not store batches with empty results, so that :py:meth:`process_calls` reports them
+
+        :param fetch_timestamps:
+            Include the block headers in the batch
+
+        :return:
+            Block number -> timestamp, for the blocks whose header we got
+        """
+        chain_id = self.web3.eth.chain_id
+        multicall_deployed_at = get_multicall_block_number(chain_id)
+        multicall_address = Web3.to_checksum_address(MULTICALL_CHAIN_ADDRESSES.get(chain_id, MULTICALL_DEPLOY_ADDRESS))
+        cacheable = self.call_cache is not None
+
+        # (block number, batch calls) for each eth_call in the JSON-RPC batch
+        batches: list[tuple[int, list[tuple[HexAddress, bytes]]]] = []
+
+        # Headers first, then the multicalls
+        requests = []
+        if fetch_timestamps:
+            requests += [(RPCEndpoint("eth_getBlockByNumber"), (hex(block_number), False)) for block_number, _ in blocks]
+
+        for block_number, calls in blocks:
+            assert type(block_number) == int, f"Multi-block reads need block numbers, got {block_number}"
+
+            if multicall_deployed_at is not None and block_number < multicall_deployed_at:
+                continue
+
+            encoded_calls = [(Web3.to_checksum_address(c.address), c.data) for c in calls if c.is_valid_for_block(block_number)]
+            encoded_calls = [e for e in encoded_calls if not self.is_quarantined(e[0], e[1], block_number)]
+
+            if cacheable and encoded_calls and self.call_cache.is_cacheable(self.web3, chain_id, block_number):
+                cached = self.call_cache.get_results(chain_id, block_number, encoded_calls, record_stats=False, from_=multicall_address)
+                encoded_calls = [e for idx, e in enumerate(encoded_calls) if idx not in cached]
+
+            batch_size = self.get_batch_size(self.web3, chain_id)
+            for i in range(0, len(encoded_calls), batch_size):
+                batch_calls = encoded_calls[i : i + batch_size]
+                tx = {
+                    "to": multicall_address,
+                    "data": "0x" + (TRY_BLOCK_AND_AGGREGATE_SELECTOR + eth_abi.encode(["bool", "(address,bytes)[]"], [False, batch_calls])).hex(),
+                }
+                gas = self.get_gas_hint(chain_id=chain_id, batch_calls=batch_calls)
+                if gas:
+                    tx["gas"] = hex(gas)
+                batches.append((block_number, batch_calls))
+                requests.append((RPCEndpoint("eth_call"), (tx, hex(block_number))))
+
+        if not requests:
+            return {}
+
+        try:
+            responses = iter(make_batch_request(self.web3, requests, raise_on_error=False))
+        except Exception as e:
+            # Batch rejected as a whole, let the per-block path deal with the blocks
+            logger.warning("Multi-block multicall prefetch of %d blocks failed, falling back to block by block reads: %s", len(blocks), e)
+            return {}
+
+        timestamps = {}
+        if fetch_timestamps:
+            for block_number, calls in blocks:
+                response = next(responses)
+                header = response.get("result")
+                if header:
+                    timestamps[block_number] = native_datetime_utc_fromtimestamp(convert_jsonrpc_value_to_int(header["timestamp"]))
+
+        stored = failed = 0
+        for block_number, batch_calls in batches:
+            response = next(responses)
+            raw_result = response.get("result")
+            if "error" in response or not raw_result or raw_result == "0x":
+                failed += 1
+                continue
+
+            _, _, batch_results = eth_abi.decode(["uint256", "bytes32", "(bool,bytes)[]"], HexBytes(raw_result))
+            if len(batch_results) != len(batch_calls) or (require_multicall_result and any(output == b"" for _, output in batch_results)):
+                failed += 1
+                continue
+
+            block_results = self.prefetched.setdefault(block_number, {})
+            for call, result in zip(batch_calls, batch_results):
+                block_results[call] = result
+            stored += 1
+
+        logger.info(
+            "Multi-block multicall prefetch for %d blocks, %d requests in one JSON-RPC batch, %d multicalls stored, %d failed and left for the per-block path",
+            len(blocks),
+            len(requests),
+            stored,
+            failed,
+        )
+        return timestamps
+
+    def clear_prefetched(self):
+        """Release results from :py:meth:`prefetch_multi_block`."""
+        self.prefetched.clear()
+
     def process_calls(
         self,
         block_identifier: BlockIdentifier,
@@ -1077,6 +1691,42 @@ class MultiprocessMulticallReader:
         filtered_in_calls = [c for c in calls if c.is_valid_for_block(block_identifier)]
         encoded_calls = [(Web3.to_checksum_address(c.address), c.data) for c in filtered_in_calls]
 
+        # Do not let known broken calls fail batches again
+        if self.quarantine:
+            quarantined_calls = [c for c, e in zip(filtered_in_calls, encoded_calls) if self.is_quarantined(e[0], e[1], block_identifier)]
+            if quarantined_calls:
+                logger.info("Skipping %d quarantined calls at block %s", len(quarantined_calls), block_identifier)
+                for call in quarantined_calls:
+                    yield EncodedCallResult(
+                        call=call,
+                        success=False,
+                        result=b"",
+                        block_identifier=block_identifier,
+                        timestamp=timestamp,
+                        quarantined=True,
+                    )
+                filtered_in_calls = [c for c, e in zip(filtered_in_calls, encoded_calls) if not self.is_quarantined(e[0], e[1], block_identifier)]
+                encoded_calls = [(Web3.to_checksum_address(c.address), c.data) for c in filtered_in_calls]
+
+        # Historical results we have already fetched in the previous runs
+        chain_id = self.web3.eth.chain_id
+        cacheable = self.call_cache is not None and self.call_cache.is_cacheable(self.web3, chain_id, block_identifier)
+        # Calls are made by Multicall3, so it is their msg.sender
+        multicall_address = Web3.to_checksum_address(MULTICALL_CHAIN_ADDRESSES.get(chain_id, MULTICALL_DEPLOY_ADDRESS))
+        if cacheable and filtered_in_calls:
+            cached = self.call_cache.get_results(chain_id, block_identifier, encoded_calls, from_=multicall_address)
+            if cached:
+                for idx, output in cached.items():
+                    yield EncodedCallResult(
+                        call=filtered_in_calls[idx],
+                        success=True,
+                        result=output,
+                        block_identifier=block_identifier,
+                        timestamp=timestamp,
+                    )
+                filtered_in_calls = [c for idx, c in enumerate(filtered_in_calls) if idx not in cached]
+                encoded_calls = [e for idx, e in enumerate(encoded_calls) if idx not in cached]
+
         start = native_datetime_utc_now()
 
         if len(filtered_out_calls) > 0:
@@ -1112,7 +1762,6 @@ class MultiprocessMulticallReader:
         # If multicall payload is heavy,
         # we need to break it to smaller multicall call chunks
         # or we get RPC timeout
-        chain_id = self.web3.eth.chain_id
         batch_size = self.get_batch_size(self.web3, chain_id)
 
         try:
@@ -1179,14 +1828,18 @@ class MultiprocessMulticallReader:
         assert len(filtered_in_calls) == len(calls_results), f"Calls: {len(filtered_in_calls)}, results: {len(calls_results)}"
         assert len(encoded_calls) == len(calls_results), f"Calls: {len(encoded_calls)}, results: {len(calls_results)}"
 
+        if cacheable:
+            self.call_cache.set_results(chain_id, block_identifier, [(address, data, output) for (address, data), (succeed, output) in zip(encoded_calls, calls_results) if succeed], from_=multicall_address)
+
         # Build EncodedCallResult() objects out of incoming results
-        for call, output_tuple in zip(filtered_in_calls, calls_results):
+        for call, encoded_call, output_tuple in zip(filtered_in_calls, encoded_calls, calls_results):
             yield EncodedCallResult(
                 call=call,
                 success=output_tuple[0],
                 result=output_tuple[1],
                 block_identifier=block_identifier,
                 timestamp=timestamp,
+                quarantined=(not output_tuple[0]) and self.is_quarantined(encoded_call[0], encoded_call[1], block_identifier),
             )
 
         # User friendly logging
@@ -1218,6 +1871,11 @@ def read_multicall_historical(
     display_progress: bool | str = True,
     progress_suffix: Callable | None = None,
     require_multicall_result=False,
+    adaptive_batch_size: Path | None = None,
+    bisect_failures=False,
+    call_cache: CallCache | None = None,
+    packed_transport=False,
+    blocks_per_request: int = 1,
 ) -> Iterable[CombinedEncodedCallResult]:
     """Read historical data using multiple threads in parallel for speedup.
 
@@ -1254,12 +1912,45 @@ def read_multicall_historical(
         Whether to display progress bar or not.
 
         Set to string to have a progress bar label.
+
+    :param adaptive_batch_size:
+        Learn multicall batch sizes per provider and share them across worker processes using this state file.
+
+        See :py:mod:`eth_defi.event_reader.multicall_batch_size`.
+
+    :param bisect_failures:
+        Split failing multicall batches to isolate and quarantine broken calls,
+        instead of failing the whole batch.
+
+        Quarantined calls are returned with :py:attr:`EncodedCallResult.quarantined` set.
+
+    :param call_cache:
+        Serve results for finalised blocks from a disk cache, so that reruns only hit the RPC for new blocks.
+
+        The worker processes open their own connections to the cache file.
+        See :py:class:`eth_defi.event_reader.call_cache.CallCache`.
+
+    :param packed_transport:
+        Register the calls and the web3 factory once per worker process and pass only block numbers in tasks.
+
+        Workers return results as packed buffers, which are turned back to :py:class:`EncodedCallResult`
+        in the main process. Cuts the inter-process overhead when reading thousands of calls per block.
+        See :py:mod:`eth_defi.event_reader.multicall_transport`.
+
+    :param blocks_per_request:
+        Read this many blocks in one worker task, sending the multicalls and the block headers
+        for all of them in one JSON-RPC batch HTTP request.
+
+        For cheap view calls, like share prices, the round trip dominates and this multiplies the throughput.
+        Results are still yielded one block at a time. Batches that fail are done again block by block
+        with the normal retry logic. See :py:meth:`MultiprocessMulticallReader.prefetch_multi_block`.
     """
 
     assert type(start_block) == int, f"Got: {start_block}"
     assert type(end_block) == int, f"Got: {end_block}"
     assert type(step) == int, f"Got: {step}"
     assert type(chain_id) == int, f"Got: {step}"
+    assert blocks_per_request >= 1, f"Got: {blocks_per_request}"
 
     worker_processor = Parallel(
         n_jobs=max_workers,
@@ -1288,9 +1979,42 @@ def read_multicall_historical(
 
     logger.debug("Per block we need to do %d calls", len(calls_pickle_friendly))
 
-    def _task_gen() -> Iterable[MulticallHistoricalTask]:
+    if not packed_transport:
+        assert not any(isinstance(c, CompactEncodedCall) for c in calls_pickle_friendly), "CompactEncodedCall needs packed_transport=True"
+
+    if packed_transport:
+        call_set = register_call_set(
+            MulticallCallSet(
+                chain_id,
+                web3factory,
+                calls_pickle_friendly,
+                require_multicall_result=require_multicall_result,
+                adaptive_batch_size=adaptive_batch_size,
+                bisect_failures=bisect_failures,
+                call_cache=call_cache,
+            )
+        )
+        worker_func = _execute_packed_multicall_subprocess
+    else:
+        call_set = None
+        worker_func = _execute_multicall_subprocess
+
+    def _task_gen() -> Iterable[MulticallHistoricalTask | PackedMulticallTask]:
         for block_number in range(start_block, end_block, step):
-            task = MulticallHistoricalTask(chain_id, web3factory, block_number, calls_pickle_friendly, require_multicall_result=require_multicall_result)
+            if call_set is not None:
+                yield PackedMulticallTask(call_set, block_number)
+                continue
+
+            task = MulticallHistoricalTask(
+                chain_id,
+                web3factory,
+                block_number,
+                calls_pickle_friendly,
+                require_multicall_result=require_multicall_result,
+                adaptive_batch_size=adaptive_batch_size,
+                bisect_failures=bisect_failures,
+                call_cache=call_cache,
+            )
             logger.debug(
                 "Created task for block %d with %d calls",
                 block_number,
@@ -1298,15 +2022,38 @@ def read_multicall_historical(
             )
             yield task
 
-    for completed_task in worker_processor(delayed(_execute_multicall_subprocess)(task) for task in _task_gen()):
-        if progress_bar:
-            progress_bar.update(1)
+    if blocks_per_request > 1:
+        if call_set is None:
+            worker_func = _execute_multi_block_multicall_subprocess
+
+        def _worker_inputs() -> Iterable:
+            # Several blocks per subprocess task, sharing the same call list in the pickle
+            tasks = _task_gen()
+            while chunk := list(islice(tasks, blocks_per_request)):
+                yield chunk
+
+    else:
+        _worker_inputs = _task_gen
+
+    try:
+        for completed in worker_processor(delayed(worker_func)(task) for task in _worker_inputs()):
+            completed_tasks = completed if isinstance(completed, list) else [completed]
+
+            for completed_task in completed_tasks:
+                if call_set is not None:
+                    completed_task = _unpack_multicall_result(completed_task, calls_pickle_friendly)
 
-            if progress_suffix is not None:
-                suffixes = progress_suffix()
-                progress_bar.set_postfix(suffixes)
+                if progress_bar:
+                    progress_bar.update(1)
 
-        yield completed_task
+                    if progress_suffix is not None:
+                        suffixes = progress_suffix()
+                        progress_bar.set_postfix(suffixes)
+
+                yield completed_task
+    finally:
+        if call_set is not None:
+            release_call_set(call_set)
 
     if progress_bar:
         progress_bar.close()
@@ -1325,6 +2072,10 @@ def read_multicall_historical_stateful(
     progress_suffix: Callable | None = None,
     require_multicall_result=False,
     chunk_size=48,
+    adaptive_batch_size: Path | None = None,
+    bisect_failures=False,
+    call_cache: CallCache | None = None,
+    packed_transport=False,
 ) -> Iterable[CombinedEncodedCallResult]:
     """Read historical data using multicall with reading state and adaptive frequency filtering.
 
@@ -1341,6 +2092,27 @@ def read_multicall_historical_stateful(
 
         Between chunks we blindly push data to subprocesses for speedup,
         do not attempt to hear back from the multiprocess to update the state.
+
+    :param adaptive_batch_size:
+        Learn multicall batch sizes per provider using this state file.
+
+        See :py:func:`read_multicall_historical`.
+
+    :param bisect_failures:
+        Split failing multicall batches to isolate and quarantine broken calls.
+
+        See :py:func:`read_multicall_historical`.
+
+    :param call_cache:
+        Serve results for finalised blocks from a disk cache.
+
+        See :py:func:`read_multicall_historical`.
+
+    :param packed_transport:
+        Register the calls once per worker process, pass only block numbers and call ids in tasks,
+        and get the results back as packed buffers.
+
+        See :py:func:`read_multicall_historical`.
     """
 
     assert type(start_block) == int, f"Got: {start_block}"
@@ -1390,16 +2162,40 @@ def read_multicall_historical_stateful(
         display_progress=display_progress,
     )
 
+    if not packed_transport:
+        assert not any(isinstance(c, CompactEncodedCall) for c in all_calls), "CompactEncodedCall needs packed_transport=True"
+
+    if packed_transport:
+        call_set = register_call_set(
+            MulticallCallSet(
+                chain_id,
+                web3factory,
+                all_calls,
+                require_multicall_result=require_multicall_result,
+                adaptive_batch_size=adaptive_batch_size,
+                bisect_failures=bisect_failures,
+                call_cache=call_cache,
+            )
+        )
+        call_index = {id(c): idx for idx, c in enumerate(all_calls)}
+        worker_func = _execute_packed_multicall_subprocess
+    else:
+        call_set = None
+        worker_func = _execute_multicall_subprocess
+
     chunk = []
 
-    def _flush_chunk(chunk: list[MulticallHistoricalTask]) -> Iterable[CombinedEncodedCallResult]:
+    def _flush_chunk(chunk: list[MulticallHistoricalTask | PackedMulticallTask]) -> Iterable[CombinedEncodedCallResult]:
         # Pass all buffered calls to sub-multiprocesses for JSON-RPC fetching
         combined_result: CombinedEncodedCallResult
 
         if len(chunk) == 0:
             return
 
-        for combined_result in worker_processor(delayed(_execute_multicall_subprocess)(task) for task in chunk):
+        for combined_result in worker_processor(delayed(worker_func)(task) for task in chunk):
+            if call_set is not None:
+                combined_result = _unpack_multicall_result(combined_result, all_calls)
+
             for r in combined_result.results:
                 # Retrofit states to the result objects
                 assert r.timestamp, f"Got bad result: {r}"
@@ -1408,51 +2204,66 @@ def read_multicall_historical_stateful(
                 r.state = state
             yield combined_result
 
-    last_block = start_block
-    for block_number in range(start_block, end_block, step):
-        # Map prefetch timestamp
-        timestamp = timestamps[block_number]
+    try:
+        last_block = start_block
+        for block_number in range(start_block, end_block, step):
+            # Map prefetch timestamp
+            timestamp = timestamps[block_number]
 
-        # Get the list of calls that are effective for this block and the blocks in the next multicall batch.
-        # Drop vaults that have peaked/dysfunctional
-        accepted_calls = [c for c, state in calls.items() if state.should_invoke(c, block_number, timestamp)]
+            # Get the list of calls that are effective for this block and the blocks in the next multicall batch.
+            # Drop vaults that have peaked/dysfunctional
+            accepted_calls = [c for c, state in calls.items() if state.should_invoke(c, block_number, timestamp)]
 
-        logger.debug(f"Compiling calls for {block_number:,}, {timestamp}, total calls {len(all_calls):,}, accepted calls {len(accepted_calls):,}")
+            logger.debug(f"Compiling calls for {block_number:,}, {timestamp}, total calls {len(all_calls):,}, accepted calls {len(accepted_calls):,}")
 
-        if len(accepted_calls) == 0:
-            logger.debug("Block %d has no calls to perform, skipping", block_number)
-            continue
+            if len(accepted_calls) == 0:
+                logger.debug("Block %d has no calls to perform, skipping", block_number)
+                continue
 
-        task = MulticallHistoricalTask(
-            chain_id,
-            web3factory,
-            block_number,
-            accepted_calls,
-            timestamp=timestamp,
-            require_multicall_result=require_multicall_result,
-        )
+            if call_set is not None:
+                task = PackedMulticallTask(
+                    call_set,
+                    block_number,
+                    call_ids=pack_call_ids(call_index[id(c)] for c in accepted_calls),
+                    timestamp=timestamp,
+                )
+            else:
+                task = MulticallHistoricalTask(
+                    chain_id,
+                    web3factory,
+                    block_number,
+                    accepted_calls,
+                    timestamp=timestamp,
+                    require_multicall_result=require_multicall_result,
+                    adaptive_batch_size=adaptive_batch_size,
+                    bisect_failures=bisect_failures,
+                    call_cache=call_cache,
+                )
 
-        chunk.append(task)
+            chunk.append(task)
 
-        # Check if we are ready to process chunk blocks at a time
-        if len(chunk) > chunk_size:
-            if progress_bar:
-                block_now = chunk[-1].block_number
-                blocks_done = block_now - last_block
-                last_block = block_now
-                progress_bar.update(blocks_done)
-                if progress_suffix is not None:
-                    suffixes = progress_suffix()
-                    progress_bar.set_postfix(suffixes)
+            # Check if we are ready to process chunk blocks at a time
+            if len(chunk) > chunk_size:
+                if progress_bar:
+                    block_now = chunk[-1].block_number
+                    blocks_done = block_now - last_block
+                    last_block = block_now
+                    progress_bar.update(blocks_done)
+                    if progress_suffix is not None:
+                        suffixes = progress_suffix()
+                        progress_bar.set_postfix(suffixes)
 
-            for combined_result in _flush_chunk(chunk):
-                logger.debug(f"Updating states for {combined_result.timestamp} {combined_result.block_number:,}")
-                yield combined_result
+                for combined_result in _flush_chunk(chunk):
+                    logger.debug(f"Updating states for {combined_result.timestamp} {combined_result.block_number:,}")
+                    yield combined_result
 
-            chunk = []
+                chunk = []
 
-    # Process the remaning uneven chunk
-    yield from _flush_chunk(chunk)
+        # Process the remaning uneven chunk
+        yield from _flush_chunk(chunk)
+    finally:
+        if call_set is not None:
+            release_call_set(call_set)
 
     if progress_bar:
         progress_bar.close()
@@ -1468,6 +2279,9 @@ def read_multicall_chunked(
     chunk_size: int = 40,
     progress_bar_desc: str | None = None,
     timestamped_results=True,
+    adaptive_batch_size: Path | None = None,
+    bisect_failures=False,
+    call_cache: CallCache | None = None,
 ) -> Iterable[EncodedCallResult]:
     """Read current data using multiple processes in parallel for speedup.
 
@@ -1561,6 +2375,21 @@ def read_multicall_chunked(
 
         Causes very slow eth_getBlock call, use only if needed.
 
+    :param adaptive_batch_size:
+        Learn multicall batch sizes per provider using this state file.
+
+        See :py:func:`read_multicall_historical`.
+
+    :param bisect_failures:
+        Split failing multicall batches to isolate and quarantine broken calls.
+
+        See :py:func:`read_multicall_historical`.
+
+    :param call_cache:
+        Serve results for finalised blocks from a disk cache.
+
+        See :py:func:`read_multicall_historical`.
+
     :return:
         Iterable of results.
 
@@ -1601,7 +2430,16 @@ def read_multicall_chunked(
             ts = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
         for i in range(0, len(calls), chunk_size):
             chunk = calls[i : i + chunk_size]
-            yield MulticallHistoricalTask(chain_id, web3factory, block_identifier, chunk, timestamp=ts)
+            yield MulticallHistoricalTask(
+                chain_id,
+                web3factory,
+                block_identifier,
+                chunk,
+                timestamp=ts,
+                adaptive_batch_size=adaptive_batch_size,
+                bisect_failures=bisect_failures,
+                call_cache=call_cache,
+            )
 
     performed_calls = success_calls = failed_calls = 0
     for completed_task in worker_processor(delayed(_execute_multicall_subprocess)(task) for task in _task_gen()):
@@ -1667,6 +2505,15 @@ class MulticallHistoricalTask:
     #: Running counter for task ids, for serialisation checks
     task_id: int = field(default_factory=_create_task_id)
 
+    #: Learn multicall batch sizes using this shared state file
+    adaptive_batch_size: Path | None = None
+
+    #: Split failing batches to isolate broken calls
+    bisect_failures: bool = False
+
+    #: Disk cache for finalised block results, reopened in the subprocess
+    call_cache: CallCache | None = None
+
     def __post_init__(self):
         assert callable(self.web3factory)
         assert type(self.block_number) in (int, str), f"Got: {self.block_number}"
@@ -1674,17 +2521,8 @@ class MulticallHistoricalTask:
         assert all(isinstance(c, EncodedCall) for c in self.calls), f"Expected list of EncodedCall objects, got {self.calls}"
 
 
-def _execute_multicall_subprocess(
-    task: MulticallHistoricalTask,
-) -> CombinedEncodedCallResult:
-    """Extract raw JSON-RPC data from a node in.
-
-    - Subprocess entrypoint
-    - This is called by a joblib.Parallel
-    - The subprocess is recycled between different batch jobs
-    - We cache reader Web3 connections between batch jobs
-    - joblib never shuts down this process
-    """
+def _get_subprocess_reader(task: MulticallHistoricalTask) -> MultiprocessMulticallReader:
+    """Get the recycled reader of this worker process for the task's chain."""
     global _reader_instance
 
     reader: MultiprocessMulticallReader
@@ -1702,6 +2540,34 @@ def _execute_multicall_subprocess(
     if reader is None:
         reader = per_chain_readers[task.chain_id] = MultiprocessMulticallReader(task.web3factory)
 
+    if task.adaptive_batch_size is not None and reader.batch_size_controller is None:
+        # The controller lives as long as the worker process,
+        # and syncs learnt sizes with other workers through the state file
+        reader.batch_size_controller = AdaptiveBatchSizeController(state_file=task.adaptive_batch_size)
+
+    # The quarantine of broken calls is kept for the lifetime of the worker process
+    reader.bisect_failures = task.bisect_failures
+
+    if task.call_cache is not None and reader.call_cache is None:
+        # Keep the first unpickled cache instance and its SQLite connection for the lifetime of the worker process
+        reader.call_cache = task.call_cache
+
+    return reader
+
+
+def _execute_multicall_subprocess(
+    task: MulticallHistoricalTask,
+) -> CombinedEncodedCallResult:
+    """Extract raw JSON-RPC data from a node in.
+
+    - Subprocess entrypoint
+    - This is called by a joblib.Parallel
+    - The subprocess is recycled between different batch jobs
+    - We cache reader Web3 connections between batch jobs
+    - joblib never shuts down this process
+    """
+    reader = _get_subprocess_reader(task)
+
     # Read block timestan for this batch
     assert task.chain_id == reader.web3.eth.chain_id, f"chain_id mismatch. Wanted: {task.chain_id}, reader has: {reader.web3.eth.chain_id}"
 
@@ -1724,3 +2590,175 @@ def _execute_multicall_subprocess(
         timestamp=timestamp,
         results=[c for c in call_results],
     )
+
+
+@dataclass(slots=True, frozen=True)
+class MulticallCallSet:
+    """Calls and settings shared by all tasks of a packed transport read.
+
+    - Registered once and loaded once per worker process,
+      see :py:mod:`eth_defi.event_reader.multicall_transport`
+    """
+
+    #: Track which chain this call belongs to
+    chain_id: int
+
+    #: Used to initialise web3 connection in the subprocess
+    web3factory: Web3Factory
+
+    #: All calls of the read, tasks refer to them by index.
+    #:
+    #: :py:class:`CompactEncodedCall` instances are turned to :py:class:`EncodedCall` when the worker loads the call set.
+    calls: list[EncodedCall | CompactEncodedCall]
+
+    #: See :py:class:`MulticallHistoricalTask`
+    require_multicall_result: bool = False
+
+    #: See :py:class:`MulticallHistoricalTask`
+    adaptive_batch_size: Path | None = None
+
+    #: See :py:class:`MulticallHistoricalTask`
+    bisect_failures: bool = False
+
+    #: See :py:class:`MulticallHistoricalTask`
+    call_cache: CallCache | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class PackedMulticallTask:
+    """Minimal task send to subprocesses in the packed transport mode."""
+
+    #: The registered :py:class:`MulticallCallSet`
+    call_set: CallSetRegistration
+
+    #: Block number to scan
+    block_number: BlockIdentifier
+
+    #: Packed indexes of the calls to perform, or ``None`` for all calls
+    call_ids: bytes | None = None
+
+    #: Prefetched timestamp, if any
+    timestamp: datetime.datetime = None
+
+
+@dataclass(slots=True, frozen=True)
+class PackedMulticallResult:
+    """Compact result returned from subprocesses in the packed transport mode."""
+
+    block_number: int
+    timestamp: datetime.datetime
+    results: PackedCallResults
+
+
+def _execute_multi_block_multicall_subprocess(
+    tasks: list[MulticallHistoricalTask],
+) -> list[CombinedEncodedCallResult]:
+    """Subprocess entrypoint for reading several blocks with one JSON-RPC batch.
+
+    - Prefetch all blocks and their timestamps in one round trip,
+      see :py:meth:`MultiprocessMulticallReader.prefetch_multi_block`
+
+    - Then process each block like :py:func:`_execute_multicall_subprocess`
+    """
+    reader = _get_subprocess_reader(tasks[0])
+
+    timestamps = reader.prefetch_multi_block(
+        [(task.block_number, task.calls) for task in tasks],
+        require_multicall_result=tasks[0].require_multicall_result,
+        fetch_timestamps=any(task.timestamp is None for task in tasks),
+    )
+
+    try:
+        return [_execute_multicall_subprocess(replace(task, timestamp=timestamps[task.block_number]) if task.timestamp is None and task.block_number in timestamps else task) for task in tasks]
+    finally:
+        reader.clear_prefetched()
+
+
+def _prepare_call_set(call_set: MulticallCallSet) -> MulticallCallSet:
+    # Run once per worker process when the call set is loaded
+    if not any(isinstance(c, CompactEncodedCall) for c in call_set.calls):
+        return call_set
+    return replace(call_set, calls=[c.to_encoded_call() if isinstance(c, CompactEncodedCall) else c for c in call_set.calls])
+
+
+def _execute_packed_multicall_subprocess(
+    task: PackedMulticallTask | list[PackedMulticallTask],
+) -> PackedMulticallResult | list[PackedMulticallResult]:
+    """Subprocess entrypoint for the packed transport mode.
+
+    - Load the call set on the first task and then recycle it
+    - Return results as packed buffers, not as pickled result objects
+    - A list of tasks is read with one JSON-RPC batch, see :py:func:`_execute_multi_block_multicall_subprocess`
+    """
+    packed_tasks = task if isinstance(task, list) else [task]
+
+    call_set: MulticallCallSet = load_call_set(packed_tasks[0].call_set, prepare=_prepare_call_set)
+
+    call_id_by_object = {}
+    tasks = []
+    for packed_task in packed_tasks:
+        if packed_task.call_ids is None:
+            call_ids = range(len(call_set.calls))
+        else:
+            call_ids = unpack_call_ids(packed_task.call_ids)
+
+        calls = [call_set.calls[idx] for idx in call_ids]
+        call_id_by_object.update((id(c), idx) for c, idx in zip(calls, call_ids))
+
+        tasks.append(
+            MulticallHistoricalTask(
+                call_set.chain_id,
+                call_set.web3factory,
+                packed_task.block_number,
+                calls,
+                require_multicall_result=call_set.require_multicall_result,
+                timestamp=packed_task.timestamp,
+                adaptive_batch_size=call_set.adaptive_batch_size,
+                bisect_failures=call_set.bisect_failures,
+                call_cache=call_set.call_cache,
+            )
+        )
+
+    if isinstance(task, list):
+        combined_results = _execute_multi_block_multicall_subprocess(tasks)
+    else:
+        combined_results = [_execute_multicall_subprocess(tasks[0])]
+
+    packed_results = [
+        PackedMulticallResult(
+            block_number=combined_result.block_number,
+            timestamp=combined_result.timestamp,
+            results=PackedCallResults.pack([(call_id_by_object[id(r.call)], r.success, r.result, r.quarantined) for r in combined_result.results]),
+        )
+        for combined_result in combined_results
+    ]
+
+    if isinstance(task, list):
+        return packed_results
+    return packed_results[0]
+
+
+def _unpack_multicall_result(
+    packed_result: PackedMulticallResult,
+    calls: list[EncodedCall],
+) -> CombinedEncodedCallResult:
+    """Turn a packed subprocess result back to result objects in the main process.
+
+    :param calls:
+        The call set, as registered
+    """
+    return CombinedEncodedCallResult(
+        block_number=packed_result.block_number,
+        timestamp=packed_result.timestamp,
+        results=[
+            EncodedCallResult(
+                call=calls[call_id],
+                success=success,
+                result=result,
+                block_identifier=packed_result.block_number,
+                timestamp=packed_result.timestamp,
+                quarantined=quarantined,
+            )
+            for call_id, success, result, quarantined in packed_result.results.unpack()
+        ],
+    )
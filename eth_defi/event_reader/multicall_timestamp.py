@@ -1,26 +1,25 @@
-"""Read timestamps of blocks using multiprocess."""
+"""Read timestamps of blocks using multiprocess.
+
+- Timestamps are cached across runs in :py:class:`eth_defi.event_reader.timestamp_store.BlockTimestampStore`
+"""
 
 import datetime
 import logging
-import os
-import pickle
 import threading
 from pathlib import Path
-from typing import TypeAlias
 
 from joblib import Parallel, delayed
 from tqdm_loggable.auto import tqdm
 
 from eth_defi.chain import get_chain_name
+from eth_defi.event_reader.timestamp_estimator import BlockTimestampEstimator
+from eth_defi.event_reader.timestamp_store import DEFAULT_TIMESTAMP_STORE_PATH, BlockTimestampStore, open_timestamp_store
 from eth_defi.event_reader.web3factory import Web3Factory
 from eth_defi.timestamp import get_block_timestamp
 
 
 logger = logging.getLogger(__name__)
 
-
-ChainBlockTimestampMap: TypeAlias = dict[int, dict[int, datetime.datetime]]
-
 _timestamp_instance = threading.local()
 
 
@@ -45,24 +44,6 @@ def _read_timestamp_subprocess(
     return block_number, get_block_timestamp(web3, block_number)
 
 
-def _load_data(cache_file: Path) -> ChainBlockTimestampMap:
-    return pickle.load(cache_file.open("rb")) if cache_file.exists() else {}
-
-
-def _save_data(timestamps: ChainBlockTimestampMap, cache_file: Path):
-    assert isinstance(timestamps, dict), "Timestamps must be a dictionary"
-    cache_file.parent.mkdir(parents=True, exist_ok=True)
-    tmp_path = cache_file.with_suffix(cache_file.suffix + ".tmp")
-    with tmp_path.open("wb") as f:
-        pickle.dump(timestamps, f)
-        f.flush()
-        os.fsync(f.fileno())
-    tmp_path.replace(cache_file)  # Atomic move
-
-    size = cache_file.stat().st_size
-    logger.debug(f"Saved block timestamps to {cache_file}, size is {size / 1024 * 1024} MB")
-
-
 def fetch_block_timestamps_multiprocess(
     chain_id: int,
     web3factory: Web3Factory,
@@ -72,8 +53,10 @@ def fetch_block_timestamps_multiprocess(
     display_progress=True,
     max_workers=8,
     timeout=120,
-    cache_file: Path | None = Path.home() / ".cache" / "tradingstrategy" / "block-timestamps.pickle",
+    cache_file: Path | None = DEFAULT_TIMESTAMP_STORE_PATH,
     checkpoint_freq: int = 20_000,
+    timestamp_store: BlockTimestampStore | None = None,
+    max_timestamp_error: float | None = None,
 ) -> dict[int, datetime.datetime]:
     """Extract timestamps using fast multiprocessing.
 
@@ -83,13 +66,30 @@ def fetch_block_timestamps_multiprocess(
     - We cache reader Web3 connections between batch jobs
     - joblib never shuts down this process
 
-    :param cache_file
+    :param cache_file:
         Cache timestamps across runs and commands.
 
-        Set to ``None`` to disable, or remove the file.
-        .
+        Directory of :py:class:`~eth_defi.event_reader.timestamp_store.BlockTimestampStore`.
+        If a legacy ``block-timestamps.pickle`` path is given, its content is migrated
+        to a store directory next to it.
+
+        Set to ``None`` to disable, or remove the directory.
+
     :param checkpoint_freq:
         Block number frequency how often to save.
+
+    :param timestamp_store:
+        Use an already open store instead of ``cache_file``.
+
+    :param max_timestamp_error:
+        Interpolate timestamps instead of reading every block header.
+
+        Only fetch the blocks needed to keep the estimate within this many seconds,
+        see :py:class:`~eth_defi.event_reader.timestamp_estimator.BlockTimestampEstimator`.
+        Use ``0`` for exact timestamps on chains with fixed block time.
+
+    :return:
+        Block number -> naive UTC timestamp map for the blocks in the range
     """
 
     assert start_block <= end_block, f"Start block {start_block} must be less than or equal to end block {end_block}"
@@ -113,22 +113,50 @@ def fetch_block_timestamps_multiprocess(
     else:
         progress_bar = None
 
-    existing_data = _load_data(cache_file)
+    if timestamp_store is None:
+        timestamp_store = open_timestamp_store(cache_file)
+
+    block_range = range(start_block, end_block + 1, step)
+
+    # O(log n) lookup per block, no need to load the whole cache
+    if timestamp_store is not None:
+        result = timestamp_store.get_many(chain_id, block_range)
+    else:
+        result = {}
+
+    logger.info("Chain %d: %d / %d block timestamps found in the cache", chain_id, len(result), len(block_range))
+
+    if max_timestamp_error is not None:
+        estimator = BlockTimestampEstimator(chain_id, timestamp_store=timestamp_store)
+        estimator.add_anchors(result)
 
-    result: ChainBlockTimestampMap = existing_data
-    result[chain_id] = result.get(chain_id, {})
+        def _fetcher(block_numbers: list[int]) -> dict[int, datetime.datetime]:
+            fetched = dict(worker_processor(delayed(_read_timestamp_subprocess)(web3factory, chain_id, b) for b in block_numbers))
+            if progress_bar:
+                progress_bar.update(len(fetched))
+            return fetched
+
+        result = estimator.resolve(None, block_range, max_error=max_timestamp_error, fetcher=_fetcher)
+
+        if progress_bar:
+            progress_bar.close()
+
+        return result
 
     def _task_gen():
         nonlocal web3factory
-        for _block_number in range(start_block, end_block + 1, step):
-            if result[chain_id].get(_block_number) is None:
+        for _block_number in block_range:
+            if result.get(_block_number) is None:
                 yield web3factory, chain_id, _block_number
 
     last_save = 0
 
     for completed_task in worker_processor(delayed(_read_timestamp_subprocess)(*args) for args in _task_gen()):
         block_number, timestamp = completed_task
-        result[chain_id][block_number] = timestamp
+        result[block_number] = timestamp
+
+        if timestamp_store is not None:
+            timestamp_store.add(chain_id, block_number, timestamp)
 
         if progress_bar:
             progress_bar.update(1)
@@ -139,12 +167,15 @@ def fetch_block_timestamps_multiprocess(
             )
 
         if block_number - last_save >= checkpoint_freq:
-            # Save the current state to the cache file
+            # Append new entries to the store, O(new entries)
             last_save = block_number
-            if cache_file:
-                _save_data(result, cache_file)
+            if timestamp_store is not None:
+                timestamp_store.flush(chain_id)
+
+    if timestamp_store is not None:
+        timestamp_store.flush(chain_id)
 
     if progress_bar:
         progress_bar.close()
 
-    return result[chain_id]
+    return result
@@ -0,0 +1,183 @@
+"""Compact task and result transport for multicall subprocess workers.
+
+- The call set of a historical read is registered once: pickled to a temporary file
+  that each worker process loads only the first time it sees the call set id
+
+- Tasks then carry only the block number and the ids of the calls to perform
+
+- Results come back as packed buffers (success bitmap + offsets + concatenated return data)
+  instead of pickled :py:class:`~eth_defi.event_reader.multicall_batcher.EncodedCallResult` objects
+
+See ``packed_transport`` in :py:func:`eth_defi.event_reader.multicall_batcher.read_multicall_historical`.
+"""
+
+import logging
+import os
+import pickle
+import tempfile
+import uuid
+from array import array
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+
+#: How many call sets a worker process keeps loaded
+MAX_LOADED_CALL_SETS = 4
+
+#: Call set id -> unpickled payload, per worker process
+_loaded_call_sets: dict[str, Any] = {}
+
+
+@dataclass(slots=True, frozen=True)
+class CallSetRegistration:
+    """Reference to a call set shared with worker processes.
+
+    - Cheap to pickle, passed with every task instead of the calls themselves
+    """
+
+    #: Unique id of the call set
+    call_set_id: str
+
+    #: Pickle file the workers load the call set from
+    path: Path
+
+
+def register_call_set(payload: Any, directory: Path | None = None) -> CallSetRegistration:
+    """Write a call set for worker processes.
+
+    - Release with :py:func:`release_call_set` when the read is done
+
+    :param payload:
+        Any picklable object, usually the calls and the settings shared by all tasks
+
+    :param directory:
+        Where to write the file. Default to the system temporary directory.
+
+    :return:
+        Registration to pass to the tasks
+    """
+    call_set_id = uuid.uuid4().hex
+    fd, path = tempfile.mkstemp(prefix=f"multicall-{call_set_id}-", suffix=".pickle", dir=directory)
+    with os.fdopen(fd, "wb") as out:
+        pickle.dump(payload, out, protocol=pickle.HIGHEST_PROTOCOL)
+    logger.debug("Registered call set %s at %s, %d bytes", call_set_id, path, os.path.getsize(path))
+    return CallSetRegistration(call_set_id=call_set_id, path=Path(path))
+
+
+def load_call_set(registration: CallSetRegistration, prepare: Callable[[Any], Any] | None = None) -> Any:
+    """Get a call set in a worker process.
+
+    - Read from the disk only the first time the worker sees the call set id
+
+    :param prepare:
+        Transform the payload once after loading it
+    """
+    payload = _loaded_call_sets.get(registration.call_set_id)
+    if payload is None:
+        with open(registration.path, "rb") as inp:
+            payload = pickle.load(inp)
+        if prepare is not None:
+            payload = prepare(payload)
+        while len(_loaded_call_sets) >= MAX_LOADED_CALL_SETS:
+            del _loaded_call_sets[next(iter(_loaded_call_sets))]
+        _loaded_call_sets[registration.call_set_id] = payload
+    return payload
+
+
+def release_call_set(registration: CallSetRegistration):
+    """Delete the call set file."""
+    try:
+        registration.path.unlink()
+    except FileNotFoundError:
+        pass
+
+
+def pack_call_ids(call_ids: Iterable[int]) -> bytes:
+    """Pack call indexes for a task."""
+    return array("I", call_ids).tobytes()
+
+
+def unpack_call_ids(data: bytes) -> array:
+    """Unpack call indexes of a task."""
+    ids = array("I")
+    ids.frombytes(data)
+    return ids
+
+
+def _pack_bitmap(flags: list[bool]) -> bytes:
+    bitmap = bytearray((len(flags) + 7) // 8)
+    for idx, flag in enumerate(flags):
+        if flag:
+            bitmap[idx >> 3] |= 1 << (idx & 7)
+    return bytes(bitmap)
+
+
+def _get_bit(bitmap: bytes, idx: int) -> bool:
+    return bool(bitmap[idx >> 3] & (1 << (idx & 7)))
+
+
+@dataclass(slots=True, frozen=True)
+class PackedCallResults:
+    """Results of many calls packed to a few flat buffers.
+
+    - Result ``i`` belongs to call ``call_ids[i]`` and its return data is ``data[offsets[i]:offsets[i + 1]]``
+    """
+
+    #: Call indexes in the call set, ``array("I")`` bytes
+    call_ids: bytes
+
+    #: Bit ``i`` is set if call ``i`` succeeded
+    success: bytes
+
+    #: Bit ``i`` is set if call ``i`` was quarantined
+    quarantined: bytes
+
+    #: Start offsets of the return data, plus the end offset, ``array("I")`` bytes
+    offsets: bytes
+
+    #: Concatenated return data
+    data: bytes
+
+    def __len__(self):
+        return len(self.call_ids) // array("I").itemsize
+
+    @classmethod
+    def pack(cls, results: list[tuple[int, bool, bytes, bool]]) -> "PackedCallResults":
+        """Pack results.
+
+        :param results:
+            List of (call id, success, return data, quarantined)
+        """
+        offsets = array("I", [0])
+        position = 0
+        for _, _, result, _ in results:
+            position += len(result)
+            offsets.append(position)
+
+        return PackedCallResults(
+            call_ids=pack_call_ids(r[0] for r in results),
+            success=_pack_bitmap([r[1] for r in results]),
+            quarantined=_pack_bitmap([r[3] for r in results]),
+            offsets=offsets.tobytes(),
+            data=b"".join(r[2] for r in results),
+        )
+
+    def unpack(self) -> Iterable[tuple[int, bool, bytes, bool]]:
+        """Unpack results.
+
+        :return:
+            Iterable of (call id, success, return data, quarantined)
+        """
+        call_ids = unpack_call_ids(self.call_ids)
+        offsets = unpack_call_ids(self.offsets)
+        data = self.data
+        for idx, call_id in enumerate(call_ids):
+            yield (
+                call_id,
+                _get_bit(self.success, idx),
+                data[offsets[idx] : offsets[idx + 1]],
+                _get_bit(self.quarantined, idx),
+            )
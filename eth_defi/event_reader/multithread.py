@@ -6,11 +6,13 @@ from requests.adapters import HTTPAdapter
 from web3.contract.contract import ContractEvent
 
 from eth_defi.event_reader.filter import Filter
+from eth_defi.event_reader.log_cache import LogCache
 from eth_defi.event_reader.logresult import LogResult
 from eth_defi.event_reader.reader import Web3EventReader, read_events_concurrent, ReaderConnection, ProgressUpdate, read_events
 from eth_defi.event_reader.reorganisation_monitor import ReorganisationMonitor
 from eth_defi.event_reader.web3factory import TunedWeb3Factory
 from eth_defi.event_reader.web3worker import create_thread_pool_executor
+from eth_defi.provider.log_block_range import AdaptiveLogRangePlanner
 
 
 class MultithreadEventReader(Web3EventReader):
@@ -161,6 +163,8 @@ class MultithreadEventReader(Web3EventReader):
         reorg_mon: Optional[ReorganisationMonitor] = None,
         notify: Optional[ProgressUpdate] = None,
         auto_close_notify=True,
+        range_planner: Optional[AdaptiveLogRangePlanner] = None,
+        log_cache: Optional[LogCache] = None,
     ):
         """Creates a multithreaded JSON-RPC reader pool.
 
@@ -204,6 +208,17 @@ class MultithreadEventReader(Web3EventReader):
 
             Assume notifier object has close() method.
 
+        :param range_planner:
+            Size eth_getLogs block ranges adaptively based on the provider limits and log density,
+            instead of using fixed ``max_blocks_once``.
+
+            See :py:class:`eth_defi.provider.log_block_range.AdaptiveLogRangePlanner`.
+
+        :param log_cache:
+            Serve finalised blocks from a disk cache on reruns.
+
+            See :py:class:`eth_defi.event_reader.log_cache.LogCache`.
+
         """
         self.http_adapter = HTTPAdapter(pool_connections=max_threads, pool_maxsize=max_threads)
         self.web3_factory = TunedWeb3Factory(json_rpc_url, self.http_adapter, thread_local_cache=True, api_counter=api_counter)
@@ -213,6 +228,8 @@ class MultithreadEventReader(Web3EventReader):
         self.reorg_mon = reorg_mon
         self.notify = notify
         self.auto_close_notify = auto_close_notify
+        self.range_planner = range_planner
+        self.log_cache = log_cache
 
         # Set up the timestamp reading method
 
@@ -286,6 +303,8 @@ class MultithreadEventReader(Web3EventReader):
                 notify=self.notify,
                 extract_timestamps=extract_timestamps,
                 chunk_size=self.max_blocks_once,
+                range_planner=self.range_planner,
+                log_cache=self.log_cache,
             )
 
         else:
@@ -300,6 +319,8 @@ class MultithreadEventReader(Web3EventReader):
                 notify=self.notify,
                 extract_timestamps=extract_timestamps,
                 chunk_size=self.max_blocks_once,
+                range_planner=self.range_planner,
+                log_cache=self.log_cache,
             )
 
     def get_total_api_call_counts(self) -> Counter:
@@ -71,6 +71,16 @@ class ParquetDatasetBlockDataStore(BlockDataStore):
         df = filtered_table.to_pandas()
         return df
 
+    def load_partition(self, partition_start: int) -> pd.DataFrame:
+        """Load data of a single partition.
+
+        :param partition_start:
+            As returned by :py:meth:`floor_block_number_to_partition_start`
+        """
+        dataset = ds.dataset(self.path, partitioning=self.partitioning)
+        filtered_table = dataset.to_table(filter=ds.field("partition") == partition_start)
+        return filtered_table.to_pandas()
+
     def save(self, df: pd.DataFrame, since_block_number: int = 0, check_contains_all_blocks=True):
         """Save all data from parquet.
 
@@ -28,7 +28,10 @@ from eth_defi.event_reader.reorganisation_monitor import ReorganisationMonitor
 from eth_defi.event_reader.web3factory import TunedWeb3Factory
 from eth_defi.event_reader.web3worker import get_worker_web3, create_thread_pool_executor
 from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.event_reader.fast_json_rpc import make_batch_request
+from eth_defi.event_reader.log_cache import LogCache
 from eth_defi.middleware import is_retryable_http_exception
+from eth_defi.provider.log_block_range import AdaptiveLogRangePlanner, is_log_range_too_large_error
 
 logger = logging.getLogger(__name__)
 
@@ -166,10 +169,12 @@ def extract_timestamps_json_rpc(
     web3: Web3,
     start_block: int,
     end_block: int,
+    batch_size: int = 100,
 ) -> Dict[str, int]:
     """Get block timestamps from block headers.
 
     Use slow JSON-RPC block headers call to get this information.
+    Headers are requested in JSON-RPC batches of ``batch_size``.
 
     TODO: This is an old code path. This has been replaced by more robust
     :py:class:`ReorganisationMonitor` implementation.
@@ -181,16 +186,49 @@ def extract_timestamps_json_rpc(
 
     logging.debug("Extracting timestamps for logs %d - %d", start_block, end_block)
 
-    # Collect block timestamps from the headers
-    for block_num in range(start_block, end_block + 1):
-        raw_result = web3.manager.request_blocking("eth_getBlockByNumber", (hex(block_num), False))
-        data_block_number = convert_jsonrpc_value_to_int(raw_result["number"])
-        assert data_block_number == block_num, "Blockchain node did not give us the block we want"
-        timestamps[raw_result["hash"]] = convert_jsonrpc_value_to_int(raw_result["timestamp"])
+    # Collect block timestamps from the headers,
+    # many headers per JSON-RPC batch
+    for batch_start in range(start_block, end_block + 1, batch_size):
+        block_numbers = range(batch_start, min(batch_start + batch_size, end_block + 1))
+        responses = make_batch_request(web3, [("eth_getBlockByNumber", (hex(block_num), False)) for block_num in block_numbers])
+        for block_num, response in zip(block_numbers, responses):
+            raw_result = response["result"]
+            assert raw_result is not None, f"Blockchain node did not have block {block_num}"
+            data_block_number = convert_jsonrpc_value_to_int(raw_result["number"])
+            assert data_block_number == block_num, "Blockchain node did not give us the block we want"
+            timestamps[raw_result["hash"]] = convert_jsonrpc_value_to_int(raw_result["timestamp"])
 
     return timestamps
 
 
+def create_filter_params(filter: Filter, start_block: int, end_block: int) -> dict:
+    """Create ``eth_getLogs`` JSON-RPC parameters for a block range.
+
+    :param start_block:
+        First block to process (inclusive)
+
+    :param end_block:
+        Last block to process (inclusive)
+    """
+    topics = list(filter.topics.keys())
+
+    # https://www.quicknode.com/docs/ethereum/eth_getLogs
+    # https://docs.alchemy.com/alchemy/guides/eth_getlogs
+    filter_params = {
+        "topics": [topics],  # JSON-RPC has totally braindead API to say how to do OR event lookup
+        "fromBlock": hex(start_block),
+        "toBlock": hex(end_block),
+    }
+
+    # Do the filtering by address.
+    # eth_getLogs gets single address or JSON list of addresses
+    if filter.contract_address:
+        assert type(filter.contract_address) in (list, str), f"Got: {type(filter.contract_address)}"
+        filter_params["address"] = filter.contract_address
+
+    return filter_params
+
+
 def extract_events(
     web3: Web3,
     start_block: int,
@@ -201,6 +239,7 @@ def extract_events(
     reorg_mon: Optional[ReorganisationMonitor] = None,
     attempts=5,
     throttle_sleep=15,
+    log_cache: Optional[LogCache] = None,
 ) -> Iterable[LogResult]:
     """Perform eth_getLogs call over a block range.
 
@@ -229,6 +268,9 @@ def extract_events(
     :param reorg_mon:
         If passed, use this instance to monitor and raise chain reorganisation exceptions.
 
+    :param log_cache:
+        Serve finalised blocks from a disk cache, see :py:class:`eth_defi.event_reader.log_cache.LogCache`.
+
     :return:
         Iterable for the raw event data
     """
@@ -236,32 +278,22 @@ def extract_events(
     if reorg_mon:
         assert extract_timestamps is None, "You cannot pass both reorg_mon and extract_timestamps"
 
-    topics = list(filter.topics.keys())
-
-    # https://www.quicknode.com/docs/ethereum/eth_getLogs
-    # https://docs.alchemy.com/alchemy/guides/eth_getlogs
-    filter_params = {
-        "topics": [topics],  # JSON-RPC has totally braindead API to say how to do OR event lookup
-        "fromBlock": hex(start_block),
-        "toBlock": hex(end_block),
-    }
-
-    # Do the filtering by address.
-    # eth_getLogs gets single address or JSON list of addresses
-    if filter.contract_address:
-        assert type(filter.contract_address) in (list, str), f"Got: {type(filter.contract_address)}"
-        filter_params["address"] = filter.contract_address
+    filter_params = create_filter_params(filter, start_block, end_block)
 
     # logging.debug("Extracting logs %s", filter_params)
     # logging.info("Log range %d - %d", start_block, end_block)
 
-    try:
+    def _get_logs(from_block: int, to_block: int) -> list[dict]:
+        params = filter_params | {"fromBlock": hex(from_block), "toBlock": hex(to_block)}
         # Bypass all middleware so it does not slow us down
         for attempt in range(attempts, 0, -1):
             try:
-                logs = web3.manager.request_blocking("eth_getLogs", (filter_params,))
-                break
+                return web3.manager.request_blocking("eth_getLogs", (params,))
             except Exception as e:
+                if is_log_range_too_large_error(e):
+                    # No point retrying the same range
+                    raise
+
                 if is_retryable_http_exception(e) and attempt > 0:
                     logger.warning(
                         "Throttling extract_events(): %s, sleeping %s",
@@ -273,6 +305,11 @@ def extract_events(
                 else:
                     raise
 
+    try:
+        if log_cache is not None:
+            logs = log_cache.fetch_logs(web3, filter_params.get("address"), filter_params["topics"], start_block, end_block, _get_logs)
+        else:
+            logs = _get_logs(start_block, end_block)
     except Exception as e:
         block_count = end_block - start_block
         raise ReadingLogsFailed(f"eth_getLogs failed for {start_block:,} - {end_block:,} (total {block_count:,} with filter {filter}") from e
@@ -335,12 +372,56 @@ def extract_events(
             yield log
 
 
+def extract_events_adaptive(
+    web3: Web3,
+    start_block: int,
+    end_block: int,
+    filter: Filter,
+    range_planner: AdaptiveLogRangePlanner,
+    context: Optional[LogContext] = None,
+    extract_timestamps: Optional[Callable] = extract_timestamps_json_rpc,
+    reorg_mon: Optional[ReorganisationMonitor] = None,
+    log_cache: Optional[LogCache] = None,
+) -> List[LogResult]:
+    """Perform eth_getLogs call over a block range, splitting the range if the provider says it is too large.
+
+    - Results are reported back to the range planner, so it can learn the log density
+
+    See :py:class:`eth_defi.provider.log_block_range.AdaptiveLogRangePlanner`.
+
+    :param start_block:
+        First block to process (inclusive)
+
+    :param end_block:
+        Last block to process (inclusive)
+
+    :return:
+        Events of the whole range, in the chain order
+    """
+    try:
+        events = list(extract_events(web3, start_block, end_block, filter, context, extract_timestamps, reorg_mon, log_cache=log_cache))
+    except ReadingLogsFailed as e:
+        sub_ranges = range_planner.record_too_large(start_block, end_block, e)
+        if not sub_ranges:
+            raise
+
+        events = []
+        for sub_start, sub_end in sub_ranges:
+            events += extract_events_adaptive(web3, sub_start, sub_end, filter, range_planner, context, extract_timestamps, reorg_mon, log_cache)
+        return events
+
+    range_planner.record_success(start_block, end_block, len(events))
+    return events
+
+
 def extract_events_concurrent(
     start_block: int,
     end_block: int,
     filter: Filter,
     context: Optional[LogContext] = None,
     extract_timestamps: Optional[Callable] = extract_timestamps_json_rpc,
+    range_planner: Optional[AdaptiveLogRangePlanner] = None,
+    log_cache: Optional[LogCache] = None,
 ) -> List[LogResult]:
     """Concurrency happy event extractor.
 
@@ -354,7 +435,9 @@ def extract_events_concurrent(
     logger.debug("Starting block scan %d - %d at thread %d for %d different events", start_block, end_block, threading.get_ident(), len(filter.topics))
     web3 = get_worker_web3()
     assert web3 is not None
-    events = list(extract_events(web3, start_block, end_block, filter, context, extract_timestamps))
+    if range_planner is not None:
+        return extract_events_adaptive(web3, start_block, end_block, filter, range_planner, context, extract_timestamps, log_cache=log_cache)
+    events = list(extract_events(web3, start_block, end_block, filter, context, extract_timestamps, log_cache=log_cache))
     return events
 
 
@@ -389,6 +472,8 @@ def read_events(
     extract_timestamps: Optional[Callable] = extract_timestamps_json_rpc,
     filter: Optional[Filter] = None,
     reorg_mon: Optional[ReorganisationMonitor] = None,
+    range_planner: Optional[AdaptiveLogRangePlanner] = None,
+    log_cache: Optional[LogCache] = None,
 ) -> Iterable[LogResult]:
     """Reads multiple events from the blockchain.
 
@@ -518,6 +603,16 @@ def read_events(
     :param reorg_mon:
         If passed, use this instance to monitor and raise chain reorganisation exceptions.
 
+    :param range_planner:
+        Size eth_getLogs block ranges adaptively instead of using a fixed ``chunk_size``.
+
+        See :py:class:`eth_defi.provider.log_block_range.AdaptiveLogRangePlanner`.
+
+    :param log_cache:
+        Serve finalised blocks from a disk cache instead of JSON-RPC.
+
+        See :py:class:`eth_defi.event_reader.log_cache.LogCache`.
+
     :return:
         Iterate over :py:class:`LogResult` instances for each event matched in
         the filter.
@@ -538,23 +633,23 @@ def read_events(
 
     last_timestamp = None
 
-    for block_num in range(start_block, end_block + 1, chunk_size):
-        last_of_chunk = min(end_block, block_num + chunk_size - 1)
+    if range_planner is not None:
+        chunks = range_planner.iterate_chunks(start_block, end_block)
+    else:
+        chunks = ((block_num, min(end_block, block_num + chunk_size - 1)) for block_num in range(start_block, end_block + 1, chunk_size))
 
+    for block_num, last_of_chunk in chunks:
         logger.debug("Extracting eth_getLogs from %d - %d", block_num, last_of_chunk)
 
         batch_events = 0
 
+        if range_planner is not None:
+            chunk_events = extract_events_adaptive(web3, block_num, last_of_chunk, filter, range_planner, context, extract_timestamps, reorg_mon, log_cache)
+        else:
+            chunk_events = extract_events(web3, block_num, last_of_chunk, filter, context, extract_timestamps, reorg_mon, log_cache=log_cache)
+
         # Stream the events
-        for event in extract_events(
-            web3,
-            block_num,
-            last_of_chunk,
-            filter,
-            context,
-            extract_timestamps,
-            reorg_mon,
-        ):
+        for event in chunk_events:
             last_timestamp = event.get("timestamp")
             total_events += 1
             batch_events += 1
@@ -578,6 +673,8 @@ def read_events_concurrent(
     extract_timestamps: Optional[Callable] = extract_timestamps_json_rpc,
     filter: Optional[Filter] = None,
     reorg_mon: Optional[ReorganisationMonitor] = None,
+    range_planner: Optional[AdaptiveLogRangePlanner] = None,
+    log_cache: Optional[LogCache] = None,
 ) -> Iterable[LogResult]:
     """Reads multiple events from the blockchain parallel using a thread pool for IO.
 
@@ -665,6 +762,17 @@ def read_events_concurrent(
     :param reorg_mon:
         If passed, use this instance to monitor and raise chain reorganisation exceptions.
 
+    :param range_planner:
+        Pre-plan eth_getLogs block ranges using the log density learnt in previous reads,
+        instead of using a fixed ``chunk_size``. Ranges that turn out too large are split by the workers.
+
+        See :py:class:`eth_defi.provider.log_block_range.AdaptiveLogRangePlanner`.
+
+    :param log_cache:
+        Serve finalised blocks from a disk cache instead of JSON-RPC.
+
+        See :py:class:`eth_defi.event_reader.log_cache.LogCache`.
+
     :return:
         Iterate over :py:class:`LogResult` instances for each event matched in
         the filter.
@@ -694,14 +802,20 @@ def read_events_concurrent(
     task_list: Dict[int, tuple] = {}
     completed_tasks: Dict[int, tuple] = {}
 
-    for block_num in range(start_block, end_block + 1, chunk_size):
-        last_of_chunk = min(end_block, block_num + chunk_size - 1)
+    if range_planner is not None:
+        chunks = range_planner.plan(start_block, end_block)
+    else:
+        chunks = [(block_num, min(end_block, block_num + chunk_size - 1)) for block_num in range(start_block, end_block + 1, chunk_size)]
+
+    for block_num, last_of_chunk in chunks:
         task_list[block_num] = (
             block_num,
             last_of_chunk,
             filter,
             context,
             extract_timestamps,
+            range_planner,
+            log_cache,
         )
 
     # Run all tasks and handle backpressure. Task manager
@@ -18,7 +18,9 @@ from web3 import HTTPProvider, Web3
 
 from eth_defi.chain import get_graphql_url, has_graphql_support
 from eth_defi.event_reader.block_header import BlockHeader, Timestamp
+from eth_defi.event_reader.block_header_window import BlockHeaderWindow, is_same_block_hash
 from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.event_reader.fast_json_rpc import make_batch_request
 from eth_defi.provider.fallback import FallbackProvider
 from eth_defi.provider.mev_blocker import MEVBlockerProvider
 
@@ -200,7 +202,10 @@ class ReorganisationMonitor(ABC):
     #: Internal buffer of our block data
     #:
     #: Block number -> Block header data
-    block_map: Dict[int, BlockHeader] = field(default_factory=dict)
+    #:
+    #: Pass :py:class:`~eth_defi.event_reader.block_header_window.BlockHeaderWindow`
+    #: to keep only a bounded number of the latest headers in memory in long running processes.
+    block_map: Dict[int, BlockHeader] | BlockHeaderWindow = field(default_factory=dict)
 
     #: Last block served by :py:meth:`update_chain` in the duty cycle
     last_block_read: int = 0
@@ -221,6 +226,14 @@ class ReorganisationMonitor(ABC):
     #: If our node constantly feeds us changing data give up.
     reorg_wait_seconds = 5
 
+    #: Only compare our last stored block against the live chain.
+    #:
+    #: Instead of re-reading ``check_depth`` block headers in every :py:meth:`figure_reorganisation_and_new_blocks`,
+    #: read the new blocks and our last stored block, which is the parent of the first new block.
+    #: If the stored block has changed, find the fork point with a binary search,
+    #: using ``O(log check_depth)`` header reads.
+    ancestor_hash_check: bool = False
+
     def has_data(self) -> bool:
         """Do we have any data available yet."""
         return len(self.block_map) > 0
@@ -233,6 +246,12 @@ class ReorganisationMonitor(ABC):
         """Get block header data for a specific block number from our memory buffer."""
         return self.block_map.get(block_number)
 
+    def get_last_recorded_block(self) -> int | None:
+        """Get the last block we have a header for in our memory buffer."""
+        if isinstance(self.block_map, BlockHeaderWindow):
+            return self.block_map.get_last_block()
+        return max(self.block_map.keys(), default=None)
+
     def skip_to_block(self, block_number: int):
         """Skip scanning initial chain and directly start from a certain block."""
         assert type(block_number) == int, f"Got: {block_number}"
@@ -281,7 +300,7 @@ class ReorganisationMonitor(ABC):
         if len(self.block_map) > 0:
             # We have some initial data from the last (aborted) run,
             # We always need to start from the last save because no gaps in data allowed
-            oldest_saved_block = max(self.block_map.keys())
+            oldest_saved_block = self.get_last_recorded_block()
             start_block = oldest_saved_block + 1
 
         blocks = end_block - start_block
@@ -346,7 +365,7 @@ class ReorganisationMonitor(ABC):
         """
         original_block = self.block_map.get(block_number)
         if original_block is not None:
-            if original_block.block_hash != block_hash:
+            if original_block.block_hash != block_hash and not is_same_block_hash(original_block.block_hash, block_hash):
                 raise ChainReorganisationDetected(block_number, original_block.block_hash, block_hash)
 
             return original_block.timestamp
@@ -360,6 +379,11 @@ class ReorganisationMonitor(ABC):
             Delete all data starting after this block (exclusive)
         """
         assert self.last_block_read
+        if isinstance(self.block_map, BlockHeaderWindow):
+            self.block_map.truncate(latest_good_block)
+            self.last_block_read = latest_good_block
+            return
+
         for block_to_delete in range(latest_good_block + 1, self.last_block_read + 1):
             del self.block_map[block_to_delete]
         self.last_block_read = latest_good_block
@@ -385,6 +409,11 @@ class ReorganisationMonitor(ABC):
         chain_last_block = self.get_last_block_live()
         check_start_at = max(self.last_block_read - self.check_depth, 1)
 
+        stored_head = self.block_map.get(self.last_block_read) if self.last_block_read else None
+        ancestor_hash_check = self.ancestor_hash_check and stored_head is not None and chain_last_block >= self.last_block_read
+        if ancestor_hash_check:
+            check_start_at = self.last_block_read
+
         logger.info(f"figure_reorganisation_and_new_blocks(), range {check_start_at:,} - {chain_last_block:,}, last block we have is {self.last_block_read:,}, check depth is %d", self.check_depth)
 
         if max_range is not None:
@@ -392,22 +421,101 @@ class ReorganisationMonitor(ABC):
             if range_len > max_range:
                 raise TooLongRange(f"Attempt to scan too long block range. {check_start_at:,} - {chain_last_block:,}. Max range: {max_range:,}.\nFor long scan ranges, please pass a flag to ignore.")
 
+        if ancestor_hash_check:
+            self.check_ancestor_and_add_new_blocks(stored_head, chain_last_block)
+            return
+
         for block in self.fetch_block_data(check_start_at, chain_last_block):
             self.check_block_reorg(block.block_number, block.block_hash)
-            if block.block_number not in self.block_map:
+            if block.block_number not in self.block_map and not self._is_evicted(block.block_number):
                 self.add_block(block)
 
+    def check_ancestor_and_add_new_blocks(self, stored_head: BlockHeader, chain_last_block: int):
+        """Add new blocks if our stored chain head is still the ancestor of the live chain.
+
+        - Used with :py:attr:`ancestor_hash_check`
+
+        :param stored_head:
+            Our last stored block
+
+        :param chain_last_block:
+            The live chain tip
+
+        :raise ChainReorganisationDetected:
+            At the first block that differs from our records
+        """
+        blocks = iter(self.fetch_block_data(stored_head.block_number, chain_last_block))
+        live_head = next(blocks, None)
+        if live_head is None:
+            # Chain tip unstable, try again on the next cycle
+            return
+
+        if not is_same_block_hash(stored_head.block_hash, live_head.block_hash):
+            fork_block, original_hash, new_hash = self.find_fork_block(stored_head.block_number, stored_head.block_hash, live_head.block_hash)
+            raise ChainReorganisationDetected(fork_block, original_hash, new_hash)
+
+        for block in blocks:
+            self.add_block(block)
+
+    def find_fork_block(self, mismatch_block: int, original_hash: str, new_hash: str) -> Tuple[int, str, str]:
+        """Binary search the first block that differs from our records.
+
+        - A changed block changes the hashes of all blocks after it,
+          so the blocks matching our records form a prefix of the range
+
+        - The search range is bounded by :py:attr:`check_depth`, like in the full scan
+
+        :param mismatch_block:
+            A block known to differ from our records
+
+        :param original_hash:
+            Our hash of ``mismatch_block``
+
+        :param new_hash:
+            The live hash of ``mismatch_block``
+
+        :return:
+            Tuple (first differing block number, our hash, live hash)
+        """
+        low = max(mismatch_block - self.check_depth, 1) - 1
+        high = mismatch_block
+        fetches = 0
+        while high - low > 1:
+            mid = (low + high) // 2
+            stored = self.block_map.get(mid)
+            live = next(iter(self.fetch_block_data(mid, mid)), None)
+            fetches += 1
+            if stored is None or live is None or not is_same_block_hash(stored.block_hash, live.block_hash):
+                high = mid
+                if stored is not None and live is not None:
+                    original_hash, new_hash = stored.block_hash, live.block_hash
+            else:
+                low = mid
+
+        logger.info("Fork point found at block %d with %d header reads", high, fetches)
+        return high, original_hash, new_hash
+
+    def _is_evicted(self, block_number: int) -> bool:
+        """Has the block fallen out of the bounded header window."""
+        return isinstance(self.block_map, BlockHeaderWindow) and self.block_map.is_evicted(block_number)
+
     def get_block_timestamp(self, block_number: int) -> int:
         """Return UNIX UTC timestamp of a block."""
 
         if not self.block_map:
             raise BlockNotAvailable("We have no records of any blocks")
 
-        if block_number not in self.block_map:
-            last_recorded_block_num = max(self.block_map.keys())
-            raise BlockNotAvailable(f"Block {block_number} has not data, the latest live block is {self.get_last_block_live()}, last recorded is {last_recorded_block_num}")
+        if isinstance(self.block_map, BlockHeaderWindow):
+            # Falls back to the spill store for old blocks
+            timestamp = self.block_map.get_timestamp(block_number)
+        else:
+            header = self.block_map.get(block_number)
+            timestamp = header.timestamp if header else None
+
+        if timestamp is None:
+            raise BlockNotAvailable(f"Block {block_number} has not data, the latest live block is {self.get_last_block_live()}, last recorded is {self.last_block_read}")
 
-        return self.block_map[block_number].timestamp
+        return timestamp
 
     def get_block_timestamp_as_pandas(self, block_number: int) -> pd.Timestamp:
         """Return UNIX UTC timestamp of a block."""
@@ -478,11 +586,21 @@ class ReorganisationMonitor(ABC):
     def restore(self, block_map: dict):
         """Restore the chain state from a saved data.
 
+        - If we use :py:class:`~eth_defi.event_reader.block_header_window.BlockHeaderWindow`,
+          only the latest headers fitting in the window are kept in memory
+
         :param block_map:
             Block number -> Block header dictionary
         """
         assert type(block_map) == dict, f"Got: {type(block_map)}"
-        self.block_map = block_map
+        if isinstance(self.block_map, BlockHeaderWindow):
+            window = self.block_map
+            window.clear()
+            last_block = max(block_map.keys())
+            for block_number in range(max(last_block - window.capacity + 1, min(block_map.keys())), last_block + 1):
+                window[block_number] = block_map[block_number]
+        else:
+            self.block_map = block_map
         self.last_block_read = max(block_map.keys())
 
     @abstractmethod
@@ -506,11 +624,20 @@ class JSONRPCReorganisationMonitor(ReorganisationMonitor):
 
     - Use expensive eth_getBlockByNumber call to download
       block hash and timestamp from Ethereum compatible node
+
+    - Headers are requested in JSON-RPC batches of ``batch_size``
     """
 
-    def __init__(self, web3: Web3, **kwargs):
+    def __init__(self, web3: Web3, batch_size: int = 50, **kwargs):
+        """
+        :param batch_size:
+            How many ``eth_getBlockByNumber`` calls to pack in one JSON-RPC batch.
+
+            Set to 1 to disable batching.
+        """
         super().__init__(**kwargs)
         self.web3 = web3
+        self.batch_size = batch_size
 
     def __repr__(self):
         return f"<JSONRPCReorganisationMonitor, last_block_read: {self.last_block_read}>"
@@ -524,34 +651,46 @@ class JSONRPCReorganisationMonitor(ReorganisationMonitor):
         web3 = self.web3
 
         # Collect block timestamps from the headers
-        for block_num in range(start_block, end_block + 1):
-            response_json = web3.manager._make_request("eth_getBlockByNumber", (hex(block_num), False))
-            raw_result = response_json["result"]
-
-            # Happens the chain tip and https://polygon-rpc.com/
-            # - likely the request routed to different backend node
-            if raw_result is None:
-                logger.debug("Abnormally terminated at block %d, chain tip unstable?", block_num)
-                break
-
-            data_block_number = raw_result["number"]
-
-            block_hash = raw_result["hash"]
-            if isinstance(block_hash, HexBytes):
-                # Web3.py middleware madness
-                block_hash = block_hash.hex()
-
-            if type(data_block_number) == str:
-                # Real node
-                assert int(raw_result["number"], 16) == block_num
-                timestamp = int(raw_result["timestamp"], 16)
+        for batch_start in range(start_block, end_block + 1, self.batch_size):
+            block_numbers = range(batch_start, min(batch_start + self.batch_size, end_block + 1))
+            if self.batch_size == 1:
+                responses = [web3.manager._make_request("eth_getBlockByNumber", (hex(block_numbers[0]), False))]
             else:
-                # EthereumTester
-                timestamp = raw_result["timestamp"]
+                responses = make_batch_request(web3, [("eth_getBlockByNumber", (hex(block_num), False)) for block_num in block_numbers])
+
+            for block_num, response_json in zip(block_numbers, responses):
+                record = self._parse_block_response(block_num, response_json)
+                if record is None:
+                    return
+                yield record
+
+    def _parse_block_response(self, block_num: int, response_json: dict) -> BlockHeader | None:
+        raw_result = response_json["result"]
+
+        # Happens the chain tip and https://polygon-rpc.com/
+        # - likely the request routed to different backend node
+        if raw_result is None:
+            logger.debug("Abnormally terminated at block %d, chain tip unstable?", block_num)
+            return None
+
+        data_block_number = raw_result["number"]
+
+        block_hash = raw_result["hash"]
+        if isinstance(block_hash, HexBytes):
+            # Web3.py middleware madness
+            block_hash = block_hash.hex()
+
+        if type(data_block_number) == str:
+            # Real node
+            assert int(raw_result["number"], 16) == block_num
+            timestamp = int(raw_result["timestamp"], 16)
+        else:
+            # EthereumTester
+            timestamp = raw_result["timestamp"]
 
-            record = BlockHeader(block_num, block_hash, timestamp)
-            logger.debug("Fetched block record: %s, total %d transactions", record, len(raw_result["transactions"]))
-            yield record
+        record = BlockHeader(block_num, block_hash, timestamp)
+        logger.debug("Fetched block record: %s, total %d transactions", record, len(raw_result["transactions"]))
+        return record
 
 
 class GraphQLReorganisationMonitor(ReorganisationMonitor):
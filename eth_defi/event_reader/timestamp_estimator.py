@@ -0,0 +1,351 @@
+"""Estimate block timestamps from sparse anchor blocks.
+
+- Fetching a block header only to learn its timestamp is the most common JSON-RPC
+  call in historical scans. For evenly spaced scans most of these timestamps
+  can be interpolated from a few known blocks.
+
+- :py:class:`BlockTimestampEstimator` keeps a piecewise-linear block number -> time model
+  for a chain, built from sorted *anchor* blocks whose timestamp we know exactly
+
+- For a block between two anchors, the error bound is derived from the fact that
+  timestamps are monotonic, and optionally from known minimum and maximum block times
+  of the chain. E.g. for a chain with fixed 2 seconds blocks two anchors
+  give exact timestamps for all blocks between them.
+
+- :py:meth:`BlockTimestampEstimator.plan_fetches` tells which blocks need to be fetched
+  so that all estimates are within the wanted error. Each round splits the worst
+  anchor segments in half, so a regular chain needs only ``O(log n)`` fetches.
+
+Example:
+
+.. code-block:: python
+
+    from eth_defi.event_reader.timestamp_estimator import BlockTimestampEstimator
+
+    estimator = BlockTimestampEstimator(chain_id=web3.eth.chain_id)
+
+    # Hourly samples for a day on Base
+    blocks = range(30_000_000, 30_043_200, 1800)
+
+    # Exact timestamps, fetching only the blocks needed to pin down the model
+    timestamps = estimator.resolve(web3, blocks, max_error=0)
+"""
+
+import bisect
+import datetime
+import logging
+import math
+from dataclasses import dataclass
+from typing import Callable, Iterable
+
+from web3 import Web3
+
+from eth_defi.event_reader.conversion import convert_jsonrpc_value_to_int
+from eth_defi.event_reader.timestamp_store import BlockTimestampStore
+from eth_defi.utils import from_unix_timestamp, to_unix_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class BlockTimeBounds:
+    """Known block time limits of a chain."""
+
+    #: Blocks are never produced faster than this, in seconds
+    min_block_time: float = 0
+
+    #: Blocks are never produced slower than this, in seconds
+    max_block_time: float = math.inf
+
+    #: The limits are valid starting from this block, e.g. after a consensus upgrade
+    first_block: int = 0
+
+
+#: Chains where block time limits are fixed by the consensus.
+#:
+#: - Ethereum: 12 seconds slots after the Merge, missed slots make blocks slower
+#:
+#: - OP Stack chains: fixed 2 seconds blocks
+#:
+DEFAULT_BLOCK_TIME_BOUNDS: dict[int, BlockTimeBounds] = {
+    1: BlockTimeBounds(min_block_time=12, first_block=15_537_394),
+    10: BlockTimeBounds(min_block_time=2, max_block_time=2, first_block=105_235_063),
+    8453: BlockTimeBounds(min_block_time=2, max_block_time=2),
+}
+
+
+@dataclass(frozen=True, slots=True)
+class TimestampEstimate:
+    """Estimated timestamp of a block."""
+
+    #: Block number
+    block_number: int
+
+    #: Estimated UNIX timestamp
+    timestamp: float
+
+    #: Maximum error of the estimate, in seconds.
+    #:
+    #: Zero for anchor blocks, ``inf`` outside the anchor range.
+    error: float
+
+    @property
+    def exact(self) -> bool:
+        return self.error == 0
+
+    def get_datetime(self) -> datetime.datetime:
+        """Naive UTC datetime of the estimate, rounded to full seconds."""
+        return from_unix_timestamp(round(self.timestamp))
+
+
+class BlockTimestampEstimator:
+    """Piecewise-linear block number -> timestamp model for a single chain.
+
+    - Anchors are kept in sorted arrays and looked up with binary search
+
+    - Add anchors as you learn block timestamps, e.g. from event logs or block headers.
+      The model refines itself incrementally.
+
+    - Optionally backed by :py:class:`~eth_defi.event_reader.timestamp_store.BlockTimestampStore`,
+      so that anchors are shared across runs and with other readers
+    """
+
+    def __init__(
+        self,
+        chain_id: int,
+        bounds: BlockTimeBounds | None = None,
+        timestamp_store: BlockTimestampStore | None = None,
+    ):
+        """
+        :param chain_id:
+            Chain we model
+
+        :param bounds:
+            Block time limits used to tighten the error bound.
+
+            If not given, use :py:data:`DEFAULT_BLOCK_TIME_BOUNDS`, or only assume monotonic timestamps.
+
+        :param timestamp_store:
+            Persistent store to read exact timestamps from and write fetched anchors to.
+        """
+        self.chain_id = chain_id
+        self.bounds = bounds or DEFAULT_BLOCK_TIME_BOUNDS.get(chain_id, BlockTimeBounds())
+        self.timestamp_store = timestamp_store
+        self.blocks: list[int] = []
+        self.timestamps: list[int] = []
+
+        #: How many block headers we have fetched
+        self.fetch_count = 0
+
+    def __repr__(self):
+        return f"<BlockTimestampEstimator chain {self.chain_id}, {len(self.blocks)} anchors>"
+
+    def __len__(self):
+        return len(self.blocks)
+
+    def add_anchor(self, block_number: int, timestamp: int | datetime.datetime):
+        """Add a block with a known timestamp to the model."""
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = int(to_unix_timestamp(timestamp))
+
+        idx = bisect.bisect_left(self.blocks, block_number)
+        if idx < len(self.blocks) and self.blocks[idx] == block_number:
+            self.timestamps[idx] = timestamp
+            return
+
+        self.blocks.insert(idx, block_number)
+        self.timestamps.insert(idx, timestamp)
+
+    def add_anchors(self, timestamps: dict[int, int | datetime.datetime]):
+        """Add several anchors."""
+        for block_number, timestamp in timestamps.items():
+            self.add_anchor(block_number, timestamp)
+
+    def load_anchors(self, block_numbers: Iterable[int]) -> int:
+        """Add anchors for blocks found in the timestamp store.
+
+        :return:
+            Number of anchors found
+        """
+        if self.timestamp_store is None:
+            return 0
+        found = self.timestamp_store.get_many(self.chain_id, list(block_numbers))
+        self.add_anchors(found)
+        return len(found)
+
+    def estimate(self, block_number: int) -> TimestampEstimate:
+        """Estimate the timestamp of a block.
+
+        - Exact for anchor blocks
+        - Linear interpolation between the surrounding anchors, with a bounded error
+        - Extrapolation with the nearest segment slope outside the anchor range, with an unbounded error
+        """
+        blocks = self.blocks
+        timestamps = self.timestamps
+        assert blocks, f"No anchors for chain {self.chain_id}"
+
+        idx = bisect.bisect_left(blocks, block_number)
+        if idx < len(blocks) and blocks[idx] == block_number:
+            return TimestampEstimate(block_number, timestamps[idx], 0)
+
+        if idx == 0 or idx == len(blocks):
+            return self._extrapolate(block_number, idx)
+
+        b0, b1 = blocks[idx - 1], blocks[idx]
+        t0, t1 = timestamps[idx - 1], timestamps[idx]
+        estimate = t0 + (t1 - t0) * (block_number - b0) / (b1 - b0)
+
+        # Timestamps are monotonic
+        low, high = t0, t1
+
+        bounds = self.bounds
+        if b0 >= bounds.first_block:
+            low = max(low, t0 + (block_number - b0) * bounds.min_block_time, t1 - (b1 - block_number) * bounds.max_block_time)
+            high = min(high, t1 - (b1 - block_number) * bounds.min_block_time, t0 + (block_number - b0) * bounds.max_block_time)
+
+        error = max(estimate - low, high - estimate, 0)
+        return TimestampEstimate(block_number, estimate, error)
+
+    def _extrapolate(self, block_number: int, idx: int) -> TimestampEstimate:
+        blocks = self.blocks
+        timestamps = self.timestamps
+        if len(blocks) == 1:
+            slope = self.bounds.min_block_time
+        elif idx == 0:
+            slope = (timestamps[1] - timestamps[0]) / (blocks[1] - blocks[0])
+        else:
+            slope = (timestamps[-1] - timestamps[-2]) / (blocks[-1] - blocks[-2])
+
+        nearest = 0 if idx == 0 else -1
+        estimate = timestamps[nearest] + slope * (block_number - blocks[nearest])
+        return TimestampEstimate(block_number, estimate, math.inf)
+
+    def get_timestamp(self, block_number: int) -> datetime.datetime:
+        """Estimated timestamp of a block as naive UTC datetime."""
+        return self.estimate(block_number).get_datetime()
+
+    def plan_fetches(self, block_numbers: Iterable[int], max_error: float) -> list[int]:
+        """Choose blocks to fetch, so that the model gets closer to the wanted error.
+
+        - For each anchor segment, pick the median of the blocks whose error exceeds ``max_error``
+        - Outside the anchor range, pick the first and the last block
+        - Fetching these blocks and adding them as anchors halves the segments
+        - Repeat until this returns an empty list
+
+        :param block_numbers:
+            Blocks we want timestamps for
+
+        :param max_error:
+            Acceptable error in seconds, ``0`` for exact timestamps
+
+        :return:
+            Block numbers to fetch in this round, sorted
+        """
+        # Segment index -> blocks needing refinement
+        segments: dict[int, list[int]] = {}
+        for block_number in sorted(set(block_numbers)):
+            if self.blocks and self.estimate(block_number).error <= max_error:
+                continue
+            segment = bisect.bisect_left(self.blocks, block_number)
+            segments.setdefault(segment, []).append(block_number)
+
+        to_fetch = set()
+        for segment, candidates in segments.items():
+            if segment == 0 or segment == len(self.blocks):
+                # Outside the anchor range, fetch the outermost blocks
+                # to turn extrapolation to interpolation
+                to_fetch.update((candidates[0], candidates[-1]))
+            else:
+                to_fetch.add(candidates[len(candidates) // 2])
+
+        return sorted(to_fetch)
+
+    def fetch_anchor(self, web3: Web3, block_number: int) -> int:
+        """Read a block header and add it as an anchor.
+
+        :return:
+            UNIX timestamp of the block
+        """
+        # Skip web3.py stack of slow result formatters
+        result = web3.manager.request_blocking("eth_getBlockByNumber", (hex(block_number), False))
+        assert result is not None, f"Chain {self.chain_id}: block {block_number:,} not available"
+        timestamp = convert_jsonrpc_value_to_int(result["timestamp"])
+        self.fetch_count += 1
+        self.add_anchor(block_number, timestamp)
+        if self.timestamp_store is not None:
+            self.timestamp_store.add(self.chain_id, block_number, timestamp)
+        return timestamp
+
+    def refresh(self, web3: Web3, block_number: int | None = None) -> int:
+        """Add the latest, or given, block as an anchor.
+
+        Call periodically in live scans, so estimates near the chain tip stay bounded.
+
+        :return:
+            Block number of the new anchor
+        """
+        if block_number is None:
+            block_number = web3.eth.block_number
+        self.fetch_anchor(web3, block_number)
+        return block_number
+
+    def resolve(
+        self,
+        web3: Web3 | None,
+        block_numbers: Iterable[int],
+        max_error: float = 0,
+        fetcher: Callable[[list[int]], dict[int, int | datetime.datetime]] | None = None,
+    ) -> dict[int, datetime.datetime]:
+        """Get timestamps for blocks, fetching only the blocks where the estimate is not good enough.
+
+        :param web3:
+            Connection used to fetch anchors.
+
+            Can be ``None`` if ``fetcher`` is given.
+
+        :param block_numbers:
+            Blocks we want timestamps for
+
+        :param max_error:
+            Acceptable error in seconds, ``0`` for exact timestamps
+
+        :param fetcher:
+            Fetch several blocks at once, e.g. using a worker pool.
+
+            Receives a list of block numbers and returns block number -> timestamp mapping.
+            If not given, fetch blocks one by one over ``web3``.
+
+        :return:
+            Block number -> naive UTC datetime mapping
+        """
+        block_numbers = list(block_numbers)
+        self.load_anchors(block_numbers)
+
+        rounds = 0
+        while to_fetch := self.plan_fetches(block_numbers, max_error):
+            rounds += 1
+            if fetcher is not None:
+                fetched = fetcher(to_fetch)
+                assert all(b in fetched for b in to_fetch), f"Fetcher did not return all blocks: {to_fetch}"
+                self.fetch_count += len(fetched)
+                self.add_anchors(fetched)
+                if self.timestamp_store is not None:
+                    self.timestamp_store.add_many(self.chain_id, fetched)
+            else:
+                for block_number in to_fetch:
+                    self.fetch_anchor(web3, block_number)
+
+        if self.timestamp_store is not None:
+            self.timestamp_store.flush(self.chain_id)
+
+        logger.info(
+            "Chain %d: resolved %d block timestamps with max error %s s, %d rounds, %d anchors, %d fetched in total",
+            self.chain_id,
+            len(block_numbers),
+            max_error,
+            rounds,
+            len(self.blocks),
+            self.fetch_count,
+        )
+
+        return {block_number: self.get_timestamp(block_number) for block_number in block_numbers}
@@ -0,0 +1,451 @@
+"""Persistent block number to timestamp store.
+
+- Replaces the whole-file pickle cache used by
+  :py:func:`eth_defi.event_reader.multicall_timestamp.fetch_block_timestamps_multiprocess`
+
+- One directory, two files per chain:
+
+  - ``chain-{id}.bin``: compacted, sorted int64 arrays of block numbers and UNIX timestamps,
+    memory-mapped for ``O(log n)`` binary search lookups
+
+  - ``chain-{id}.log``: append-only log of new ``(block number, timestamp)`` int64 pairs
+
+- Writes are ``O(new entries)``: they only append to the log.
+  When the log grows large, it is merged to the sorted file (compaction),
+  which is atomically replaced.
+
+- Writers take a file lock, so several scanner processes can write at the same time.
+  Readers never lock: they memory-map the sorted file, and tolerate a half-written
+  record at the end of the log.
+
+- Only uses the Python standard library, no NumPy dependency
+
+- Files use the native byte order, they are a local cache and not meant to be moved between machines
+
+Example:
+
+.. code-block:: python
+
+    from eth_defi.event_reader.timestamp_store import BlockTimestampStore
+
+    store = BlockTimestampStore()
+    store.add(1, 21_000_000, 1730000000)
+    store.flush()
+
+    assert store.get_timestamp(1, 21_000_000) == 1730000000
+"""
+
+import bisect
+import datetime
+import logging
+import mmap
+import os
+import pickle
+import struct
+from array import array
+from pathlib import Path
+from typing import TypeAlias
+
+from filelock import FileLock
+
+from eth_defi.utils import from_unix_timestamp, to_unix_timestamp
+
+logger = logging.getLogger(__name__)
+
+
+#: Default store location
+DEFAULT_TIMESTAMP_STORE_PATH = Path.home() / ".cache" / "tradingstrategy" / "block-timestamps"
+
+#: The old pickle cache we can migrate from
+LEGACY_TIMESTAMP_PICKLE_PATH = Path.home() / ".cache" / "tradingstrategy" / "block-timestamps.pickle"
+
+#: Chain id -> block number -> timestamp, the content of the old pickle cache
+ChainBlockTimestampMap: TypeAlias = dict[int, dict[int, datetime.datetime]]
+
+#: Magic bytes at the start of the compacted file, 8 bytes to keep int64 alignment
+_MAGIC = b"BTSTORE1"
+
+#: magic + row count
+_HEADER_SIZE = 16
+
+#: Two int64 per log record
+_LOG_RECORD_SIZE = 16
+
+
+class _ChainView:
+    """Loaded state of a single chain."""
+
+    __slots__ = ("main_file", "main_map", "views", "blocks", "timestamps", "main_stat", "log", "log_size", "pending")
+
+    def __init__(self):
+        self.main_file = None
+        self.main_map: mmap.mmap | None = None
+
+        #: All memoryviews exported from the map, must be released before closing it
+        self.views: list[memoryview] = []
+
+        #: Sorted block numbers, memoryview over the mmap
+        self.blocks: memoryview | None = None
+
+        #: Timestamps matching :py:attr:`blocks`
+        self.timestamps: memoryview | None = None
+
+        #: (inode, mtime) of the loaded compacted file
+        self.main_stat: tuple | None = None
+
+        #: Entries read from the append log
+        self.log: dict[int, int] = {}
+
+        #: Bytes of the append log we have read
+        self.log_size = 0
+
+        #: Entries added by us, not yet flushed to the log
+        self.pending: dict[int, int] = {}
+
+    def close(self):
+        # Release memoryviews before closing the map
+        for v in reversed(self.views):
+            v.release()
+        self.views = []
+        if self.main_map is not None:
+            self.main_map.close()
+        if self.main_file is not None:
+            self.main_file.close()
+        self.blocks = self.timestamps = self.main_map = self.main_file = None
+
+    def __len__(self):
+        return len(self.blocks) if self.blocks is not None else 0
+
+
+class BlockTimestampStore:
+    """Block number -> UNIX timestamp store for multiple chains.
+
+    - ``O(log n)`` lookups using binary search over memory-mapped sorted arrays
+
+    - Append-only writes, safe for multiple concurrent writer processes
+
+    - See the module documentation for the file format
+
+    - Not thread safe, use one instance per thread
+    """
+
+    def __init__(
+        self,
+        path: Path = DEFAULT_TIMESTAMP_STORE_PATH,
+        compact_threshold=200_000,
+        lock_timeout=120,
+    ):
+        """Open a store.
+
+        :param path:
+            Directory where the per-chain files live. Created if it does not exist.
+
+        :param compact_threshold:
+            Merge the append log into the sorted file when the log has this many entries
+
+        :param lock_timeout:
+            Seconds to wait for other writers
+        """
+        assert isinstance(path, Path), f"Got {type(path)}"
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self.lock_timeout = lock_timeout
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.chains: dict[int, _ChainView] = {}
+
+    def __repr__(self):
+        return f"<BlockTimestampStore {self.path}, loaded chains {list(self.chains.keys())}>"
+
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            # Interpreter shutdown
+            pass
+
+    def close(self):
+        """Release memory maps."""
+        for view in getattr(self, "chains", {}).values():
+            view.close()
+
+    def get_main_path(self, chain_id: int) -> Path:
+        return self.path / f"chain-{chain_id}.bin"
+
+    def get_log_path(self, chain_id: int) -> Path:
+        return self.path / f"chain-{chain_id}.log"
+
+    def _get_lock(self, chain_id: int) -> FileLock:
+        return FileLock(self.path / f"chain-{chain_id}.lock", timeout=self.lock_timeout)
+
+    def _get_view(self, chain_id: int) -> _ChainView:
+        view = self.chains.get(chain_id)
+        if view is None:
+            view = self.chains[chain_id] = _ChainView()
+            self._refresh(chain_id, view)
+        return view
+
+    def _refresh(self, chain_id: int, view: _ChainView):
+        """Pick up changes made by other processes.
+
+        - Only stats the files if nothing has changed
+        """
+        main_path = self.get_main_path(chain_id)
+        log_path = self.get_log_path(chain_id)
+
+        try:
+            st = main_path.stat()
+            main_stat = (st.st_ino, st.st_mtime_ns, st.st_size)
+        except FileNotFoundError:
+            main_stat = None
+
+        if main_stat != view.main_stat:
+            # Compaction happened, the log was folded into the main file
+            view.close()
+            view.log.clear()
+            view.log_size = 0
+            view.main_stat = main_stat
+            if main_stat is not None:
+                self._map_main_file(main_path, view)
+
+        try:
+            log_size = log_path.stat().st_size
+        except FileNotFoundError:
+            log_size = 0
+
+        if log_size < view.log_size:
+            # Log was truncated by compaction, but we saw the old main file.
+            # Reread from the start.
+            view.log.clear()
+            view.log_size = 0
+
+        if log_size > view.log_size:
+            with log_path.open("rb") as f:
+                f.seek(view.log_size)
+                data = f.read(log_size - view.log_size)
+            # Ignore a half-written record at the end
+            usable = len(data) - len(data) % _LOG_RECORD_SIZE
+            records = array("q")
+            records.frombytes(data[:usable])
+            for i in range(0, len(records), 2):
+                view.log[records[i]] = records[i + 1]
+            view.log_size += usable
+
+    def _map_main_file(self, main_path: Path, view: _ChainView):
+        f = main_path.open("rb")
+        header = f.read(_HEADER_SIZE)
+        if len(header) < _HEADER_SIZE or header[0:8] != _MAGIC:
+            f.close()
+            logger.warning("Block timestamp store file %s damaged, ignoring", main_path)
+            return
+        (count,) = struct.unpack("q", header[8:16])
+        if count == 0:
+            f.close()
+            return
+        view.main_file = f
+        view.main_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        base = memoryview(view.main_map)
+        raw = base[_HEADER_SIZE : _HEADER_SIZE + count * 16]
+        data = raw.cast("q")
+        view.blocks = data[0:count]
+        view.timestamps = data[count : count * 2]
+        view.views = [base, raw, data, view.blocks, view.timestamps]
+
+    def _lookup(self, view: _ChainView, block_number: int) -> int | None:
+        value = view.pending.get(block_number)
+        if value is not None:
+            return value
+        value = view.log.get(block_number)
+        if value is not None:
+            return value
+        blocks = view.blocks
+        if blocks is not None:
+            idx = bisect.bisect_left(blocks, block_number)
+            if idx < len(blocks) and blocks[idx] == block_number:
+                return view.timestamps[idx]
+        return None
+
+    def get_timestamp(self, chain_id: int, block_number: int, refresh=True) -> int | None:
+        """Get UNIX timestamp of a block.
+
+        :param refresh:
+            On a miss, check if other processes have written new data
+
+        :return:
+            UNIX timestamp, or ``None`` if we do not have it
+        """
+        view = self._get_view(chain_id)
+        value = self._lookup(view, block_number)
+        if value is None and refresh:
+            self._refresh(chain_id, view)
+            value = self._lookup(view, block_number)
+        return value
+
+    def get(self, chain_id: int, block_number: int) -> datetime.datetime | None:
+        """Get a block timestamp as naive UTC datetime."""
+        value = self.get_timestamp(chain_id, block_number)
+        if value is None:
+            return None
+        return from_unix_timestamp(value)
+
+    def get_many(self, chain_id: int, block_numbers: list[int] | range) -> dict[int, datetime.datetime]:
+        """Get timestamps for multiple blocks.
+
+        - Refresh from disk only once
+
+        :return:
+            Block number -> naive UTC datetime map of the blocks we have
+        """
+        view = self._get_view(chain_id)
+        self._refresh(chain_id, view)
+        result = {}
+        for block_number in block_numbers:
+            value = self._lookup(view, block_number)
+            if value is not None:
+                result[block_number] = from_unix_timestamp(value)
+        return result
+
+    def get_count(self, chain_id: int) -> int:
+        """How many blocks of a chain we have stored, approximately.
+
+        Log entries may duplicate compacted entries.
+        """
+        view = self._get_view(chain_id)
+        self._refresh(chain_id, view)
+        return len(view) + len(view.log) + len(view.pending)
+
+    def add(self, chain_id: int, block_number: int, timestamp: int | datetime.datetime):
+        """Add a block timestamp.
+
+        - Buffered in memory until :py:meth:`flush`
+
+        :param timestamp:
+            UNIX timestamp or naive UTC datetime
+        """
+        if isinstance(timestamp, datetime.datetime):
+            timestamp = int(to_unix_timestamp(timestamp))
+        assert type(block_number) == int, f"Got {type(block_number)}"
+        assert type(timestamp) == int, f"Got {type(timestamp)}"
+        self._get_view(chain_id).pending[block_number] = timestamp
+
+    def add_many(self, chain_id: int, timestamps: dict[int, int | datetime.datetime]):
+        """Add multiple block timestamps."""
+        for block_number, timestamp in timestamps.items():
+            self.add(chain_id, block_number, timestamp)
+
+    def flush(self, chain_id: int | None = None):
+        """Append buffered entries to the log.
+
+        - Compact the chain if the log has grown too large
+
+        :param chain_id:
+            Flush only this chain. Default to all chains.
+        """
+        chain_ids = [chain_id] if chain_id is not None else list(self.chains.keys())
+        for chain_id in chain_ids:
+            view = self.chains.get(chain_id)
+            if view is None or not view.pending:
+                continue
+
+            records = array("q")
+            for block_number, timestamp in view.pending.items():
+                records.append(block_number)
+                records.append(timestamp)
+
+            log_path = self.get_log_path(chain_id)
+            with self._get_lock(chain_id):
+                with log_path.open("ab") as f:
+                    f.write(records.tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                logger.debug("Appended %d block timestamps to %s", len(view.pending), log_path)
+                view.pending.clear()
+
+                self._refresh(chain_id, view)
+                if len(view.log) >= self.compact_threshold:
+                    self._compact_locked(chain_id, view)
+
+    def compact(self, chain_id: int):
+        """Merge the append log of a chain into the sorted file."""
+        view = self._get_view(chain_id)
+        self.flush(chain_id)
+        with self._get_lock(chain_id):
+            self._refresh(chain_id, view)
+            self._compact_locked(chain_id, view)
+
+    def _compact_locked(self, chain_id: int, view: _ChainView):
+        if not view.log:
+            return
+
+        merged: dict[int, int] = {}
+        if view.blocks is not None:
+            merged.update(zip(view.blocks, view.timestamps))
+        merged.update(view.log)
+
+        blocks = array("q", sorted(merged.keys()))
+        timestamps = array("q", (merged[b] for b in blocks))
+
+        main_path = self.get_main_path(chain_id)
+        tmp_path = main_path.with_suffix(f".{os.getpid()}.tmp")
+        with tmp_path.open("wb") as f:
+            f.write(_MAGIC)
+            f.write(struct.pack("q", len(blocks)))
+            f.write(blocks.tobytes())
+            f.write(timestamps.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        tmp_path.replace(main_path)  # Atomic move
+
+        # Readers who see the new main file discard the old log
+        self.get_log_path(chain_id).open("wb").close()
+
+        logger.info("Compacted block timestamps for chain %d, total %d blocks, %d bytes", chain_id, len(blocks), main_path.stat().st_size)
+
+        self._refresh(chain_id, view)
+
+    def import_legacy_pickle(self, fname: Path = LEGACY_TIMESTAMP_PICKLE_PATH) -> int:
+        """Import timestamps from the old ``block-timestamps.pickle`` cache.
+
+        :return:
+            Number of imported entries
+        """
+        with fname.open("rb") as f:
+            data: ChainBlockTimestampMap = pickle.load(f)
+
+        count = 0
+        for chain_id, timestamps in data.items():
+            self.add_many(chain_id, timestamps)
+            count += len(timestamps)
+            self.compact(chain_id)
+
+        logger.info("Imported %d block timestamps from %s to %s", count, fname, self.path)
+        return count
+
+
+def open_timestamp_store(path: Path | None = DEFAULT_TIMESTAMP_STORE_PATH) -> BlockTimestampStore | None:
+    """Open a timestamp store, migrating the legacy pickle cache on the first use.
+
+    :param path:
+        Store directory.
+
+        For backwards compatibility, if a ``.pickle`` file is given,
+        the store is created in a directory next to it and the pickle is imported.
+
+        ``None`` disables the store.
+    """
+    if path is None:
+        return None
+
+    if path.suffix == ".pickle":
+        legacy = path
+        path = path.with_suffix("")
+    elif path == DEFAULT_TIMESTAMP_STORE_PATH:
+        legacy = LEGACY_TIMESTAMP_PICKLE_PATH
+    else:
+        legacy = None
+
+    needs_migration = legacy is not None and legacy.exists() and not path.exists()
+    store = BlockTimestampStore(path)
+    if needs_migration:
+        store.import_legacy_pickle(legacy)
+    return store
@@ -35,6 +35,7 @@ import hypersync
 from hypersync import BlockField
 
 from eth_defi.event_reader.block_header import BlockHeader
+from eth_defi.event_reader.timestamp_store import BlockTimestampStore
 from eth_defi.utils import from_unix_timestamp
 
 logger = logging.getLogger(__name__)
@@ -118,11 +119,16 @@ def get_block_timestamps_using_hypersync(
     chain_id: int,
     start_block: int,
     end_block: int,
+    timestamp_store: BlockTimestampStore | None = None,
 ) -> dict[BlockNumber, BlockHeader]:
     """Quickly get block timestamps using Hypersync API.
 
     Wraps :py:func:`get_block_timestamps_using_hypersync_async`.
 
+    :param timestamp_store:
+        Write the received timestamps to this persistent store,
+        so that later JSON-RPC based readers do not need to fetch them.
+
     :return:
         Block number -> header mapping
     """
@@ -139,6 +145,11 @@ def get_block_timestamps_using_hypersync(
 
     result = asyncio.run(_hypersync_asyncio_wrapper())
 
+    if timestamp_store is not None:
+        for header in result.values():
+            timestamp_store.add(chain_id, header.block_number, header.timestamp)
+        timestamp_store.flush(chain_id)
+
     # Crash in the case Hypersync is not syncing
     # for i in range(start_block, end_block + 1):
     #    assert i in result, f"Did not get block {i}, we got {result}"
@@ -12,7 +12,10 @@ Most are for dealing with JSON-RPC unreliability issues with retries.
 """
 
 import logging
+import math
+import threading
 import time
+from collections import OrderedDict
 from http.client import RemoteDisconnected
 from pprint import pformat
 from typing import (
@@ -182,6 +185,27 @@ DEFAULT_RETRYABLE_RPC_ERROR_MESSAGES = {
 #:
 STATIC_CALL_LIST = ("eth_chainId",)
 
+#: Cache the response until the process exits
+STATIC_CALL_FOREVER = math.inf
+
+#: Cache the response only if it concerns a block behind the finality depth
+STATIC_CALL_FINALISED = -1.0
+
+#: How long :py:func:`static_call_cache_middleware` keeps responses, seconds.
+#:
+#: - ``eth_chainId`` never changes
+#:
+#: - ``eth_getBlockByNumber`` with a concrete block number is cached once the block is final
+#:
+#: - ``eth_blockNumber`` is not cached, as the cache is process-wide and polling loops
+#:   and :py:func:`eth_defi.provider.anvil.mine` need a fresh value.
+#:   Opt in with e.g. ``StaticCallCache(ttls=DEFAULT_STATIC_CALL_TTLS | {"eth_blockNumber": 1.0})``.
+#:
+DEFAULT_STATIC_CALL_TTLS = {
+    "eth_chainId": STATIC_CALL_FOREVER,
+    "eth_getBlockByNumber": STATIC_CALL_FINALISED,
+}
+
 
 class ProbablyNodeHasNoBlock(Exception):
     """A special exception raised when we suspect JSON-RPC node does not yet have data for a block we asked.
@@ -495,12 +519,179 @@ def construct_sign_and_send_raw_middleware_anvil(private_key_or_account) -> Midd
     return sign_and_send_raw_middleware
 
 
+class StaticCallCache:
+    """Process-wide cache for JSON-RPC responses that do not change.
+
+    - Keyed by (namespace, method, params), where the namespace is the RPC configuration
+      the Web3 instance was created from, so Web3 instances for different chains never mix
+
+    - Shared across all Web3 instances of the process created by
+      :py:func:`eth_defi.provider.multi_provider.create_multi_provider_web3`,
+      :py:class:`eth_defi.provider.multi_provider.MultiProviderWeb3Factory` and
+      :py:class:`eth_defi.event_reader.web3factory.TunedWeb3Factory`,
+      so thread pool workers do not repeat the same chain id and block header calls
+
+    - Per-method TTLs, see :py:data:`DEFAULT_STATIC_CALL_TTLS`
+
+    - Only successful responses are cached
+
+    - ``eth_blockNumber`` responses are always observed to track the chain tip for finality,
+      even when not cached
+
+    - Bounded, least recently used entries are dropped first
+
+    - Thread safe
+    """
+
+    def __init__(
+        self,
+        ttls: dict[str, float] = None,
+        finality_depth: int = 128,
+        max_entries: int = 10_000,
+    ):
+        """
+        :param ttls:
+            JSON-RPC method -> seconds, :py:data:`STATIC_CALL_FOREVER` or :py:data:`STATIC_CALL_FINALISED`.
+
+            Methods not listed are not cached. Default to :py:data:`DEFAULT_STATIC_CALL_TTLS`.
+
+        :param finality_depth:
+            How many blocks behind the last seen ``eth_blockNumber`` we consider final
+
+        :param max_entries:
+            Max number of cached responses
+        """
+        self.ttls = ttls if ttls is not None else DEFAULT_STATIC_CALL_TTLS.copy()
+        self.finality_depth = finality_depth
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+        #: (namespace, method, params) -> (response, expires at)
+        self.entries: OrderedDict[tuple, tuple[RPCResponse, float]] = OrderedDict()
+
+        #: namespace -> highest block number seen
+        self.tips: dict[str, int] = {}
+
+        #: Responses served from the cache
+        self.hits = 0
+
+        #: Responses we had to ask from the RPC
+        self.misses = 0
+
+    def __repr__(self):
+        return f"<StaticCallCache entries:{len(self.entries):,} hits:{self.hits:,} misses:{self.misses:,}>"
+
+    def __len__(self):
+        return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.tips.clear()
+
+    def get_ttl(self, namespace: str, method: str, params: Any) -> float | None:
+        """How long we can cache the response of this call.
+
+        :return:
+            Seconds, or ``None`` if the call must not be cached
+        """
+        ttl = self.ttls.get(method)
+        if ttl != STATIC_CALL_FINALISED:
+            return ttl
+
+        # eth_getBlockByNumber and similar: a concrete block number behind the finality depth
+        block_identifier = params[0] if params else None
+        if isinstance(block_identifier, str) and block_identifier.startswith("0x"):
+            block_number = int(block_identifier, 16)
+        elif type(block_identifier) == int:
+            block_number = block_identifier
+        else:
+            return None
+
+        tip = self.tips.get(namespace)
+        if tip is None or block_number > tip - self.finality_depth:
+            return None
+        return STATIC_CALL_FOREVER
+
+    def make_request(
+        self,
+        namespace: str,
+        method: RPCEndpoint,
+        params: Any,
+        make_request: Callable[[RPCEndpoint, Any], RPCResponse],
+    ) -> RPCResponse:
+        """Serve a JSON-RPC call from the cache or the underlying provider."""
+        if method not in self.ttls and method != "eth_blockNumber":
+            return make_request(method, params)
+
+        key = (namespace, method, repr(params))
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry[1] > now:
+                    self.entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[0]
+                del self.entries[key]
+            self.misses += 1
+
+        resp = make_request(method, params)
+
+        if not isinstance(resp, dict) or "error" in resp or resp.get("result") is None:
+            return resp
+
+        with self.lock:
+            if method == "eth_blockNumber":
+                block_number = resp["result"]
+                block_number = int(block_number, 16) if isinstance(block_number, str) else block_number
+                self.tips[namespace] = max(self.tips.get(namespace, 0), block_number)
+
+            ttl = self.get_ttl(namespace, method, params)
+            if ttl is not None:
+                self.entries[key] = (resp, now + ttl)
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+
+        return resp
+
+
+#: The cache shared by all Web3 instances of this process
+_shared_static_call_cache = StaticCallCache()
+
+
+def get_static_call_cache() -> StaticCallCache:
+    """Get the process-wide :py:class:`StaticCallCache`."""
+    return _shared_static_call_cache
+
+
+def _get_static_call_cache(web3: "Web3") -> StaticCallCache:
+    # A Web3 instance can opt out of the shared cache by setting its own
+    cache = getattr(web3, "static_call_cache", None)
+    if cache is None:
+        return _shared_static_call_cache
+    return cache
+
+
+def _get_static_call_namespace(web3: "Web3") -> str:
+    # Set by create_multi_provider_web3(), otherwise fall back to the provider identity
+    namespace = getattr(web3, "static_call_cache_namespace", None)
+    if namespace is None:
+        provider = web3.provider
+        namespace = getattr(provider, "endpoint_uri", None) or f"provider-{id(provider)}"
+    return str(namespace)
+
+
 # Create class-based middleware for v7 compatibility
 if WEB3_PY_V7:
     from web3.middleware import Web3Middleware
 
     class StaticCallCacheMiddleware(Web3Middleware):
-        """v7-style static call cache middleware."""
+        """v7-style static call cache middleware.
+
+        See :py:class:`StaticCallCache`.
+        """
 
         def __init__(self, w3):
             super().__init__(w3)
@@ -508,16 +699,7 @@ if WEB3_PY_V7:
 
         def wrap_make_request(self, make_request):
             def middleware(method: RPCEndpoint, params: Any) -> RPCResponse:
-                cache = getattr(self.w3, "static_call_cache", {})
-                if method in STATIC_CALL_LIST:
-                    cached = cache.get(method)
-                    if cached:
-                        return cached
-
-                resp = make_request(method, params)
-                cache[method] = resp
-                self.w3.static_call_cache = cache
-                return resp
+                return _get_static_call_cache(self.w3).make_request(_get_static_call_namespace(self.w3), method, params, make_request)
 
             return middleware
 
@@ -530,22 +712,14 @@ else:
         make_request: Callable[[RPCEndpoint, Any], Any],
         web3: "Web3",
     ) -> Callable[[RPCEndpoint, Any], Any]:
-        """Cache JSON-RPC call values that never change.
+        """Cache JSON-RPC call values that do not change.
+
+        - Uses ``web3.static_call_cache`` if set, otherwise the process-wide cache
 
-        The cache is web3 instance itself, to allow sharing the cache
-        between different JSON-RPC providers.
+        See :py:class:`StaticCallCache`.
         """
 
         def middleware(method: RPCEndpoint, params: Any) -> RPCResponse:
-            cache = getattr(web3, "static_call_cache", {})
-            if method in STATIC_CALL_LIST:
-                cached = cache.get(method)
-                if cached:
-                    return cached
-
-            resp = make_request(method, params)
-            cache[method] = resp
-            web3.static_call_cache = cache
-            return resp
+            return _get_static_call_cache(web3).make_request(_get_static_call_namespace(web3), method, params, make_request)
 
         return middleware
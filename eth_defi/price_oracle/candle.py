@@ -0,0 +1,366 @@
+"""Streaming OHLCV candle builder for live price feeds.
+
+- :py:func:`eth_defi.research.candle.convert_to_ohlcv_candles` resamples a complete DataFrame
+  after the fact. For live feeds tracking thousands of pairs, recomputing candles on every block
+  does not scale.
+
+- :py:class:`CandleBuilder` consumes :py:class:`~eth_defi.price_oracle.oracle.PriceEntry` objects one at a time,
+  keeps the open candles per pair and time bucket in memory and emits candles when they close
+
+- Chain reorganisations reported by :py:class:`~eth_defi.event_reader.reorganisation_monitor.ReorganisationMonitor`
+  roll back trades of the abandoned fork. Already emitted candles affected by the fork are emitted again,
+  with an incremented :py:attr:`Candle.revision`.
+
+- Trades of a candle are kept until the candle is closed and older than ``finality_blocks``,
+  so that it can be recomputed
+
+Example:
+
+.. code-block:: python
+
+    builder = CandleBuilder(time_frame=datetime.timedelta(minutes=5))
+
+    while True:
+        resolution = reorg_mon.update_chain()
+        for candle in builder.apply_chain_resolution(resolution):
+            store.replace(candle)  # A corrected candle
+
+        start, end = resolution.get_read_range()
+        for log in read_events(web3, start, end, filter=filter, reorg_mon=reorg_mon, context=context):
+            entry = convert_swap_event_to_price_entry(log)
+            for candle in builder.add_price_entry(entry):
+                store.replace(candle)
+
+        for candle in builder.update_block(end, reorg_mon.get_block_timestamp_as_pandas(end).to_pydatetime()):
+            store.replace(candle)
+"""
+
+import datetime
+import heapq
+import logging
+from dataclasses import dataclass, field, replace
+from decimal import Decimal
+from typing import Iterable
+
+from eth_defi.event_reader.reorganisation_monitor import ChainReorganisationResolution
+from eth_defi.price_oracle.oracle import PriceEntry
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(slots=True)
+class CandleTrade:
+    """A single trade contributing to a candle."""
+
+    block_number: int
+
+    #: Order of the trade within the builder, to keep the order of trades within a block
+    sequence: int
+
+    timestamp: datetime.datetime
+
+    price: Decimal
+
+    volume: Decimal
+
+
+@dataclass(slots=True)
+class Candle:
+    """One OHLCV candle of a pair."""
+
+    #: Pair identifier, usually a pool contract address
+    pair: str
+
+    #: Start of the time bucket
+    timestamp: datetime.datetime
+
+    open: Decimal | None
+
+    high: Decimal | None
+
+    low: Decimal | None
+
+    close: Decimal | None
+
+    #: Sum of trade volumes
+    volume: Decimal
+
+    #: Number of trades.
+    #:
+    #: A corrected candle with zero trades means all its trades were in an abandoned fork
+    #: and the candle should be deleted.
+    trades: int
+
+    #: First and last block of the trades
+    first_block: int | None
+
+    last_block: int | None
+
+    #: How many times this candle has been emitted before
+    revision: int = 0
+
+    #: Is the time bucket over
+    closed: bool = False
+
+
+@dataclass(slots=True)
+class _CandleState:
+    pair: str
+    timestamp: datetime.datetime
+    trades: list[CandleTrade] = field(default_factory=list)
+    candle: Candle | None = None
+    closed: bool = False
+
+    #: How many times we have emitted this candle
+    emitted: int = 0
+
+    def rebuild(self):
+        trades = self.trades
+        if not trades:
+            self.candle = Candle(self.pair, self.timestamp, None, None, None, None, Decimal(0), 0, None, None, closed=self.closed)
+            return
+
+        prices = [t.price for t in trades]
+        self.candle = Candle(
+            pair=self.pair,
+            timestamp=self.timestamp,
+            open=trades[0].price,
+            high=max(prices),
+            low=min(prices),
+            close=trades[-1].price,
+            volume=sum((t.volume for t in trades), Decimal(0)),
+            trades=len(trades),
+            first_block=trades[0].block_number,
+            last_block=trades[-1].block_number,
+            closed=self.closed,
+        )
+
+    def add(self, trade: CandleTrade):
+        trades = self.trades
+        if not trades or (trades[-1].block_number, trades[-1].sequence) <= (trade.block_number, trade.sequence):
+            trades.append(trade)
+            candle = self.candle
+            if candle is None or candle.trades == 0:
+                self.rebuild()
+                return
+            # Incremental update for the in-order case
+            candle.high = max(candle.high, trade.price)
+            candle.low = min(candle.low, trade.price)
+            candle.close = trade.price
+            candle.volume += trade.volume
+            candle.trades += 1
+            candle.last_block = trade.block_number
+        else:
+            trades.append(trade)
+            trades.sort(key=lambda t: (t.block_number, t.sequence))
+            self.rebuild()
+
+    def emit(self) -> Candle:
+        self.candle.revision = self.emitted
+        self.candle.closed = self.closed
+        self.emitted += 1
+        # Give out a copy, so that later corrections do not mutate emitted candles
+        return replace(self.candle)
+
+
+def _to_decimal(value: Decimal | float | int | None) -> Decimal:
+    if value is None:
+        return Decimal(0)
+    if isinstance(value, Decimal):
+        return value
+    return Decimal(str(value))
+
+
+class CandleBuilder:
+    """Incrementally build OHLCV candles for many pairs.
+
+    - Candles are emitted when they close: when a block with a timestamp past the candle time bucket is seen,
+      see :py:meth:`update_block`
+
+    - Late trades and chain reorganisations emit corrected versions of already closed candles
+
+    - Trades are ordered by block number and arrival order, not by timestamp
+    """
+
+    def __init__(
+        self,
+        time_frame: datetime.timedelta,
+        finality_blocks: int = 128,
+        epoch: datetime.datetime = datetime.datetime(1970, 1, 1),
+    ):
+        """
+        :param time_frame:
+            Candle duration
+
+        :param finality_blocks:
+            How many blocks we keep trades of closed candles for reorganisation corrections.
+
+            Should match the check depth of the reorganisation monitor.
+
+        :param epoch:
+            Time bucket alignment
+        """
+        assert time_frame.total_seconds() > 0
+        self.time_frame = time_frame
+        self.finality_blocks = finality_blocks
+        self.epoch = epoch
+
+        #: (pair, bucket start) -> state
+        self.candles: dict[tuple[str, datetime.datetime], _CandleState] = {}
+
+        #: Heap of (bucket end, pair, bucket start) for open candles
+        self.open_heap: list[tuple[datetime.datetime, str, datetime.datetime]] = []
+
+        #: Heap of (last block, pair, bucket start) for closed candles we still keep trades for
+        self.closed_heap: list[tuple[int, str, datetime.datetime]] = []
+
+        self.sequence = 0
+        self.last_block_number: int | None = None
+        self.last_block_timestamp: datetime.datetime | None = None
+
+        #: Trades that arrived for already finalised candles
+        self.dropped_trades = 0
+
+    def __repr__(self):
+        return f"<CandleBuilder {self.time_frame}, {len(self.candles)} candles tracked, {len(self.open_heap)} open>"
+
+    def get_bucket(self, timestamp: datetime.datetime) -> datetime.datetime:
+        """Get the start of the time bucket for a timestamp."""
+        return timestamp - (timestamp - self.epoch) % self.time_frame
+
+    def add_trade(
+        self,
+        pair: str,
+        timestamp: datetime.datetime,
+        price: Decimal,
+        volume: Decimal | float | None,
+        block_number: int,
+    ) -> list[Candle]:
+        """Add a trade.
+
+        :return:
+            Corrected candles, if the trade landed in an already closed candle
+        """
+        assert timestamp.tzinfo is None, "Timestamp only accept naive UTC datetimes"
+        assert isinstance(block_number, int), f"Block number needed, got {block_number}"
+
+        bucket = self.get_bucket(timestamp)
+        key = (pair, bucket)
+        state = self.candles.get(key)
+
+        if state is None:
+            if self.last_block_timestamp is not None and bucket + self.time_frame <= self.last_block_timestamp and self._is_final(block_number):
+                logger.warning("Trade for finalised candle %s %s at block %d dropped", pair, bucket, block_number)
+                self.dropped_trades += 1
+                return []
+            state = self.candles[key] = _CandleState(pair, bucket)
+            heapq.heappush(self.open_heap, (bucket + self.time_frame, pair, bucket))
+
+        self.sequence += 1
+        state.add(CandleTrade(block_number, self.sequence, timestamp, _to_decimal(price), _to_decimal(volume)))
+
+        if state.closed:
+            # Late trade, emit a correction
+            heapq.heappush(self.closed_heap, (state.candle.last_block, pair, bucket))
+            return [state.emit()]
+
+        return []
+
+    def add_price_entry(self, entry: PriceEntry, pair: str | None = None) -> list[Candle]:
+        """Add a trade from a price feed.
+
+        Use e.g. :py:func:`eth_defi.uniswap_v3.oracle.convert_swap_event_to_price_entry`
+        or :py:func:`eth_defi.uniswap_v2.oracle.convert_sync_log_result_to_price_entry` to turn decoded swap logs to price entries.
+
+        :param pair:
+            Pair id, defaults to the pool contract address of the entry
+        """
+        pair = pair or entry.pool_contract_address
+        assert pair, f"Pair id missing: {entry}"
+        return self.add_trade(pair, entry.timestamp, entry.price, entry.volume, entry.block_number)
+
+    def _is_final(self, block_number: int) -> bool:
+        return self.last_block_number is not None and block_number < self.last_block_number - self.finality_blocks
+
+    def update_block(self, block_number: int, timestamp: datetime.datetime) -> list[Candle]:
+        """Tell the builder the chain has progressed.
+
+        - Close and emit all candles whose time bucket has ended
+        - Forget trades of candles past the finality depth
+
+        :return:
+            Closed candles
+        """
+        self.last_block_number = block_number
+        self.last_block_timestamp = timestamp
+
+        emitted = []
+        while self.open_heap and self.open_heap[0][0] <= timestamp:
+            _, pair, bucket = heapq.heappop(self.open_heap)
+            state = self.candles.get((pair, bucket))
+            if state is None or state.closed:
+                continue
+            state.closed = True
+            if state.trades:
+                emitted.append(state.emit())
+                heapq.heappush(self.closed_heap, (state.candle.last_block, pair, bucket))
+            else:
+                del self.candles[(pair, bucket)]
+
+        while self.closed_heap and self._is_final(self.closed_heap[0][0]):
+            last_block, pair, bucket = heapq.heappop(self.closed_heap)
+            state = self.candles.get((pair, bucket))
+            if state is not None and state.closed and state.candle.last_block == last_block:
+                del self.candles[(pair, bucket)]
+
+        return emitted
+
+    def handle_reorg(self, latest_good_block: int) -> list[Candle]:
+        """Remove trades of an abandoned fork.
+
+        :param latest_good_block:
+            Trades after this block are removed
+
+        :return:
+            Corrections for already emitted candles.
+
+            A candle with zero trades should be deleted.
+        """
+        corrected = []
+        for key, state in list(self.candles.items()):
+            if not state.trades or state.trades[-1].block_number <= latest_good_block:
+                continue
+
+            state.trades = [t for t in state.trades if t.block_number <= latest_good_block]
+            state.rebuild()
+
+            if state.emitted:
+                corrected.append(state.emit())
+                if state.closed and state.trades:
+                    heapq.heappush(self.closed_heap, (state.candle.last_block, state.pair, state.timestamp))
+
+            if not state.trades:
+                if state.closed:
+                    del self.candles[key]
+                else:
+                    # Keep the open slot, the fork may bring trades back
+                    state.candle = None
+
+        logger.info("Candle builder reorg at block %d, %d emitted candles corrected", latest_good_block, len(corrected))
+
+        if self.last_block_number is not None:
+            self.last_block_number = min(self.last_block_number, latest_good_block)
+
+        return corrected
+
+    def apply_chain_resolution(self, resolution: ChainReorganisationResolution) -> list[Candle]:
+        """Roll back a fork detected by :py:meth:`~eth_defi.event_reader.reorganisation_monitor.ReorganisationMonitor.update_chain`."""
+        if resolution.reorg_detected:
+            return self.handle_reorg(resolution.latest_block_with_good_data)
+        return []
+
+    def get_open_candles(self, pair: str | None = None) -> Iterable[Candle]:
+        """Current state of open candles, not yet emitted."""
+        for (candle_pair, bucket), state in self.candles.items():
+            if not state.closed and state.trades and (pair is None or pair == candle_pair):
+                yield state.candle
@@ -0,0 +1,271 @@
+"""Shared live event ingestion for many price oracles.
+
+- :py:func:`eth_defi.uniswap_v2.oracle.update_live_price_feed` and
+  :py:func:`eth_defi.uniswap_v3.oracle.update_live_price_feed` poll one pool each.
+  Running hundreds of them multiplies ``eth_getLogs`` and block header calls.
+
+- :py:class:`SharedLivePriceFeed` runs one ``eth_getLogs`` filter over all tracked pools
+  and, optionally, one :py:class:`~eth_defi.event_reader.reorganisation_monitor.ReorganisationMonitor`,
+  and fans decoded Sync/Swap events out to the :py:class:`~eth_defi.price_oracle.oracle.PriceOracle`
+  instance of each pool
+
+- Optionally feeds a :py:class:`~eth_defi.price_oracle.candle.CandleBuilder`
+
+Example:
+
+.. code-block:: python
+
+    reorg_mon = create_reorganisation_monitor(web3, check_depth=20)
+    reorg_mon.load_initial_block_headers(block_count=20)
+
+    feed = SharedLivePriceFeed(web3, reorg_mon=reorg_mon)
+    for pair_address in pair_addresses:
+        oracle = PriceOracle(time_weighted_average_price)
+        feed.add_uniswap_v2_pair(oracle, pair_address)
+
+    while True:
+        stats = feed.update()
+        price = feed.get_oracle(pair_addresses[0]).calculate_price()
+        time.sleep(5)
+"""
+
+import logging
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable
+
+from web3 import Web3
+from web3.contract.contract import ContractEvent
+
+from eth_defi.abi import get_contract
+from eth_defi.compat import native_datetime_utc_fromtimestamp
+from eth_defi.event_reader.filter import Filter
+from eth_defi.event_reader.logresult import LogContext, LogResult
+from eth_defi.event_reader.reader import extract_timestamps_json_rpc, read_events
+from eth_defi.event_reader.reorganisation_monitor import ReorganisationMonitor
+from eth_defi.price_oracle.candle import CandleBuilder, Candle
+from eth_defi.price_oracle.oracle import PriceEntry, PriceOracle
+from eth_defi.uniswap_v2.oracle import UniswapV2PriceOracleContext, convert_sync_log_result_to_price_entry
+from eth_defi.uniswap_v2.pair import fetch_pair_details
+from eth_defi.uniswap_v3.oracle import UniswapV3PriceOracleContext, convert_swap_event_to_price_entry
+from eth_defi.uniswap_v3.pool import fetch_pool_details
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LiveFeedPool:
+    """One pool tracked by :py:class:`SharedLivePriceFeed`."""
+
+    #: Pool address, lowercase
+    address: str
+
+    #: Oracle receiving the price entries of this pool
+    oracle: PriceOracle
+
+    #: Event we listen to
+    event: type[ContractEvent]
+
+    #: Set as the log context before calling the converter
+    context: LogContext
+
+    #: Turn a raw log to a price entry
+    converter: Callable[[LogResult], PriceEntry]
+
+    def get_topic(self) -> str:
+        """Event signature hash"""
+        return self.event.build_filter().topics[0]
+
+
+class SharedLivePriceFeed:
+    """Feed many price oracles from a single event subscription.
+
+    - Pools can be mixed Uniswap v2 and v3 likes, all events are read with one ``eth_getLogs`` filter
+
+    - With a reorganisation monitor, block headers are fetched once per block for all pools
+      and forks are rolled back in the candle builder
+    """
+
+    def __init__(
+        self,
+        web3: Web3,
+        reorg_mon: ReorganisationMonitor | None = None,
+        lookback_block_count: int = 5,
+        chunk_size: int = 100,
+        candle_builder: CandleBuilder | None = None,
+    ):
+        """
+        :param web3:
+            Connection, without middleware
+
+        :param reorg_mon:
+            Track the chain tip and block timestamps.
+
+            If not given, poll ``lookback_block_count`` latest blocks on every update.
+
+        :param lookback_block_count:
+            How many blocks to re-read on every update without a reorganisation monitor
+
+        :param chunk_size:
+            Max blocks per ``eth_getLogs`` call
+
+        :param candle_builder:
+            Also build candles from the price entries
+        """
+        self.web3 = web3
+        self.reorg_mon = reorg_mon
+        self.lookback_block_count = lookback_block_count
+        self.chunk_size = chunk_size
+        self.candle_builder = candle_builder
+        self.pools: dict[str, LiveFeedPool] = {}
+        self.filter: Filter | None = None
+
+        #: Candles emitted during the last update
+        self.emitted_candles: list[Candle] = []
+
+    def __repr__(self):
+        return f"<SharedLivePriceFeed tracking {len(self.pools)} pools>"
+
+    def add_pool(self, pool: LiveFeedPool):
+        """Start tracking a pool."""
+        assert pool.address == pool.address.lower(), f"Pool address must be lowercase: {pool.address}"
+        self.pools[pool.address] = pool
+        self.filter = None
+
+    def add_uniswap_v2_pair(self, oracle: PriceOracle, pair_address: str, reverse_token_order=False):
+        """Track Sync events of a Uniswap v2 compatible pair."""
+        Pair = get_contract(self.web3, "sushi/UniswapV2Pair.json")
+        pair_details = fetch_pair_details(self.web3, pair_address)
+        self.add_pool(
+            LiveFeedPool(
+                address=pair_address.lower(),
+                oracle=oracle,
+                event=Pair.events.Sync,
+                context=UniswapV2PriceOracleContext(pair_details, reverse_token_order),
+                converter=convert_sync_log_result_to_price_entry,
+            )
+        )
+
+    def add_uniswap_v3_pool(self, oracle: PriceOracle, pool_address: str, reverse_token_order=False):
+        """Track Swap events of a Uniswap v3 compatible pool."""
+        Pool = get_contract(self.web3, "uniswap_v3/UniswapV3Pool.json")
+        pool_details = fetch_pool_details(self.web3, pool_address)
+        self.add_pool(
+            LiveFeedPool(
+                address=pool_address.lower(),
+                oracle=oracle,
+                event=Pool.events.Swap,
+                context=UniswapV3PriceOracleContext(pool_details, reverse_token_order),
+                converter=convert_swap_event_to_price_entry,
+            )
+        )
+
+    def get_oracle(self, address: str) -> PriceOracle:
+        return self.pools[address.lower()].oracle
+
+    def get_filter(self) -> Filter:
+        """One filter over all pools and event types."""
+        if self.filter is None:
+            self.filter = Filter(
+                contract_address=list(self.pools.keys()),
+                bloom=None,
+                topics={pool.get_topic(): pool.event for pool in self.pools.values()},
+            )
+        return self.filter
+
+    def get_read_range(self) -> tuple[int, int, bool]:
+        """Figure out the block range for this update.
+
+        :return:
+            Start block, end block, reorg detected
+        """
+        if self.reorg_mon is not None:
+            resolution = self.reorg_mon.update_chain()
+            if self.candle_builder is not None:
+                self.emitted_candles += self.candle_builder.apply_chain_resolution(resolution)
+            start_block, end_block = resolution.get_read_range()
+            return start_block, end_block, resolution.reorg_detected
+
+        current_block = self.web3.eth.block_number
+        return max(current_block - self.lookback_block_count, 1), current_block, False
+
+    def update(self) -> Counter:
+        """Read new events for all pools and update their oracles.
+
+        :return:
+            Debug stats
+        """
+        assert self.pools, "No pools to track"
+
+        stats = Counter(
+            {
+                "created": 0,
+                "duplicates": 0,
+                "reorgs": 0,
+                "discarded": 0,
+                "chain_reorgs": 0,
+            }
+        )
+
+        self.emitted_candles = []
+
+        start_block, end_block, reorg_detected = self.get_read_range()
+        if reorg_detected:
+            stats["chain_reorgs"] += 1
+
+        if start_block > end_block:
+            return stats
+
+        filter = self.get_filter()
+        pool_topics = {address: pool.get_topic() for address, pool in self.pools.items()}
+
+        for log_result in read_events(
+            self.web3,
+            start_block,
+            end_block,
+            notify=None,
+            chunk_size=self.chunk_size,
+            filter=filter,
+            reorg_mon=self.reorg_mon,
+            extract_timestamps=None if self.reorg_mon else extract_timestamps_json_rpc,
+        ):
+            address = log_result["address"].lower()
+            pool = self.pools.get(address)
+            if pool is None or log_result["topics"][0] != pool_topics[address]:
+                # Event of another pool type we are tracking
+                continue
+
+            log_result["context"] = pool.context
+            entry = pool.converter(log_result)
+
+            # Overlapping reads return events the oracle already has
+            known = pool.oracle.get_by_transaction_hash(entry.tx_hash) is not None
+            hopped = pool.oracle.add_price_entry_reorg_safe(entry)
+            if hopped:
+                stats["reorgs"] += 1
+            elif known:
+                stats["duplicates"] += 1
+            else:
+                stats["created"] += 1
+
+            if self.candle_builder is not None:
+                self.emitted_candles += self.candle_builder.add_price_entry(entry, pair=pool.address)
+
+        # Get the last block timestamp
+        if self.reorg_mon is not None:
+            unix_timestamp = self.reorg_mon.get_block_timestamp(end_block)
+        else:
+            timestamps = extract_timestamps_json_rpc(self.web3, end_block, end_block)
+            unix_timestamp = next(iter(timestamps.values()))
+        last_timestamp = native_datetime_utc_fromtimestamp(unix_timestamp)
+
+        for pool in self.pools.values():
+            pool.oracle.update_last_refresh(end_block, last_timestamp)
+            stats["discarded"] += pool.oracle.truncate_buffer(last_timestamp)
+
+        if self.candle_builder is not None:
+            self.emitted_candles += self.candle_builder.update_block(end_block, last_timestamp)
+
+        logger.info("Live feed update %d - %d for %d pools: %s", start_block, end_block, len(self.pools), stats)
+
+        return stats
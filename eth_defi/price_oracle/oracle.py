@@ -5,14 +5,15 @@ like :py:mod:`eth_defi.uniswap_v2.oracle`.
 
 """
 
+import bisect
 import datetime
 import enum
-import heapq
 import statistics
 from abc import abstractmethod
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Dict, List, Optional, Protocol, Tuple
+from fractions import Fraction
+from typing import Dict, Iterator, List, Optional, Protocol
 from eth_defi.compat import native_datetime_utc_now
 
 
@@ -113,6 +114,130 @@ class PriceEntry:
         self.block_hash = new_entry.block_hash
 
 
+class PriceEntryBuffer:
+    """Time-ordered buffer of price entries.
+
+    - Entries are kept in a list sorted by timestamp, oldest first.
+      Entries arrive mostly in order, so adding is an amortised ``O(1)`` append;
+      the slot of a late entry is found with a ``O(log n)`` binary search
+      and inserted with a ``list.insert()`` memory move.
+
+    - ``O(1)`` newest and oldest access, ``O(1)`` transaction hash lookup
+
+    - ``O(log n + k)`` truncation, where ``k`` is the number of discarded entries,
+      plus a memory move of the remaining entries
+
+    - Keeps running sums of prices and volumes, so that
+      :py:func:`time_weighted_average_price` and :py:func:`volume_weighted_average_price`
+      are ``O(1)`` no matter the buffer size. The sums are exact fractions, so adding and removing
+      entries does not accumulate rounding errors.
+    """
+
+    def __init__(self):
+        self.entries: list[PriceEntry] = []
+        #: tx hash -> the first added entry with this hash
+        self.tx_hash_index: dict[str, PriceEntry] = {}
+        #: tx hash -> later entries with the same hash, e.g. several swaps in one transaction
+        self.tx_hash_duplicates: dict[str, list[PriceEntry]] = {}
+        self.price_sum = Fraction(0)
+        self.volume_sum = Fraction(0)
+        self.price_volume_sum = Fraction(0)
+        self.volume_count = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self) -> Iterator[PriceEntry]:
+        return iter(self.entries)
+
+    def _update_sums(self, entry: PriceEntry, sign: int):
+        price = Fraction(entry.price)
+        self.price_sum += sign * price
+        if entry.volume is not None:
+            volume = Fraction(entry.volume)
+            self.volume_sum += sign * volume
+            self.price_volume_sum += sign * price * volume
+            self.volume_count += sign
+
+    def add(self, entry: PriceEntry):
+        """Add a new entry in its time order.
+
+        Entries with the same timestamp keep their insertion order.
+        """
+        entries = self.entries
+        if not entries or entries[-1].timestamp <= entry.timestamp:
+            entries.append(entry)
+        else:
+            # Late entry, after any entries with the same timestamp
+            bisect.insort_right(entries, entry, key=_get_timestamp)
+
+        if entry.tx_hash:
+            if self.tx_hash_index.setdefault(entry.tx_hash, entry) is not entry:
+                self.tx_hash_duplicates.setdefault(entry.tx_hash, []).append(entry)
+
+        self._update_sums(entry, 1)
+
+    def _forget(self, entry: PriceEntry):
+        tx_hash = entry.tx_hash
+        if tx_hash:
+            duplicates = self.tx_hash_duplicates.get(tx_hash)
+            if self.tx_hash_index.get(tx_hash) is entry:
+                if duplicates:
+                    # The next added entry with the same hash takes over
+                    self.tx_hash_index[tx_hash] = duplicates.pop(0)
+                else:
+                    del self.tx_hash_index[tx_hash]
+            elif duplicates:
+                duplicates[:] = [e for e in duplicates if e is not entry]
+
+            if tx_hash in self.tx_hash_duplicates and not self.tx_hash_duplicates[tx_hash]:
+                del self.tx_hash_duplicates[tx_hash]
+        self._update_sums(entry, -1)
+
+    def get_by_transaction_hash(self, tx_hash: str) -> Optional[PriceEntry]:
+        """Get the first added entry of a transaction."""
+        return self.tx_hash_index.get(tx_hash)
+
+    def get_newest(self) -> Optional[PriceEntry]:
+        return self.entries[-1] if self.entries else None
+
+    def get_oldest(self) -> Optional[PriceEntry]:
+        return self.entries[0] if self.entries else None
+
+    def truncate(self, too_old: datetime.datetime) -> int:
+        """Discard entries older than the given timestamp.
+
+        :return:
+            Number of discarded entries
+        """
+        entries = self.entries
+        count = bisect.bisect_left(entries, too_old, key=_get_timestamp)
+        for entry in entries[:count]:
+            self._forget(entry)
+        del entries[:count]
+        return count
+
+    def get_mean_price(self) -> Decimal:
+        """Mean of all prices in the buffer."""
+        assert self.entries, "Empty buffer"
+        return _fraction_to_decimal(self.price_sum / len(self.entries))
+
+    def get_volume_weighted_price(self) -> Decimal:
+        """Volume-weighted mean of prices of entries that have volume."""
+        if self.volume_count == 0 or self.volume_sum == 0:
+            raise NotEnoughData("No volume data in the buffer")
+        return _fraction_to_decimal(self.price_volume_sum / self.volume_sum)
+
+
+def _get_timestamp(entry: PriceEntry) -> datetime.datetime:
+    return entry.timestamp
+
+
+def _fraction_to_decimal(value: Fraction) -> Decimal:
+    """Convert the same way as :py:mod:`statistics` does."""
+    return Decimal(value.numerator) / Decimal(value.denominator)
+
+
 class PriceFunction(Protocol):
     """A callable for calcualte
 
@@ -167,7 +292,10 @@ class PriceOracle(BasePriceOracle):
     - Sample data over multiple events
 
     - Rotate ring buffer of events when new data comes in.
-      Uses `Python heapq <https://docs.python.org/3/library/heapq.html>`__ for this.
+      Uses :py:class:`PriceEntryBuffer` for this.
+
+    - :py:func:`time_weighted_average_price` and :py:func:`volume_weighted_average_price`
+      are calculated from running sums without copying the buffer
 
     Example:
 
@@ -246,9 +374,9 @@ class PriceOracle(BasePriceOracle):
 
         self.target_time_window = target_time_window
 
-        # Buffer of price events using heapq.
+        # Buffer of price events.
         # The oldest datetime.datetime is the first always the first entry.
-        self.buffer: List[Tuple[datetime.datetime, PriceEntry]] = []
+        self.buffer = PriceEntryBuffer()
 
         # In real-time mode,
         # pairs might not have seen trades for a while,
@@ -314,7 +442,14 @@ class PriceOracle(BasePriceOracle):
 
         """
         self.check_data_quality()
-        events = [tpl[1] for tpl in self.buffer]
+
+        # Fast path from running sums
+        if self.price_function is time_weighted_average_price:
+            return self.buffer.get_mean_price()
+        elif self.price_function is volume_weighted_average_price:
+            return self.buffer.get_volume_weighted_price()
+
+        events = list(self.buffer)
         return self.price_function(events)
 
     def add_price_entry(self, evt: PriceEntry):
@@ -323,13 +458,9 @@ class PriceOracle(BasePriceOracle):
         .. note::
 
             It is not safe to call this function multiple times for the same event.
-
-        Further reading
-
-        - https://docs.python.org/3/library/heapq.html
         """
         assert isinstance(evt, PriceEntry)
-        heapq.heappush(self.buffer, (evt.timestamp, evt))
+        self.buffer.add(evt)
 
     def add_price_entry_reorg_safe(self, evt: PriceEntry) -> bool:
         """Add price entry to the ring buffer with support for fixing chain reorganisations.
@@ -351,28 +482,22 @@ class PriceOracle(BasePriceOracle):
         if existing:
             if existing.block_hash != evt.block_hash:
                 existing.update_chain_reorg(evt)
+                return True
         else:
-            heapq.heappush(self.buffer, (evt.timestamp, evt))
+            self.buffer.add(evt)
+        return False
 
     def get_by_transaction_hash(self, tx_hash: str) -> Optional[PriceEntry]:
         """Get an event by transaction hash."""
-        for heap_index, entry in self.buffer:
-            if entry.tx_hash == tx_hash:
-                return entry
-        return None
+        return self.buffer.get_by_transaction_hash(tx_hash)
 
     def get_newest(self) -> Optional[PriceEntry]:
         """Return the newest price entry."""
-        if self.buffer:
-            largest_list = heapq.nlargest(1, self.buffer)
-            return largest_list[0][1]
-        return None
+        return self.buffer.get_newest()
 
     def get_oldest(self) -> Optional[PriceEntry]:
         """Return the oldest price entry."""
-        if self.buffer:
-            return self.buffer[0][1]
-        return None
+        return self.buffer.get_oldest()
 
     def get_buffer_duration(self) -> datetime.timedelta:
         """How long time is the time we have price events in the buffer for."""
@@ -422,11 +547,7 @@ class PriceOracle(BasePriceOracle):
         """
 
         too_old = current_timestamp - self.target_time_window
-        old_buffer_length = len(self.buffer)
-
-        self.buffer = [entry for entry in self.buffer if entry[0] >= too_old]
-
-        return old_buffer_length - len(self.buffer)
+        return self.buffer.truncate(too_old)
 
 
 def time_weighted_average_price(events: List[PriceEntry]) -> Decimal:
@@ -445,6 +566,28 @@ def time_weighted_average_price(events: List[PriceEntry]) -> Decimal:
     return statistics.mean(prices)
 
 
+def volume_weighted_average_price(events: List[PriceEntry]) -> Decimal:
+    """Calculate VWAP price over all entries in the buffer.
+
+    Entries without volume data are ignored.
+
+    :raise NotEnoughData:
+        If no entry has volume
+    """
+    price_volume_sum = Fraction(0)
+    volume_sum = Fraction(0)
+    for e in events:
+        if e.volume is not None:
+            volume = Fraction(e.volume)
+            price_volume_sum += Fraction(e.price) * volume
+            volume_sum += volume
+
+    if volume_sum == 0:
+        raise NotEnoughData("No volume data in the buffer")
+
+    return _fraction_to_decimal(price_volume_sum / volume_sum)
+
+
 class TrustedStablecoinOracle(BasePriceOracle):
     """Return a price for a token we trust we can always redeem for 1 USD."""
 
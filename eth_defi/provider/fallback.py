@@ -5,8 +5,10 @@
 
 import enum
 import logging
+import threading
 import time
 from collections import Counter, defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from pprint import pformat
 from typing import Any, cast
 from requests.exceptions import HTTPError
@@ -14,8 +16,10 @@ from requests.exceptions import HTTPError
 from web3 import Web3
 from web3.types import RPCEndpoint, RPCResponse
 
-from eth_defi.event_reader.fast_json_rpc import get_last_headers
+from eth_defi.event_reader.fast_json_rpc import BatchRequests, get_last_headers, is_batch_too_large_error, send_batch_request
 from eth_defi.middleware import DEFAULT_RETRYABLE_EXCEPTIONS, DEFAULT_RETRYABLE_HTTP_STATUS_CODES, DEFAULT_RETRYABLE_RPC_ERROR_CODES, ProbablyNodeHasNoBlock, is_retryable_http_exception, SomeCrappyRPCProviderException
+from eth_defi.provider.log_block_range import is_log_range_too_large_error
+from eth_defi.provider.health import DEFAULT_SPREAD_METHODS, ProviderHealthTracker, get_rate_limit_cool_down
 from eth_defi.provider.named import BaseNamedProvider, NamedProvider, get_provider_name
 from eth_defi.compat import WEB3_PY_V7
 
@@ -43,6 +47,16 @@ class FallbackStrategy(enum.Enum):
     #:
     cycle_on_error = "cycle_on_error"
 
+    #: Spread read calls across all healthy providers, weighted by their observed latency and error rate.
+    #:
+    #: On an error, fail over to an untried provider immediately.
+    #: Methods not in ``spread_methods``, like ``eth_sendRawTransaction``,
+    #: still use :py:attr:`cycle_on_error`.
+    #:
+    #: See :py:mod:`eth_defi.provider.health`.
+    #:
+    latency_weighted = "latency_weighted"
+
 
 def _check_provider_middlewares_compat(provider):
     """Check if provider has conflicting retry middleware with v6/v7 compatibility.
@@ -119,6 +133,10 @@ class FallbackProvider(BaseNamedProvider):
         :py:class:`FallbackProvider` does not call any middlewares installed on the providers themselves.
     """
 
+    #: :py:meth:`make_batch_request` retries and splits batches itself,
+    #: see :py:func:`eth_defi.event_reader.fast_json_rpc.make_batch_request`
+    handles_batch_errors = True
+
     def __init__(
         self,
         providers: list[NamedProvider],
@@ -131,6 +149,9 @@ class FallbackProvider(BaseNamedProvider):
         retries: int = 6,
         state_missing_switch_over_delay: float = 12.0,
         switchover_noisiness=logging.WARNING,
+        max_batch_size: int = 100,
+        hedge_delay: float | None = None,
+        spread_methods: frozenset[str] = DEFAULT_SPREAD_METHODS,
     ):
         """
         :param providers:
@@ -167,6 +188,23 @@ class FallbackProvider(BaseNamedProvider):
 
             See code comments for details.
 
+        :param max_batch_size:
+            Max calls in one JSON-RPC batch, see :py:meth:`make_batch_request`.
+
+            Lowered automatically per provider if a provider rejects large batches,
+            and grown back one call at a time after successful batches.
+
+        :param hedge_delay:
+            Hedge slow read calls with :py:attr:`FallbackStrategy.latency_weighted`.
+
+            If a provider has not replied within its p95 latency, but at least ``hedge_delay`` seconds,
+            send the same request to another provider and use whichever reply comes first.
+            Set to ``None`` to disable hedging.
+
+        :param spread_methods:
+            JSON-RPC methods that are safe to spread and hedge across providers
+            with :py:attr:`FallbackStrategy.latency_weighted`.
+
         """
 
         super().__init__()
@@ -202,6 +240,27 @@ class FallbackProvider(BaseNamedProvider):
         # Wait 12 seconds for block missing errors
         self.state_missing_switch_over_delay = 12.0
 
+        self.max_batch_size = max_batch_size
+
+        #: provider number -> learnt batch size, if a provider rejected batches of :py:attr:`max_batch_size`
+        self.batch_size_limits: dict[int, int] = {}
+
+        #: provider number -> full size batches in a row since the last change of the batch size
+        self.batch_success_streaks: Counter = Counter()
+
+        self.hedge_delay = hedge_delay
+        self.spread_methods = spread_methods
+
+        #: How many hedge requests we have sent
+        self.hedge_count = 0
+
+        #: Latency and error tracking for :py:attr:`FallbackStrategy.latency_weighted`
+        self.health: ProviderHealthTracker | None = None
+        if strategy == FallbackStrategy.latency_weighted:
+            self.health = ProviderHealthTracker([get_provider_name(p) for p in providers])
+
+        self._hedge_executor: ThreadPoolExecutor | None = None
+
     def __repr__(self):
         names = [get_provider_name(p) for p in self.providers]
         return f"<Fallback provider {', '.join(names)}>"
@@ -268,26 +327,37 @@ class FallbackProvider(BaseNamedProvider):
         - If there are errors try cycle through providers and sleep
           between cycles until one provider works
 
+        - With :py:attr:`FallbackStrategy.latency_weighted`, pick the provider
+          for each read call by its health and fail over to untried providers without sleeping
+
         - Use a special "ignore_error" parameter to skip retries,
           if given in ``eth_call`` payload.
         """
 
-        # The caller has requested not to retry.
-        # Set in EncodedCall.call(ignore_error=True)
-        ignore_error = False
-        param_1 = params[0] if isinstance(params, (tuple, list)) and len(params) > 0 else None
-        if param_1 and isinstance(param_1, dict):
-            ignore_error = param_1.pop("ignore_error", False)
-            if ignore_error:
-                # Don't pass the flag to RPC
-                params = [param_1, *params[1:]]
+        params, ignore_error = _pop_ignore_error(params)
+
+        weighted = self.health is not None and method in self.spread_methods
+        tried = set()
 
         current_sleep = self.sleep
         for i in range(self.retries + 1):
-            provider = self.get_active_provider()
+            if weighted:
+                idx = self.health.choose(exclude=tried)
+            else:
+                idx = self.currently_active_provider
+            provider = self.providers[idx]
+
+            # Providers whose hedged request raised
+            failed = []
             try:
                 # Call the underlying provider
-                resp_data = provider.make_request(method, params)
+                if weighted and self.hedge_delay is not None and self.has_multiple_providers():
+                    idx, resp_data = self._make_hedged_request(idx, method, params, failed)
+                    provider = self.providers[idx]
+                elif weighted:
+                    resp_data = self._make_timed_request(idx, method, params)
+                else:
+                    resp_data = provider.make_request(method, params)
 
                 # We need to manually raise the exception here,
                 # likely was raised by Web3.py itself in pre-6.0 versions.
@@ -317,7 +387,7 @@ class FallbackProvider(BaseNamedProvider):
 
                 # Track succeed API counts,
                 # see test_fallback_single_fault
-                self.api_call_counts[self.currently_active_provider][method] += 1
+                self.api_call_counts[idx][method] += 1
 
                 return resp_data
 
@@ -335,6 +405,14 @@ class FallbackProvider(BaseNamedProvider):
                 if ignore_error:
                     raise
 
+                # eth_getLogs range must be split by the caller, retrying the same range will fail again,
+                # see AdaptiveLogRangePlanner.
+                # Still rotate, as the next provider may have more generous limits.
+                if method == "eth_getLogs" and is_log_range_too_large_error(e):
+                    if self.has_multiple_providers() and not weighted:
+                        self.switch_provider()
+                    raise
+
                 if is_retryable_http_exception(
                     e,
                     retryable_rpc_error_codes=self.retryable_rpc_error_codes,
@@ -343,7 +421,23 @@ class FallbackProvider(BaseNamedProvider):
                     method=method,
                     params=params,
                 ):
-                    if self.has_multiple_providers():
+                    if weighted:
+                        if failed:
+                            # Blame the providers that failed, not the one we picked first
+                            idx = failed[0]
+                            provider = self.providers[idx]
+                        for failed_idx in failed or [idx]:
+                            self.health.record_failure(failed_idx)
+                            tried.add(failed_idx)
+                        if len(tried) < len(self.providers) and i < self.retries:
+                            # Fail over to an untried provider right away
+                            logger.log(self.switchover_noisiness, "Encountered JSON-RPC retryable error %s at %s\nWhen calling RPC method: %s, trying another provider", e, get_provider_name(provider), method)
+                            self.retry_count += 1
+                            self.api_retry_counts[idx][method] += 1
+                            continue
+                        # Everyone failed, sleep and start over
+                        tried = set()
+                    elif self.has_multiple_providers():
                         self.switch_provider()
 
                     if i < self.retries:
@@ -364,7 +458,7 @@ class FallbackProvider(BaseNamedProvider):
                         time.sleep(current_sleep)
                         current_sleep *= self.backoff
                         self.retry_count += 1
-                        self.api_retry_counts[self.currently_active_provider][method] += 1
+                        self.api_retry_counts[idx][method] += 1
                         continue
                     else:
                         raise  # Out of retries
@@ -373,6 +467,299 @@ class FallbackProvider(BaseNamedProvider):
 
         raise AssertionError("Should never be reached")
 
+    def _make_timed_request(self, idx: int, method: RPCEndpoint, params: Any, cancelled: threading.Event | None = None) -> RPCResponse:
+        """Call a provider and record its latency and rate limit headers.
+
+        Failures are recorded by the caller, as only retryable errors count against the provider.
+
+        :param cancelled:
+            Set when a hedged request lost the race, so its late reply does not skew the health stats
+        """
+        started = time.perf_counter()
+        try:
+            resp_data = self.providers[idx].make_request(method, params)
+        except HTTPError as e:
+            if e.response is not None and e.response.status_code == 429 and not (cancelled and cancelled.is_set()):
+                self.health.record_rate_limit(idx, get_rate_limit_cool_down(dict(e.response.headers)) or self.sleep)
+            raise
+
+        if cancelled and cancelled.is_set():
+            return resp_data
+
+        self.health.record_success(idx, time.perf_counter() - started)
+
+        # Thread-local, so this works in hedge threads too
+        cool_down = get_rate_limit_cool_down(get_last_headers())
+        if cool_down:
+            self.health.record_rate_limit(idx, cool_down)
+
+        return resp_data
+
+    def _make_hedged_request(self, idx: int, method: RPCEndpoint, params: Any, failed: list[int]) -> tuple[int, RPCResponse]:
+        """Send a request, and the same request to another provider if the first one is slow.
+
+        - The losing request is cancelled and its late reply is not recorded in the health stats
+
+        - If both requests fail, the first error is raised and the second one logged
+
+        :param failed:
+            Indexes of the providers whose request raised are appended here, in the order of failure
+
+        :return:
+            Tuple (provider index that replied first, response)
+        """
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=max(4, 2 * len(self.providers)), thread_name_prefix="fallback-hedge")
+
+        cancelled = {idx: threading.Event()}
+        primary = self._hedge_executor.submit(self._make_timed_request, idx, method, params, cancelled[idx])
+        done, _ = wait([primary], timeout=self.health.get_hedge_delay(idx, self.hedge_delay))
+        hedge_idx = None if done else self.health.choose(exclude={idx})
+        if hedge_idx is None:
+            if primary.exception() is not None:
+                failed.append(idx)
+            return idx, primary.result()
+
+        logger.debug("Hedging %s: %s is slow, also asking %s", method, get_provider_name(self.providers[idx]), get_provider_name(self.providers[hedge_idx]))
+        self.hedge_count += 1
+        cancelled[hedge_idx] = threading.Event()
+        hedge = self._hedge_executor.submit(self._make_timed_request, hedge_idx, method, params, cancelled[hedge_idx])
+        futures = {primary: idx, hedge: hedge_idx}
+
+        pending = set(futures)
+        first_error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        cancelled[futures[loser]].set()
+                        loser.cancel()
+                    return futures[future], future.result()
+
+                failed.append(futures[future])
+                if first_error is None:
+                    first_error = future.exception()
+                else:
+                    logger.warning("Both hedged %s requests failed, discarding the error from %s: %s", method, get_provider_name(self.providers[futures[future]]), future.exception())
+
+        raise first_error
+
+    def close(self):
+        """Shut down the hedged request threads.
+
+        Called automatically when the provider is garbage collected.
+        """
+        executor = getattr(self, "_hedge_executor", None)
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self._hedge_executor = None
+
+    def __del__(self):
+        self.close()
+
+    def __getstate__(self):
+        """Threads cannot be pickled, e.g. when passing the provider to a loky worker."""
+        state = self.__dict__.copy()
+        state["_hedge_executor"] = None
+        return state
+
+    def __setstate__(self, state):
+        """The hedge thread pool is recreated on the first hedged request."""
+        self.__dict__.update(state)
+
+    #: Grow a lowered batch size by one call after this many full size batches in a row
+    BATCH_GROW_AFTER = 5
+
+    def get_batch_size(self, provider_idx: int | None = None) -> int:
+        """Get the batch size for a provider.
+
+        :param provider_idx:
+            Provider number. Default to the active provider.
+        """
+        if provider_idx is None:
+            provider_idx = self.currently_active_provider
+        return self.batch_size_limits.get(provider_idx, self.max_batch_size)
+
+    def make_batch_request(self, batch_requests: BatchRequests) -> list[RPCResponse]:
+        """Make many requests in JSON-RPC batches.
+
+        - Requests are sent in batches of :py:meth:`get_batch_size` through the active provider
+
+        - If the whole batch fails with a retryable error, retry and switch providers like :py:meth:`make_request`
+
+        - If the provider rejects the batch because it is too large, halve the batch size of this provider.
+          The size grows back by one after :py:attr:`BATCH_GROW_AFTER` full size batches in a row,
+          up to :py:attr:`max_batch_size`, so a transient rejection does not stick.
+
+        - If the provider rejects the batch for another reason, e.g. rate limiting or no batch support,
+          send the calls one by one with :py:meth:`make_request`
+
+        - Calls failing within the batch with a retryable error are retried individually with :py:meth:`make_request`
+
+        - Calls failing with a non-retryable error, like a reverted ``eth_call``, are returned as is
+
+        :param batch_requests:
+            List of (method, params) tuples
+
+        :return:
+            Responses in the request order
+        """
+        results = []
+        pos = 0
+        while pos < len(batch_requests):
+            batch_size = self.get_batch_size()
+            chunk = batch_requests[pos : pos + batch_size]
+            responses = self._make_batch_request_with_retries(chunk)
+
+            # Provider switches only happen before retries, so the active provider gave the answer
+            idx = self.currently_active_provider
+
+            if responses is None:
+                # Too large, try again with smaller batches
+                self.batch_size_limits[idx] = max(1, len(chunk) // 2)
+                self.batch_success_streaks[idx] = 0
+                logger.log(self.switchover_noisiness, "JSON-RPC batch of %d requests rejected by %s, lowering batch size to %d", len(chunk), get_provider_name(self.providers[idx]), self.batch_size_limits[idx])
+                continue
+
+            if idx in self.batch_size_limits and len(chunk) >= self.batch_size_limits[idx]:
+                # Additive increase, the provider may have had a transient problem
+                self.batch_success_streaks[idx] += 1
+                if self.batch_success_streaks[idx] >= self.BATCH_GROW_AFTER:
+                    self.batch_success_streaks[idx] = 0
+                    if self.batch_size_limits[idx] + 1 >= self.max_batch_size:
+                        del self.batch_size_limits[idx]
+                    else:
+                        self.batch_size_limits[idx] += 1
+
+            if len(responses) != len(chunk):
+                # Some providers silently drop items in large batches
+                logger.warning("Sent JSON-RPC batch of %d requests, received %d responses, retrying individually", len(chunk), len(responses))
+                responses = [None] * len(chunk)
+
+            for (method, params), response in zip(chunk, responses):
+                results.append(self._check_batch_response(method, params, response))
+
+            pos += len(chunk)
+
+        return results
+
+    def _make_batch_request_with_retries(self, batch_requests: BatchRequests) -> list[RPCResponse] | None:
+        """Send one batch, retry with provider switching if the whole batch fails.
+
+        :return:
+            Responses, or ``None`` if the batch was rejected as too large and should be split.
+
+            ``None`` items if the calls must be sent one by one.
+        """
+        batch_requests = [(method, _pop_ignore_error(params)[0]) for method, params in batch_requests]
+
+        current_sleep = self.sleep
+        for i in range(self.retries + 1):
+            provider = self.get_active_provider()
+            try:
+                responses = send_batch_request(provider, batch_requests)
+
+                if not isinstance(responses, list):
+                    error_json_payload = responses.get("error")
+                    if _is_tac_provider_madness(error_json_payload):
+                        raise SomeCrappyRPCProviderException(str(error_json_payload))
+                    raise ExtraValueError(
+                        error_json_payload,
+                        extra_help=f"JSON-RPC batch of {len(batch_requests)} requests rejected:\n{responses}",
+                    )
+
+                return responses
+
+            except Exception as e:
+                retryable = is_retryable_http_exception(
+                    e,
+                    retryable_rpc_error_codes=self.retryable_rpc_error_codes,
+                    retryable_status_codes=self.retryable_status_codes,
+                    retryable_exceptions=self.retryable_exceptions,
+                    method=None,
+                    params=None,
+                )
+
+                if not retryable:
+                    if is_batch_too_large_error(e) and len(batch_requests) > 1:
+                        return None
+                    # Rate limited, batches not supported, etc.
+                    # Fall back to single calls with the full retry logic
+                    logger.log(self.switchover_noisiness, "JSON-RPC batch of %d requests failed: %s, sending them one by one", len(batch_requests), e)
+                    return [None] * len(batch_requests)
+
+                if self.has_multiple_providers():
+                    self.switch_provider()
+
+                if i < self.retries:
+                    logger.log(
+                        self.switchover_noisiness,
+                        "Encountered JSON-RPC retryable error %s\nWhen calling a batch of %d requests\nRetrying in %f seconds, retry #%d / %d",
+                        e,
+                        len(batch_requests),
+                        current_sleep,
+                        i + 1,
+                        self.retries,
+                    )
+                    time.sleep(current_sleep)
+                    current_sleep *= self.backoff
+                    self.retry_count += 1
+                    self.api_retry_counts[self.currently_active_provider]["batch"] += 1
+                    continue
+                raise  # Out of retries
+
+        raise AssertionError("Should never be reached")
+
+    def _check_batch_response(self, method: RPCEndpoint, params: Any, response: RPCResponse | None) -> RPCResponse:
+        """Check a single response of a batch, retry individually if needed."""
+        if response is None:
+            return self.make_request(method, params)
+
+        params, ignore_error = _pop_ignore_error(params)
+        error_json_payload = response.get("error")
+        try:
+            if error_json_payload:
+                raise ExtraValueError(error_json_payload, extra_help=f"Error in JSON-RPC batch response:\n{error_json_payload}\nMethod: {method}\nParams: {pformat(params)}")
+            _check_faulty_rpc_response(self, method, params, response)
+        except Exception as e:
+            if ignore_error:
+                return response
+
+            if _is_tac_provider_madness(error_json_payload) or is_retryable_http_exception(
+                e,
+                retryable_rpc_error_codes=self.retryable_rpc_error_codes,
+                retryable_status_codes=self.retryable_status_codes,
+                retryable_exceptions=self.retryable_exceptions,
+                method=method,
+                params=params,
+            ):
+                return self.make_request(method, params)
+
+            return response
+
+        self.api_call_counts[self.currently_active_provider][method] += 1
+        return response
+
+
+def _pop_ignore_error(params: Any) -> tuple[Any, bool]:
+    """Strip the special ``ignore_error`` flag from ``eth_call`` payload.
+
+    The caller has requested not to retry.
+    Set in EncodedCall.call(ignore_error=True)
+
+    :return:
+        Params without the flag, ignore error flag
+    """
+    ignore_error = False
+    param_1 = params[0] if isinstance(params, (tuple, list)) and len(params) > 0 else None
+    if param_1 and isinstance(param_1, dict) and "ignore_error" in param_1:
+        param_1 = param_1.copy()
+        ignore_error = param_1.pop("ignore_error", False)
+        # Don't pass the flag to RPC
+        params = [param_1, *params[1:]]
+    return params, ignore_error
+
 
 def _check_faulty_rpc_response(
     provider: NamedProvider,
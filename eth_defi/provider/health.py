@@ -0,0 +1,254 @@
+"""JSON-RPC provider health tracking.
+
+- Keep per-provider latency percentiles, error rates and rate limit cool downs
+
+- Used by :py:class:`~eth_defi.provider.fallback.FallbackProvider` with
+  :py:attr:`~eth_defi.provider.fallback.FallbackStrategy.latency_weighted` to spread read calls
+  across all configured providers, weighted by their observed capacity,
+  and to decide when to hedge a slow request
+"""
+
+import logging
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+
+logger = logging.getLogger(__name__)
+
+
+#: Read-only methods that can be sent to any provider, and sent twice when hedging
+DEFAULT_SPREAD_METHODS = frozenset(
+    {
+        "eth_call",
+        "eth_getLogs",
+        "eth_getBlockByNumber",
+        "eth_getBlockByHash",
+        "eth_getBalance",
+        "eth_getCode",
+        "eth_getStorageAt",
+        "eth_chainId",
+    }
+)
+
+
+@dataclass(slots=True)
+class ProviderHealth:
+    """Observed health of a single provider."""
+
+    #: Provider name for diagnostics
+    name: str
+
+    #: Latencies of recent successful requests, seconds
+    latencies: deque = field(default_factory=lambda: deque(maxlen=200))
+
+    #: Exponentially weighted error rate, 0...1
+    error_rate: float = 0.0
+
+    success_count: int = 0
+
+    error_count: int = 0
+
+    #: UNIX time until we do not send anything to this provider
+    rate_limited_until: float = 0.0
+
+    #: Cached sorted latencies, invalidated on new samples
+    _sorted: list | None = None
+
+    def get_latency_percentile(self, q: float) -> float | None:
+        """Get latency percentile.
+
+        :param q:
+            Percentile 0...1
+
+        :return:
+            Seconds, or ``None`` if we have no samples
+        """
+        if not self.latencies:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self.latencies)
+        idx = min(int(q * len(self._sorted)), len(self._sorted) - 1)
+        return self._sorted[idx]
+
+    def get_p50(self) -> float | None:
+        return self.get_latency_percentile(0.50)
+
+    def get_p99(self) -> float | None:
+        return self.get_latency_percentile(0.99)
+
+    def is_rate_limited(self, now: float) -> bool:
+        return now < self.rate_limited_until
+
+
+class ProviderHealthTracker:
+    """Track provider health and pick providers for requests.
+
+    - Providers are picked randomly, weighted by ``(1 - error rate)² / p50 latency``
+    - Providers without latency samples are treated as good as the best known provider, so they get probed
+    - Rate limited providers are skipped until their cool down ends
+
+    Thread safe, as hedged requests are recorded from worker threads.
+    """
+
+    def __init__(
+        self,
+        names: list[str],
+        latency_window: int = 200,
+        error_decay: float = 0.05,
+        min_weight: float = 0.01,
+        rng: random.Random | None = None,
+    ):
+        """
+        :param names:
+            Provider names, in the provider order
+
+        :param latency_window:
+            How many recent latency samples we keep per provider
+
+        :param error_decay:
+            How fast error rate reacts, the weight of the latest request
+
+        :param min_weight:
+            Keep sending a trickle of requests to bad providers so they can recover
+        """
+        self.providers = [ProviderHealth(name, latencies=deque(maxlen=latency_window)) for name in names]
+        self.error_decay = error_decay
+        self.min_weight = min_weight
+        self.rng = rng or random.Random()
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<ProviderHealthTracker {self.get_stats()}>"
+
+    def __getstate__(self):
+        """Locks cannot be pickled."""
+        state = self.__dict__.copy()
+        del state["lock"]
+        return state
+
+    def __setstate__(self, state):
+        """Locks cannot be pickled."""
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+
+    def record_success(self, idx: int, duration: float):
+        with self.lock:
+            health = self.providers[idx]
+            health.latencies.append(duration)
+            health._sorted = None
+            health.success_count += 1
+            health.error_rate *= 1 - self.error_decay
+
+    def record_failure(self, idx: int):
+        with self.lock:
+            health = self.providers[idx]
+            health.error_count += 1
+            health.error_rate = health.error_rate * (1 - self.error_decay) + self.error_decay
+
+    def record_rate_limit(self, idx: int, cool_down: float):
+        """Provider told us to back off.
+
+        :param cool_down:
+            Seconds, e.g. from ``Retry-After`` header
+        """
+        with self.lock:
+            health = self.providers[idx]
+            health.rate_limited_until = max(health.rate_limited_until, time.time() + cool_down)
+        logger.info("Provider %s rate limited for %f seconds", health.name, cool_down)
+
+    def get_weight(self, idx: int, best_p50: float | None) -> float:
+        health = self.providers[idx]
+        p50 = health.get_p50() or best_p50
+        if p50 is None:
+            return 1.0
+        return max((1 - health.error_rate) ** 2 / max(p50, 0.001), self.min_weight)
+
+    def choose(self, exclude: set[int] | None = None) -> int | None:
+        """Pick a provider for the next request.
+
+        :param exclude:
+            Providers already tried for this request
+
+        :return:
+            Provider index, or ``None`` if all providers are excluded
+        """
+        now = time.time()
+        with self.lock:
+            candidates = [idx for idx in range(len(self.providers)) if not exclude or idx not in exclude]
+            if not candidates:
+                return None
+
+            available = [idx for idx in candidates if not self.providers[idx].is_rate_limited(now)]
+            if not available:
+                # Everyone is rate limited, pick the one that cools down first
+                return min(candidates, key=lambda idx: self.providers[idx].rate_limited_until)
+
+            known_p50s = [p for p in (self.providers[idx].get_p50() for idx in available) if p is not None]
+            best_p50 = min(known_p50s) if known_p50s else None
+            weights = [self.get_weight(idx, best_p50) for idx in available]
+            return self.rng.choices(available, weights=weights)[0]
+
+    def get_hedge_delay(self, idx: int, min_delay: float, percentile: float = 0.95) -> float:
+        """How long we wait for a provider before hedging.
+
+        :return:
+            Latency percentile of the provider, but at least ``min_delay`` seconds
+        """
+        with self.lock:
+            latency = self.providers[idx].get_latency_percentile(percentile)
+        return max(latency or min_delay, min_delay)
+
+    def get_stats(self) -> dict[str, dict]:
+        """Diagnostics output."""
+        now = time.time()
+        with self.lock:
+            return {
+                h.name: {
+                    "p50": h.get_p50(),
+                    "p99": h.get_p99(),
+                    "error_rate": h.error_rate,
+                    "success_count": h.success_count,
+                    "error_count": h.error_count,
+                    "rate_limited": h.is_rate_limited(now),
+                }
+                for h in self.providers
+            }
+
+
+def get_rate_limit_cool_down(headers: dict) -> float | None:
+    """Read rate limit state from RPC HTTP reply headers.
+
+    - ``Retry-After``
+    - ``x-ratelimit-remaining`` reaching zero, with ``x-ratelimit-reset`` in seconds if given
+
+    :return:
+        Seconds to wait, or ``None`` if not rate limited
+    """
+    if not headers:
+        return None
+
+    headers = {k.lower(): v for k, v in headers.items()}
+
+    retry_after = headers.get("retry-after")
+    if retry_after:
+        try:
+            return float(retry_after)
+        except ValueError:
+            # HTTP date format, not worth parsing
+            return 1.0
+
+    remaining = headers.get("x-ratelimit-remaining")
+    if remaining is not None:
+        try:
+            if float(remaining) <= 0:
+                reset = float(headers.get("x-ratelimit-reset", 1.0))
+                if reset > 1_000_000_000:
+                    # UNIX timestamp instead of seconds
+                    reset = max(reset - time.time(), 0.0)
+                return reset
+        except ValueError:
+            pass
+
+    return None
@@ -1,15 +1,72 @@
-"""How long log queries are split into smaller batches per RPC provider."""
+"""How long log queries are split into smaller batches per RPC provider.
+
+- :py:func:`get_logs_max_block_range` gives a static starting point per provider
+
+- :py:class:`AdaptiveLogRangePlanner` learns the actual limits of the provider and the log density
+  of the scanned block range, so that dense periods (e.g. Uniswap swaps) get short ranges
+  and empty periods get long ranges
+"""
+
+import logging
+import re
+import threading
+from typing import Iterable
 
 from web3 import Web3
 
 from eth_defi.provider.named import get_provider_name
 
+logger = logging.getLogger(__name__)
+
+
+#: Error message fragments RPC providers use when ``eth_getLogs`` range or result set is too large.
+#:
+#: Matched lowercase against the exception and its causes.
+#:
+LOG_RANGE_ERROR_MESSAGES = (
+    # Infura, Alchemy, QuickNode
+    # {'code': -32005, 'message': 'query returned more than 10000 results'}
+    "query returned more than",
+    # Alchemy
+    # 'Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range and no limit on the response size, or you can request any block range with a cap of 10K logs in the response. Based on your parameters, this block range should work: [0x1312d00, 0x1312f4a]'
+    "log response size exceeded",
+    "eth_getlogs is limited to",
+    # Geth, Erigon, various load balancers
+    "block range is too large",
+    "block range too large",
+    "range is too large",
+    "exceed maximum block range",
+    "exceeds max block range",
+    "exceeds the range allowed",
+    "block range limit",
+    "too many results",
+    "too many logs",
+    "query timeout exceeded",
+)
+
+#: BSC nodes reply with a bare "limit exceeded" when ``eth_getLogs`` asks too much.
+#:
+#: https://github.com/bnb-chain/bsc/issues/1215
+#:
+#: ``{'code': -32005, 'message': 'limit exceeded'}``
+#:
+#: Matched by the error code and the full message, as a message fragment would
+#: also match rate limit errors like ``daily request limit exceeded`` that must be retried.
+#:
+BSC_LOG_LIMIT_ERROR = (-32005, "limit exceeded")
+
+
+_RESULT_LIMIT_RE = re.compile(r"more than ([\d,]+) (?:results|logs)")
+_SUGGESTED_RANGE_RE = re.compile(r"\[(0x[0-9a-f]+), ?(0x[0-9a-f]+)\]")
+_BLOCK_RANGE_LIMIT_RE = re.compile(r"(?:up to a|limited to a|max(?:imum)? block range(?: is| of)?:?) ([\d,]+)(k?)")
+
 
 def get_logs_max_block_range(web3: Web3) -> int:
     """Get how many blocks is the max batch size in eth_getLogs for this RPC provider.
 
     - See https://www.alchemy.com/docs/node/ethereum/ethereum-api-endpoints/eth-get-logs
     - Handle broken chains and subpar RPC providers
+    - See :py:class:`AdaptiveLogRangePlanner` for learning the limits on the fly
     """
 
     name = get_provider_name(web3.provider)
@@ -19,3 +76,309 @@ def get_logs_max_block_range(web3: Web3) -> int:
 
     # Default to 10k blocks
     return 10_000
+
+
+def _get_error_messages(exc: BaseException) -> str:
+    """Collect lowercased messages of the exception and its causes."""
+    messages = []
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        messages.append(str(exc).lower())
+        exc = exc.__cause__ or exc.__context__
+    return "\n".join(messages)
+
+
+def _get_rpc_errors(exc: BaseException) -> Iterable[dict]:
+    """Collect JSON-RPC error payloads ``{'code': ..., 'message': ...}`` of the exception and its causes."""
+    seen = set()
+    while exc is not None and id(exc) not in seen:
+        seen.add(id(exc))
+        if exc.args and isinstance(exc.args[0], dict):
+            yield exc.args[0]
+        rpc_response = getattr(exc, "rpc_response", None)
+        if isinstance(rpc_response, dict) and isinstance(rpc_response.get("error"), dict):
+            yield rpc_response["error"]
+        exc = exc.__cause__ or exc.__context__
+
+
+def is_log_range_too_large_error(exc: BaseException) -> bool:
+    """Did ``eth_getLogs`` fail because we asked too much.
+
+    - Walks the exception cause chain, so works with :py:class:`eth_defi.event_reader.reader.ReadingLogsFailed`
+
+    - Retrying the same range is pointless, the range must be split
+
+    - Rate limit errors are not range errors and are left for the retry logic
+
+    See :py:data:`LOG_RANGE_ERROR_MESSAGES` and :py:data:`BSC_LOG_LIMIT_ERROR`.
+    """
+    message = _get_error_messages(exc)
+    if any(m in message for m in LOG_RANGE_ERROR_MESSAGES):
+        return True
+
+    code, bsc_message = BSC_LOG_LIMIT_ERROR
+    for error in _get_rpc_errors(exc):
+        if error.get("code") == code and str(error.get("message", "")).strip().lower() == bsc_message:
+            return True
+
+    return False
+
+
+class AdaptiveLogRangePlanner:
+    """Plan ``eth_getLogs`` block ranges based on provider limits and log density.
+
+    - Start with :py:func:`get_logs_max_block_range`
+
+    - On "too many results" or "range too large" errors, split the range
+      and learn the provider's block range and result count limits
+
+    - Widen the range over sparse regions and narrow it over dense ones,
+      aiming for ``target_results`` logs per call
+
+    - Remember the log density per ``bucket_size`` blocks, so the next run over
+      the same blocks can pre-plan chunk boundaries with :py:meth:`plan`.
+      Persist with :py:meth:`to_dict` and :py:meth:`from_dict`.
+
+    Thread safe, can be shared with :py:func:`eth_defi.event_reader.reader.read_events_concurrent` workers.
+
+    Example:
+
+    .. code-block:: python
+
+        planner = AdaptiveLogRangePlanner.create(web3)
+
+        for log in read_events(
+            web3,
+            start_block,
+            end_block,
+            filter=filter,
+            range_planner=planner,
+        ):
+            ...
+
+        # Save the learnt log density for the next run
+        state = planner.to_dict()
+    """
+
+    def __init__(
+        self,
+        max_block_range: int = 10_000,
+        min_block_range: int = 1,
+        target_results: int = 2_000,
+        max_results: int | None = None,
+        growth: float = 2.0,
+        bucket_size: int = 1_000,
+        density: dict[int, float] | None = None,
+    ):
+        """
+        :param max_block_range:
+            Max blocks in one ``eth_getLogs`` call.
+
+            Lowered automatically if the provider complains.
+
+        :param min_block_range:
+            Never split ranges smaller than this
+
+        :param target_results:
+            How many logs we aim to get in one call
+
+        :param max_results:
+            Known result count limit of the provider, e.g. 10,000 for Infura.
+
+            Learnt from error messages if not given.
+
+        :param growth:
+            How fast we widen or narrow the range when we have no density data
+
+        :param bucket_size:
+            Block granularity of the log density data
+
+        :param density:
+            Bucket number -> logs per block, from a previous run
+        """
+        assert max_block_range >= min_block_range >= 1
+        self.max_block_range = max_block_range
+        self.min_block_range = min_block_range
+        self.target_results = target_results
+        self.max_results = max_results
+        self.growth = growth
+        self.bucket_size = bucket_size
+        self.density: dict[int, float] = density or {}
+
+        #: Current range for blocks we have no density data
+        self.block_range = max_block_range
+
+        #: How many times we had to split a range
+        self.split_count = 0
+
+        self.lock = threading.Lock()
+
+    def __repr__(self):
+        return f"<AdaptiveLogRangePlanner range:{self.block_range:,} max range:{self.max_block_range:,} max results:{self.max_results} density buckets:{len(self.density):,}>"
+
+    @classmethod
+    def create(cls, web3: Web3, **kwargs) -> "AdaptiveLogRangePlanner":
+        """Create a planner with the default block range limit of the provider."""
+        return cls(max_block_range=get_logs_max_block_range(web3), **kwargs)
+
+    def to_dict(self) -> dict:
+        """Serialise the learnt limits and log density, e.g. to JSON."""
+        with self.lock:
+            return {
+                "max_block_range": self.max_block_range,
+                "max_results": self.max_results,
+                "bucket_size": self.bucket_size,
+                "density": {str(k): v for k, v in self.density.items()},
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict, **kwargs) -> "AdaptiveLogRangePlanner":
+        """Restore a planner saved with :py:meth:`to_dict`."""
+        return cls(
+            max_block_range=data["max_block_range"],
+            max_results=data["max_results"],
+            bucket_size=data["bucket_size"],
+            density={int(k): v for k, v in data["density"].items()},
+            **kwargs,
+        )
+
+    def get_result_budget(self) -> float:
+        """How many logs we aim for in one call."""
+        if self.max_results:
+            # Leave headroom, as density is an estimate
+            return min(self.target_results, self.max_results * 0.5)
+        return self.target_results
+
+    def get_chunk_end(self, start_block: int, end_block: int) -> int:
+        """Get the last block of the next ``eth_getLogs`` call.
+
+        :param start_block:
+            First block of the chunk (inclusive)
+
+        :param end_block:
+            Last block we are going to read (inclusive)
+
+        :return:
+            Last block of the chunk (inclusive)
+        """
+        with self.lock:
+            end_cap = min(end_block, start_block + self.max_block_range - 1)
+            budget = self.get_result_budget()
+            expected = 0.0
+            block = start_block
+            while block <= end_cap:
+                bucket = block // self.bucket_size
+                bucket_end = min((bucket + 1) * self.bucket_size - 1, end_cap)
+                density = self.density.get(bucket)
+                if density is None:
+                    # No data, fall back to the current adaptive range
+                    return min(end_cap, max(block - 1, start_block + self.block_range - 1))
+
+                if density > 0:
+                    blocks_left = int((budget - expected) / density)
+                    if block + blocks_left - 1 < bucket_end:
+                        # The minimum range must not run past the last block we read
+                        return min(end_cap, max(start_block + self.min_block_range - 1, block + blocks_left - 1, start_block))
+
+                expected += density * (bucket_end - block + 1)
+                block = bucket_end + 1
+
+            return end_cap
+
+    def iterate_chunks(self, start_block: int, end_block: int) -> Iterable[tuple[int, int]]:
+        """Iterate chunks lazily, taking into account what we learnt from the previous chunks.
+
+        :return:
+            Iterable of (start block, end block) inclusive ranges
+        """
+        block = start_block
+        while block <= end_block:
+            chunk_end = self.get_chunk_end(block, end_block)
+            yield block, chunk_end
+            block = chunk_end + 1
+
+    def plan(self, start_block: int, end_block: int) -> list[tuple[int, int]]:
+        """Pre-plan chunk boundaries for concurrent reading.
+
+        Uses the log density of previous reads, if any.
+
+        :return:
+            List of (start block, end block) inclusive ranges
+        """
+        return list(self.iterate_chunks(start_block, end_block))
+
+    def record_success(self, start_block: int, end_block: int, result_count: int):
+        """Learn from a successful ``eth_getLogs`` call.
+
+        :param result_count:
+            How many logs we got
+        """
+        block_count = end_block - start_block + 1
+        density = result_count / block_count
+        budget = self.get_result_budget()
+        with self.lock:
+            # Only update buckets that the call fully covered, or we had no data for
+            for bucket in range(start_block // self.bucket_size, end_block // self.bucket_size + 1):
+                bucket_start = bucket * self.bucket_size
+                full = start_block <= bucket_start and bucket_start + self.bucket_size - 1 <= end_block
+                if full or bucket not in self.density:
+                    self.density[bucket] = density
+
+            if result_count < budget / 4:
+                self.block_range = min(self.max_block_range, int(self.block_range * self.growth))
+            elif result_count > budget:
+                self.block_range = max(self.min_block_range, int(self.block_range / self.growth))
+
+    def record_too_large(self, start_block: int, end_block: int, exc: BaseException) -> list[tuple[int, int]] | None:
+        """Learn from a failed ``eth_getLogs`` call and split the range.
+
+        :param exc:
+            The exception raised
+
+        :return:
+            Sub ranges to retry,
+            or ``None`` if this was not a range error or the range cannot be split further
+        """
+        if not is_log_range_too_large_error(exc):
+            return None
+
+        block_count = end_block - start_block + 1
+        if block_count <= self.min_block_range:
+            return None
+
+        message = _get_error_messages(exc)
+        split_at = start_block + block_count // 2 - 1
+
+        with self.lock:
+            self.split_count += 1
+
+            result_match = _RESULT_LIMIT_RE.search(message)
+            range_match = _BLOCK_RANGE_LIMIT_RE.search(message)
+            suggested_match = _SUGGESTED_RANGE_RE.search(message)
+
+            if result_match:
+                # We got more than the limit, so the density is at least this high
+                limit = int(result_match.group(1).replace(",", ""))
+                self.max_results = min(self.max_results or limit, limit)
+                density = limit / block_count
+                for bucket in range(start_block // self.bucket_size, end_block // self.bucket_size + 1):
+                    self.density[bucket] = max(self.density.get(bucket, 0), density)
+
+            if range_match:
+                limit = int(range_match.group(1).replace(",", "")) * (1000 if range_match.group(2) else 1)
+                if self.min_block_range <= limit < self.max_block_range:
+                    self.max_block_range = limit
+            elif not result_match and not suggested_match and "range" in message:
+                # Plain range error, provider limit is below what we asked
+                self.max_block_range = max(self.min_block_range, min(self.max_block_range, block_count // 2))
+
+            if suggested_match:
+                suggested_end = int(suggested_match.group(2), 16)
+                if start_block <= suggested_end < end_block:
+                    split_at = suggested_end
+
+            self.block_range = max(self.min_block_range, min(self.block_range, self.max_block_range, block_count // 2))
+
+        logger.info("eth_getLogs range %d - %d too large, splitting at %d, planner is now %s", start_block, end_block, split_at, self)
+        return [(start_block, split_at), (split_at + 1, end_block)]
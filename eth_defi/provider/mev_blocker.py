@@ -22,6 +22,7 @@ from web3 import Web3
 from web3.providers import JSONBaseProvider
 from web3.types import RPCEndpoint, RPCResponse
 
+from eth_defi.event_reader.fast_json_rpc import BatchRequests, send_batch_request
 from eth_defi.provider.named import BaseNamedProvider
 
 #: List of RPC methods that execution transactions
@@ -72,6 +73,15 @@ class MEVBlockerProvider(BaseNamedProvider):
             self.provider_counter["call"] += 1
             return self.call_provider.make_request(method, params)
 
+    def make_batch_request(self, batch_requests: BatchRequests) -> list[RPCResponse] | RPCResponse:
+        """Batch read calls through the call provider.
+
+        Transactions cannot be batched.
+        """
+        assert not any(self.is_transact_method(method) for method, params in batch_requests), f"Transact methods cannot be batched: {batch_requests}"
+        self.provider_counter["call"] += len(batch_requests)
+        return send_batch_request(self.call_provider, batch_requests)
+
     @property
     def endpoint_uri(self) -> str:
         """Map us to the transact provider by the default"""
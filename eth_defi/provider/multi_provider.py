@@ -13,7 +13,7 @@ from web3 import Web3, HTTPProvider
 
 from eth_defi.chain import install_chain_middleware
 from eth_defi.event_reader.fast_json_rpc import patch_provider, patch_web3
-from eth_defi.middleware import static_call_cache_middleware
+from eth_defi.middleware import STATIC_CALL_FOREVER, StaticCallCache, static_call_cache_middleware
 from eth_defi.provider.anvil import is_anvil
 from eth_defi.provider.broken_provider import set_block_tip_latency
 from eth_defi.provider.fallback import FallbackProvider
@@ -125,6 +125,10 @@ def create_multi_provider_web3(
 
     - HTTP providers have middleware cleared and chain middleware installed
 
+    - Responses that do not change, like ``eth_chainId``, are cached and shared with other Web3 instances
+      of the same configuration line in the process, see :py:class:`eth_defi.middleware.StaticCallCache`.
+      Anvil gets a private cache for ``eth_chainId`` only.
+
     The configuration line is a whitespace separated list of URLs (spaces, newlines, etc.)
     using mini configuration language.
 
@@ -283,6 +287,10 @@ def create_multi_provider_web3(
 
     web3 = MultiProviderWeb3(provider)
 
+    # Web3 instances created from the same configuration share static call cache entries,
+    # see eth_defi.middleware.StaticCallCache
+    web3.static_call_cache_namespace = " ".join(items)
+
     patch_web3(web3)
 
     # Import compatibility functions
@@ -323,6 +331,9 @@ def create_multi_provider_web3(
         # When running against local testing,
         # we need to disable block tip latency hacks
         set_block_tip_latency(web3, 0)
+        # Anvil mines and reverts blocks at will,
+        # do not share block data with other instances
+        web3.static_call_cache = StaticCallCache(ttls={"eth_chainId": STATIC_CALL_FOREVER})
 
     return web3
 
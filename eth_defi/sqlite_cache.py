@@ -4,9 +4,21 @@ See :py:class:`PersistentKeyValueStore`
 """
 
 import sqlite3
+from collections import OrderedDict
 from pathlib import Path
-from threading import get_ident
-from typing import Any
+from threading import Lock, get_ident
+from typing import Any, Iterable
+
+
+#: Max number of SQL variables in a single query.
+#:
+#: SQLite before 3.32 has a limit of 999.
+SQLITE_MAX_VARIABLES = 999
+
+#: In-process LRU cache size for the high-throughput mode of the built-in disk caches.
+#:
+#: See ``cache_max_bytes`` in :py:class:`PersistentKeyValueStore`.
+DEFAULT_CACHE_MAX_BYTES = 16 * 1024 * 1024
 
 
 class PersistentKeyValueStore(dict):
@@ -22,29 +34,127 @@ class PersistentKeyValueStore(dict):
     - Cache keys must be strings
     - Cache values must be string-encodeable via :py:meth:`encode_value` and :py:meth:`decode_value` hooks
     - Can be used across threads
+
+    High-throughput mode:
+
+    - ``wal=True`` switches the database to write-ahead logging, so readers in other threads
+      and processes are not blocked by a writer, and commits are cheaper
+
+    - Use :py:meth:`set_many` and :py:meth:`get_many` for bulk operations in a single transaction
+
+    - ``cache_max_bytes`` enables an in-process LRU cache in front of SQLite,
+      shared by all threads. The cache is not aware of writes by other processes.
+
+    - :py:meth:`iteritems` and friends stream rows in batches without loading the whole table
+
+    Example:
+
+    .. code-block:: python
+
+        cache = PersistentKeyValueStore(path, wal=True, cache_max_bytes=DEFAULT_CACHE_MAX_BYTES)
+        cache.set_many({"a": "1", "b": "2"})
+        assert cache.get_many(["a", "b", "c"]) == {"a": "1", "b": "2"}
     """
 
-    def __init__(self, filename: Path, autocommit=True):
+    def __init__(
+        self,
+        filename: Path,
+        autocommit=True,
+        wal=False,
+        cache_max_bytes: int = 0,
+        iter_batch_size: int = 1000,
+    ):
         """
         :param filename: Path to the sqlite database
 
         :param autocommit: Whether to autocommit every time new entry is added to the database
+
+        :param wal:
+            Use SQLite write-ahead log journal mode.
+
+            The journal mode is persistent in the database file.
+
+        :param cache_max_bytes:
+            Size of the in-process LRU cache for encoded values, in characters.
+
+            Set zero to disable.
+
+        :param iter_batch_size:
+            How many rows to fetch at a time when iterating
         """
         super().__init__()
         self.autocommit = autocommit
         assert isinstance(filename, Path)
         self.filename = filename
         self.thread_connection_map = {}
+        self.wal = wal
+        self.iter_batch_size = iter_batch_size
+
+        self.cache_max_bytes = cache_max_bytes
+        self.cache_bytes = 0
+        self.lru_cache: OrderedDict[str, str] = OrderedDict()
+        self.lru_lock = Lock()
+
+        #: LRU cache hit and miss counters
+        self.cache_hits = 0
+        self.cache_misses = 0
 
     @property
     def conn(self) -> sqlite3.Connection:
         """One connection per thread"""
         thread_id = get_ident()
         if thread_id not in self.thread_connection_map:
-            self.thread_connection_map[thread_id] = sqlite3.connect(self.filename)
-            self.thread_connection_map[thread_id].execute("CREATE TABLE IF NOT EXISTS kv (key text unique, value text)")
+            conn = sqlite3.connect(self.filename, timeout=60)
+            if self.wal:
+                conn.execute("PRAGMA journal_mode=WAL")
+                # Safe with WAL, only the last transactions may roll back on power loss
+                conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key text unique, value text)")
+            self.thread_connection_map[thread_id] = conn
         return self.thread_connection_map[thread_id]
 
+    def _cache_get(self, key: str) -> str | None:
+        if not self.cache_max_bytes:
+            return None
+        with self.lru_lock:
+            value = self.lru_cache.get(key)
+            if value is None:
+                self.cache_misses += 1
+                return None
+            self.lru_cache.move_to_end(key)
+            self.cache_hits += 1
+            return value
+
+    def _cache_put(self, key: str, value: str):
+        if not self.cache_max_bytes:
+            return
+        size = len(value)
+        if size > self.cache_max_bytes:
+            return
+        with self.lru_lock:
+            old = self.lru_cache.pop(key, None)
+            if old is not None:
+                self.cache_bytes -= len(old)
+            self.lru_cache[key] = value
+            self.cache_bytes += size
+            while self.cache_bytes > self.cache_max_bytes:
+                _, evicted = self.lru_cache.popitem(last=False)
+                self.cache_bytes -= len(evicted)
+
+    def _cache_discard(self, key: str):
+        if not self.cache_max_bytes:
+            return
+        with self.lru_lock:
+            old = self.lru_cache.pop(key, None)
+            if old is not None:
+                self.cache_bytes -= len(old)
+
+    def clear_lru_cache(self):
+        """Drop the in-process cache, e.g. after another process has written to the database."""
+        with self.lru_lock:
+            self.lru_cache.clear()
+            self.cache_bytes = 0
+
     def encode_value(self, value: Any) -> str:
         """Hook to convert Python objects to cache format"""
         return value
@@ -62,21 +172,29 @@ class PersistentKeyValueStore(dict):
     def commit(self):
         self.conn.commit()
 
-    def iterkeys(self):
+    def _iterate_rows(self, sql: str) -> Iterable[tuple]:
         c = self.conn.cursor()
-        for row in c.execute("SELECT key FROM kv"):
+        c.execute(sql)
+        while rows := c.fetchmany(self.iter_batch_size):
+            yield from rows
+
+    def iterkeys(self):
+        for row in self._iterate_rows("SELECT key FROM kv"):
             yield row[0]
 
     def itervalues(self):
-        c = self.conn.cursor()
-        for row in c.execute("SELECT value FROM kv"):
+        for row in self._iterate_rows("SELECT value FROM kv"):
             yield row[0]
 
     def iteritems(self):
-        c = self.conn.cursor()
-        for row in c.execute("SELECT key, value FROM kv"):
+        for row in self._iterate_rows("SELECT key, value FROM kv"):
             yield row[0], row[1]
 
+    def iter_decoded_items(self) -> Iterable[tuple[str, Any]]:
+        """Stream all entries with values passed through :py:meth:`decode_value`."""
+        for key, value in self.iteritems():
+            yield key, self.decode_value(value)
+
     def keys(self):
         return list(self.iterkeys())
 
@@ -87,20 +205,27 @@ class PersistentKeyValueStore(dict):
         return list(self.iteritems())
 
     def __contains__(self, key):
+        if self._cache_get(key) is not None:
+            return True
         return self.conn.execute("SELECT 1 FROM kv WHERE key = ?", (key,)).fetchone() is not None
 
     def __getitem__(self, key):
         assert type(key) == str, f"Only string keys allowed, got {key}"
-        item = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
-        if item is None:
-            raise KeyError(key)
-        return self.decode_value(item[0])
+        raw = self._cache_get(key)
+        if raw is None:
+            item = self.conn.execute("SELECT value FROM kv WHERE key = ?", (key,)).fetchone()
+            if item is None:
+                raise KeyError(key)
+            raw = item[0]
+            self._cache_put(key, raw)
+        return self.decode_value(raw)
 
     def __setitem__(self, key, value):
         assert type(key) == str, f"Only string keys allowed, got {key}"
         value = self.encode_value(value)
         assert type(value) == str, f"Only string values allowed, got {value}"
         self.conn.execute("REPLACE INTO kv (key, value) VALUES (?,?)", (key, value))
+        self._cache_put(key, value)
         if self.autocommit:
             self.conn.commit()
 
@@ -108,6 +233,76 @@ class PersistentKeyValueStore(dict):
         if key not in self:
             raise KeyError(key)
         self.conn.execute("DELETE FROM kv WHERE key = ?", (key,))
+        self._cache_discard(key)
+
+    def set_many(self, items: dict[str, Any] | Iterable[tuple[str, Any]]):
+        """Write multiple entries in a single transaction.
+
+        :param items:
+            Key -> value mapping, or iterable of key, value tuples
+        """
+        if isinstance(items, dict):
+            items = items.items()
+
+        rows = []
+        for key, value in items:
+            assert type(key) == str, f"Only string keys allowed, got {key}"
+            value = self.encode_value(value)
+            assert type(value) == str, f"Only string values allowed, got {value}"
+            rows.append((key, value))
+
+        self.conn.executemany("REPLACE INTO kv (key, value) VALUES (?,?)", rows)
+
+        for key, value in rows:
+            self._cache_put(key, value)
+
+        if self.autocommit:
+            self.conn.commit()
+
+    def get_many(self, keys: Iterable[str]) -> dict[str, Any]:
+        """Read multiple entries with a minimum number of queries.
+
+        :return:
+            Key -> decoded value mapping for keys that exist in the store
+        """
+        raw_values = {}
+        missing = []
+        for key in keys:
+            raw = self._cache_get(key)
+            if raw is not None:
+                raw_values[key] = raw
+            else:
+                missing.append(key)
+
+        for i in range(0, len(missing), SQLITE_MAX_VARIABLES):
+            chunk = missing[i : i + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            for key, raw in self.conn.execute(f"SELECT key, value FROM kv WHERE key IN ({placeholders})", chunk):
+                raw_values[key] = raw
+                self._cache_put(key, raw)
+
+        return {key: self.decode_value(raw) for key, raw in raw_values.items()}
+
+    def get_existing_keys(self, keys: Iterable[str]) -> set[str]:
+        """Check which keys exist, without reading and decoding the values.
+
+        :return:
+            The keys that exist in the store
+        """
+        existing = set()
+        missing = []
+        for key in keys:
+            if self._cache_get(key) is not None:
+                existing.add(key)
+            else:
+                missing.append(key)
+
+        for i in range(0, len(missing), SQLITE_MAX_VARIABLES):
+            chunk = missing[i : i + SQLITE_MAX_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            existing.update(key for (key,) in self.conn.execute(f"SELECT key FROM kv WHERE key IN ({placeholders})", chunk))
+
+        return existing
 
     def __iter__(self):
         return self.iterkeys()
@@ -117,16 +312,17 @@ class PersistentKeyValueStore(dict):
         return rows if rows is not None else 0
 
     def get(self, key, default=None):
-        if key in self:
-            value = self[key]
-            return value
-        return default
+        if type(key) != str:
+            return default
+        try:
+            return self[key]
+        except KeyError:
+            return default
 
     def purge(self):
         """Delete all keys and save."""
-        keys = list(self.keys())
-        for key in keys:
-            del self[key]
+        self.conn.execute("DELETE FROM kv")
+        self.clear_lru_cache()
         self.commit()
 
     def get_file_size(self) -> int:
@@ -1040,13 +1040,23 @@ class TokenDiskCache(PersistentKeyValueStore):
         self,
         filename=DEFAULT_TOKEN_DISK_CACHE_PATH,
         max_str_length: int = 256,
+        wal=False,
+        cache_max_bytes: int = 0,
     ):
+        """
+        :param wal:
+            Opt in to SQLite write-ahead log, see :py:class:`~eth_defi.sqlite_cache.PersistentKeyValueStore`
+
+        :param cache_max_bytes:
+            Opt in to an in-process LRU cache for token entries,
+            e.g. :py:data:`~eth_defi.sqlite_cache.DEFAULT_CACHE_MAX_BYTES`
+        """
         assert isinstance(filename, Path), f"We got {filename}"
         filename = filename.expanduser()
         dirname = filename.parent
         os.makedirs(dirname, exist_ok=True)
         self.max_str_length = max_str_length
-        super().__init__(filename)
+        super().__init__(filename, wal=wal, cache_max_bytes=cache_max_bytes)
 
     def encode_value(self, value: dict) -> Any:
         value["saved_at"] = native_datetime_utc_now().isoformat()
@@ -1095,9 +1105,10 @@ class TokenDiskCache(PersistentKeyValueStore):
         yield total_supply
 
     def generate_calls(self, chain_id: int, addresses: list[HexAddress]) -> Iterable[EncodedCall]:
-        for address in addresses:
-            cache_key = TokenDetails.generate_cache_key(chain_id, address)
-            if cache_key not in self:
+        cache_keys = {address: TokenDetails.generate_cache_key(chain_id, address) for address in addresses}
+        cached = self.get_existing_keys(cache_keys.values())
+        for address, cache_key in cache_keys.items():
+            if cache_key not in cached:
                 yield from self.encode_multicalls(address)
             else:
                 logger.debug("Was already cached: %s", address)
@@ -1173,16 +1184,21 @@ class TokenDiskCache(PersistentKeyValueStore):
             results_per_address[call_result.call.address][call_result.call.func_name] = call_result
 
         tokens_read = 0
+        pending = {}
 
         for address, result_per_address in results_per_address.items():
             cache_entry = self.create_cache_entry(result_per_address)
             key = TokenDetails.generate_cache_key(chain_id, address)
             cache_entry["chain_id"] = chain_id
-            self[key] = cache_entry
+            pending[key] = cache_entry
             tokens_read += 1
 
             if tokens_read % checkpoint == 0:
+                self.set_many(pending)
                 self.commit()
+                pending = {}
+
+        self.set_many(pending)
 
         logger.info(
             "Read %d tokens for chain %d with %d multicalls ",
@@ -300,6 +300,8 @@ class CachedTokenRisk(TokenRisk):
         session: Session = None,
         cache: dict | None = None,
         retries: int | None = DEFAULT_RETRIES,
+        wal=False,
+        cache_max_bytes: int = 0,
     ):
         """
 
@@ -322,6 +324,14 @@ class CachedTokenRisk(TokenRisk):
             Cache keys are format: `cache_key = f"{chain_id}-{address}"`.
             Cache values are JSON blobs as string.
 
+        :param wal:
+            Opt in to SQLite write-ahead log for ``cache_file``,
+            see :py:class:`~eth_defi.sqlite_cache.PersistentKeyValueStore`
+
+        :param cache_max_bytes:
+            Opt in to an in-process LRU cache for ``cache_file``,
+            e.g. :py:data:`~eth_defi.sqlite_cache.DEFAULT_CACHE_MAX_BYTES`
+
         """
         super().__init__(api_key, session=session, retries=retries)
 
@@ -335,7 +345,7 @@ class CachedTokenRisk(TokenRisk):
             self.cache = cache
         else:
             assert isinstance(cache_file, Path), f"Got {cache_file.__class__}"
-            self.cache = PersistentKeyValueStore(cache_file)
+            self.cache = PersistentKeyValueStore(cache_file, wal=wal, cache_max_bytes=cache_max_bytes)
 
         logger.info("Starting with Token Risk cache at %s, we have %d entries cached", cache_file, len(self.cache))
 
@@ -387,8 +397,10 @@ class CachedTokenRisk(TokenRisk):
         scores = []
         path = self.cache.filename
 
-        for key in self.cache.keys():
-            data = json.loads(self.cache[key])
+        # Stream the database instead of loading all keys
+        items = self.cache.iteritems() if isinstance(self.cache, PersistentKeyValueStore) else self.cache.items()
+        for key, value in items:
+            data = json.loads(value)
             scores.append(data["score"])
 
         text = f"""
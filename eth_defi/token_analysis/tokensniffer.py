@@ -555,6 +555,8 @@ class CachedTokenSniffer(TokenSniffer):
         api_key: str,
         session: Session = None,
         cache: dict | None = None,
+        wal=False,
+        cache_max_bytes: int = 0,
     ):
         """
 
@@ -577,6 +579,14 @@ class CachedTokenSniffer(TokenSniffer):
             Cache keys are format: `cache_key = f"{chain_id}-{address}"`.
             Cache values are JSON blobs as string.
 
+        :param wal:
+            Opt in to SQLite write-ahead log for ``cache_file``,
+            see :py:class:`~eth_defi.sqlite_cache.PersistentKeyValueStore`
+
+        :param cache_max_bytes:
+            Opt in to an in-process LRU cache for ``cache_file``,
+            e.g. :py:data:`~eth_defi.sqlite_cache.DEFAULT_CACHE_MAX_BYTES`
+
         """
         super().__init__(api_key, session)
 
@@ -585,7 +595,7 @@ class CachedTokenSniffer(TokenSniffer):
             self.cache = cache
         else:
             assert isinstance(cache_file, Path), f"Got {cache_file.__class__}"
-            self.cache = PersistentKeyValueStore(cache_file)
+            self.cache = PersistentKeyValueStore(cache_file, wal=wal, cache_max_bytes=cache_max_bytes)
 
     def fetch_token_info(self, chain_id: int, address: str | HexAddress) -> TokenSnifferReply:
         """Get TokenSniffer info.
@@ -634,8 +644,10 @@ class CachedTokenSniffer(TokenSniffer):
         scores = []
         path = self.cache.filename
 
-        for key in self.cache.keys():
-            data = json.loads(self.cache[key])
+        # Stream the database instead of loading all keys
+        items = self.cache.iteritems() if isinstance(self.cache, PersistentKeyValueStore) else self.cache.items()
+        for key, value in items:
+            data = json.loads(value)
             scores.append(data["score"])
 
         text = f"""
@@ -0,0 +1,364 @@
+"""Offline Uniswap v2 reserve index from Sync events.
+
+- Track (reserve0, reserve1) of every pair of a Uniswap v2 compatible deployment
+  from ``Sync`` logs, with the history of changes
+
+- Quote swaps and multi-hop routes locally at the latest or any historical block,
+  instead of calling ``getReserves()`` for every quote like :py:class:`eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator`
+
+- Persist the index to a file and resume scanning from the last indexed block
+
+Example:
+
+.. code-block:: python
+
+    index = ReserveIndex(fee=30)
+    index.add_pair(pair_address, token0, token1)
+
+    for log in read_events(web3, start_block=index.get_last_block() + 1, end_block=end_block, filter=sync_filter):
+        index.handle_sync_log(log)
+
+    index.save(Path("/tmp/reserves.json"))
+
+    # How much USDC we get for 1 WETH 1000 blocks ago
+    usdc_out = index.get_amount_out(10**18, [weth, usdc], block_number=end_block - 1000)
+
+    # Best route for WETH -> DAI, direct or through USDC
+    amount_out, path = index.find_best_route(10**18, weth, dai, intermediate_tokens=[usdc])
+"""
+
+import json
+import logging
+import math
+from bisect import bisect_right
+from pathlib import Path
+from typing import Iterable
+
+from eth_typing import HexAddress
+
+from eth_defi.event_reader.conversion import convert_int256_bytes_to_int, convert_jsonrpc_value_to_int, decode_data
+from eth_defi.uniswap_v2.fees import UniswapV2FeeCalculator
+
+logger = logging.getLogger(__name__)
+
+
+class UnknownPair(Exception):
+    """We do not index a pair for these tokens, or it had no Sync events by the block."""
+
+
+class InsufficientLiquidity(ValueError):
+    """A pair on the path cannot fill the swap.
+
+    - The swap would buy out the whole reserve, or a hop rounds down to zero
+    """
+
+
+class PairReserveHistory:
+    """Reserve changes of a single pair.
+
+    - One entry per block, holding the reserves at the end of the block
+    """
+
+    __slots__ = ("token0", "token1", "blocks", "reserve0", "reserve1", "log_index")
+
+    def __init__(self, token0: HexAddress, token1: HexAddress):
+        self.token0 = token0
+        self.token1 = token1
+        #: Blocks where the reserves changed, ascending
+        self.blocks: list[int] = []
+        self.reserve0: list[int] = []
+        self.reserve1: list[int] = []
+        #: Log index of the last applied Sync
+        self.log_index = -1
+
+    def update(self, block_number: int, log_index: int, reserve0: int, reserve1: int):
+        if self.blocks:
+            last_block = self.blocks[-1]
+            if (block_number, log_index) <= (last_block, self.log_index):
+                # Already applied
+                return
+            if block_number == last_block:
+                self.reserve0[-1] = reserve0
+                self.reserve1[-1] = reserve1
+                self.log_index = log_index
+                return
+
+        self.blocks.append(block_number)
+        self.reserve0.append(reserve0)
+        self.reserve1.append(reserve1)
+        self.log_index = log_index
+
+    def get_reserves(self, block_number: int | None = None) -> tuple[int, int, int] | None:
+        """Get reserves at the end of a block.
+
+        :return:
+            Tuple (reserve0, reserve1, block number of the last change) or ``None``
+        """
+        if block_number is None:
+            idx = len(self.blocks) - 1
+        else:
+            idx = bisect_right(self.blocks, block_number) - 1
+        if idx < 0:
+            return None
+        return self.reserve0[idx], self.reserve1[idx], self.blocks[idx]
+
+    def rollback(self, latest_good_block: int):
+        idx = bisect_right(self.blocks, latest_good_block)
+        if idx < len(self.blocks):
+            del self.blocks[idx:]
+            del self.reserve0[idx:]
+            del self.reserve1[idx:]
+            # The log index of the kept last block is no longer known,
+            # but any replayed event is in a later block
+            self.log_index = math.inf if self.blocks else -1
+
+
+class ReserveIndex:
+    """Reserves of Uniswap v2 pairs indexed from Sync events.
+
+    - All pairs must use the same fee, like the pairs of one Uniswap v2 deployment
+
+    - Events must be fed in the chain order, already applied events are ignored
+    """
+
+    def __init__(self, fee: int = 30):
+        """
+        :param fee:
+            Trading fee in bps, default = 30 bps (0.3%)
+        """
+        self.fee = fee
+
+        #: Pair address -> history
+        self.pairs: dict[HexAddress, PairReserveHistory] = {}
+
+        #: (token0, token1) -> pair address
+        self.pairs_by_tokens: dict[tuple[HexAddress, HexAddress], HexAddress] = {}
+
+        #: Token -> tokens it has a pair with
+        self.neighbours: dict[HexAddress, set[HexAddress]] = {}
+
+        #: The last block we have processed events for
+        self.last_block = 0
+
+    def __repr__(self):
+        return f"<ReserveIndex {len(self.pairs):,} pairs, last block {self.last_block:,}>"
+
+    def get_last_block(self) -> int:
+        """The last block the index is up to date with."""
+        return self.last_block
+
+    def set_last_block(self, block_number: int):
+        """Mark the index up to date, even if the last blocks had no Sync events."""
+        self.last_block = max(self.last_block, block_number)
+
+    def add_pair(self, pair_address: HexAddress, token0: HexAddress, token1: HexAddress):
+        """Start tracking a pair.
+
+        - E.g. from ``PairCreated`` events or :py:func:`eth_defi.uniswap_v2.pair.fetch_pair_details`
+        """
+        pair_address = pair_address.lower()
+        token0 = token0.lower()
+        token1 = token1.lower()
+        if pair_address in self.pairs:
+            return
+        self.pairs[pair_address] = PairReserveHistory(token0, token1)
+        self.pairs_by_tokens[(token0, token1)] = pair_address
+        self.neighbours.setdefault(token0, set()).add(token1)
+        self.neighbours.setdefault(token1, set()).add(token0)
+
+    def update_reserves(self, pair_address: HexAddress, block_number: int, log_index: int, reserve0: int, reserve1: int):
+        """Record the reserves of a pair after a Sync event."""
+        history = self.pairs.get(pair_address.lower())
+        if history is None:
+            raise UnknownPair(f"Pair {pair_address} not added to the index")
+        history.update(block_number, log_index, reserve0, reserve1)
+        self.last_block = max(self.last_block, block_number)
+
+    def handle_sync_log(self, log: dict):
+        """Record a raw Sync event from :py:func:`eth_defi.event_reader.reader.read_events`.
+
+        - Sync events of pairs we do not track are ignored
+        """
+        pair_address = log["address"].lower()
+        if pair_address not in self.pairs:
+            return
+        data_entries = decode_data(log["data"])
+        self.update_reserves(
+            pair_address,
+            convert_jsonrpc_value_to_int(log["blockNumber"]),
+            convert_jsonrpc_value_to_int(log["logIndex"]),
+            convert_int256_bytes_to_int(data_entries[0]),
+            convert_int256_bytes_to_int(data_entries[1]),
+        )
+
+    def get_reserves(self, token_a: HexAddress, token_b: HexAddress, block_number: int | None = None) -> tuple[int, int, int]:
+        """Get the reserves of a pair in the token order asked.
+
+        Offline counterpart of :py:meth:`eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_reserves`.
+
+        :param block_number:
+            Reserves at the end of this block. Default to the latest.
+
+        :return:
+            Tuple (reserve_a, reserve_b, block number when the reserves last changed)
+
+        :raise UnknownPair:
+            No pair, or the pair had no Sync events by the block
+        """
+        token_a = token_a.lower()
+        token_b = token_b.lower()
+        pair_address = self.pairs_by_tokens.get((token_a, token_b)) or self.pairs_by_tokens.get((token_b, token_a))
+        if pair_address is None:
+            raise UnknownPair(f"No pair for {token_a} - {token_b}")
+
+        history = self.pairs[pair_address]
+        reserves = history.get_reserves(block_number)
+        if reserves is None or reserves[0] == 0 or reserves[1] == 0:
+            raise UnknownPair(f"Pair {pair_address} has no liquidity at block {block_number}")
+
+        reserve0, reserve1, block = reserves
+        if history.token0 == token_a:
+            return reserve0, reserve1, block
+        return reserve1, reserve0, block
+
+    def get_amount_out(self, amount_in: int, path: list[HexAddress], *, slippage: float = 0, block_number: int | None = None) -> int:
+        """Get how much token we are going to receive.
+
+        Offline counterpart of :py:meth:`eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_amount_out`.
+
+        :param path:
+            List of token addresses how to route the trade
+
+        :param slippage:
+            Slippage express in bps
+
+        :param block_number:
+            Quote at the end of this block. Default to the latest.
+
+        :raise InsufficientLiquidity:
+            A hop gives zero tokens out
+        """
+        assert len(path) >= 2
+        assert slippage >= 0
+        assert amount_in > 0, f"Got amount in: {amount_in}"
+        current_amount = amount_in
+        for p0, p1 in zip(path, path[1:]):
+            if current_amount <= 0:
+                raise InsufficientLiquidity(f"Swap {amount_in} on {path} rounds down to zero before {p0} - {p1}")
+            reserve_in, reserve_out, _ = self.get_reserves(p0, p1, block_number)
+            current_amount = UniswapV2FeeCalculator.get_amount_out_from_reserves(current_amount, reserve_in, reserve_out, fee=self.fee)
+        return int(current_amount * 10_000 // (10_000 + slippage))
+
+    def get_amount_in(self, amount_out: int, path: list[HexAddress], *, slippage: float = 0, block_number: int | None = None) -> int:
+        """Get how much token we are going to spend.
+
+        Offline counterpart of :py:meth:`eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_amount_in`.
+
+        :raise InsufficientLiquidity:
+            A pair does not have enough reserves to pay out the amount
+        """
+        assert len(path) >= 2
+        assert slippage >= 0
+        assert amount_out > 0, f"Got amount out: {amount_out}"
+        current_amount = amount_out
+        for p0, p1 in reversed(list(zip(path, path[1:]))):
+            reserve_in, reserve_out, _ = self.get_reserves(p0, p1, block_number)
+            if current_amount >= reserve_out:
+                raise InsufficientLiquidity(f"Buying {current_amount} from {p0} - {p1} would drain reserve {reserve_out}")
+            current_amount = UniswapV2FeeCalculator.get_amount_in_from_reserves(current_amount, reserve_in, reserve_out, fee=self.fee)
+        return int(current_amount * (10_000 + slippage) // 10_000)
+
+    def generate_paths(self, token_in: HexAddress, token_out: HexAddress, intermediate_tokens: Iterable[HexAddress] | None = None, max_hops: int = 2) -> Iterable[list[HexAddress]]:
+        """Generate swap paths between two tokens over indexed pairs.
+
+        :param intermediate_tokens:
+            Route only through these tokens, like WETH and USDC.
+            Default to any token.
+
+        :param max_hops:
+            Maximum number of pairs in a path
+        """
+        token_in = token_in.lower()
+        token_out = token_out.lower()
+        allowed = {t.lower() for t in intermediate_tokens} if intermediate_tokens is not None else None
+
+        def _walk(path: list[HexAddress]):
+            for neighbour in self.neighbours.get(path[-1], ()):
+                if neighbour == token_out:
+                    yield path + [neighbour]
+                elif len(path) < max_hops and neighbour not in path and (allowed is None or neighbour in allowed):
+                    yield from _walk(path + [neighbour])
+
+        yield from _walk([token_in])
+
+    def find_best_route(
+        self,
+        amount_in: int,
+        token_in: HexAddress,
+        token_out: HexAddress,
+        *,
+        intermediate_tokens: Iterable[HexAddress] | None = None,
+        max_hops: int = 2,
+        block_number: int | None = None,
+    ) -> tuple[int, list[HexAddress]] | None:
+        """Find the path giving the most out for a swap.
+
+        :return:
+            Tuple (amount out, path) or ``None`` if there is no route with liquidity
+        """
+        best = None
+        for path in self.generate_paths(token_in, token_out, intermediate_tokens, max_hops):
+            try:
+                amount_out = self.get_amount_out(amount_in, path, block_number=block_number)
+            except (UnknownPair, InsufficientLiquidity):
+                # No liquidity at the block, or the swap is too small for a hop
+                continue
+            if best is None or amount_out > best[0]:
+                best = (amount_out, path)
+        return best
+
+    def rollback(self, latest_good_block: int):
+        """Discard reserve changes after a block, because of a chain reorganisation."""
+        for history in self.pairs.values():
+            history.rollback(latest_good_block)
+        self.last_block = min(self.last_block, latest_good_block)
+
+    def save(self, path: Path):
+        """Write the index to a JSON file, including the reserve history."""
+        data = {
+            "fee": self.fee,
+            "last_block": self.last_block,
+            "pairs": {
+                pair_address: {
+                    "token0": history.token0,
+                    "token1": history.token1,
+                    "blocks": history.blocks,
+                    "reserve0": [str(r) for r in history.reserve0],
+                    "reserve1": [str(r) for r in history.reserve1],
+                    "log_index": history.log_index if history.log_index != math.inf else None,
+                }
+                for pair_address, history in self.pairs.items()
+            },
+        }
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wt") as out:
+            json.dump(data, out)
+        tmp.rename(path)
+
+    @staticmethod
+    def load(path: Path) -> "ReserveIndex":
+        """Resume an index written with :py:meth:`save`."""
+        with open(path, "rt") as inp:
+            data = json.load(inp)
+
+        index = ReserveIndex(fee=data["fee"])
+        for pair_address, pair_data in data["pairs"].items():
+            index.add_pair(pair_address, pair_data["token0"], pair_data["token1"])
+            history = index.pairs[pair_address]
+            history.blocks = pair_data["blocks"]
+            history.reserve0 = [int(r) for r in pair_data["reserve0"]]
+            history.reserve1 = [int(r) for r in pair_data["reserve1"]]
+            history.log_index = pair_data["log_index"] if pair_data["log_index"] is not None else math.inf
+        index.last_block = data["last_block"]
+        logger.info("Loaded %s from %s", index, path)
+        return index
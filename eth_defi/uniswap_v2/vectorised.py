@@ -0,0 +1,178 @@
+"""Vectorised Uniswap v2 constant product quoting.
+
+- Batch counterparts of :py:meth:`eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_amount_out_from_reserves`
+  and :py:meth:`~eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_amount_in_from_reserves`
+  for slippage surface and liquidity studies over a large number of pairs and trade sizes
+
+- Exact integer semantics, same results as the scalar functions: NumPy ``int64`` is used
+  when the intermediate products cannot overflow, Python integers in ``object`` arrays otherwise.
+  The ``object`` fallback is exact, but not faster than a Python loop. For speed, scale the amounts down to fit int64.
+
+- Invalid rows (zero amount, zero reserves, buying out the whole reserve) give zero
+  instead of raising, so one bad pair does not fail the whole batch
+
+Example:
+
+.. code-block:: python
+
+    # Sell 1, 10 and 100 WETH in each pair
+    amounts_in = np.repeat([10**18, 10 * 10**18, 100 * 10**18], len(pairs))
+    reserves_in = np.tile(weth_reserves, 3)
+    reserves_out = np.tile(usdc_reserves, 3)
+
+    amounts_out = get_amount_out_from_reserves_batch(amounts_in, reserves_in, reserves_out)
+    price_impact = get_price_impact_batch(amounts_in, reserves_in, reserves_out, amounts_out)
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+#: Largest value we let int64 computations reach
+INT64_MAX = np.iinfo(np.int64).max
+
+#: Anything numpy can turn to an integer array, including lists of Python ints larger than 64 bits
+IntegerArrayLike = np.ndarray | Iterable[int]
+
+
+def as_integer_array(values: IntegerArrayLike) -> np.ndarray:
+    """Convert raw token amounts to an integer array without losing precision.
+
+    - ``int64`` if all values fit
+
+    - ``object`` array of Python integers otherwise, e.g. for uint112 reserves
+
+    .. note ::
+
+        ``np.asarray([1, 2**63])`` silently gives ``float64``, so lists are always
+        converted through ``object`` first.
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iu":
+        if values.dtype.kind == "u" and values.size and values.max() > INT64_MAX:
+            return values.astype(object)
+        return values.astype(np.int64, copy=False)
+
+    arr = np.array(values, dtype=object)
+    if arr.size == 0:
+        return arr.astype(np.int64)
+
+    low = arr.min()
+    high = arr.max()
+    assert isinstance(low, (int, np.integer)) and isinstance(high, (int, np.integer)), f"Expected integer amounts, got {type(high)}"
+    if -INT64_MAX <= low and high <= INT64_MAX:
+        return arr.astype(np.int64)
+    return arr
+
+
+def _max(arr: np.ndarray) -> int:
+    return int(arr.max()) if arr.size else 0
+
+
+def _unify(bound: int, *arrays: np.ndarray) -> list[np.ndarray]:
+    """Switch all arrays to Python integers if ``bound`` would overflow int64."""
+    if bound > INT64_MAX or any(a.dtype == object for a in arrays):
+        return [a.astype(object) for a in arrays]
+    return list(arrays)
+
+
+def get_amount_out_from_reserves_batch(
+    amount_in: IntegerArrayLike,
+    reserve_in: IntegerArrayLike,
+    reserve_out: IntegerArrayLike,
+    *,
+    fee: int = 30,
+) -> np.ndarray:
+    """Batch version of :py:meth:`~eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_amount_out_from_reserves`.
+
+    :param amount_in: Amounts of input asset
+    :param reserve_in: Reserves of input asset in the pair contracts
+    :param reserve_out: Reserves of output asset in the pair contracts
+    :param fee: Trading fee express in bps, default = 30 bps (0.3%)
+    :return: Maximum amounts of output asset, zero for invalid rows
+    """
+    amount_in = as_integer_array(amount_in)
+    reserve_in = as_integer_array(reserve_in)
+    reserve_out = as_integer_array(reserve_out)
+
+    fee_multiplier = 10_000 - fee
+    bound = max(
+        _max(amount_in) * fee_multiplier * _max(reserve_out),
+        _max(reserve_in) * 10_000 + _max(amount_in) * fee_multiplier,
+    )
+    amount_in, reserve_in, reserve_out = _unify(bound, amount_in, reserve_in, reserve_out)
+
+    valid = (amount_in > 0) & (reserve_in > 0) & (reserve_out > 0)
+    amount_in_with_fee = amount_in * fee_multiplier
+    numerator = amount_in_with_fee * reserve_out
+    denominator = reserve_in * 10_000 + amount_in_with_fee
+    denominator = np.where(valid, denominator, 1)
+    return np.where(valid, numerator // denominator, 0)
+
+
+def get_amount_in_from_reserves_batch(
+    amount_out: IntegerArrayLike,
+    reserve_in: IntegerArrayLike,
+    reserve_out: IntegerArrayLike,
+    *,
+    fee: int = 30,
+) -> np.ndarray:
+    """Batch version of :py:meth:`~eth_defi.uniswap_v2.fees.UniswapV2FeeCalculator.get_amount_in_from_reserves`.
+
+    :param amount_out: Amounts of output asset
+    :param reserve_in: Reserves of input asset in the pair contracts
+    :param reserve_out: Reserves of output asset in the pair contracts
+    :param fee: Trading fee express in bps, default = 30 bps (0.3%)
+    :return: Required amounts of input asset, zero for invalid rows or if the pair does not have enough liquidity
+    """
+    amount_out = as_integer_array(amount_out)
+    reserve_in = as_integer_array(reserve_in)
+    reserve_out = as_integer_array(reserve_out)
+
+    bound = max(
+        _max(reserve_in) * _max(amount_out) * 10_000,
+        _max(reserve_out) * (10_000 - fee),
+    )
+    amount_out, reserve_in, reserve_out = _unify(bound, amount_out, reserve_in, reserve_out)
+
+    valid = (amount_out > 0) & (reserve_in > 0) & (reserve_out > amount_out)
+    numerator = reserve_in * amount_out * 10_000
+    denominator = (reserve_out - amount_out) * (10_000 - fee)
+    denominator = np.where(valid, denominator, 1)
+    return np.where(valid, numerator // denominator + 1, 0)
+
+
+def get_price_impact_batch(
+    amount_in: IntegerArrayLike,
+    reserve_in: IntegerArrayLike,
+    reserve_out: IntegerArrayLike,
+    amount_out: IntegerArrayLike | None = None,
+    *,
+    fee: int = 30,
+) -> np.ndarray:
+    """How much worse the execution price is than the mid price, LP fee included.
+
+    :param amount_out:
+        Output of :py:func:`get_amount_out_from_reserves_batch`, calculated if not given
+
+    :return:
+        ``float64`` array, 0.01 means 1%. NaN for invalid rows.
+    """
+    amount_in = as_integer_array(amount_in)
+    reserve_in = as_integer_array(reserve_in)
+    reserve_out = as_integer_array(reserve_out)
+    if amount_out is None:
+        amount_out = get_amount_out_from_reserves_batch(amount_in, reserve_in, reserve_out, fee=fee)
+    else:
+        amount_out = as_integer_array(amount_out)
+
+    amount_in_f = amount_in.astype(np.float64)
+    amount_out_f = amount_out.astype(np.float64)
+    reserve_in_f = reserve_in.astype(np.float64)
+    reserve_out_f = reserve_out.astype(np.float64)
+
+    valid = (amount_in_f > 0) & (reserve_in_f > 0) & (reserve_out_f > 0) & (amount_out_f > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        execution_price = amount_out_f / amount_in_f
+        mid_price = reserve_out_f / reserve_in_f
+        impact = 1 - execution_price / mid_price
+    return np.where(valid, impact, np.nan)
@@ -150,6 +150,28 @@ def decode_swap(log: LogResult) -> dict:
     return result
 
 
+def decode_swap_columns(columns: "eth_defi.event_reader.columnar.LogColumns") -> "pandas.DataFrame":
+    """Process a chunk of swap events at once.
+
+    - Columnar counterpart of :py:func:`decode_swap`, without per-log dict allocations
+    - Amounts, price and liquidity are exact Python ints, tick is ``int64``
+    - Use :py:func:`eth_defi.event_reader.columnar.iterate_log_columns` to get the chunks
+
+    :param columns:
+        Logs of Swap events only
+
+    :return:
+        DataFrame with the same columns as :py:func:`decode_swap` results
+    """
+    df = columns.to_pandas().rename(columns={"transaction_hash": "tx_hash", "address": "pool_contract_address"})
+    df["amount0"] = columns.get_word_int(0, signed=True)
+    df["amount1"] = columns.get_word_int(1, signed=True)
+    df["sqrt_price_x96"] = columns.get_word_int(2)
+    df["liquidity"] = columns.get_word_int(3)
+    df["tick"] = columns.get_word_int64(4, signed=True)
+    return df
+
+
 def decode_mint(log: LogResult) -> dict:
     """Process mint event. The event signature is:
 
@@ -0,0 +1,575 @@
+"""Local Uniswap v3 pool state rebuilt from Mint, Burn and Swap events.
+
+- Keep the tick map of a pool (liquidity net and gross per initialised tick)
+  in memory, updated incrementally from decoded events
+
+- Answer swap output, price impact and liquidity depth queries locally,
+  without a subgraph or an ``eth_call`` per quote
+
+- Query the state at any block after the first ingested event,
+  by replaying events from the nearest checkpoint
+
+- Persist snapshots, so a restart does not need to replay the pool history from its creation
+
+Events are the dicts produced by :py:func:`eth_defi.uniswap_v3.events.decode_mint`,
+:py:func:`~eth_defi.uniswap_v3.events.decode_burn` and :py:func:`~eth_defi.uniswap_v3.events.decode_swap`.
+
+Example:
+
+.. code-block:: python
+
+    initialize_topic = Web3.to_hex(Web3.keccak(text="Initialize(uint160,int24)"))
+    mint_topic = Web3.to_hex(Web3.keccak(text="Mint(address,address,int24,int24,uint128,uint256,uint256)"))
+    burn_topic = Web3.to_hex(Web3.keccak(text="Burn(address,int24,int24,uint128,uint256,uint256)"))
+    swap_topic = Web3.to_hex(Web3.keccak(text="Swap(address,address,int256,int256,uint160,uint128,int24)"))
+
+    engine = PoolStateEngine(pool_address, fee=3000)
+
+    # Read from the pool creation block, so Initialize comes first
+    for log in read_events(...):
+        topic = log["topics"][0]
+        if topic == initialize_topic:
+            sqrt_price_x96, tick = decode_data(log["data"])
+            engine.handle_initialize(
+                {
+                    "block_number": convert_jsonrpc_value_to_int(log["blockNumber"]),
+                    "log_index": convert_jsonrpc_value_to_int(log["logIndex"]),
+                    "sqrt_price_x96": convert_int256_bytes_to_int(sqrt_price_x96),
+                    "tick": convert_int256_bytes_to_int(tick, signed=True),
+                }
+            )
+        elif topic == mint_topic:
+            engine.handle_mint(decode_mint(log))
+        elif topic == burn_topic:
+            engine.handle_burn(decode_burn(log))
+        elif topic == swap_topic:
+            engine.handle_swap(decode_swap(log))
+
+    engine.save_snapshot(Path("/tmp/pool-state.json"))
+
+    # Sell 1 WETH (token0) at the latest block
+    quote = engine.get_state().quote_exact_input(10**18, zero_for_one=True)
+    print(f"Out {quote.amount_out}, price impact {quote.price_impact:.2%}")
+
+    # Liquidity depth 1% up and down 5000 blocks ago
+    depths = engine.get_state(engine.get_last_block() - 5000).estimate_liquidity_depth([-1, 1])
+"""
+
+import json
+import logging
+import math
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from eth_typing import HexAddress
+
+from eth_defi.uniswap_v3.constants import MAX_TICK, MIN_TICK
+from eth_defi.uniswap_v3.tick_math import (
+    MAX_SQRT_RATIO,
+    MIN_SQRT_RATIO,
+    Q96,
+    compute_swap_step,
+    get_amount0_delta,
+    get_amount1_delta,
+    get_sqrt_ratio_at_tick,
+    get_tick_at_sqrt_ratio,
+)
+
+logger = logging.getLogger(__name__)
+
+
+#: Event kinds in the journal
+_MINT = 1
+_BURN = 2
+_SWAP = 3
+_INITIALIZE = 4
+
+
+@dataclass(slots=True, frozen=True)
+class SwapQuote:
+    """Result of a locally simulated exact input swap."""
+
+    #: How much was actually swapped in, including the LP fee.
+    #:
+    #: Less than asked if the pool ran out of liquidity.
+    amount_in: int
+
+    #: How much we get out
+    amount_out: int
+
+    #: LP fees paid, in the input token
+    fee_amount: int
+
+    #: Pool price after the swap
+    sqrt_price_x96_after: int
+
+    #: Pool tick after the swap
+    tick_after: int
+
+    #: How many initialised ticks the swap crossed
+    ticks_crossed: int
+
+    #: How much worse the execution price is than the mid price before the swap, LP fee included.
+    #:
+    #: 0.01 means 1%.
+    price_impact: float
+
+
+@dataclass(slots=True)
+class PoolTickState:
+    """The state of a Uniswap v3 pool at a block.
+
+    - Initialised ticks are kept in sorted lists, liquidity values do not fit in 64-bit NumPy arrays
+
+    - Mirrors ``slot0``, ``liquidity`` and ``ticks`` of the pool contract
+    """
+
+    #: Pool fee in hundredths of a bip, e.g. 3000 for 0.30%
+    fee: int
+
+    #: Current price, ``slot0.sqrtPriceX96``. Zero until the first swap or :py:meth:`initialize`.
+    sqrt_price_x96: int = 0
+
+    #: Current tick, ``slot0.tick``
+    tick: int = 0
+
+    #: Liquidity active in the current tick range
+    liquidity: int = 0
+
+    #: Initialised ticks, ascending
+    ticks: list[int] = field(default_factory=list)
+
+    #: Liquidity net of each tick in :py:attr:`ticks`
+    liquidity_net: list[int] = field(default_factory=list)
+
+    #: Liquidity gross of each tick in :py:attr:`ticks`
+    liquidity_gross: list[int] = field(default_factory=list)
+
+    #: Block number of the last event applied
+    block_number: int = 0
+
+    #: Log index of the last event applied
+    log_index: int = -1
+
+    def is_initialized(self) -> bool:
+        """Do we know the pool price."""
+        return self.sqrt_price_x96 != 0
+
+    def copy(self) -> "PoolTickState":
+        return PoolTickState(
+            fee=self.fee,
+            sqrt_price_x96=self.sqrt_price_x96,
+            tick=self.tick,
+            liquidity=self.liquidity,
+            ticks=self.ticks.copy(),
+            liquidity_net=self.liquidity_net.copy(),
+            liquidity_gross=self.liquidity_gross.copy(),
+            block_number=self.block_number,
+            log_index=self.log_index,
+        )
+
+    def get_price(self) -> float:
+        """Mid price as token1 per token0, raw amounts without decimals."""
+        return (self.sqrt_price_x96 / Q96) ** 2
+
+    def get_tick_liquidity(self, tick: int) -> tuple[int, int] | None:
+        """Get liquidity net and gross of an initialised tick.
+
+        :return:
+            Tuple (liquidity net, liquidity gross) or ``None`` if the tick is not initialised
+        """
+        idx = bisect_left(self.ticks, tick)
+        if idx < len(self.ticks) and self.ticks[idx] == tick:
+            return self.liquidity_net[idx], self.liquidity_gross[idx]
+        return None
+
+    def initialize(self, sqrt_price_x96: int, tick: int):
+        """Set the initial price, from the pool ``Initialize`` event."""
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+
+    def update_position(self, tick_lower: int, tick_upper: int, liquidity_delta: int):
+        """Apply a Mint (positive delta) or Burn (negative delta)."""
+        assert tick_lower < tick_upper, f"Bad tick range {tick_lower} - {tick_upper}"
+        if liquidity_delta == 0:
+            # Burn of zero collects fees only
+            return
+
+        self._update_tick(tick_lower, liquidity_delta, liquidity_delta)
+        self._update_tick(tick_upper, liquidity_delta, -liquidity_delta)
+
+        if self.is_initialized() and tick_lower <= self.tick < tick_upper:
+            self.liquidity += liquidity_delta
+
+    def apply_swap(self, sqrt_price_x96: int, tick: int, liquidity: int):
+        """Apply a Swap event, which carries the pool state after the swap."""
+        self.sqrt_price_x96 = sqrt_price_x96
+        self.tick = tick
+        self.liquidity = liquidity
+
+    def _update_tick(self, tick: int, gross_delta: int, net_delta: int):
+        idx = bisect_left(self.ticks, tick)
+        if idx < len(self.ticks) and self.ticks[idx] == tick:
+            gross = self.liquidity_gross[idx] + gross_delta
+            assert gross >= 0, f"Negative liquidity at tick {tick}, events missing?"
+            if gross == 0:
+                # Tick is cleared when the last position using it is removed
+                del self.ticks[idx]
+                del self.liquidity_net[idx]
+                del self.liquidity_gross[idx]
+            else:
+                self.liquidity_gross[idx] = gross
+                self.liquidity_net[idx] += net_delta
+        else:
+            assert gross_delta > 0, f"Burn from an uninitialised tick {tick}, events missing?"
+            self.ticks.insert(idx, tick)
+            self.liquidity_net.insert(idx, net_delta)
+            self.liquidity_gross.insert(idx, gross_delta)
+
+    def quote_exact_input(self, amount_in: int, zero_for_one: bool, sqrt_price_limit_x96: int | None = None) -> SwapQuote:
+        """Simulate an exact input swap against the local tick map.
+
+        - Same algorithm as ``UniswapV3Pool.swap()``
+
+        - Results match the on-chain quoter within a few wei of rounding,
+          because the pool contract also stops at uninitialised tick bitmap word boundaries
+
+        :param amount_in:
+            Raw amount of token0 if ``zero_for_one``, otherwise token1
+
+        :param zero_for_one:
+            Swap direction, sell token0 for token1
+
+        :param sqrt_price_limit_x96:
+            Stop at this price. Default to the minimum or maximum price.
+
+            Must be below the current price for ``zero_for_one`` and above it otherwise,
+            like the ``SPL`` check of the pool contract.
+        """
+        assert self.is_initialized(), "Pool price unknown, no Swap or Initialize events applied"
+        assert amount_in > 0
+
+        sqrt_price = self.sqrt_price_x96
+
+        if sqrt_price_limit_x96 is None:
+            sqrt_price_limit_x96 = MIN_SQRT_RATIO + 1 if zero_for_one else MAX_SQRT_RATIO - 1
+        elif zero_for_one:
+            assert MIN_SQRT_RATIO < sqrt_price_limit_x96 < sqrt_price, f"Price limit {sqrt_price_limit_x96} must be below the current price {sqrt_price} when selling token0"
+        else:
+            assert sqrt_price < sqrt_price_limit_x96 < MAX_SQRT_RATIO, f"Price limit {sqrt_price_limit_x96} must be above the current price {sqrt_price} when selling token1"
+
+        tick = self.tick
+        liquidity = self.liquidity
+        remaining = amount_in
+        amount_out = 0
+        fee_amount = 0
+        ticks_crossed = 0
+
+        if zero_for_one:
+            idx = bisect_right(self.ticks, tick) - 1
+        else:
+            idx = bisect_right(self.ticks, tick)
+
+        while remaining != 0 and sqrt_price != sqrt_price_limit_x96:
+            initialized = 0 <= idx < len(self.ticks)
+            if initialized:
+                tick_next = self.ticks[idx]
+            else:
+                tick_next = MIN_TICK if zero_for_one else MAX_TICK
+
+            sqrt_price_next = get_sqrt_ratio_at_tick(tick_next)
+            if zero_for_one:
+                target = max(sqrt_price_next, sqrt_price_limit_x96)
+            else:
+                target = min(sqrt_price_next, sqrt_price_limit_x96)
+
+            sqrt_price_start = sqrt_price
+            sqrt_price, step_in, step_out, step_fee = compute_swap_step(sqrt_price, target, liquidity, remaining, self.fee)
+            remaining -= step_in + step_fee
+            amount_out += step_out
+            fee_amount += step_fee
+
+            if sqrt_price == sqrt_price_next:
+                if initialized:
+                    liquidity_net = self.liquidity_net[idx]
+                    liquidity += -liquidity_net if zero_for_one else liquidity_net
+                    ticks_crossed += 1
+                    idx += -1 if zero_for_one else 1
+                elif tick_next in (MIN_TICK, MAX_TICK):
+                    break
+                tick = tick_next - 1 if zero_for_one else tick_next
+            elif sqrt_price != sqrt_price_start:
+                tick = get_tick_at_sqrt_ratio(sqrt_price)
+
+        amount_in_used = amount_in - remaining
+
+        # Compare to the mid price in out / in units
+        mid_price = self.get_price() if zero_for_one else 1 / self.get_price()
+        if amount_in_used > 0:
+            price_impact = 1 - (amount_out / amount_in_used) / mid_price
+        else:
+            price_impact = 0.0
+
+        return SwapQuote(
+            amount_in=amount_in_used,
+            amount_out=amount_out,
+            fee_amount=fee_amount,
+            sqrt_price_x96_after=sqrt_price,
+            tick_after=tick,
+            ticks_crossed=ticks_crossed,
+            price_impact=price_impact,
+        )
+
+    def get_amount_to_reach_price(self, sqrt_price_target_x96: int) -> int | None:
+        """How much token needs to be taken out of the pool to move the price to the target, fees excluded.
+
+        - Price up: the amount of token0 bought from the pool
+
+        - Price down: the amount of token1 bought from the pool
+
+        :return:
+            Raw token amount, or ``None`` if there is not enough liquidity to reach the price
+        """
+        assert self.is_initialized(), "Pool price unknown, no Swap or Initialize events applied"
+        sqrt_price = self.sqrt_price_x96
+        liquidity = self.liquidity
+        amount = 0
+
+        if sqrt_price_target_x96 >= sqrt_price:
+            idx = bisect_right(self.ticks, self.tick)
+            while sqrt_price < sqrt_price_target_x96:
+                if idx >= len(self.ticks):
+                    return None
+                step_target = min(get_sqrt_ratio_at_tick(self.ticks[idx]), sqrt_price_target_x96)
+                amount += get_amount0_delta(sqrt_price, step_target, liquidity, False)
+                sqrt_price = step_target
+                if sqrt_price < sqrt_price_target_x96:
+                    liquidity += self.liquidity_net[idx]
+                    idx += 1
+        else:
+            idx = bisect_right(self.ticks, self.tick) - 1
+            while sqrt_price > sqrt_price_target_x96:
+                if idx < 0:
+                    return None
+                step_target = max(get_sqrt_ratio_at_tick(self.ticks[idx]), sqrt_price_target_x96)
+                amount += get_amount1_delta(step_target, sqrt_price, liquidity, False)
+                sqrt_price = step_target
+                if sqrt_price > sqrt_price_target_x96:
+                    liquidity -= self.liquidity_net[idx]
+                    idx -= 1
+
+        return amount
+
+    def estimate_liquidity_depth(
+        self,
+        depths: list[float] = [-5, -2, -1, -0.5, -0.2, -0.1, 0.1, 0.2, 0.5, 1, 2, 5],
+    ) -> list[tuple[float, int | None]]:
+        """Calculate the liquidity at multiple price depths.
+
+        - Local counterpart of :py:func:`eth_defi.uniswap_v3.liquidity.estimate_liquidity_depth_at_block`
+
+        :param depths:
+            Price moves in percents, more than -100
+
+        :return:
+            List of tuples (depth, raw token amount to buy from the pool to move the price there).
+            Token0 for positive depths, token1 for negative depths.
+            The amount is ``None`` if there is not enough liquidity.
+        """
+        sqrt_price = self.sqrt_price_x96
+        result = []
+        for depth in depths:
+            assert depth > -100, f"Price cannot move {depth}%"
+            target = int(sqrt_price * math.sqrt((100 + depth) / 100))
+            result.append((depth, self.get_amount_to_reach_price(target)))
+        return result
+
+    def to_dict(self) -> dict:
+        """Serialise for JSON, big integers as strings."""
+        return {
+            "fee": self.fee,
+            "sqrt_price_x96": str(self.sqrt_price_x96),
+            "tick": self.tick,
+            "liquidity": str(self.liquidity),
+            "ticks": self.ticks,
+            "liquidity_net": [str(v) for v in self.liquidity_net],
+            "liquidity_gross": [str(v) for v in self.liquidity_gross],
+            "block_number": self.block_number,
+            "log_index": self.log_index,
+        }
+
+    @staticmethod
+    def from_dict(data: dict) -> "PoolTickState":
+        """Deserialise :py:meth:`to_dict` output."""
+        return PoolTickState(
+            fee=data["fee"],
+            sqrt_price_x96=int(data["sqrt_price_x96"]),
+            tick=data["tick"],
+            liquidity=int(data["liquidity"]),
+            ticks=list(data["ticks"]),
+            liquidity_net=[int(v) for v in data["liquidity_net"]],
+            liquidity_gross=[int(v) for v in data["liquidity_gross"]],
+            block_number=data["block_number"],
+            log_index=data["log_index"],
+        )
+
+
+class PoolStateEngine:
+    """Rebuild a Uniswap v3 pool state from its events.
+
+    - Events must be fed in the chain order. Already applied events, by (block number, log index),
+      are ignored, so overlapping event ranges can be replayed after a restart.
+
+    - The current state is updated in place. For historical queries a copy of the state is taken
+      every ``checkpoint_interval`` blocks and the events since are kept in a compact journal.
+
+    - After :py:meth:`load_snapshot`, history before the snapshot block is not available
+    """
+
+    def __init__(self, pool_address: HexAddress | str, fee: int, checkpoint_interval: int = 1000):
+        """
+        :param pool_address:
+            Events of other pools are rejected
+
+        :param fee:
+            Pool fee in hundredths of a bip, e.g. 3000 for 0.30%
+
+        :param checkpoint_interval:
+            Take a state copy for historical queries this often, in blocks
+        """
+        self.pool_address = pool_address.lower()
+        self.checkpoint_interval = checkpoint_interval
+
+        #: The state after the latest ingested event
+        self.state = PoolTickState(fee=fee)
+
+        #: (block number, log index, kind, a, b, c) of ingested events
+        self.journal: list[tuple[int, int, int, int, int, int]] = []
+
+        #: Journal length and a state copy at each checkpoint
+        self.checkpoints: list[tuple[int, PoolTickState]] = [(0, self.state.copy())]
+
+        #: Last block number of each checkpoint state, for bisecting
+        self.checkpoint_blocks: list[int] = [0]
+
+    def __repr__(self):
+        return f"<PoolStateEngine {self.pool_address} at block {self.state.block_number:,}, {len(self.state.ticks)} ticks>"
+
+    def get_last_block(self) -> int:
+        """The block of the last ingested event."""
+        return self.state.block_number
+
+    def handle_initialize(self, event: dict):
+        """Apply the pool ``Initialize`` event.
+
+        :param event:
+            Dict with ``block_number``, ``log_index``, ``sqrt_price_x96`` and ``tick``
+        """
+        self._ingest(event, _INITIALIZE, event["sqrt_price_x96"], event["tick"], 0)
+
+    def handle_mint(self, event: dict):
+        """Apply a decoded Mint event, see :py:func:`eth_defi.uniswap_v3.events.decode_mint`."""
+        self._ingest(event, _MINT, event["tick_lower"], event["tick_upper"], int(event["amount"]))
+
+    def handle_burn(self, event: dict):
+        """Apply a decoded Burn event, see :py:func:`eth_defi.uniswap_v3.events.decode_burn`."""
+        self._ingest(event, _BURN, event["tick_lower"], event["tick_upper"], int(event["amount"]))
+
+    def handle_swap(self, event: dict):
+        """Apply a decoded Swap event, see :py:func:`eth_defi.uniswap_v3.events.decode_swap`."""
+        self._ingest(event, _SWAP, event["sqrt_price_x96"], event["tick"], event["liquidity"])
+
+    def _ingest(self, event: dict, kind: int, a: int, b: int, c: int):
+        pool_address = event.get("pool_contract_address")
+        assert pool_address is None or pool_address.lower() == self.pool_address, f"Event for another pool: {pool_address}"
+
+        block_number = event["block_number"]
+        log_index = event["log_index"]
+        state = self.state
+        if (block_number, log_index) <= (state.block_number, state.log_index):
+            # Already applied
+            return
+
+        if block_number != state.block_number and block_number >= self.checkpoint_blocks[-1] + self.checkpoint_interval:
+            self.checkpoints.append((len(self.journal), state.copy()))
+            self.checkpoint_blocks.append(state.block_number)
+
+        entry = (block_number, log_index, kind, a, b, c)
+        _apply(state, entry)
+        self.journal.append(entry)
+
+    def get_state(self, block_number: int | None = None) -> PoolTickState:
+        """Get the pool state at the end of a block.
+
+        :param block_number:
+            Default to the latest state.
+
+        :return:
+            The live state object for the latest block, a copy otherwise
+        """
+        if block_number is None or block_number >= self.state.block_number:
+            return self.state
+
+        idx = bisect_right(self.checkpoint_blocks, block_number) - 1
+        assert idx >= 0, f"Block {block_number} is before the history we have, starts at {self.checkpoint_blocks[0]}"
+        journal_start, checkpoint = self.checkpoints[idx]
+        state = checkpoint.copy()
+        for entry in self.journal[journal_start:]:
+            if entry[0] > block_number:
+                break
+            _apply(state, entry)
+        return state
+
+    def rollback(self, latest_good_block: int):
+        """Discard events after a block, because of a chain reorganisation.
+
+        :param latest_good_block:
+            Keep the events of this block (inclusive)
+        """
+        if latest_good_block >= self.state.block_number:
+            return
+        self.state = self.get_state(latest_good_block)
+        journal_end = bisect_right(self.journal, (latest_good_block, math.inf))
+        del self.journal[journal_end:]
+        checkpoint_end = bisect_right(self.checkpoint_blocks, latest_good_block)
+        del self.checkpoints[checkpoint_end:]
+        del self.checkpoint_blocks[checkpoint_end:]
+
+    def save_snapshot(self, path: Path):
+        """Write the latest state to a JSON file."""
+        data = {"pool_address": self.pool_address, "state": self.state.to_dict()}
+        tmp = path.with_suffix(".tmp")
+        with open(tmp, "wt") as out:
+            json.dump(data, out)
+        tmp.rename(path)
+
+    @staticmethod
+    def load_snapshot(path: Path, checkpoint_interval: int = 1000) -> "PoolStateEngine":
+        """Continue from a state written by :py:meth:`save_snapshot`."""
+        with open(path, "rt") as inp:
+            data = json.load(inp)
+        state = PoolTickState.from_dict(data["state"])
+        engine = PoolStateEngine(data["pool_address"], fee=state.fee, checkpoint_interval=checkpoint_interval)
+        engine.state = state
+        engine.checkpoints = [(0, state.copy())]
+        engine.checkpoint_blocks = [state.block_number]
+        logger.info("Loaded %s from %s", engine, path)
+        return engine
+
+
+def _apply(state: PoolTickState, entry: tuple[int, int, int, int, int, int]):
+    """Apply a journal entry to a state."""
+    block_number, log_index, kind, a, b, c = entry
+    if kind == _MINT:
+        state.update_position(a, b, c)
+    elif kind == _BURN:
+        state.update_position(a, b, -c)
+    elif kind == _SWAP:
+        state.apply_swap(a, b, c)
+    elif kind == _INITIALIZE:
+        state.initialize(a, b)
+    else:
+        raise AssertionError(f"Unknown event kind {kind}")
+    state.block_number = block_number
+    state.log_index = log_index
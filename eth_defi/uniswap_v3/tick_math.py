@@ -0,0 +1,203 @@
+"""Uniswap v3 tick and swap math in integer arithmetic.
+
+- Python ports of ``TickMath``, ``SqrtPriceMath`` and ``SwapMath`` libraries of
+  `Uniswap v3 core <https://github.com/Uniswap/v3-core/tree/main/contracts/libraries>`__
+
+- Results match the on-chain contracts, as long as the inputs fit in the Solidity types
+
+- Used to quote swaps locally, without an ``eth_call`` per quote,
+  see :py:mod:`eth_defi.uniswap_v3.pool_state_engine`
+"""
+
+import math
+
+from eth_defi.uniswap_v3.constants import MAX_TICK, MIN_TICK
+
+#: 2**96, fixed point multiplier of sqrtPriceX96
+Q96 = 2**96
+
+#: The minimum value returned by :py:func:`get_sqrt_ratio_at_tick`
+MIN_SQRT_RATIO = 4295128739
+
+#: The maximum value returned by :py:func:`get_sqrt_ratio_at_tick`
+MAX_SQRT_RATIO = 1461446703485210103287273052203988822378723970342
+
+#: Fee is expressed in hundredths of a bip
+FEE_DENOMINATOR = 1_000_000
+
+_MAX_UINT256 = 2**256 - 1
+
+# (bit, multiplier) pairs of TickMath.getSqrtRatioAtTick()
+_TICK_RATIO_MULTIPLIERS = (
+    (0x2, 0xFFF97272373D413259A46990580E213A),
+    (0x4, 0xFFF2E50F5F656932EF12357CF3C7FDCC),
+    (0x8, 0xFFE5CACA7E10E4E61C3624EAA0941CD0),
+    (0x10, 0xFFCB9843D60F6159C9DB58835C926644),
+    (0x20, 0xFF973B41FA98C081472E6896DFB254C0),
+    (0x40, 0xFF2EA16466C96A3843EC78B326B52861),
+    (0x80, 0xFE5DEE046A99A2A811C461F1969C3053),
+    (0x100, 0xFCBE86C7900A88AEDCFFC83B479AA3A4),
+    (0x200, 0xF987A7253AC413176F2B074CF7815E54),
+    (0x400, 0xF3392B0822B70005940C7A398E4B70F3),
+    (0x800, 0xE7159475A2C29B7443B29C7FA6E889D9),
+    (0x1000, 0xD097F3BDFD2022B8845AD8F792AA5825),
+    (0x2000, 0xA9F746462D870FDF8A65DC1F90E061E5),
+    (0x4000, 0x70D869A156D2A1B890BB3DF62BAF32F7),
+    (0x8000, 0x31BE135F97D08FD981231505542FCFA6),
+    (0x10000, 0x9AA508B5B7A84E1C677DE54F3E99BC9),
+    (0x20000, 0x5D6AF8DEDB81196699C329225EE604),
+    (0x40000, 0x2216E584F5FA1EA926041BEDFE98),
+    (0x80000, 0x48A170391F7DC42444E8FA2),
+)
+
+
+def mul_div(a: int, b: int, denominator: int) -> int:
+    """``FullMath.mulDiv``"""
+    return a * b // denominator
+
+
+def mul_div_rounding_up(a: int, b: int, denominator: int) -> int:
+    """``FullMath.mulDivRoundingUp``"""
+    return -(-(a * b) // denominator)
+
+
+def div_rounding_up(a: int, b: int) -> int:
+    """``UnsafeMath.divRoundingUp``"""
+    return -(-a // b)
+
+
+def get_sqrt_ratio_at_tick(tick: int) -> int:
+    """Calculate sqrt(1.0001^tick) * 2^96.
+
+    ``TickMath.getSqrtRatioAtTick``
+    """
+    abs_tick = abs(tick)
+    assert abs_tick <= MAX_TICK, f"Tick out of range: {tick}"
+
+    ratio = 0xFFFCB933BD6FAD37AA2D162D1A594001 if abs_tick & 0x1 else 0x100000000000000000000000000000000
+    for bit, multiplier in _TICK_RATIO_MULTIPLIERS:
+        if abs_tick & bit:
+            ratio = (ratio * multiplier) >> 128
+
+    if tick > 0:
+        ratio = _MAX_UINT256 // ratio
+
+    # Round up to go from Q128.128 to Q128.96
+    return (ratio >> 32) + (0 if ratio % (1 << 32) == 0 else 1)
+
+
+def get_tick_at_sqrt_ratio(sqrt_price_x96: int) -> int:
+    """Calculate the greatest tick for which :py:func:`get_sqrt_ratio_at_tick` is less than or equal to the given ratio.
+
+    ``TickMath.getTickAtSqrtRatio``
+    """
+    assert MIN_SQRT_RATIO <= sqrt_price_x96 < MAX_SQRT_RATIO, f"Sqrt price out of range: {sqrt_price_x96}"
+
+    # Float estimate, then correct the last digit with the exact function
+    tick = math.floor(2 * math.log(sqrt_price_x96 / Q96) / math.log(1.0001))
+    tick = min(max(tick, MIN_TICK), MAX_TICK)
+    while tick > MIN_TICK and get_sqrt_ratio_at_tick(tick) > sqrt_price_x96:
+        tick -= 1
+    while tick < MAX_TICK and get_sqrt_ratio_at_tick(tick + 1) <= sqrt_price_x96:
+        tick += 1
+    return tick
+
+
+def get_amount0_delta(sqrt_ratio_a_x96: int, sqrt_ratio_b_x96: int, liquidity: int, round_up: bool) -> int:
+    """Amount of token0 between two prices.
+
+    ``SqrtPriceMath.getAmount0Delta``
+    """
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+        sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+
+    numerator1 = liquidity << 96
+    numerator2 = sqrt_ratio_b_x96 - sqrt_ratio_a_x96
+
+    if round_up:
+        return div_rounding_up(mul_div_rounding_up(numerator1, numerator2, sqrt_ratio_b_x96), sqrt_ratio_a_x96)
+    return mul_div(numerator1, numerator2, sqrt_ratio_b_x96) // sqrt_ratio_a_x96
+
+
+def get_amount1_delta(sqrt_ratio_a_x96: int, sqrt_ratio_b_x96: int, liquidity: int, round_up: bool) -> int:
+    """Amount of token1 between two prices.
+
+    ``SqrtPriceMath.getAmount1Delta``
+    """
+    if sqrt_ratio_a_x96 > sqrt_ratio_b_x96:
+        sqrt_ratio_a_x96, sqrt_ratio_b_x96 = sqrt_ratio_b_x96, sqrt_ratio_a_x96
+
+    if round_up:
+        return mul_div_rounding_up(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, Q96)
+    return mul_div(liquidity, sqrt_ratio_b_x96 - sqrt_ratio_a_x96, Q96)
+
+
+def get_next_sqrt_price_from_input(sqrt_price_x96: int, liquidity: int, amount_in: int, zero_for_one: bool) -> int:
+    """Price after adding ``amount_in`` of token0 or token1.
+
+    ``SqrtPriceMath.getNextSqrtPriceFromInput``
+    """
+    assert sqrt_price_x96 > 0
+    assert liquidity > 0
+
+    if amount_in == 0:
+        return sqrt_price_x96
+
+    if zero_for_one:
+        # getNextSqrtPriceFromAmount0RoundingUp, add = true
+        numerator1 = liquidity << 96
+        product = amount_in * sqrt_price_x96
+        if product <= _MAX_UINT256:
+            return mul_div_rounding_up(numerator1, sqrt_price_x96, numerator1 + product)
+        return div_rounding_up(numerator1, numerator1 // sqrt_price_x96 + amount_in)
+
+    # getNextSqrtPriceFromAmount1RoundingDown, add = true
+    return sqrt_price_x96 + (amount_in << 96) // liquidity
+
+
+def compute_swap_step(
+    sqrt_ratio_current_x96: int,
+    sqrt_ratio_target_x96: int,
+    liquidity: int,
+    amount_remaining: int,
+    fee_pips: int,
+) -> tuple[int, int, int, int]:
+    """Swap within a single tick range, exact input.
+
+    ``SwapMath.computeSwapStep`` for a positive ``amountRemaining``
+
+    :return:
+        Tuple (next sqrt price, amount in, amount out, fee amount)
+    """
+    assert amount_remaining >= 0, "Only exact input swaps supported"
+    zero_for_one = sqrt_ratio_current_x96 >= sqrt_ratio_target_x96
+
+    amount_remaining_less_fee = mul_div(amount_remaining, FEE_DENOMINATOR - fee_pips, FEE_DENOMINATOR)
+    if zero_for_one:
+        amount_in = get_amount0_delta(sqrt_ratio_target_x96, sqrt_ratio_current_x96, liquidity, True)
+    else:
+        amount_in = get_amount1_delta(sqrt_ratio_current_x96, sqrt_ratio_target_x96, liquidity, True)
+
+    if amount_remaining_less_fee >= amount_in:
+        sqrt_ratio_next_x96 = sqrt_ratio_target_x96
+    else:
+        sqrt_ratio_next_x96 = get_next_sqrt_price_from_input(sqrt_ratio_current_x96, liquidity, amount_remaining_less_fee, zero_for_one)
+
+    reached_target = sqrt_ratio_target_x96 == sqrt_ratio_next_x96
+
+    if zero_for_one:
+        if not reached_target:
+            amount_in = get_amount0_delta(sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, True)
+        amount_out = get_amount1_delta(sqrt_ratio_next_x96, sqrt_ratio_current_x96, liquidity, False)
+    else:
+        if not reached_target:
+            amount_in = get_amount1_delta(sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, True)
+        amount_out = get_amount0_delta(sqrt_ratio_current_x96, sqrt_ratio_next_x96, liquidity, False)
+
+    if not reached_target:
+        # We did not reach the target, so take the remainder of the maximum input as fee
+        fee_amount = amount_remaining - amount_in
+    else:
+        fee_amount = mul_div_rounding_up(amount_in, fee_pips, FEE_DENOMINATOR - fee_pips)
+
+    return sqrt_ratio_next_x96, amount_in, amount_out, fee_amount
@@ -0,0 +1,88 @@
+"""Vectorised Uniswap v3 price and liquidity helpers.
+
+- Batch counterparts of :py:func:`eth_defi.uniswap_v3.utils.tick_to_price`,
+  :py:func:`~eth_defi.uniswap_v3.utils.tick_to_sqrt_price`,
+  :py:func:`~eth_defi.uniswap_v3.utils.get_token0_amount_in_range` and
+  :py:func:`~eth_defi.uniswap_v3.utils.get_token1_amount_in_range`
+  for liquidity depth studies over a large number of pools and ranges
+
+- Same floating point formulas as the scalar helpers.
+  For exact integer swap math see :py:mod:`eth_defi.uniswap_v3.tick_math`.
+
+- uint128 liquidity values are accepted as lists or ``object`` arrays of Python integers
+"""
+
+from typing import Iterable
+
+import numpy as np
+
+
+def as_float_array(values: np.ndarray | Iterable) -> np.ndarray:
+    """Convert ticks, prices or raw liquidity values to ``float64``.
+
+    - Python integers larger than 64 bits are converted one by one, as NumPy cannot cast them directly
+    """
+    if isinstance(values, np.ndarray) and values.dtype.kind in "iuf":
+        return values.astype(np.float64, copy=False)
+    return np.array([float(v) for v in values], dtype=np.float64)
+
+
+def tick_to_price_batch(ticks: np.ndarray | Iterable[int]) -> np.ndarray:
+    """Returns prices corresponding to ticks."""
+    return np.power(1.0001, as_float_array(ticks))
+
+
+def tick_to_sqrt_price_batch(ticks: np.ndarray | Iterable[int]) -> np.ndarray:
+    """Returns square root prices corresponding to ticks."""
+    return np.power(1.0001, as_float_array(ticks) / 2)
+
+
+def get_token0_amount_in_range_batch(liquidity: np.ndarray | Iterable, sp: np.ndarray | Iterable, sb: np.ndarray | Iterable) -> np.ndarray:
+    """Returns token0 (base token) amounts in liquidity ranges.
+
+    :param liquidity: current virtual liquidity
+    :param sp: square root current price
+    :param sb: square root upper price
+    """
+    sp = as_float_array(sp)
+    sb = as_float_array(sb)
+    return as_float_array(liquidity) * (sb - sp) / (sp * sb)
+
+
+def get_token1_amount_in_range_batch(liquidity: np.ndarray | Iterable, sp: np.ndarray | Iterable, sa: np.ndarray | Iterable) -> np.ndarray:
+    """Returns token1 (quote token) amounts in liquidity ranges.
+
+    :param liquidity: current virtual liquidity
+    :param sp: square root current price
+    :param sa: square root lower price
+    """
+    return as_float_array(liquidity) * (as_float_array(sp) - as_float_array(sa))
+
+
+def estimate_in_range_depth_batch(
+    liquidity: np.ndarray | Iterable,
+    current_ticks: np.ndarray | Iterable[int],
+    depth: float,
+) -> np.ndarray:
+    """Estimate liquidity depth for many pools, assuming the price stays within the active tick range.
+
+    - First order approximation of :py:meth:`eth_defi.uniswap_v3.pool_state_engine.PoolTickState.estimate_liquidity_depth`
+      that does not cross any ticks, good for screening pools before exact per-pool calculations
+
+    :param liquidity:
+        Active liquidity of each pool
+
+    :param current_ticks:
+        Current tick of each pool
+
+    :param depth:
+        Price move in percents, e.g. ``1`` or ``-1``
+
+    :return:
+        Raw token0 amounts for positive depth, token1 amounts for negative depth
+    """
+    sp = tick_to_sqrt_price_batch(current_ticks)
+    target = sp * np.sqrt((100 + depth) / 100)
+    if depth > 0:
+        return get_token0_amount_in_range_batch(liquidity, sp, target)
+    return get_token1_amount_in_range_batch(liquidity, sp, target)
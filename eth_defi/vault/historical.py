@@ -31,6 +31,7 @@ from eth_defi.provider.broken_provider import get_almost_latest_block_number
 from eth_defi.token import TokenDetails, TokenDiskCache
 from eth_defi.utils import chunked
 from eth_defi.vault.base import VaultBase, VaultHistoricalReader, VaultHistoricalRead, VaultSpec
+from eth_defi.vault.historical_dataset import write_partitioned_vault_prices
 
 logger = logging.getLogger(__name__)
 
@@ -324,18 +325,23 @@ def scan_historical_prices_to_parquet(
     require_multicall_result=False,
     frequency: Literal["1d", "1h"] = "1d",
     reader_states: dict[VaultSpec, dict] | None = None,
+    partitioned=False,
 ) -> ParquetScanResult:
     """Scan all historical vault share prices of vaults and save them in to Parquet file.
 
     - Write historical prices to a Parquet file
     - Multiprocess-boosted
     - The same Parquet file can contain data from multiple chains
+    - Optionally write to a Hive-partitioned dataset directory instead of a single file,
+      see :py:mod:`eth_defi.vault.historical_dataset`
 
     :param output_fname:
         Path to a destination Parquet file.
 
         If the file exists, all entries for the current chain are deleted and rewritten.
 
+        If ``partitioned`` is set, this is the dataset root directory.
+
     :param web3:
         Web3 connection
 
@@ -372,6 +378,12 @@ def scan_historical_prices_to_parquet(
     :param max_workers:
         Number of subprocesses to use for multicall
 
+    :param partitioned:
+        Write to a dataset partitioned by chain and month.
+
+        Only the partitions of this chain at or after ``start_block`` are rewritten,
+        instead of the whole multichain file.
+
     :return:
         Scan report.
     """
@@ -477,91 +489,108 @@ def scan_historical_prices_to_parquet(
 
     schema = VaultHistoricalRead.to_pyarrow_schema()
 
-    if output_fname.exists():
-        try:
-            existing_table = pq.read_table(output_fname)
-        except pa.lib.ArrowInvalid as e:
-            logger.warning(
-                "Parquet file %s, write damaged %s, resetting",
-                output_fname,
-                str(e),
-            )
-            existing_table = None
-    else:
-        existing_table = None
+    logger.info(
+        "Starting vault historical price export to %s, we have %d vaults, range %d - %d, block step is %d, block time is %s seconds, token cache is %s",
+        output_fname,
+        len(vaults),
+        start_block,
+        end_block,
+        step,
+        block_time,
+        token_cache.filename,
+    )
 
-    if existing_table is not None:
-        logger.info(
-            "Detected existing file %s with %d rows",
-            output_fname,
-            len(existing_table),
-        )
-        # Clear existing entries for this chain
-        mask = pc.and_(
-            pc.equal(existing_table["chain"], chain_id),
-            pc.greater_equal(existing_table["block_number"], start_block),
-        )
-        all_row_count = len(existing_table)
-        rows_deleted = pc.sum(mask).as_py() or 0
-        existing_table = existing_table.filter(pc.invert(mask))
-        existing_row_count = existing_table.num_rows
-        logger.info(
-            "Removed existing %d rows out of %d rows for chain %d from the vault time-series data, existing table has %d rows",
-            rows_deleted,
-            all_row_count,
-            chain_id,
-            existing_row_count,
+    assert end_block >= start_block, f"End block {end_block} must be greater than or equal to start block {start_block}"
+
+    if partitioned:
+        # Hive-partitioned dataset, only rewrite partitions affected by this scan
+        write_result = write_partitioned_vault_prices(
+            dataset_path=output_fname,
+            chain_id=chain_id,
+            start_block=start_block,
+            rows=converted_iter,
+            chunk_size=chunk_size,
+            compression=compression,
         )
-        existing = True
+        rows_written = write_result["rows_written"]
+        rows_deleted = write_result["rows_deleted"]
+        existing = write_result["existing"]
+        existing_row_count = write_result["existing_row_count"]
+        chunks_done = write_result["chunks_done"]
+        size = write_result["file_size"]
     else:
-        logger.info("No existing table, no removed rows")
-        existing_table = None
-        rows_deleted = 0
-        existing = False
-        existing_row_count = 0
-
-    # Perform atomic update of the prices Parquet file
-    with tempfile.NamedTemporaryFile(
-        mode="wb",
-        dir=output_fname.parent,
-        suffix=".parquet",
-        delete=False,
-    ) as tmp:
-        # Initialize ParquetWriter with the schema
-        temp_fname = tmp.name
-        writer = pq.ParquetWriter(temp_fname, schema, compression=compression)
+        if output_fname.exists():
+            try:
+                existing_table = pq.read_table(output_fname)
+            except pa.lib.ArrowInvalid as e:
+                logger.warning(
+                    "Parquet file %s, write damaged %s, resetting",
+                    output_fname,
+                    str(e),
+                )
+                existing_table = None
+        else:
+            existing_table = None
 
         if existing_table is not None:
-            writer.write_table(existing_table)
-
-        rows_written = 0
-
-        logger.info(
-            "Starting vault historical price export to %s, we have %d vaults, range %d - %d, block step is %d, block time is %s seconds, token cache is %s",
-            output_fname,
-            len(vaults),
-            start_block,
-            end_block,
-            step,
-            block_time,
-            token_cache.filename,
-        )
-
-        assert end_block >= start_block, f"End block {end_block} must be greater than or equal to start block {start_block}"
-
-        chunks_done = 0
-        for chunk in chunked(converted_iter, chunk_size):
-            logger.debug("Processing chunk %d", chunks_done)
-            table = pa.Table.from_pylist(chunk, schema=schema)
-            writer.write_table(table)
-            rows_written += len(chunk)
-            chunks_done += 1
-
-        # Close the writer to finalize the file
-        writer.close()
-        os.replace(temp_fname, output_fname)
-
-    size = output_fname.stat().st_size
+            logger.info(
+                "Detected existing file %s with %d rows",
+                output_fname,
+                len(existing_table),
+            )
+            # Clear existing entries for this chain
+            mask = pc.and_(
+                pc.equal(existing_table["chain"], chain_id),
+                pc.greater_equal(existing_table["block_number"], start_block),
+            )
+            all_row_count = len(existing_table)
+            rows_deleted = pc.sum(mask).as_py() or 0
+            existing_table = existing_table.filter(pc.invert(mask))
+            existing_row_count = existing_table.num_rows
+            logger.info(
+                "Removed existing %d rows out of %d rows for chain %d from the vault time-series data, existing table has %d rows",
+                rows_deleted,
+                all_row_count,
+                chain_id,
+                existing_row_count,
+            )
+            existing = True
+        else:
+            logger.info("No existing table, no removed rows")
+            existing_table = None
+            rows_deleted = 0
+            existing = False
+            existing_row_count = 0
+
+        # Perform atomic update of the prices Parquet file
+        with tempfile.NamedTemporaryFile(
+            mode="wb",
+            dir=output_fname.parent,
+            suffix=".parquet",
+            delete=False,
+        ) as tmp:
+            # Initialize ParquetWriter with the schema
+            temp_fname = tmp.name
+            writer = pq.ParquetWriter(temp_fname, schema, compression=compression)
+
+            if existing_table is not None:
+                writer.write_table(existing_table)
+
+            rows_written = 0
+
+            chunks_done = 0
+            for chunk in chunked(converted_iter, chunk_size):
+                logger.debug("Processing chunk %d", chunks_done)
+                table = pa.Table.from_pylist(chunk, schema=schema)
+                writer.write_table(table)
+                rows_written += len(chunk)
+                chunks_done += 1
+
+            # Close the writer to finalize the file
+            writer.close()
+            os.replace(temp_fname, output_fname)
+
+        size = output_fname.stat().st_size
 
     logger.info(
         f"Exported {rows_written} vault {frequency} price rows, file size is now {size:,} bytes",
@@ -0,0 +1,439 @@
+"""Append-only, Hive-partitioned Parquet dataset for vault price scans.
+
+- The single-file mode of :py:func:`eth_defi.vault.historical.scan_historical_prices_to_parquet`
+  reads and rewrites the whole multichain price file on every run
+
+- In the dataset mode the prices are stored in a directory tree partitioned by chain and calendar month::
+
+    vault-prices-1h/
+        chain=1/
+            month=2024-12/part-0.parquet
+            month=2025-01/part-0.parquet
+        chain=8453/
+            month=2025-01/part-0.parquet
+
+- An incremental scan only rewrites the partitions of the scanned chain
+  that contain blocks at or after the scan start block, everything else is left untouched
+
+- Each partition file is replaced atomically. Temporary files are dot-prefixed,
+  so concurrent readers using :py:mod:`pyarrow.dataset` never see half-written data
+
+- Damaged partition files are moved aside with a ``_damaged-`` prefix, which :py:mod:`pyarrow.dataset` skips,
+  so they can be inspected or recovered by hand
+
+- Partition files carry the full :py:meth:`eth_defi.vault.base.VaultHistoricalRead.to_pyarrow_schema`
+  schema, so a single partition file is readable on its own
+
+Example how to read a filtered view without loading the whole history:
+
+.. code-block:: python
+
+    from eth_defi.vault.historical_dataset import read_partitioned_vault_prices
+
+    table = read_partitioned_vault_prices(
+        Path("~/.tradingstrategy/vaults/vault-prices-1h").expanduser(),
+        chain_id=8453,
+        vault_addresses=["0x45aa96f0b3188d47a1dafdbefce1db6b37f58216"],
+        start=datetime.datetime(2025, 1, 1),
+    )
+    df = table.to_pandas()
+"""
+
+import datetime
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Iterable, TypedDict, Collection
+
+from eth_defi.compat import native_datetime_utc_now
+from eth_defi.utils import chunked
+from eth_defi.vault.base import VaultHistoricalRead
+
+logger = logging.getLogger(__name__)
+
+
+#: Name of the data file inside each partition directory
+PARTITION_FILE_NAME = "part-0.parquet"
+
+#: Prefix of damaged partition files moved aside.
+#:
+#: :py:mod:`pyarrow.dataset` ignores files starting with an underscore.
+DAMAGED_FILE_PREFIX = "_damaged-"
+
+
+class PartitionedWriteResult(TypedDict):
+    """Result of writing new scan rows to a partitioned dataset."""
+
+    #: Did the dataset exist before the write
+    existing: bool
+
+    #: New rows written
+    rows_written: int
+
+    #: Rows removed from the rewritten partitions, because they were at or after the start block
+    rows_deleted: int
+
+    #: Rows in the dataset, all chains, after the deletion and before the new rows were written
+    existing_row_count: int
+
+    #: Total size of all partition files in bytes
+    file_size: int
+
+    #: How many ``chunk_size`` chunks were processed
+    chunks_done: int
+
+    #: Names of partitions (``chain=x/month=y``) we wrote or deleted
+    partitions_touched: list[str]
+
+
+def get_partition_month(timestamp: datetime.datetime) -> str:
+    """Get the month partition key for a timestamp.
+
+    :param timestamp:
+        Naive UTC datetime
+
+    :return:
+        Month as ``YYYY-MM`` string, sorts lexically
+    """
+    return f"{timestamp.year:04d}-{timestamp.month:02d}"
+
+
+def get_chain_partition_path(dataset_path: Path, chain_id: int) -> Path:
+    """Get the directory holding all partitions of a chain."""
+    return dataset_path / f"chain={chain_id}"
+
+
+def get_partition_path(dataset_path: Path, chain_id: int, month: str) -> Path:
+    """Get the data file of a single partition."""
+    return get_chain_partition_path(dataset_path, chain_id) / f"month={month}" / PARTITION_FILE_NAME
+
+
+def get_pyarrow_partitioning() -> "pyarrow.dataset.Partitioning":
+    """Hive partitioning of the vault price dataset.
+
+    The partition columns duplicate the data columns, so that
+    :py:mod:`pyarrow.dataset` can prune partitions by a filter on ``chain``.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(
+        pa.schema(
+            [
+                ("chain", pa.uint32()),
+                ("month", pa.string()),
+            ]
+        ),
+        flavor="hive",
+    )
+
+
+def _read_block_range(fname: Path) -> tuple[int, int, int]:
+    """Read min/max block number and row count from Parquet footer statistics.
+
+    Does not touch the data pages.
+
+    :return:
+        Tuple (min block, max block, row count)
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(fname).metadata
+    column_index = metadata.schema.names.index("block_number")
+    min_block = None
+    max_block = None
+    for i in range(metadata.num_row_groups):
+        stats = metadata.row_group(i).column(column_index).statistics
+        if stats is None or not stats.has_min_max:
+            # Cannot tell, treat as straddling
+            return 0, 2**32, metadata.num_rows
+        min_block = stats.min if min_block is None else min(min_block, stats.min)
+        max_block = stats.max if max_block is None else max(max_block, stats.max)
+
+    if min_block is None:
+        # Empty file
+        return 0, 0, 0
+
+    return min_block, max_block, metadata.num_rows
+
+
+def _get_dataset_row_count_and_size(dataset_path: Path) -> tuple[int, int]:
+    """Get total row count and size from partition file footers."""
+    import pyarrow.parquet as pq
+
+    rows = 0
+    size = 0
+    for fname in dataset_path.glob(f"chain=*/month=*/{PARTITION_FILE_NAME}"):
+        rows += pq.ParquetFile(fname).metadata.num_rows
+        size += fname.stat().st_size
+    return rows, size
+
+
+def write_partitioned_vault_prices(
+    dataset_path: Path,
+    chain_id: int,
+    start_block: int,
+    rows: Iterable[dict],
+    chunk_size=1024,
+    compression="zstd",
+) -> PartitionedWriteResult:
+    """Write vault price rows of one chain to a partitioned dataset.
+
+    - All existing rows of ``chain_id`` at or after ``start_block`` are deleted,
+      the same semantics as with the single-file mode
+
+    - Only partitions of ``chain_id`` that have rows at or after ``start_block``,
+      or receive new rows, are rewritten
+
+    - Partitions that are older than the start block are not read at all,
+      we only peek into their Parquet footers
+
+    :param dataset_path:
+        Root directory of the dataset. Created if it does not exist.
+
+    :param chain_id:
+        Chain of which data we are writing
+
+    :param start_block:
+        Scan start block. Existing rows at or after this block are replaced.
+
+    :param rows:
+        Iterable of dicts from :py:meth:`VaultHistoricalRead.export`.
+
+        All rows must belong to ``chain_id``.
+
+    :param chunk_size:
+        How many rows to convert to a Arrow table in one go
+
+    :param compression:
+        Parquet compression
+
+    :return:
+        Write report
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    import pyarrow.compute as pc
+
+    assert isinstance(dataset_path, Path)
+    assert type(chain_id) == int
+    assert type(start_block) == int
+
+    existing = dataset_path.exists()
+    chain_path = get_chain_partition_path(dataset_path, chain_id)
+    chain_path.mkdir(parents=True, exist_ok=True)
+
+    schema = VaultHistoricalRead.to_pyarrow_schema()
+
+    # Classify existing partitions of this chain by their footer block range.
+    # month -> (min block, max block, row count)
+    existing_partitions: dict[str, tuple[int, int, int]] = {}
+    for fname in chain_path.glob(f"month=*/{PARTITION_FILE_NAME}"):
+        month = fname.parent.name.removeprefix("month=")
+        try:
+            existing_partitions[month] = _read_block_range(fname)
+        except pa.lib.ArrowInvalid as e:
+            damaged_fname = fname.with_name(f"{DAMAGED_FILE_PREFIX}{native_datetime_utc_now():%Y%m%d%H%M%S}-{fname.name}")
+            logger.warning(
+                "Partition %s damaged %s, moving it to %s and resetting. Rows of this partition before the start block %d are not rescanned.",
+                fname,
+                str(e),
+                damaged_fname,
+                start_block,
+            )
+            fname.rename(damaged_fname)
+
+    # Partitions where some rows must be dropped
+    affected_months = {month for month, (min_block, max_block, row_count) in existing_partitions.items() if max_block >= start_block}
+
+    logger.info(
+        "Partitioned write to %s, chain %d, start block %d, existing partitions %d, affected by rewrite %d",
+        dataset_path,
+        chain_id,
+        start_block,
+        len(existing_partitions),
+        len(affected_months),
+    )
+
+    rows_deleted = 0
+    rows_written = 0
+    chunks_done = 0
+
+    # month -> (writer, temp file name)
+    writers: dict[str, tuple[pq.ParquetWriter, str]] = {}
+
+    def _load_kept_rows(month: str) -> pa.Table | None:
+        """Read the rows we keep from an existing partition."""
+        nonlocal rows_deleted
+        if month not in existing_partitions:
+            return None
+        fname = get_partition_path(dataset_path, chain_id, month)
+        table = pq.read_table(fname, schema=schema)
+        mask = pc.less(table["block_number"], start_block)
+        kept = table.filter(mask)
+        rows_deleted += table.num_rows - kept.num_rows
+        return kept
+
+    def _open_writer(month: str) -> pq.ParquetWriter:
+        partition_dir = chain_path / f"month={month}"
+        partition_dir.mkdir(parents=True, exist_ok=True)
+        # Dot-prefixed temp files are ignored by pyarrow.dataset readers
+        fd, temp_fname = tempfile.mkstemp(dir=partition_dir, prefix=".tmp-", suffix=".parquet")
+        os.close(fd)
+        writer = pq.ParquetWriter(temp_fname, schema, compression=compression)
+        kept = _load_kept_rows(month)
+        if kept is not None and kept.num_rows > 0:
+            writer.write_table(kept)
+        writers[month] = (writer, temp_fname)
+        return writer
+
+    try:
+        for chunk in chunked(rows, chunk_size):
+            by_month: dict[str, list[dict]] = {}
+            for row in chunk:
+                assert row["chain"] == chain_id, f"Got row for chain {row['chain']}, expected {chain_id}"
+                by_month.setdefault(get_partition_month(row["timestamp"]), []).append(row)
+
+            for month, month_rows in by_month.items():
+                if month in writers:
+                    writer = writers[month][0]
+                else:
+                    writer = _open_writer(month)
+                writer.write_table(pa.Table.from_pylist(month_rows, schema=schema))
+
+            rows_written += len(chunk)
+            chunks_done += 1
+    except Exception:
+        # Leave the dataset as it was
+        for writer, temp_fname in writers.values():
+            writer.close()
+            os.unlink(temp_fname)
+        raise
+
+    partitions_touched = []
+
+    for month, (writer, temp_fname) in writers.items():
+        writer.close()
+        os.replace(temp_fname, get_partition_path(dataset_path, chain_id, month))
+        partitions_touched.append(f"chain={chain_id}/month={month}")
+
+    # Affected partitions which did not receive any new data
+    for month in sorted(affected_months - writers.keys()):
+        fname = get_partition_path(dataset_path, chain_id, month)
+        min_block, max_block, row_count = existing_partitions[month]
+        if min_block >= start_block:
+            # The whole partition is replaced by the scan
+            rows_deleted += row_count
+            shutil.rmtree(fname.parent)
+        else:
+            kept = _load_kept_rows(month)
+            fd, temp_fname = tempfile.mkstemp(dir=fname.parent, prefix=".tmp-", suffix=".parquet")
+            os.close(fd)
+            pq.write_table(kept, temp_fname, compression=compression)
+            os.replace(temp_fname, fname)
+        partitions_touched.append(f"chain={chain_id}/month={month}")
+
+    total_rows, size = _get_dataset_row_count_and_size(dataset_path)
+
+    logger.info(
+        "Partitioned write complete, rows written %d, rows deleted %d, partitions touched %d, dataset size %d bytes",
+        rows_written,
+        rows_deleted,
+        len(partitions_touched),
+        size,
+    )
+
+    return PartitionedWriteResult(
+        existing=existing,
+        rows_written=rows_written,
+        rows_deleted=rows_deleted,
+        existing_row_count=total_rows - rows_written,
+        file_size=size,
+        chunks_done=chunks_done,
+        partitions_touched=partitions_touched,
+    )
+
+
+def read_partitioned_vault_prices(
+    dataset_path: Path,
+    chain_id: int | None = None,
+    vault_addresses: Collection[str] | None = None,
+    start: datetime.datetime | None = None,
+    end: datetime.datetime | None = None,
+    columns: list[str] | None = None,
+) -> "pyarrow.Table":
+    """Load a filtered view of a partitioned vault price dataset.
+
+    - Partitions outside the chain and the time range are never opened
+
+    - Vault address filter is pushed down to the Parquet row group statistics
+
+    :param dataset_path:
+        Root directory of the dataset
+
+    :param chain_id:
+        Only read this chain
+
+    :param vault_addresses:
+        Only read these vaults.
+
+        Addresses are matched lowercased.
+
+    :param start:
+        Read rows with timestamp at or after this, naive UTC
+
+    :param end:
+        Read rows with timestamp before this, naive UTC
+
+    :param columns:
+        Columns to read.
+
+        Default to all columns of :py:meth:`VaultHistoricalRead.to_pyarrow_schema`.
+
+    :return:
+        Arrow table with the same schema as the single-file output
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    assert isinstance(dataset_path, Path)
+
+    schema = VaultHistoricalRead.to_pyarrow_schema()
+    full_schema = schema.append(pa.field("month", pa.string()))
+
+    if not dataset_path.exists():
+        return schema.empty_table()
+
+    dataset = ds.dataset(
+        dataset_path,
+        format="parquet",
+        partitioning=get_pyarrow_partitioning(),
+        schema=full_schema,
+    )
+
+    conditions = []
+
+    if chain_id is not None:
+        conditions.append(ds.field("chain") == chain_id)
+
+    if vault_addresses is not None:
+        conditions.append(ds.field("address").isin([a.lower() for a in vault_addresses]))
+
+    if start is not None:
+        conditions.append(ds.field("month") >= get_partition_month(start))
+        conditions.append(ds.field("timestamp") >= pa.scalar(start, type=pa.timestamp("ms")))
+
+    if end is not None:
+        conditions.append(ds.field("month") <= get_partition_month(end))
+        conditions.append(ds.field("timestamp") < pa.scalar(end, type=pa.timestamp("ms")))
+
+    filter = None
+    for c in conditions:
+        filter = c if filter is None else filter & c
+
+    if columns is None:
+        columns = schema.names
+
+    return dataset.to_table(columns=columns, filter=filter)
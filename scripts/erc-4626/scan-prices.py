@@ -47,6 +47,11 @@ Re-run manual test::
     export JSON_RPC_URL=$JSON_RPC_GNOSIS
     python scripts/erc-4626/scan-prices.py
 
+Write to a chain and month partitioned dataset directory instead of a single Parquet file,
+so that incremental scans only rewrite the affected partitions::
+
+    PARTITIONED=true python scripts/erc-4626/scan-prices.py
+
 Copy server-side run results back to the local machine::
 
     rsync -av --inplace --progress --exclude="tmp*" "oracle-tailscale:.tradingstrategy/vaults/*" ~/.tradingstrategy/vaults/
@@ -115,8 +120,13 @@ def main():
 
     assert frequency in ["1h", "1d"], f"Unsupported frequency: {frequency}"
 
+    partitioned = os.environ.get("PARTITIONED", "false").lower() == "true"
+
     vault_db_fname = DEFAULT_VAULT_DATABASE
-    price_parquet_fname = output_folder / f"vault-prices-{frequency}.parquet"
+    if partitioned:
+        price_parquet_fname = output_folder / f"vault-prices-{frequency}"
+    else:
+        price_parquet_fname = output_folder / f"vault-prices-{frequency}.parquet"
 
     reader_state_db = output_folder / f"vault-reader-state-{frequency}.pickle"
 
@@ -178,6 +188,7 @@ def main():
         token_cache=token_cache,
         frequency=frequency,
         reader_states=reader_states,
+        partitioned=partitioned,
     )
 
     # Save states
@@ -0,0 +1,107 @@
+"""Test ERC-4626: partitioned vault price dataset writes and reads."""
+
+import datetime
+from pathlib import Path
+
+from eth_defi.vault.historical_dataset import DAMAGED_FILE_PREFIX, write_partitioned_vault_prices, read_partitioned_vault_prices, get_partition_path
+
+
+def _make_rows(chain_id: int, address: str, start_block: int, start: datetime.datetime, count: int, step_days=10) -> list[dict]:
+    """Generate fake exported VaultHistoricalRead rows."""
+    rows = []
+    for i in range(count):
+        rows.append(
+            {
+                "chain": chain_id,
+                "address": address,
+                "block_number": start_block + i * 1000,
+                "timestamp": start + datetime.timedelta(days=i * step_days),
+                "share_price": 1.0 + i / 100,
+                "total_assets": 1000.0,
+                "total_supply": 1000.0,
+                "performance_fee": 0.2,
+                "management_fee": 0.0,
+                "errors": "",
+            }
+        )
+    return rows
+
+
+def test_partitioned_vault_prices_incremental(tmp_path: Path):
+    """Incremental scan rewrites only partitions at or after the start block."""
+
+    dataset_path = tmp_path / "vault-prices-1d"
+
+    # 9 rows, 10 days apart, spanning Jan - Mar 2025
+    rows = _make_rows(1, "0xaaaa", 1_000_000, datetime.datetime(2025, 1, 1), 9)
+    result = write_partitioned_vault_prices(dataset_path, chain_id=1, start_block=1_000_000, rows=rows, chunk_size=4)
+    assert result["existing"] is False
+    assert result["rows_written"] == 9
+    assert result["rows_deleted"] == 0
+    assert result["existing_row_count"] == 0
+    assert sorted(result["partitions_touched"]) == ["chain=1/month=2025-01", "chain=1/month=2025-02", "chain=1/month=2025-03"]
+
+    # Another chain goes to its own partitions
+    rows = _make_rows(8453, "0xbbbb", 5_000, datetime.datetime(2025, 1, 1), 3)
+    result = write_partitioned_vault_prices(dataset_path, chain_id=8453, start_block=5_000, rows=rows)
+    assert result["existing"] is True
+    assert result["existing_row_count"] == 9
+    assert result["partitions_touched"] == ["chain=8453/month=2025-01"]
+
+    jan_partition = get_partition_path(dataset_path, 1, "2025-01")
+    jan_mtime = jan_partition.stat().st_mtime_ns
+
+    # Rescan chain 1 from the middle of February,
+    # January must not be touched
+    rows = _make_rows(1, "0xaaaa", 1_005_000, datetime.datetime(2025, 2, 20), 1)
+    result = write_partitioned_vault_prices(dataset_path, chain_id=1, start_block=1_005_000, rows=rows)
+    assert result["rows_written"] == 1
+    assert result["rows_deleted"] == 4
+    assert sorted(result["partitions_touched"]) == ["chain=1/month=2025-02", "chain=1/month=2025-03"]
+    assert jan_partition.stat().st_mtime_ns == jan_mtime
+
+    # The March partition only had rows after the start block and got no new data
+    assert not get_partition_path(dataset_path, 1, "2025-03").exists()
+
+    table = read_partitioned_vault_prices(dataset_path, chain_id=1)
+    assert table.num_rows == 5 + 1
+    assert table.schema.names[0] == "chain"
+    assert "month" not in table.schema.names
+
+    table = read_partitioned_vault_prices(dataset_path)
+    assert table.num_rows == 6 + 3
+
+    table = read_partitioned_vault_prices(dataset_path, vault_addresses=["0xBBBB"])
+    assert table.num_rows == 3
+
+    table = read_partitioned_vault_prices(
+        dataset_path,
+        chain_id=1,
+        start=datetime.datetime(2025, 1, 15),
+        end=datetime.datetime(2025, 2, 1),
+    )
+    assert table["timestamp"].to_pylist() == [datetime.datetime(2025, 1, 21), datetime.datetime(2025, 1, 31)]
+
+
+def test_partitioned_vault_prices_damaged_partition(tmp_path: Path, caplog):
+    """Damaged partitions are moved aside, not deleted, and skipped by readers."""
+
+    dataset_path = tmp_path / "vault-prices-1d"
+    rows = _make_rows(1, "0xaaaa", 1_000_000, datetime.datetime(2025, 1, 1), 9)
+    write_partitioned_vault_prices(dataset_path, chain_id=1, start_block=1_000_000, rows=rows)
+
+    jan_partition = get_partition_path(dataset_path, 1, "2025-01")
+    jan_partition.write_bytes(b"garbage")
+
+    rows = _make_rows(1, "0xaaaa", 1_005_000, datetime.datetime(2025, 2, 20), 1)
+    write_partitioned_vault_prices(dataset_path, chain_id=1, start_block=1_005_000, rows=rows)
+
+    assert "damaged" in caplog.text
+    assert not jan_partition.exists()
+    damaged = list(jan_partition.parent.glob(f"{DAMAGED_FILE_PREFIX}*"))
+    assert len(damaged) == 1
+    assert damaged[0].read_bytes() == b"garbage"
+
+    # January rows are gone, February 10th is kept and February 20th rescanned
+    table = read_partitioned_vault_prices(dataset_path, chain_id=1)
+    assert table.num_rows == 2
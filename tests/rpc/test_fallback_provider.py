@@ -10,7 +10,7 @@ import requests
 from eth_account import Account
 
 from eth_defi.confirmation import wait_and_broadcast_multiple_nodes, NonceMismatch
-from eth_defi.event_reader.fast_json_rpc import get_last_headers
+from eth_defi.event_reader.fast_json_rpc import get_last_headers, make_batch_request
 from eth_defi.provider.broken_provider import get_default_block_tip_latency
 from web3 import HTTPProvider, Web3
 
@@ -348,3 +348,62 @@ def test_broadcast_and_wait_multiple_nonce_too_high(web3: Web3, deployer: str):
             node_switch_timeout=datetime.timedelta(seconds=1),
             check_nonce_validity=True,
         )
+
+
+def test_fallback_batch_request(web3: Web3, fallback_provider: FallbackProvider, deployer: str):
+    """Many calls in one JSON-RPC batch."""
+    block_number = web3.eth.block_number
+    responses = make_batch_request(
+        web3,
+        [
+            ("eth_chainId", []),
+            ("eth_getBlockByNumber", (hex(block_number), False)),
+            ("eth_getBalance", (deployer, "latest")),
+        ],
+    )
+    assert int(responses[0]["result"], 16) == web3.eth.chain_id
+    assert int(responses[1]["result"]["number"], 16) == block_number
+    assert int(responses[2]["result"], 16) == web3.eth.get_balance(deployer)
+    assert fallback_provider.api_call_counts[0]["eth_getBlockByNumber"] == 1
+
+
+def test_fallback_batch_too_large(web3: Web3, fallback_provider: FallbackProvider, provider_1):
+    """Split batches when the provider rejects them."""
+    original = provider_1.make_batch_request
+
+    def _capped_batch(batch_requests):
+        if len(batch_requests) > 4:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch too large"}}
+        return original(batch_requests)
+
+    with patch.object(provider_1, "make_batch_request", side_effect=_capped_batch):
+        responses = fallback_provider.make_batch_request([("eth_chainId", [])] * 10)
+
+    assert len(responses) == 10
+    assert all(int(r["result"], 16) == web3.eth.chain_id for r in responses)
+    # 100 -> 5 -> 2, and grown back to 3 after five full batches
+    assert fallback_provider.get_batch_size() == 3
+    assert fallback_provider.currently_active_provider == 0
+
+
+def test_fallback_batch_item_retry(web3: Web3, fallback_provider: FallbackProvider, provider_1):
+    """Retry failed items of a batch individually."""
+    original = provider_1.make_batch_request
+
+    def _faulty_batch(batch_requests):
+        responses = original(batch_requests)
+        responses[1] = {"jsonrpc": "2.0", "id": responses[1]["id"], "error": {"code": -32603, "message": "Internal JSON-RPC error."}}
+        return responses
+
+    block_number = web3.eth.block_number
+    with patch.object(provider_1, "make_batch_request", side_effect=_faulty_batch):
+        responses = fallback_provider.make_batch_request(
+            [
+                ("eth_chainId", []),
+                ("eth_getBlockByNumber", (hex(block_number), False)),
+                ("eth_call", ({"to": ZERO_ADDRESS, "data": "0x"}, "latest")),
+            ]
+        )
+
+    assert int(responses[1]["result"]["number"], 16) == block_number
+    assert fallback_provider.api_call_counts[0]["eth_getBlockByNumber"] == 1
@@ -0,0 +1,58 @@
+"""Adaptive multicall batch size controller tests."""
+
+from pathlib import Path
+
+import pytest
+from requests.exceptions import ReadTimeout
+
+from eth_defi.event_reader.multicall_batch_size import AdaptiveBatchSizeController, classify_multicall_failure
+
+
+def test_classify_multicall_failure():
+    """Map RPC errors to failure kinds."""
+    assert classify_multicall_failure(ValueError({"message": "out of gas", "code": -32000})) == "gas"
+    assert classify_multicall_failure(ValueError("request timed out")) == "timeout"
+    assert classify_multicall_failure(ReadTimeout()) == "timeout"
+    assert classify_multicall_failure(ValueError("historical state 0x1234 is not available")) == "node"
+    assert classify_multicall_failure(ValueError("execution reverted")) == "revert"
+    assert classify_multicall_failure(ValueError("invalid JSON")) == "other"
+
+
+def test_adaptive_batch_size_grow_and_shrink(tmp_path: Path):
+    """Grow on healthy responses, shrink on gas errors, share learnt size through the state file."""
+    state_file = tmp_path / "batch-sizes.json"
+
+    controller = AdaptiveBatchSizeController(state_file=state_file, grow_after=2, save_interval=0)
+    assert controller.get_batch_size(1, "rpc.example.com", default_batch_size=40) == 40
+
+    # Two fast full batches grow the size
+    controller.report_success(1, "rpc.example.com", batch_size=40, duration=0.5, payload_bytes=40 * 56)
+    controller.report_success(1, "rpc.example.com", batch_size=40, duration=0.5, payload_bytes=40 * 56)
+    assert controller.get_batch_size(1, "rpc.example.com", default_batch_size=40) == 50
+
+    # Partial batches do not grow the size
+    controller.report_success(1, "rpc.example.com", batch_size=3, duration=0.1, payload_bytes=3 * 56)
+    controller.report_success(1, "rpc.example.com", batch_size=3, duration=0.1, payload_bytes=3 * 56)
+    assert controller.get_batch_size(1, "rpc.example.com", default_batch_size=40) == 50
+
+    # Throttling is not size related
+    assert controller.report_failure(1, "rpc.example.com", batch_size=50, failure_kind="throttle") == 50
+
+    # Out of gas halves the size
+    assert controller.report_failure(1, "rpc.example.com", batch_size=50, failure_kind="gas") == 25
+
+    # Slow responses shrink the size
+    controller.report_success(1, "rpc.example.com", batch_size=25, duration=30.0, payload_bytes=25 * 56)
+    assert controller.get_batch_size(1, "rpc.example.com", default_batch_size=40) == 20
+
+    # Another provider and chain are tracked separately
+    assert controller.get_batch_size(1, "other.example.com", default_batch_size=40) == 40
+    assert controller.get_batch_size(5000, "rpc.example.com", default_batch_size=16) == 16
+
+    # Another worker process picks up the learnt size
+    controller.save()
+    controller_2 = AdaptiveBatchSizeController(state_file=state_file)
+    assert controller_2.get_batch_size(1, "rpc.example.com", default_batch_size=40) == 20
+    stats = controller_2.stats[(1, "rpc.example.com")]
+    assert stats.failures == {"throttle": 1, "gas": 1}
+    assert stats.payload_bytes_per_call_ewma == pytest.approx(56)
@@ -0,0 +1,126 @@
+"""Multicall split-on-failure bisection tests."""
+
+from types import SimpleNamespace
+
+import pytest
+from requests.exceptions import ReadTimeout
+from web3 import Web3, EthereumTesterProvider
+
+from eth_defi.event_reader.multicall_batch_size import AdaptiveBatchSizeController, classify_multicall_failure
+from eth_defi.event_reader.multicall_batcher import BISECT_FAILURES, MulticallRetryable, MultiprocessMulticallReader
+
+
+POISON_ADDRESS = "0x000000000000000000000000000000000000dEaD"
+
+
+class FakeMulticall:
+    """Mimic Multicall3 where one call burns all gas of the whole batch."""
+
+    def __init__(self):
+        self.rpc_calls = 0
+        self.functions = SimpleNamespace(tryBlockAndAggregate=self._try_block_and_aggregate)
+
+    def _try_block_and_aggregate(self, calls: list, requireSuccess: bool):
+        def _call(tx: dict, block_identifier: int):
+            self.rpc_calls += 1
+            if any(address == POISON_ADDRESS for address, data in calls):
+                raise ValueError({"message": "out of gas", "code": -32000})
+            return block_identifier, b"", [(True, data) for address, data in calls]
+
+        return SimpleNamespace(call=_call)
+
+
+@pytest.fixture()
+def reader() -> MultiprocessMulticallReader:
+    web3 = Web3(EthereumTesterProvider())
+    return MultiprocessMulticallReader(web3, bisect_failures=True, quarantine_blocks=100)
+
+
+def test_multicall_bisect_poison_call(reader: MultiprocessMulticallReader):
+    """Isolate a broken call and still get results for the healthy calls."""
+
+    healthy = [(Web3.to_checksum_address(f"0x{i:040x}"), i.to_bytes(4, "big")) for i in range(1, 16)]
+    encoded_calls = healthy[0:7] + [(POISON_ADDRESS, b"\xff")] + healthy[7:]
+
+    multicall = FakeMulticall()
+    results = reader.call_multicall_with_batch_size(
+        multicall,
+        block_identifier=1_000,
+        batch_size=40,
+        encoded_calls=encoded_calls,
+        require_multicall_result=False,
+    )
+
+    assert len(results) == 16
+    assert results[7] == (False, b"")
+    assert [r for idx, r in enumerate(results) if idx != 7] == [(True, data) for address, data in healthy]
+
+    # One full batch + log2(16) * 2 halves
+    assert multicall.rpc_calls == 1 + 4 * 2
+
+    assert reader.is_quarantined(POISON_ADDRESS, b"\xff", 1_050)
+    assert not reader.is_quarantined(POISON_ADDRESS, b"\xff", 1_200)
+    assert not reader.is_quarantined(healthy[0][0], healthy[0][1], 1_000)
+
+    entry = reader.quarantine[(POISON_ADDRESS, b"\xff")]
+    assert entry.failure_count == 1
+    assert "out of gas" in entry.reason
+
+
+def test_multicall_bisect_timeout_not_quarantined(reader: MultiprocessMulticallReader):
+    """Transport timeouts are retried, not bisected and quarantined."""
+
+    class TimeoutMulticall(FakeMulticall):
+        def _try_block_and_aggregate(self, calls: list, requireSuccess: bool):
+            def _call(tx: dict, block_identifier: int):
+                self.rpc_calls += 1
+                raise ReadTimeout("Read timed out")
+
+            return SimpleNamespace(call=_call)
+
+    assert classify_multicall_failure(ReadTimeout("Read timed out")) not in BISECT_FAILURES
+
+    encoded_calls = [(Web3.to_checksum_address(f"0x{i:040x}"), i.to_bytes(4, "big")) for i in range(1, 9)]
+    multicall = TimeoutMulticall()
+    with pytest.raises(MulticallRetryable):
+        reader.bisect_multicall(multicall, 1_000, encoded_calls, {}, "out of gas")
+
+    assert multicall.rpc_calls == 1
+    assert reader.quarantine == {}
+
+
+@pytest.mark.parametrize("error", [{"message": "out of gas", "code": -32000}, {"message": "execution reverted", "code": 3}])
+def test_multicall_bisect_does_not_shrink_batch_size(tmp_path, error: dict):
+    """A single broken call is bisected and does not shrink the shared batch size of other workers."""
+
+    class BrokenMulticall(FakeMulticall):
+        def _try_block_and_aggregate(self, calls: list, requireSuccess: bool):
+            def _call(tx: dict, block_identifier: int):
+                self.rpc_calls += 1
+                if any(address == POISON_ADDRESS for address, data in calls):
+                    raise ValueError(error)
+                return block_identifier, b"", [(True, data) for address, data in calls]
+
+            return SimpleNamespace(call=_call)
+
+    state_file = tmp_path / "batch-size.pickle"
+    controller = AdaptiveBatchSizeController(state_file=state_file, save_interval=0)
+    reader = MultiprocessMulticallReader(Web3(EthereumTesterProvider()), bisect_failures=True, batch_size_controller=controller)
+    chain_id = reader.web3.eth.chain_id
+    provider_name = reader.get_active_provider_name()
+    batch_size = controller.get_batch_size(chain_id, provider_name, default_batch_size=16)
+
+    healthy = [(Web3.to_checksum_address(f"0x{i:040x}"), i.to_bytes(4, "big")) for i in range(1, 16)]
+    results = reader.call_multicall_with_batch_size(
+        BrokenMulticall(),
+        block_identifier=1_000,
+        batch_size=batch_size,
+        encoded_calls=healthy[0:7] + [(POISON_ADDRESS, b"\xff")] + healthy[7:],
+        require_multicall_result=False,
+    )
+
+    assert results[7] == (False, b"")
+    assert reader.is_quarantined(POISON_ADDRESS, b"\xff", 1_000)
+    assert controller.get_batch_size(chain_id, provider_name, default_batch_size=1) == batch_size
+    # Nothing smaller was persisted for other workers
+    assert AdaptiveBatchSizeController(state_file=state_file).get_batch_size(chain_id, provider_name, default_batch_size=batch_size) == batch_size
@@ -0,0 +1,249 @@
+"""Asyncio event and multicall reader.
+
+- Offline tests run against a fake JSON-RPC server
+- Mainnet tests need ``JSON_RPC_ETHEREUM``
+"""
+
+import asyncio
+import os
+import threading
+
+import pytest
+import ujson
+from aiohttp import web
+from eth_abi import decode, encode
+from web3 import Web3
+
+from eth_defi.abi import get_contract
+from eth_defi.event_reader.async_reader import TRY_BLOCK_AND_AGGREGATE_SELECTOR, AsyncJSONRPCClient, _ordered_in_flight, read_events_async, read_events_asyncio, read_multicall_historical_async, read_multicall_historical_asyncio, run_async_iterator
+from eth_defi.event_reader.multicall_batcher import EncodedCall, MulticallNonRetryable, MulticallRetryable
+
+JSON_RPC_ETHEREUM = os.environ.get("JSON_RPC_ETHEREUM")
+
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+BROKEN_ADDRESS = "0x" + "dd" * 20
+
+
+class FakeNode:
+    """Fake JSON-RPC node.
+
+    - Every block has one Sync event
+    - Multicall returns the call data as the result
+    """
+
+    def __init__(self, fail_first: int = 0):
+        self.fail_first = fail_first
+        self.broken_error = {"code": 3, "message": "execution reverted"}
+        self.requests = 0
+        self.calls = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.requests <= self.fail_first:
+            return web.Response(status=503)
+
+        payload = ujson.loads(await request.read())
+        method, params = payload["method"], payload["params"]
+        self.calls.append(method)
+
+        if method == "eth_getLogs":
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            result = [
+                {
+                    "address": "0x" + "aa" * 20,
+                    "topics": [SYNC_TOPIC],
+                    "data": "0x",
+                    "blockNumber": hex(b),
+                    "blockHash": f"0x{b:064x}",
+                    "transactionHash": f"0x{b:064x}",
+                    "logIndex": "0x0",
+                }
+                for b in range(start, end + 1)
+            ]
+        elif method == "eth_getBlockByNumber":
+            b = int(params[0], 16)
+            result = {"number": params[0], "hash": f"0x{b:064x}", "timestamp": hex(1_700_000_000 + b * 12)}
+        elif method == "eth_call":
+            data = bytes.fromhex(params[0]["data"][2:])
+            assert data[0:4] == TRY_BLOCK_AND_AGGREGATE_SELECTOR
+            _, calls = decode(["bool", "(address,bytes)[]"], data[4:])
+            if any(address == BROKEN_ADDRESS for address, _ in calls):
+                return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "error": self.broken_error})
+            block_number = int(params[1], 16)
+            outputs = [(True, call_data) for _, call_data in calls]
+            result = "0x" + encode(["uint256", "bytes32", "(bool,bytes)[]"], [block_number, b"\x00" * 32, outputs]).hex()
+        else:
+            raise NotImplementedError(method)
+
+        return web.json_response({"jsonrpc": "2.0", "id": payload["id"], "result": result})
+
+
+@pytest.fixture()
+def fake_node() -> FakeNode:
+    return FakeNode()
+
+
+@pytest.fixture()
+def fake_node_url(fake_node):
+    """Run the fake node in a background event loop."""
+    app = web.Application()
+    app.router.add_post("/", fake_node.handle)
+
+    async def _start():
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return runner, port
+
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    runner, port = asyncio.run_coroutine_threadsafe(_start(), loop).result()
+    yield f"http://127.0.0.1:{port}/"
+    asyncio.run_coroutine_threadsafe(runner.cleanup(), loop).result()
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def test_read_events_asyncio(fake_node_url, fake_node: FakeNode):
+    """Read events in block order with timestamps."""
+    Pair = get_contract(Web3(), "sushi/UniswapV2Pair.json")
+
+    logs = list(
+        read_events_asyncio(
+            fake_node_url,
+            start_block=1,
+            end_block=95,
+            events=[Pair.events.Sync],
+            chunk_size=10,
+            max_concurrency=4,
+        )
+    )
+
+    assert [log["blockNumber"] for log in logs] == list(range(1, 96))
+    assert logs[0]["timestamp"] == 1_700_000_012
+    assert logs[0]["event"].event_name == "Sync"
+    assert logs[-1]["chunk_id"] == 91
+    assert fake_node.calls.count("eth_getLogs") == 10
+
+
+def test_read_events_asyncio_retry(fake_node_url, fake_node: FakeNode):
+    """Recover from HTTP 503."""
+    Pair = get_contract(Web3(), "sushi/UniswapV2Pair.json")
+    fake_node.fail_first = 2
+
+    async def _gen():
+        async with AsyncJSONRPCClient(fake_node_url, sleep=0.01) as client:
+            async for log in read_events_async(client, 1, 5, events=[Pair.events.Sync], extract_timestamps=False):
+                yield log
+            assert client.retry_count == 2
+
+    logs = list(run_async_iterator(_gen))
+    assert len(logs) == 5
+    assert logs[0]["timestamp"] is None
+
+
+def test_ordered_in_flight_early_exit():
+    """Tasks still in flight are cancelled and awaited when the reader stops early."""
+    finished = []
+
+    async def _job(i: int):
+        try:
+            await asyncio.sleep(0.01 * i)
+            return i
+        finally:
+            finished.append(i)
+
+    async def _read_first():
+        results = _ordered_in_flight((_job(i) for i in range(10)), max_in_flight=4)
+        first = await anext(results)
+        await results.aclose()
+        # Tasks 1 - 3 were scheduled and have completed their cancellation
+        assert sorted(finished) == [0, 1, 2, 3]
+        return first
+
+    assert asyncio.run(_read_first()) == 0
+
+
+def test_read_multicall_historical_asyncio(fake_node_url):
+    """Multicall results in the block order, with broken calls isolated."""
+    calls = [EncodedCall.from_keccak_signature(address="0x" + f"{i:040x}", signature=bytes(4), function="test", data=i.to_bytes(32, "big"), extra_data=None) for i in range(1, 11)]
+    broken = EncodedCall.from_keccak_signature(address=BROKEN_ADDRESS, signature=bytes(4), function="broken", data=b"", extra_data=None)
+
+    results = list(
+        read_multicall_historical_asyncio(
+            1,
+            fake_node_url,
+            calls + [broken],
+            start_block=20_000_000,
+            end_block=20_000_010,
+            step=2,
+            batch_size=4,
+            display_progress=False,
+            bisect_failures=True,
+        )
+    )
+
+    assert [r.block_number for r in results] == list(range(20_000_000, 20_000_010, 2))
+    first = results[0]
+    assert len(first.results) == 11
+    assert first.results[0].result == bytes(4) + (1).to_bytes(32, "big")
+    assert first.results[9].success
+    assert not first.results[10].success
+    assert first.results[10].quarantined
+    assert first.timestamp.year == 2031
+
+    with pytest.raises(MulticallNonRetryable):
+        list(read_multicall_historical_asyncio(1, fake_node_url, [broken], 20_000_000, 20_000_001, 1, display_progress=False))
+
+
+def _read_one_block(url: str, calls: list[EncodedCall]) -> list:
+    async def _gen():
+        async with AsyncJSONRPCClient(url, sleep=0.01, retries=2) as client:
+            async for result in read_multicall_historical_async(client, 1, calls, 20_000_000, 20_000_001, 1, batch_size=4, bisect_failures=True):
+                yield result
+
+    return list(run_async_iterator(_gen))
+
+
+def test_multicall_bisect_without_retries(fake_node_url, fake_node: FakeNode):
+    """EVM failures are bisected right away, node errors are retried and never bisected."""
+    calls = [EncodedCall.from_keccak_signature(address="0x" + f"{i:040x}", signature=bytes(4), function="test", data=i.to_bytes(32, "big"), extra_data=None) for i in range(1, 4)]
+    broken = EncodedCall.from_keccak_signature(address=BROKEN_ADDRESS, signature=bytes(4), function="broken", data=b"", extra_data=None)
+
+    # -32603 is retryable, but out of gas fails the same way on every retry
+    fake_node.broken_error = {"code": -32603, "message": "out of gas"}
+    results = _read_one_block(fake_node_url, calls + [broken])
+    assert results[0].results[3].quarantined
+    # Header + full batch + 2 halves + 2 quarters, no retries
+    assert fake_node.requests == 1 + 1 + 2 + 2
+
+    # Node error is retried with the full batch, then given up
+    fake_node.requests = 0
+    fake_node.broken_error = {"code": -32603, "message": "Internal JSON-RPC error."}
+    with pytest.raises(MulticallRetryable):
+        _read_one_block(fake_node_url, calls + [broken])
+    assert fake_node.calls[-3:] == ["eth_call"] * 3
+    assert fake_node.requests == 1 + 3
+
+
+@pytest.mark.skipif(JSON_RPC_ETHEREUM is None, reason="Set JSON_RPC_ETHEREUM environment variable to Ethereum mainnet node to run this test")
+def test_read_events_asyncio_mainnet():
+    """Read the first Uniswap v2 pairs."""
+    Factory = get_contract(Web3(), "sushi/UniswapV2Factory.json")
+
+    logs = list(
+        read_events_asyncio(
+            JSON_RPC_ETHEREUM,
+            10_000_835,
+            10_009_000,
+            events=[Factory.events.PairCreated],
+            chunk_size=100,
+        )
+    )
+
+    assert len(logs) == 2
+    assert logs[0]["transactionHash"] == "0xd07cbde817318492092cc7a27b3064a69bd893c01cb593d6029683ffd290ab3a"
+    assert logs[1]["transactionHash"] == "0xb0621ca74cee9f540dda6d575f6a7b876133b42684c1259aaeb59c831410ccb2"
@@ -0,0 +1,98 @@
+"""Whole-batch JSON-RPC errors."""
+
+from web3 import Web3
+from web3.providers import BaseProvider
+
+from eth_defi.event_reader.fast_json_rpc import is_batch_too_large_error, make_batch_request
+from eth_defi.event_reader.reader import extract_timestamps_json_rpc
+from eth_defi.provider.fallback import FallbackProvider
+
+
+class FakeBatchNode(BaseProvider):
+    """Serve block headers, reject batches with a canned error."""
+
+    def __init__(self, batch_error: dict | None = None, max_batch_size: int = 1_000):
+        super().__init__()
+        self.batch_error = batch_error
+        self.max_batch_size = max_batch_size
+        self.batches = []
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+        assert method == "eth_getBlockByNumber"
+        block_number = int(params[0], 16)
+        return {"jsonrpc": "2.0", "id": 1, "result": {"number": params[0], "hash": f"0x{block_number:064x}", "timestamp": hex(1_700_000_000 + block_number)}}
+
+    def make_batch_request(self, batch_requests):
+        self.batches.append(len(batch_requests))
+        if self.batch_error is not None:
+            return {"jsonrpc": "2.0", "id": None, "error": self.batch_error}
+        if len(batch_requests) > self.max_batch_size:
+            return {"jsonrpc": "2.0", "id": None, "error": {"code": -32600, "message": "batch too large"}}
+        return [self.make_request(method, params) for method, params in batch_requests]
+
+
+def _get_headers(count: int) -> list:
+    return [("eth_getBlockByNumber", (hex(n), False)) for n in range(1, count + 1)]
+
+
+def test_batch_too_large_error():
+    assert is_batch_too_large_error(ValueError({"code": -32600, "message": "batch too large"}))
+    assert is_batch_too_large_error(ValueError({"code": -32600, "message": "batch limit 100 exceeded"}))
+    assert not is_batch_too_large_error(ValueError({"code": 429, "message": "Too many requests"}))
+
+
+def test_fallback_batch_size_only_lowered_on_size_errors():
+    """Rate limited batches are sent one by one, batch size errors split the batch."""
+    node = FakeBatchNode(batch_error={"code": 429, "message": "Too many requests"})
+    fallback_provider = FallbackProvider([node], sleep=0, retries=1)
+    responses = fallback_provider.make_batch_request(_get_headers(10))
+    assert [int(r["result"]["number"], 16) for r in responses] == list(range(1, 11))
+    assert fallback_provider.get_batch_size() == 100
+    assert node.batches == [10]
+    assert node.calls.count("eth_getBlockByNumber") == 10
+
+    node = FakeBatchNode(max_batch_size=4)
+    fallback_provider = FallbackProvider([node], sleep=0, retries=1)
+    responses = fallback_provider.make_batch_request(_get_headers(8))
+    assert len(responses) == 8
+    # 100 -> 4
+    assert node.batches == [8, 4, 4]
+    assert fallback_provider.get_batch_size() == 4
+    assert fallback_provider.max_batch_size == 100
+
+
+def test_fallback_batch_size_grows_back():
+    """A lowered batch size grows back by one after full size batches."""
+    node = FakeBatchNode(max_batch_size=4)
+    fallback_provider = FallbackProvider([node], sleep=0, retries=1, max_batch_size=6)
+    fallback_provider.make_batch_request(_get_headers(8))
+    assert node.batches == [6, 3, 3, 2]
+    assert fallback_provider.get_batch_size() == 3
+
+    # The limit was transient
+    node.max_batch_size = 1_000
+    node.batches = []
+    grow_after = FallbackProvider.BATCH_GROW_AFTER
+    # The two full batches of 3 above count towards growing
+    expected_batches = [3] * (grow_after - 2) + [4] * grow_after + [5] * grow_after + [6]
+    responses = fallback_provider.make_batch_request(_get_headers(sum(expected_batches)))
+    assert len(responses) == sum(expected_batches)
+    assert node.batches == expected_batches
+    assert fallback_provider.get_batch_size() == 6
+    assert fallback_provider.batch_size_limits == {}
+
+
+def test_batch_request_falls_back_to_single_calls():
+    """Without FallbackProvider, a failed batch goes through the middlewares one call at a time."""
+    node = FakeBatchNode(batch_error={"code": 429, "message": "Too many requests"})
+    web3 = Web3(node)
+    responses = make_batch_request(web3, _get_headers(5))
+    assert [int(r["result"]["number"], 16) for r in responses] == list(range(1, 6))
+    assert node.batches == [5]
+
+    timestamps = extract_timestamps_json_rpc(web3, 1, 5)
+    assert timestamps[f"0x{3:064x}"] == 1_700_000_003
@@ -0,0 +1,73 @@
+"""Block timestamp interpolation tests."""
+
+import datetime
+from pathlib import Path
+
+import pytest
+
+from eth_defi.event_reader.timestamp_estimator import BlockTimeBounds, BlockTimestampEstimator
+from eth_defi.event_reader.timestamp_store import BlockTimestampStore
+from eth_defi.utils import from_unix_timestamp
+
+
+def _fixed_block_time_chain(block_number: int) -> int:
+    """2 seconds blocks."""
+    return 1_700_000_000 + block_number * 2
+
+
+def _missed_slots_chain(block_number: int) -> int:
+    """12 seconds slots, with a missed slot after block 500."""
+    return 1_700_000_000 + block_number * 12 + (12 if block_number > 500 else 0)
+
+
+def test_estimate_between_anchors():
+    """Interpolate and bound the error from monotonic timestamps only."""
+    estimator = BlockTimestampEstimator(chain_id=999, bounds=BlockTimeBounds())
+    estimator.add_anchor(100, 1_000)
+    estimator.add_anchor(200, datetime.datetime(1970, 1, 1, 0, 33, 20))
+
+    assert estimator.estimate(100).exact
+    estimate = estimator.estimate(150)
+    assert estimate.timestamp == 1_500
+    assert estimate.error == 500
+
+    # Outside the anchor range we cannot promise anything
+    assert estimator.estimate(300).timestamp == 3_000
+    assert estimator.estimate(300).error == float("inf")
+
+
+def test_resolve_fixed_block_time(tmp_path: Path):
+    """Two anchors pin down all blocks on a chain with fixed block time."""
+    store = BlockTimestampStore(tmp_path)
+    estimator = BlockTimestampEstimator(chain_id=8453, timestamp_store=store)
+
+    def _fetcher(block_numbers: list[int]) -> dict[int, int]:
+        return {b: _fixed_block_time_chain(b) for b in block_numbers}
+
+    blocks = range(1_000, 44_200, 1_800)
+    result = estimator.resolve(None, blocks, max_error=0, fetcher=_fetcher)
+
+    assert len(result) == len(blocks)
+    assert all(result[b] == from_unix_timestamp(_fixed_block_time_chain(b)) for b in blocks)
+    assert estimator.fetch_count == 2
+
+    # Fetched anchors were persisted
+    assert store.get_timestamp(8453, 1_000) == _fixed_block_time_chain(1_000)
+
+
+@pytest.mark.parametrize("max_error", [0, 12])
+def test_resolve_missed_slots(max_error: float):
+    """Fetch only the blocks around a missed slot."""
+    estimator = BlockTimestampEstimator(chain_id=1, bounds=BlockTimeBounds(min_block_time=12))
+
+    def _fetcher(block_numbers: list[int]) -> dict[int, int]:
+        return {b: _missed_slots_chain(b) for b in block_numbers}
+
+    blocks = range(0, 1_001, 10)
+    result = estimator.resolve(None, blocks, max_error=max_error, fetcher=_fetcher)
+
+    for b in blocks:
+        error = abs((result[b] - from_unix_timestamp(_missed_slots_chain(b))).total_seconds())
+        assert error <= max_error
+
+    assert estimator.fetch_count < len(blocks) / 5
@@ -0,0 +1,59 @@
+"""Persistent block timestamp store tests."""
+
+import datetime
+import pickle
+from pathlib import Path
+
+from eth_defi.event_reader.timestamp_store import BlockTimestampStore, open_timestamp_store
+
+
+def test_block_timestamp_store_add_and_read(tmp_path: Path):
+    """Write timestamps, read them back from another store instance and compact."""
+
+    store = BlockTimestampStore(tmp_path, compact_threshold=1_000_000)
+    store.add(1, 100, 1_700_000_000)
+    store.add_many(1, {101: 1_700_000_012, 99: datetime.datetime(2023, 11, 14, 22, 13, 8)})
+    store.add(5000, 100, 1_600_000_000)
+
+    # Pending writes are visible to the writer before flush
+    assert store.get_timestamp(1, 100) == 1_700_000_000
+    store.flush()
+
+    # Another process sees the log without compaction
+    reader = BlockTimestampStore(tmp_path)
+    assert reader.get_timestamp(1, 99) == 1_699_999_988
+    assert reader.get_timestamp(1, 101) == 1_700_000_012
+    assert reader.get_timestamp(1, 102) is None
+    assert reader.get_timestamp(5000, 100) == 1_600_000_000
+    assert reader.get(1, 100) == datetime.datetime(2023, 11, 14, 22, 13, 20)
+    assert reader.get_count(1) == 3
+
+    # Merge the log to the sorted file
+    store.compact(1)
+    assert store.get_log_path(1).stat().st_size == 0
+    assert store.get_main_path(1).exists()
+
+    store.add(1, 102, 1_700_000_024)
+    store.flush(1)
+
+    result = reader.get_many(1, range(99, 104))
+    assert list(result.keys()) == [99, 100, 101, 102]
+    assert result[102] == datetime.datetime(2023, 11, 14, 22, 13, 44)
+
+    reader.close()
+    store.close()
+
+
+def test_block_timestamp_store_legacy_pickle(tmp_path: Path):
+    """Migrate the old pickle cache on the first open."""
+
+    legacy = tmp_path / "block-timestamps.pickle"
+    data = {1: {i: datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=12 * i) for i in range(1, 11)}}
+    with legacy.open("wb") as f:
+        pickle.dump(data, f)
+
+    store = open_timestamp_store(legacy)
+    assert store.path == tmp_path / "block-timestamps"
+    assert store.get_count(1) == 10
+    assert store.get(1, 10) == datetime.datetime(2024, 1, 1, 0, 2)
+    store.close()
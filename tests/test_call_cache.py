@@ -0,0 +1,77 @@
+"""Persistent eth_call cache."""
+
+import pickle
+from pathlib import Path
+from types import SimpleNamespace
+
+from hexbytes import HexBytes
+from web3 import Web3
+
+from eth_defi.event_reader.call_cache import CallCache
+from eth_defi.event_reader.multicall_batcher import EncodedCall
+
+
+class FakeEth:
+    """Answer eth_call with the block number, chain tip at 1,000."""
+
+    chain_id = 1
+    block_number = 1_000
+
+    def __init__(self):
+        self.calls = 0
+
+    def call(self, transaction, block_identifier):
+        self.calls += 1
+        number = self.block_number if block_identifier == "latest" else block_identifier
+        return HexBytes(number.to_bytes(32, "big"))
+
+
+def test_encoded_call_cache(tmp_path: Path):
+    """Finalised block results are served from the cache, the chain tip is not cached."""
+    web3 = SimpleNamespace(eth=FakeEth())
+    call_cache = CallCache(tmp_path / "calls.sqlite", finality_depth=10)
+
+    call = EncodedCall.from_keccak_signature(
+        address="0x" + "aa" * 20,
+        signature=Web3.keccak(text="totalSupply()")[0:4],
+        function="totalSupply",
+        data=b"",
+        extra_data=None,
+    )
+
+    first = call.call(web3, block_identifier=900, cache=call_cache)
+    assert int.from_bytes(first, "big") == 900
+    assert call_cache.misses == 1
+    assert len(call_cache) == 1
+
+    second = call.call(web3, block_identifier=900, cache=call_cache)
+    assert second == first
+    assert call_cache.hits == 1
+    assert web3.eth.calls == 1
+
+    # Latest and unfinalised blocks are always fetched
+    call.call(web3, block_identifier="latest", cache=call_cache)
+    call.call(web3, block_identifier=995, cache=call_cache)
+    call.call(web3, block_identifier=995, cache=call_cache)
+    assert web3.eth.calls == 4
+    assert len(call_cache) == 1
+
+    # Another caller may get another answer
+    call.call(web3, block_identifier=900, cache=call_cache, from_="0x" + "bb" * 20)
+    assert web3.eth.calls == 5
+    assert len(call_cache) == 2
+
+    # Subprocess workers get their own connection to the same file
+    clone = pickle.loads(pickle.dumps(call_cache))
+    assert clone.finality_depth == 10
+    assert clone.get_result(1, call.address, call.data, 900) == bytes(first)
+    assert clone.get_result(1, call.address, call.data, 900, from_="0x" + "cc" * 20) is None
+
+
+def test_call_cache_eviction(tmp_path: Path):
+    call_cache = CallCache(tmp_path / "calls.sqlite", max_entries=10, evict_interval=5)
+    for block in range(20):
+        call_cache.set_result(1, "0x" + "aa" * 20, b"\x01", block, block.to_bytes(32, "big"))
+    assert len(call_cache) <= 10
+    assert call_cache.get_result(1, "0x" + "aa" * 20, b"\x01", 19) == (19).to_bytes(32, "big")
+    assert call_cache.get_result(1, "0x" + "aa" * 20, b"\x01", 1) is None
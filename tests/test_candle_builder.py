@@ -0,0 +1,65 @@
+"""Streaming OHLCV candle builder tests."""
+
+import datetime
+from decimal import Decimal
+
+from eth_defi.event_reader.reorganisation_monitor import ChainReorganisationResolution
+from eth_defi.price_oracle.candle import CandleBuilder
+from eth_defi.price_oracle.oracle import PriceEntry, PriceSource
+
+START = datetime.datetime(2024, 1, 1)
+
+
+def _block_time(block_number: int) -> datetime.datetime:
+    """One block per 12 seconds."""
+    return START + datetime.timedelta(seconds=12 * block_number)
+
+
+def test_candle_builder_close_and_reorg():
+    """Emit closed candles and correct them after a fork."""
+    builder = CandleBuilder(time_frame=datetime.timedelta(minutes=1), finality_blocks=20)
+
+    # 5 blocks per candle, one trade per block per pair
+    emitted = []
+    for block in range(0, 12):
+        for pair, base in (("0xaaa", 100), ("0xbbb", 10)):
+            entry = PriceEntry(
+                timestamp=_block_time(block),
+                price=Decimal(base + block),
+                volume=Decimal(1),
+                source=PriceSource.unknown,
+                pool_contract_address=pair,
+                block_number=block,
+            )
+            assert builder.add_price_entry(entry) == []
+        emitted += builder.update_block(block, _block_time(block))
+
+    # Candles for 00:00 and 00:01 are closed, 00:02 is still open
+    assert [(c.pair, c.timestamp.minute) for c in emitted] == [("0xaaa", 0), ("0xbbb", 0), ("0xaaa", 1), ("0xbbb", 1)]
+    first = emitted[0]
+    assert (first.open, first.high, first.low, first.close, first.volume, first.trades) == (100, 104, 100, 104, 5, 5)
+    assert first.closed and first.revision == 0
+
+    open_candles = list(builder.get_open_candles("0xaaa"))
+    assert len(open_candles) == 1
+    assert open_candles[0].trades == 2
+
+    # Fork from block 8 onwards
+    corrected = builder.apply_chain_resolution(ChainReorganisationResolution(last_live_block=11, latest_block_with_good_data=7, reorg_detected=True))
+    assert [(c.pair, c.timestamp.minute, c.trades, c.revision) for c in corrected] == [("0xaaa", 1, 3, 1), ("0xbbb", 1, 3, 1)]
+    assert corrected[0].high == 107
+    assert corrected[0].close == 107
+    assert list(builder.get_open_candles()) == []
+
+    # The new fork has a different price at block 8
+    entry = PriceEntry(timestamp=_block_time(8), price=Decimal(50), volume=Decimal(2), source=PriceSource.unknown, pool_contract_address="0xaaa", block_number=8)
+    late = builder.add_price_entry(entry)
+    assert len(late) == 1
+    assert (late[0].low, late[0].close, late[0].volume, late[0].revision) == (50, 50, 5, 2)
+
+    # Old closed candles are forgotten after the finality depth
+    builder.update_block(100, _block_time(100))
+    assert len(builder.candles) == 0
+    entry = PriceEntry(timestamp=_block_time(1), price=Decimal(1), source=PriceSource.unknown, pool_contract_address="0xaaa", block_number=1)
+    assert builder.add_price_entry(entry) == []
+    assert builder.dropped_trades == 1
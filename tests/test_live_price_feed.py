@@ -0,0 +1,123 @@
+"""Shared multi-pool live price feed tests.
+
+- Run offline against a mock chain and patched event reader
+"""
+
+import datetime
+from decimal import Decimal
+
+from web3 import Web3
+
+import eth_defi.price_oracle.live_feed as live_feed
+from eth_defi.abi import get_contract
+from eth_defi.compat import native_datetime_utc_fromtimestamp
+from eth_defi.event_reader.reorganisation_monitor import MockChainAndReorganisationMonitor
+from eth_defi.price_oracle.candle import CandleBuilder
+from eth_defi.price_oracle.live_feed import LiveFeedPool, SharedLivePriceFeed
+from eth_defi.price_oracle.oracle import PriceEntry, PriceOracle, PriceSource, time_weighted_average_price
+
+POOL_A = "0x" + "aa" * 20
+POOL_B = "0x" + "bb" * 20
+POOL_C = "0x" + "cc" * 20
+
+
+def _convert(log: dict) -> PriceEntry:
+    return PriceEntry(
+        timestamp=native_datetime_utc_fromtimestamp(log["timestamp"]),
+        price=Decimal(log["data"]),
+        volume=Decimal(1),
+        source=PriceSource.uniswap_v2_like_pool_sync_event,
+        pool_contract_address=log["address"],
+        block_number=log["blockNumber"],
+        tx_hash=log["transactionHash"],
+        block_hash=log["blockHash"],
+    )
+
+
+def test_shared_live_price_feed(monkeypatch):
+    """One event read fans out to many oracles and survives a fork."""
+    web3 = Web3()
+    Pair = get_contract(web3, "sushi/UniswapV2Pair.json")
+    Pool = get_contract(web3, "uniswap_v3/UniswapV3Pool.json")
+    sync_topic = Pair.events.Sync.build_filter().topics[0]
+    swap_topic = Pool.events.Swap.build_filter().topics[0]
+
+    reorg_mon = MockChainAndReorganisationMonitor(block_duration_seconds=12, check_depth=5)
+    reorg_mon.produce_blocks(10)
+    reorg_mon.figure_reorganisation_and_new_blocks()
+
+    feed = SharedLivePriceFeed(
+        web3,
+        reorg_mon=reorg_mon,
+        candle_builder=CandleBuilder(datetime.timedelta(minutes=1)),
+    )
+    for address, event in ((POOL_A, Pair.events.Sync), (POOL_B, Pair.events.Sync), (POOL_C, Pool.events.Swap)):
+        feed.add_pool(
+            LiveFeedPool(
+                address=address,
+                oracle=PriceOracle(time_weighted_average_price, min_duration=datetime.timedelta(0)),
+                event=event,
+                context=None,
+                converter=_convert,
+            )
+        )
+
+    # One filter for all pools
+    filter = feed.get_filter()
+    assert set(filter.contract_address) == {POOL_A, POOL_B, POOL_C}
+    assert set(filter.topics.keys()) == {sync_topic, swap_topic}
+
+    read_calls = []
+    # Blocks the node sends again before the requested range
+    overlap = 0
+
+    def _read_events(web3, start_block, end_block, filter, reorg_mon, **kwargs):
+        read_calls.append((start_block, end_block))
+        for block_number in range(start_block - overlap, end_block + 1):
+            header = reorg_mon.get_block_by_number(block_number)
+            for address, topic, price in ((POOL_A, sync_topic, 100), (POOL_B, sync_topic, 10), (POOL_C, swap_topic, 1), (POOL_A, swap_topic, 999)):
+                yield {
+                    "address": Web3.to_checksum_address(address),
+                    "topics": [topic],
+                    "data": str(price + block_number),
+                    "blockNumber": block_number,
+                    "blockHash": header.block_hash,
+                    "transactionHash": f"{address}-{block_number}",
+                    "timestamp": header.timestamp,
+                    "context": None,
+                }
+
+    monkeypatch.setattr(live_feed, "read_events", _read_events)
+
+    reorg_mon.produce_blocks(5)
+    stats = feed.update()
+    assert read_calls == [(11, 15)]
+    # Pool A Swap events do not match its Sync subscription
+    assert stats["created"] == 15
+    assert stats["duplicates"] == 0
+    assert stats["chain_reorgs"] == 0
+    assert len(feed.get_oracle(POOL_A).buffer) == 5
+    assert feed.get_oracle(POOL_A).get_newest().price == Decimal(115)
+    assert feed.get_oracle(POOL_B).get_newest().price == Decimal(25)
+    assert feed.get_oracle(POOL_C).last_refreshed_block_number == 15
+
+    # Fork at block 14, transactions hop to new blocks
+    reorg_mon.produce_fork(14)
+    reorg_mon.produce_fork(15)
+    reorg_mon.produce_blocks(1)
+    stats = feed.update()
+    assert stats["chain_reorgs"] == 1
+    assert read_calls[-1] == (14, 16)
+    assert stats["reorgs"] == 6
+    assert stats["created"] == 3
+    assert feed.get_oracle(POOL_A).get_by_transaction_hash(f"{POOL_A}-15").block_hash == "0x8888"
+
+    # Already seen events are counted as duplicates, not created
+    overlap = 2
+    reorg_mon.produce_blocks(1)
+    stats = feed.update()
+    assert read_calls[-1] == (17, 17)
+    assert stats["created"] == 3
+    assert stats["duplicates"] == 6
+    assert stats["reorgs"] == 0
+    assert len(feed.get_oracle(POOL_A).buffer) == 7
@@ -0,0 +1,107 @@
+"""Disk-backed eth_getLogs cache."""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+from web3 import Web3
+
+from eth_defi.abi import get_contract
+from eth_defi.event_reader.log_cache import LogCache, get_log_filter_key
+from eth_defi.event_reader.reader import prepare_filter, read_events
+
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+
+class FakeLogNode:
+    """One event every 10 blocks, chain tip at 10,000."""
+
+    def __init__(self):
+        self.calls = []
+
+    def request_blocking(self, method, params):
+        assert method == "eth_getLogs"
+        start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        self.calls.append((start, end))
+        return [
+            {
+                "address": "0x" + "aa" * 20,
+                "topics": [SYNC_TOPIC],
+                "data": "0x",
+                "blockNumber": hex(b),
+                "blockHash": f"0x{b:064x}",
+                "logIndex": "0x0",
+            }
+            for b in range(start, end + 1)
+            if b % 10 == 0
+        ]
+
+
+def test_log_filter_key():
+    assert get_log_filter_key(["0xAA", "0xbb"], [["0x2", "0x1"]]) == get_log_filter_key(["0xbb", "0xaa"], [["0x1", "0x2"]])
+    assert get_log_filter_key("0xaa", [["0x1"]]) != get_log_filter_key("0xaa", [["0x2"]])
+
+
+def test_read_events_log_cache(tmp_path: Path):
+    """Rerun is served from the cache, only the unfinalised tail goes to RPC."""
+    Pair = get_contract(Web3(), "sushi/UniswapV2Pair.json")
+    filter = prepare_filter([Pair.events.Sync])
+
+    node = FakeLogNode()
+    web3 = SimpleNamespace(manager=node, eth=SimpleNamespace(block_number=10_000))
+    log_cache = LogCache(tmp_path / "logs.sqlite", chain_id=1, chunk_size=1_000, finality_depth=500)
+
+    def _read(start, end):
+        return [log["blockNumber"] for log in read_events(web3, start, end, filter=filter, extract_timestamps=None, chunk_size=3_000, log_cache=log_cache)]
+
+    first = _read(500, 9_999)
+    assert first == list(range(500, 10_000, 10))
+    # Read ranges 500 - 3,499, 3,500 - 6,499, 6,500 - 9,499 fully cover these final chunks
+    assert len(log_cache) == 6
+
+    # Partially covered chunks are fetched again, exactly over the asked blocks
+    node.calls = []
+    second = _read(500, 9_999)
+    assert second == first
+    assert node.calls == [(500, 999), (3_000, 3_499), (3_500, 3_999), (6_000, 6_499), (6_500, 6_999), (9_000, 9_499), (9_500, 9_999)]
+    assert len(log_cache) == 6
+
+    # Aligned reads store the rest of the final chunks
+    node.calls = []
+    assert _read(1_000, 9_999) == list(range(1_000, 10_000, 10))
+    assert node.calls == [(3_000, 3_999), (6_000, 6_999), (9_000, 9_999)]
+    assert len(log_cache) == 8
+
+    # Subrange sliced from the cached chunks
+    node.calls = []
+    assert _read(1_234, 2_345) == list(range(1_240, 2_346, 10))
+    assert node.calls == []
+
+    # Reopen from disk
+    log_cache.close()
+    log_cache = LogCache(tmp_path / "logs.sqlite", chain_id=1, chunk_size=1_000, finality_depth=500)
+    assert _read(1_000, 1_999) == list(range(1_000, 2_000, 10))
+    assert node.calls == []
+    assert log_cache.hit_blocks == 1_000
+
+
+def test_log_cache_respects_range_limit(tmp_path: Path):
+    """Ranges are not widened past what the provider accepts."""
+
+    class LimitedLogNode(FakeLogNode):
+        def request_blocking(self, method, params):
+            start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+            if end - start + 1 > 100:
+                raise ValueError({"code": -32005, "message": "query returned more than 10000 results"})
+            return super().request_blocking(method, params)
+
+    Pair = get_contract(Web3(), "sushi/UniswapV2Pair.json")
+    filter = prepare_filter([Pair.events.Sync])
+
+    node = LimitedLogNode()
+    web3 = SimpleNamespace(manager=node, eth=SimpleNamespace(block_number=10_000))
+    log_cache = LogCache(tmp_path / "logs.sqlite", chain_id=1, chunk_size=1_000, finality_depth=500)
+
+    logs = read_events(web3, 1_050, 1_449, filter=filter, extract_timestamps=None, chunk_size=100, log_cache=log_cache)
+    assert [log["blockNumber"] for log in logs] == list(range(1_050, 1_450, 10))
+    assert all(end - start + 1 <= 100 for start, end in node.calls)
+    assert len(log_cache) == 0
@@ -0,0 +1,126 @@
+"""Adaptive eth_getLogs range planning."""
+
+from types import SimpleNamespace
+
+from web3 import Web3
+
+from eth_defi.abi import get_contract
+from eth_defi.event_reader.reader import extract_events, prepare_filter, read_events
+from eth_defi.provider.log_block_range import AdaptiveLogRangePlanner, is_log_range_too_large_error
+
+SYNC_TOPIC = "0x1c411e9a96e071241c2f21f7726b17ae89e3cab4c78be50e062b03a9fffbbad1"
+
+
+class FakeLogNode:
+    """eth_getLogs with a 100 result limit.
+
+    - Blocks 5,000 - 5,999 have 10 events per block
+    - Other blocks have one event per 100 blocks
+    """
+
+    def __init__(self):
+        self.calls = []
+
+    def get_log_count(self, block: int) -> int:
+        if 5_000 <= block < 6_000:
+            return 10
+        return 1 if block % 100 == 0 else 0
+
+    def request_blocking(self, method, params):
+        assert method == "eth_getLogs"
+        start, end = int(params[0]["fromBlock"], 16), int(params[0]["toBlock"], 16)
+        self.calls.append((start, end))
+        logs = [
+            {
+                "address": "0x" + "aa" * 20,
+                "topics": [SYNC_TOPIC],
+                "data": "0x",
+                "blockNumber": hex(b),
+                "blockHash": f"0x{b:064x}",
+                "logIndex": hex(i),
+            }
+            for b in range(start, end + 1)
+            for i in range(self.get_log_count(b))
+        ]
+        if len(logs) > 100:
+            raise ValueError({"code": -32005, "message": "query returned more than 100 results"})
+        return logs
+
+
+def test_log_range_errors():
+    assert is_log_range_too_large_error(ValueError({"code": -32005, "message": "query returned more than 10000 results"}))
+    assert is_log_range_too_large_error(ValueError({"code": -32602, "message": "Log response size exceeded. this block range should work: [0x10, 0x20]"}))
+    assert not is_log_range_too_large_error(ValueError({"code": -32000, "message": "header not found"}))
+
+    # BSC is matched by code and the full message, rate limits are not range errors
+    assert is_log_range_too_large_error(ValueError({"code": -32005, "message": "limit exceeded"}))
+    assert not is_log_range_too_large_error(ValueError({"code": -32005, "message": "daily request limit exceeded"}))
+    assert not is_log_range_too_large_error(ValueError({"code": 429, "message": "rate limit exceeded"}))
+    assert not is_log_range_too_large_error(ValueError({"code": -32000, "message": "limit exceeded"}))
+
+    planner = AdaptiveLogRangePlanner(max_block_range=10_000)
+    error = ValueError({"code": -32602, "message": "Log response size exceeded. You can make eth_getLogs requests with up to a 2K block range. This block range should work: [0x0, 0x20]"})
+    assert planner.record_too_large(0, 5_000, error) == [(0, 0x20), (0x21, 5_000)]
+    assert planner.max_block_range == 2_000
+
+    assert planner.record_too_large(0, 5_000, ValueError("execution reverted")) is None
+
+
+def test_log_range_min_block_range_last_chunk():
+    """Dense last chunk is not widened past the end block by the minimum range."""
+    planner = AdaptiveLogRangePlanner(min_block_range=50, target_results=100, density={0: 1_000.0})
+    assert planner.get_chunk_end(0, 500) == 49
+    assert planner.get_chunk_end(480, 500) == 500
+    assert planner.plan(0, 120) == [(0, 49), (50, 99), (100, 120)]
+
+
+def test_read_events_adaptive_range():
+    """Dense blocks get split, sparse blocks get wide ranges, and the next run pre-plans the ranges."""
+    Pair = get_contract(Web3(), "sushi/UniswapV2Pair.json")
+    filter = prepare_filter([Pair.events.Sync])
+
+    node = FakeLogNode()
+    web3 = SimpleNamespace(manager=node)
+    planner = AdaptiveLogRangePlanner(max_block_range=4_000, target_results=50)
+
+    logs = list(read_events(web3, 1, 19_999, filter=filter, extract_timestamps=None, range_planner=planner))
+
+    expected = sum(node.get_log_count(b) for b in range(1, 20_000))
+    assert len(logs) == expected
+    assert [log["blockNumber"] for log in logs] == sorted(log["blockNumber"] for log in logs)
+    assert planner.max_results == 100
+    assert planner.split_count > 0
+
+    # Second run uses the learnt density and does not hit the limit
+    planner = AdaptiveLogRangePlanner.from_dict(planner.to_dict(), target_results=50)
+    node.calls = []
+    plan = planner.plan(1, 19_999)
+    assert all(end - start < 10 for start, end in plan if 5_000 <= start < 6_000)
+    assert max(end - start + 1 for start, end in plan) == 4_000
+
+    logs = list(read_events(web3, 1, 19_999, filter=filter, extract_timestamps=None, range_planner=planner))
+    assert len(logs) == expected
+    assert planner.split_count == 0
+
+
+class RateLimitedLogNode(FakeLogNode):
+    """Throttle the first eth_getLogs call."""
+
+    def request_blocking(self, method, params):
+        if not self.calls:
+            self.calls.append(None)
+            raise ValueError({"code": -32005, "message": "daily request limit exceeded"})
+        return super().request_blocking(method, params)
+
+
+def test_rate_limit_retried():
+    """Rate limit errors that look like the BSC range error are retried, not split."""
+    Pair = get_contract(Web3(), "sushi/UniswapV2Pair.json")
+    filter = prepare_filter([Pair.events.Sync])
+
+    node = RateLimitedLogNode()
+    web3 = SimpleNamespace(manager=node)
+
+    logs = list(extract_events(web3, 1, 1_000, filter, extract_timestamps=None, throttle_sleep=0))
+    assert len(logs) == 10
+    assert node.calls == [None, (1, 1_000)]
@@ -0,0 +1,121 @@
+"""Multi-block multicall reads with JSON-RPC batching."""
+
+import eth_abi
+from web3 import Web3
+from web3.providers import BaseProvider
+
+from eth_defi.event_reader.multicall_batcher import (
+    TRY_BLOCK_AND_AGGREGATE_SELECTOR,
+    EncodedCall,
+    MulticallHistoricalTask,
+    MultiprocessMulticallReader,
+    _execute_multi_block_multicall_subprocess,
+    _reader_instance,
+)
+from eth_defi.event_reader.web3factory import SimpleWeb3Factory
+
+
+class FakeMulticallNode(BaseProvider):
+    """Answer tryBlockAndAggregate with the block number for every call.
+
+    - Block 20,000,003 is broken for batches
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+        self.single_calls = []
+
+    def _answer(self, method, params):
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+
+        block_number = int(params[0], 16) if method == "eth_getBlockByNumber" else int(params[1], 16)
+        if method == "eth_getBlockByNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": {"number": params[0], "timestamp": hex(1_700_000_000 + block_number - 20_000_000)}}
+
+        assert method == "eth_call"
+        data = bytes.fromhex(params[0]["data"][2:])
+        assert data[0:4] == TRY_BLOCK_AND_AGGREGATE_SELECTOR
+        _, calls = eth_abi.decode(["bool", "(address,bytes)[]"], data[4:])
+        results = [(True, block_number.to_bytes(32, "big")) for _ in calls]
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x" + eth_abi.encode(["uint256", "bytes32", "(bool,bytes)[]"], [block_number, b"\x00" * 32, results]).hex()}
+
+    def make_request(self, method, params):
+        if method == "eth_call":
+            self.single_calls.append(int(params[1], 16))
+        return self._answer(method, params)
+
+    def make_batch_request(self, batch_requests):
+        self.batches.append(batch_requests)
+        responses = []
+        for method, params in batch_requests:
+            if method == "eth_call" and params[1] == hex(20_000_003):
+                responses.append({"jsonrpc": "2.0", "id": 1, "error": {"code": -32000, "message": "execution timeout"}})
+            else:
+                responses.append(self._answer(method, params))
+        return responses
+
+
+def test_multi_block_prefetch():
+    """Several blocks are read with one JSON-RPC batch, failed blocks fall back to single block calls."""
+    node = FakeMulticallNode()
+    web3 = Web3(node)
+    reader = MultiprocessMulticallReader(web3)
+
+    calls = [
+        EncodedCall.from_keccak_signature(
+            address=Web3.to_checksum_address("0x" + f"{i + 1:040x}"),
+            signature=Web3.keccak(text="totalSupply()")[0:4],
+            function="totalSupply",
+            data=b"",
+            extra_data=None,
+        )
+        for i in range(100)
+    ]
+    blocks = list(range(20_000_000, 20_000_005))
+
+    timestamps = reader.prefetch_multi_block([(b, calls) for b in blocks])
+    assert len(node.batches) == 1
+    # 5 headers + 5 blocks x 2 multicall batches of 60 calls
+    assert len(node.batches[0]) == 5 + 5 * 2
+    assert timestamps[20_000_002].timestamp() == 1_700_000_002
+    assert 20_000_003 not in reader.prefetched
+
+    for block_number in blocks:
+        results = list(reader.process_calls(block_number, calls, timestamp=timestamps[block_number]))
+        assert len(results) == 100
+        assert all(int.from_bytes(r.result, "big") == block_number for r in results)
+
+    # Only the failed block went through the per-block path
+    assert node.single_calls == [20_000_003, 20_000_003]
+
+    reader.clear_prefetched()
+    assert reader.prefetched == {}
+
+
+def test_multi_block_subprocess_task():
+    """Worker entrypoint returns one result per block, with timestamps from the same batch."""
+    node = FakeMulticallNode()
+    web3 = Web3(node)
+    calls = [
+        EncodedCall.from_keccak_signature(
+            address=Web3.to_checksum_address("0x" + f"{i + 1:040x}"),
+            signature=Web3.keccak(text="totalSupply()")[0:4],
+            function="totalSupply",
+            data=b"",
+            extra_data=None,
+        )
+        for i in range(10)
+    ]
+    tasks = [MulticallHistoricalTask(1, SimpleWeb3Factory(web3), b, calls) for b in (20_000_010, 20_000_020)]
+    try:
+        results = _execute_multi_block_multicall_subprocess(tasks)
+    finally:
+        _reader_instance.per_chain_readers.pop(1, None)
+
+    assert [r.block_number for r in results] == [20_000_010, 20_000_020]
+    assert results[1].timestamp.timestamp() == 1_700_000_020
+    assert all(int.from_bytes(c.result, "big") == 20_000_020 for c in results[1].results)
+    assert len(node.batches) == 1
+    assert node.single_calls == []
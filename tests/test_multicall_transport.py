@@ -0,0 +1,157 @@
+"""Packed task and result transport for multicall subprocess workers."""
+
+import datetime
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+from web3 import Web3
+
+from eth_defi.event_reader import multicall_batcher
+from eth_defi.event_reader.multicall_batcher import (
+    CompactEncodedCall,
+    EncodedCall,
+    MulticallCallSet,
+    PackedMulticallResult,
+    _prepare_call_set,
+    _unpack_multicall_result,
+    intern_call_metadata,
+)
+from eth_defi.event_reader.multicall_transport import PackedCallResults, load_call_set, pack_call_ids, register_call_set, release_call_set, unpack_call_ids
+from eth_defi.provider.multi_provider import MultiProviderWeb3Factory
+
+
+def _create_calls(count: int) -> list[EncodedCall]:
+    return [
+        EncodedCall.from_keccak_signature(
+            address="0x" + f"{i:040x}",
+            signature=Web3.keccak(text="totalSupply()")[0:4],
+            function="totalSupply",
+            data=b"",
+            extra_data=None,
+        )
+        for i in range(count)
+    ]
+
+
+def test_packed_call_results():
+    results = [
+        (7, True, (1).to_bytes(32, "big"), False),
+        (0, False, b"", True),
+        (3, True, b"", False),
+        (9, False, b"\x08\xc3\x79\xa0", False),
+    ]
+    packed = PackedCallResults.pack(results)
+    assert len(packed) == 4
+    assert list(packed.unpack()) == results
+    assert list(pickle.loads(pickle.dumps(packed)).unpack()) == results
+
+    assert list(unpack_call_ids(pack_call_ids([1, 2, 100_000]))) == [1, 2, 100_000]
+    assert list(PackedCallResults.pack([]).unpack()) == []
+
+
+def test_call_set_registration(tmp_path: Path):
+    calls = _create_calls(1_000)
+    call_set = register_call_set(calls, directory=tmp_path)
+
+    # Tasks only carry the small registration
+    assert len(pickle.dumps(call_set)) < len(pickle.dumps(calls)) / 100
+
+    loaded = load_call_set(call_set)
+    assert loaded == calls
+    # Loaded only once per process
+    assert load_call_set(call_set) is loaded
+
+    # Main process maps ids back to its own call objects
+    timestamp = datetime.datetime(2024, 1, 1)
+    packed = PackedMulticallResult(
+        block_number=100,
+        timestamp=timestamp,
+        results=PackedCallResults.pack([(999, True, b"\x01", False), (5, False, b"", False)]),
+    )
+    combined = _unpack_multicall_result(packed, calls)
+    assert combined.results[0].call is calls[999]
+    assert combined.results[0].result == b"\x01"
+    assert combined.results[0].timestamp == timestamp
+    assert combined.results[1].call is calls[5]
+    assert not combined.results[1].success
+
+    release_call_set(call_set)
+    assert not call_set.path.exists()
+
+
+def test_compact_encoded_call(tmp_path: Path):
+    """Compact calls share metadata, survive the call set registration and are turned to EncodedCall in workers."""
+    metadata = intern_call_metadata("totalSupply", extra_data={"vault": 1}, first_block_number=100)
+    calls = [
+        CompactEncodedCall.from_keccak_signature(
+            address="0x" + f"{i:040x}",
+            signature=Web3.keccak(text="totalSupply()")[0:4],
+            data=b"",
+            metadata=metadata,
+        )
+        for i in range(100)
+    ]
+    assert calls[1].address == Web3.to_checksum_address("0x" + f"{1:040x}")
+    assert calls[1].selector == Web3.keccak(text="totalSupply()")[0:4]
+    assert calls[1].extra_data == {"vault": 1}
+    assert not calls[1].is_valid_for_block(99)
+    assert calls[1].is_valid_for_block(100)
+    assert not hasattr(calls[1], "__dict__")
+
+    call_set = register_call_set(MulticallCallSet(1, MultiProviderWeb3Factory("http://localhost:8545"), calls), directory=tmp_path)
+    with open(call_set.path, "rb") as inp:
+        loaded = pickle.load(inp)
+    assert loaded.calls == calls
+    assert all(c.metadata is loaded.calls[0].metadata for c in loaded.calls)
+    release_call_set(call_set)
+
+    prepared = _prepare_call_set(loaded)
+    assert all(isinstance(c, EncodedCall) for c in prepared.calls)
+    assert prepared.calls[1].address == Web3.to_checksum_address(calls[1].address)
+    assert prepared.calls[1].data == calls[1].data
+    assert prepared.calls[1].first_block_number == 100
+
+    # Results in the main process refer to the caller's compact calls
+    packed = PackedMulticallResult(100, None, PackedCallResults.pack([(1, True, b"\x01", False)]))
+    assert _unpack_multicall_result(packed, calls).results[0].call is calls[1]
+
+    assert CompactEncodedCall.from_encoded_call(prepared.calls[1]) == calls[1]
+
+    # Same call for another reader is a different call
+    other_reader = CompactEncodedCall(calls[1].target, calls[1].data, intern_call_metadata("totalSupply", extra_data={"vault": 2}, first_block_number=100))
+    assert other_reader != calls[1]
+
+
+def test_call_metadata_registry_bounded(monkeypatch):
+    """Metadata registry evicts the least recently used entries."""
+    monkeypatch.setattr(multicall_batcher, "CALL_METADATA_REGISTRY_MAX_SIZE", 2)
+    monkeypatch.setattr(multicall_batcher, "_call_metadata_registry", OrderedDict())
+    extra_data = [{"vault": i} for i in range(3)]
+    first = intern_call_metadata("totalSupply", extra_data[0])
+    second = intern_call_metadata("totalSupply", extra_data[1])
+
+    # Using the first metadata again makes the second the oldest
+    assert intern_call_metadata("totalSupply", extra_data[0]) is first
+    intern_call_metadata("totalSupply", extra_data[2])
+    assert len(multicall_batcher._call_metadata_registry) == 2
+    assert intern_call_metadata("totalSupply", extra_data[0]) is first
+    assert intern_call_metadata("totalSupply", extra_data[1]) is not second
+
+
+def test_compact_encoded_call_address_once(monkeypatch):
+    """Checksummed address is calculated when the call is created, and carried over pickling."""
+    call = CompactEncodedCall.from_keccak_signature(
+        address="0x" + "ab" * 20,
+        signature=Web3.keccak(text="totalSupply()")[0:4],
+        data=b"",
+        metadata=intern_call_metadata("totalSupply"),
+    )
+
+    def _fail(address):
+        raise AssertionError("Checksummed again")
+
+    monkeypatch.setattr(multicall_batcher.Web3, "to_checksum_address", _fail)
+    assert call.address == "0xABaBaBaBABabABabAbAbABAbABabababaBaBABaB"
+    assert pickle.loads(pickle.dumps(call)).address == call.address
+    assert call.to_encoded_call().address == call.address
@@ -21,7 +21,7 @@ from web3 import Web3
 from eth_defi.compat import WEB3_PY_V7, install_retry_middleware_compat
 
 from eth_defi.compat import clear_middleware
-from eth_defi.price_oracle.oracle import PriceOracle, time_weighted_average_price, NotEnoughData, DataTooOld, DataPeriodTooShort
+from eth_defi.price_oracle.oracle import PriceOracle, time_weighted_average_price, NotEnoughData, DataTooOld, DataPeriodTooShort, PriceEntry, PriceSource, volume_weighted_average_price
 from eth_defi.provider.multi_provider import create_multi_provider_web3, MultiProviderWeb3Factory
 from eth_defi.uniswap_v2.oracle import update_price_oracle_with_sync_events_single_thread
 from eth_defi.uniswap_v2.pair import fetch_pair_details
@@ -123,6 +123,107 @@ def test_oracle_feed_data_reverse():
     assert oracle.get_oldest().timestamp == datetime.datetime(2021, 1, 1)
 
 
+def test_oracle_buffer_running_sums():
+    """Buffer stays time ordered and running TWAP/VWAP match the full calculation."""
+
+    oracle = PriceOracle(
+        volume_weighted_average_price,
+        min_entries=1,
+        min_duration=datetime.timedelta(0),
+        max_age=PriceOracle.ANY_AGE,
+        target_time_window=datetime.timedelta(minutes=10),
+    )
+
+    start = datetime.datetime(2021, 1, 1)
+    for i in range(100):
+        # Every tenth event arrives late
+        minute = i - 3 if i % 10 == 0 and i > 0 else i
+        evt = PriceEntry(
+            timestamp=start + datetime.timedelta(minutes=minute),
+            price=Decimal(100) + Decimal(i) / Decimal(7),
+            volume=Decimal(i % 5),
+            source=PriceSource.unknown,
+            tx_hash=f"0x{i:064x}",
+            block_hash="0x1",
+            block_number=i,
+        )
+        oracle.add_price_entry_reorg_safe(evt)
+
+    entries = list(oracle.buffer)
+    assert [e.timestamp for e in entries] == sorted(e.timestamp for e in entries)
+    assert oracle.get_newest().timestamp == start + datetime.timedelta(minutes=99)
+    assert oracle.get_by_transaction_hash(f"0x{50:064x}").block_number == 50
+
+    # Calling again with a new block is a reorg, not a duplicate
+    moved = PriceEntry(timestamp=entries[0].timestamp, price=entries[0].price, source=PriceSource.unknown, tx_hash=entries[0].tx_hash, block_hash="0x2", block_number=1000)
+    oracle.add_price_entry_reorg_safe(moved)
+    assert len(oracle.buffer) == 100
+    assert entries[0].block_number == 1000
+
+    assert oracle.calculate_price() == volume_weighted_average_price(entries)
+
+    # Drop events older than 10 minutes
+    assert oracle.truncate_buffer(start + datetime.timedelta(minutes=99)) == 90
+    assert oracle.get_by_transaction_hash(f"0x{50:064x}") is None
+    entries = list(oracle.buffer)
+    assert oracle.calculate_price() == volume_weighted_average_price(entries)
+
+    oracle.price_function = time_weighted_average_price
+    assert oracle.calculate_price() == time_weighted_average_price(entries)
+
+
+def test_oracle_shared_transaction_hash():
+    """Several swaps in one transaction, the first added entry is returned by the hash."""
+
+    oracle = PriceOracle(
+        time_weighted_average_price,
+        min_entries=1,
+        min_duration=datetime.timedelta(0),
+        max_age=PriceOracle.ANY_AGE,
+        target_time_window=datetime.timedelta(0),
+    )
+
+    tx_hash = "0x" + "ab" * 32
+    start = datetime.datetime(2021, 1, 1)
+    first, second, third = [
+        PriceEntry(
+            timestamp=start + datetime.timedelta(minutes=i),
+            price=Decimal(100 + i),
+            source=PriceSource.unknown,
+            tx_hash=tx_hash,
+            block_hash="0x1",
+            block_number=i,
+        )
+        for i in (1, 2, 0)
+    ]
+    oracle.add_price_entry(first)
+    oracle.add_price_entry(second)
+    oracle.add_price_entry(third)
+    assert oracle.get_by_transaction_hash(tx_hash) is first
+
+    # Dropping the indexed entry falls back to the next added one
+    oracle.truncate_buffer(start + datetime.timedelta(minutes=2))
+    assert oracle.get_by_transaction_hash(tx_hash) is second
+    oracle.truncate_buffer(start + datetime.timedelta(minutes=3))
+    assert oracle.get_by_transaction_hash(tx_hash) is None
+
+
+def test_oracle_late_entries_same_timestamp():
+    """Late entries are inserted after entries with the same timestamp, truncation keeps the boundary."""
+
+    oracle = PriceOracle(time_weighted_average_price, min_entries=1, min_duration=datetime.timedelta(0), max_age=PriceOracle.ANY_AGE)
+    start = datetime.datetime(2021, 1, 1)
+    minutes = [0, 5, 5, 10, 5, 1]
+    for i, minute in enumerate(minutes):
+        oracle.add_price_entry(PriceEntry(timestamp=start + datetime.timedelta(minutes=minute), price=Decimal(i), source=PriceSource.unknown))
+
+    assert [e.price for e in oracle.buffer] == [0, 5, 1, 2, 4, 3]
+
+    assert oracle.truncate_buffer(start + datetime.timedelta(minutes=5) + oracle.target_time_window) == 2
+    assert [e.price for e in oracle.buffer] == [1, 2, 4, 3]
+    assert oracle.calculate_price() == time_weighted_average_price(list(oracle.buffer))
+
+
 def test_oracle_too_old():
     """Price data is stale for real time."""
 
@@ -0,0 +1,142 @@
+"""Latency and health aware provider routing."""
+
+import pickle
+import random
+import time
+
+import pytest
+import requests
+from web3.providers import JSONBaseProvider
+
+from eth_defi.provider.fallback import FallbackProvider, FallbackStrategy
+from eth_defi.provider.health import ProviderHealthTracker, get_rate_limit_cool_down
+
+
+class FakeProvider(JSONBaseProvider):
+    """Reply to ``eth_chainId`` after a delay, optionally failing."""
+
+    def __init__(self, name: str, delay: float = 0.0, fail: bool = False):
+        super().__init__()
+        self.endpoint_uri = f"http://{name}.example.com"
+        self.delay = delay
+        self.fail = fail
+        self.calls = 0
+
+    def make_request(self, method, params):
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise requests.exceptions.ConnectionError("Fake connection error")
+        return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+
+
+def test_health_tracker_weights():
+    """Fast providers get more requests, rate limited providers get none."""
+    tracker = ProviderHealthTracker(["fast", "slow", "limited"], rng=random.Random(1))
+    for _ in range(20):
+        tracker.record_success(0, 0.01)
+        tracker.record_success(1, 0.1)
+        tracker.record_success(2, 0.01)
+    tracker.record_rate_limit(2, 60)
+
+    picks = [tracker.choose() for _ in range(1000)]
+    assert picks.count(2) == 0
+    assert picks.count(0) > 8 * picks.count(1)
+    assert tracker.choose(exclude={0, 1}) == 2
+    assert tracker.choose(exclude={0, 1, 2}) is None
+
+    stats = tracker.get_stats()
+    assert stats["slow"]["p50"] == pytest.approx(0.1)
+    assert stats["limited"]["rate_limited"]
+
+    assert tracker.get_hedge_delay(1, min_delay=0.05) == pytest.approx(0.1)
+    assert tracker.get_hedge_delay(0, min_delay=0.05) == 0.05
+
+
+def test_rate_limit_headers():
+    assert get_rate_limit_cool_down({"Retry-After": "3"}) == 3
+    assert get_rate_limit_cool_down({"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "2"}) == 2
+    assert get_rate_limit_cool_down({"X-RateLimit-Remaining": "10"}) is None
+    assert get_rate_limit_cool_down({}) is None
+
+
+def test_fallback_latency_weighted_failover():
+    """Broken provider is skipped without sleeping and requests spread to the healthy ones."""
+    broken = FakeProvider("broken", fail=True)
+    good_1 = FakeProvider("good1")
+    good_2 = FakeProvider("good2")
+    provider = FallbackProvider([broken, good_1, good_2], strategy=FallbackStrategy.latency_weighted, sleep=10)
+
+    started = time.time()
+    for _ in range(50):
+        assert provider.make_request("eth_chainId", [])["result"] == "0x1"
+    assert time.time() - started < 5
+
+    assert good_1.calls > 5
+    assert good_2.calls > 5
+    assert provider.health.providers[0].error_rate > 0.1
+    assert provider.api_call_counts[0]["eth_chainId"] == 0
+    assert provider.api_call_counts[1]["eth_chainId"] + provider.api_call_counts[2]["eth_chainId"] == 50
+
+
+def test_fallback_hedged_request():
+    """Slow provider is hedged by a fast one, and the late reply of the slow one is ignored."""
+    slow = FakeProvider("slow", delay=0.5)
+    fast = FakeProvider("fast")
+    provider = FallbackProvider([slow, fast], strategy=FallbackStrategy.latency_weighted, hedge_delay=0.05)
+    provider.health.choose = lambda exclude=None: 1 if exclude else 0
+
+    started = time.time()
+    assert provider.make_request("eth_chainId", [])["result"] == "0x1"
+    assert time.time() - started < 1.0
+    assert provider.hedge_count == 1
+    assert provider.api_call_counts[1]["eth_chainId"] == 1
+
+    time.sleep(1.0)
+    assert slow.calls == 1
+    assert provider.health.providers[0].success_count == 0
+    assert provider.health.providers[1].success_count == 1
+
+    provider.close()
+    assert provider._hedge_executor is None
+
+
+def test_fallback_hedged_request_both_fail(caplog):
+    """Both hedged requests fail, the first error is raised and the second one logged."""
+    slow = FakeProvider("slow", delay=0.2, fail=True)
+    broken = FakeProvider("broken", fail=True)
+    provider = FallbackProvider([slow, broken], strategy=FallbackStrategy.latency_weighted, hedge_delay=0.05)
+    provider.health.choose = lambda exclude=None: 1 if exclude else 0
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        provider._make_hedged_request(0, "eth_chainId", [], failed := [])
+    assert failed == [1, 0]
+    assert "discarding the error from slow.example.com" in caplog.text
+    provider.close()
+
+
+def test_fallback_hedged_request_blames_failed_provider():
+    """The providers whose hedged requests failed are penalised and skipped, not the one picked first."""
+    slow = FakeProvider("slow", delay=0.2, fail=True)
+    broken = FakeProvider("broken", fail=True)
+    good = FakeProvider("good")
+    provider = FallbackProvider([slow, broken, good], strategy=FallbackStrategy.latency_weighted, hedge_delay=0.05, sleep=10)
+    provider.health.choose = lambda exclude=None: min(set(range(3)) - (exclude or set()))
+
+    started = time.time()
+    assert provider.make_request("eth_chainId", [])["result"] == "0x1"
+    assert time.time() - started < 5
+    assert broken.calls == 1
+    assert good.calls == 1
+    assert provider.health.providers[0].error_rate > 0
+    assert provider.health.providers[1].error_rate > 0
+    assert provider.health.providers[2].error_rate == 0
+
+    # Hedge threads and health locks are not pickled, but recreated
+    assert provider._hedge_executor is not None
+    assert provider.__getstate__()["_hedge_executor"] is None
+    del provider.health.choose
+    health = pickle.loads(pickle.dumps(provider.health))
+    assert health.providers[1].error_rate == provider.health.providers[1].error_rate
+    health.record_success(2, 0.01)
+    provider.close()
@@ -1,5 +1,7 @@
 """Test chain reorganisation monitor."""
 
+from eth_defi.event_reader.block_header_window import BlockHeaderWindow
+from eth_defi.event_reader.parquet_block_data_store import ParquetDatasetBlockDataStore
 from eth_defi.event_reader.reorganisation_monitor import MockChainAndReorganisationMonitor
 
 
@@ -87,3 +89,78 @@ def test_incremental():
     assert reorg_resolution.reorg_detected
     assert reorg_resolution.latest_block_with_good_data == 102
     assert reorg_resolution.last_live_block == 104
+
+
+def test_perform_chain_reorg_header_window(tmp_path):
+    """Simulate a chain reorganisation with a bounded block header window spilling to Parquet."""
+
+    store = ParquetDatasetBlockDataStore(tmp_path, partition_size=50)
+    window = BlockHeaderWindow(capacity=120, store=store)
+    mock_chain = MockChainAndReorganisationMonitor(check_depth=100, block_map=window)
+
+    mock_chain.produce_blocks(300)
+    reorg_resolution = mock_chain.update_chain()
+    assert not reorg_resolution.reorg_detected
+    assert len(mock_chain.block_map) == 120
+    assert window.get_first_block() == 181
+    assert window.get_last_block() == 300
+
+    # Blocks 1 - 149 were written as complete partitions, 150 - 180 wait for their partition to complete
+    assert window.spilled_partitions == 3
+    assert mock_chain.get_block_timestamp(10) == mock_chain.simulated_blocks[10].timestamp
+    assert mock_chain.get_block_timestamp(170) == mock_chain.simulated_blocks[170].timestamp
+    assert mock_chain.get_block_by_number(200).timestamp == mock_chain.simulated_blocks[200].timestamp
+
+    mock_chain.produce_fork(270)
+    mock_chain.produce_blocks(2)
+
+    reorg_resolution = mock_chain.update_chain()
+    assert reorg_resolution.reorg_detected
+    assert reorg_resolution.latest_block_with_good_data == 269
+    assert mock_chain.get_last_block_read() == 302
+    assert window.get_last_block() == 302
+    assert window.get_first_block() == 183
+    assert mock_chain.get_block_by_number(270).block_hash == "0x" + "8888".rjust(64, "0")
+
+
+class CountingMockChain(MockChainAndReorganisationMonitor):
+    """Count the block headers read."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.headers_read = 0
+
+    def fetch_block_data(self, start_block, end_block):
+        for block in super().fetch_block_data(start_block, end_block):
+            self.headers_read += 1
+            yield block
+
+
+def test_ancestor_hash_check():
+    """Detect a chain reorganisation by checking the stored chain head only."""
+
+    mock_chain = CountingMockChain(check_depth=100, ancestor_hash_check=True)
+    mock_chain.produce_blocks(200)
+    mock_chain.update_chain()
+    assert mock_chain.get_last_block_read() == 200
+
+    # Without reorgs, we read only the new blocks and our stored head
+    mock_chain.headers_read = 0
+    mock_chain.produce_blocks(2)
+    reorg_resolution = mock_chain.update_chain()
+    assert not reorg_resolution.reorg_detected
+    assert mock_chain.headers_read == 3
+
+    # A fork changes the hashes of all following blocks
+    for block_number in range(170, 203):
+        mock_chain.produce_fork(block_number, fork_marker=hex(0x8888_0000 + block_number))
+    mock_chain.produce_blocks(2)
+
+    mock_chain.headers_read = 0
+    reorg_resolution = mock_chain.update_chain()
+    assert reorg_resolution.reorg_detected
+    assert reorg_resolution.latest_block_with_good_data == 169
+    assert mock_chain.get_last_block_read() == 204
+    assert mock_chain.get_block_by_number(185).block_hash == hex(0x8888_0000 + 185)
+    # Stored head and new blocks, log2(100) probes, re-read from the fork point
+    assert mock_chain.headers_read <= 3 + 7 + 36
@@ -0,0 +1,84 @@
+"""SQLite key-value store tests."""
+
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from eth_defi.sqlite_cache import PersistentKeyValueStore
+
+
+class JSONStore(PersistentKeyValueStore):
+    def encode_value(self, value: dict) -> str:
+        return json.dumps(value)
+
+    def decode_value(self, value: str) -> dict:
+        return json.loads(value)
+
+
+def test_sqlite_cache_bulk_wal(tmp_path: Path):
+    """Bulk writes and reads in WAL mode, with the LRU cache evicting by size."""
+    path = tmp_path / "cache.sqlite"
+    store = JSONStore(path, wal=True, cache_max_bytes=200, iter_batch_size=7)
+
+    entries = {f"key-{i}": {"i": i} for i in range(2_000)}
+    store.set_many(entries)
+    assert len(store) == 2_000
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # LRU cache is bounded
+    assert store.cache_bytes <= 200
+    assert 0 < len(store.lru_cache) < 2_000
+
+    # Bulk read over SQLite variable limit, including missing keys
+    result = store.get_many([f"key-{i}" for i in range(0, 2_500)])
+    assert len(result) == 2_000
+    assert result["key-1999"] == {"i": 1999}
+
+    # Cached reads do not hit SQLite
+    assert store["key-1999"] == {"i": 1999}
+    hits = store.cache_hits
+    assert store["key-1999"] == {"i": 1999}
+    assert store.cache_hits == hits + 1
+
+    # Streaming iteration in batches
+    assert sum(1 for _ in store.iter_decoded_items()) == 2_000
+    assert next(store.iter_decoded_items())[1] == {"i": 0}
+
+    # Deletes invalidate the cache
+    del store["key-1999"]
+    store.commit()
+    assert store.get("key-1999") is None
+
+    # Readers in other threads see the data
+    def _read(i: int):
+        return store.get(f"key-{i}")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        assert list(executor.map(_read, range(4))) == [{"i": i} for i in range(4)]
+
+    store.purge()
+    assert len(store) == 0
+    assert store.cache_bytes == 0
+
+    store.close()
+
+
+def test_sqlite_cache_defaults_and_existing_keys(tmp_path: Path):
+    """Default store has no WAL or LRU cache, and existence checks do not decode values."""
+    store = JSONStore(tmp_path / "cache.sqlite")
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] != "wal"
+
+    store.set_many({f"key-{i}": {"i": i} for i in range(1_500)})
+    assert len(store.lru_cache) == 0
+
+    # Missing and non-str keys return the default
+    assert store.get("missing", 1) == 1
+    assert store.get(1, "default") == "default"
+    assert store.get(None) is None
+
+    decoded = []
+    store.decode_value = lambda value: decoded.append(value)
+    assert store.get_existing_keys([f"key-{i}" for i in range(1_000, 2_000)]) == {f"key-{i}" for i in range(1_000, 1_500)}
+    assert decoded == []
+
+    store.close()
@@ -0,0 +1,103 @@
+"""Static JSON-RPC call cache middleware."""
+
+from web3 import Web3
+from web3.providers import BaseProvider
+
+from eth_defi.compat import add_middleware
+from eth_defi.middleware import DEFAULT_STATIC_CALL_TTLS, StaticCallCache, static_call_cache_middleware
+
+
+class CountingProvider(BaseProvider):
+    """Chain tip at 1,000, counts calls per method."""
+
+    def __init__(self):
+        super().__init__()
+        self.calls = []
+
+    def make_request(self, method, params):
+        self.calls.append(method)
+        if method == "eth_chainId":
+            return {"jsonrpc": "2.0", "id": 1, "result": "0x1"}
+        if method == "eth_blockNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": hex(1_000)}
+        if method == "eth_getBlockByNumber":
+            return {"jsonrpc": "2.0", "id": 1, "result": {"number": params[0]}}
+        return {"jsonrpc": "2.0", "id": 1, "error": {"code": -32601, "message": "not supported"}}
+
+
+def _create_web3(cache: StaticCallCache, namespace: str) -> tuple[Web3, CountingProvider]:
+    provider = CountingProvider()
+    web3 = Web3(provider)
+    web3.static_call_cache = cache
+    web3.static_call_cache_namespace = namespace
+    add_middleware(web3, static_call_cache_middleware, layer=0)
+    return web3, provider
+
+
+def test_static_call_cache():
+    """Cache is keyed by params, finalised blocks only, and shared across instances with the same namespace."""
+    cache = StaticCallCache(finality_depth=100)
+    web3, provider = _create_web3(cache, "https://example.com")
+
+    def _get_block(number):
+        return web3.manager.request_blocking("eth_getBlockByNumber", [hex(number), False])
+
+    # Tip unknown, not cached
+    _get_block(500)
+    _get_block(500)
+    assert provider.calls.count("eth_getBlockByNumber") == 2
+
+    assert web3.eth.chain_id == 1
+    assert web3.eth.chain_id == 1
+    assert web3.eth.block_number == 1_000
+    assert web3.eth.block_number == 1_000
+    assert provider.calls.count("eth_chainId") == 1
+    # Block number is not cached by default, but the tip is tracked for finality
+    assert provider.calls.count("eth_blockNumber") == 2
+
+    # Finalised block cached per params, unfinalised and latest are not
+    _get_block(500)
+    _get_block(500)
+    _get_block(501)
+    _get_block(950)
+    _get_block(950)
+    web3.manager.request_blocking("eth_getBlockByNumber", ["latest", False])
+    web3.manager.request_blocking("eth_getBlockByNumber", ["latest", False])
+    assert provider.calls.count("eth_getBlockByNumber") == 2 + 1 + 1 + 2 + 2
+
+    # Another instance of the same configuration is served from the cache
+    web3_2, provider_2 = _create_web3(cache, "https://example.com")
+    assert web3_2.eth.chain_id == 1
+    assert web3_2.manager.request_blocking("eth_getBlockByNumber", [hex(500), False])["number"] == hex(500)
+    assert provider_2.calls == []
+
+    # Different configuration does not share entries
+    web3_3, provider_3 = _create_web3(cache, "https://other.example.com")
+    assert web3_3.eth.chain_id == 1
+    assert provider_3.calls == ["eth_chainId"]
+
+
+def test_static_call_cache_ttl_and_bounds():
+    # Opt in block number caching
+    cache = StaticCallCache(ttls=DEFAULT_STATIC_CALL_TTLS | {"eth_blockNumber": 60.0})
+    web3, provider = _create_web3(cache, "test")
+    web3.eth.block_number
+    web3.eth.block_number
+    assert provider.calls == ["eth_blockNumber"]
+
+    cache = StaticCallCache(ttls={"eth_blockNumber": 0.0}, max_entries=2)
+    web3, provider = _create_web3(cache, "test")
+
+    web3.eth.block_number
+    web3.eth.block_number
+    assert provider.calls == ["eth_blockNumber", "eth_blockNumber"]
+
+    # Errors are not cached
+    cache.ttls["eth_gasPrice"] = 60.0
+    for i in range(2):
+        try:
+            web3.eth.gas_price
+        except Exception:
+            pass
+    assert provider.calls.count("eth_gasPrice") == 2
+    assert len(cache) <= 2
@@ -0,0 +1,88 @@
+"""Offline Uniswap v2 reserve index."""
+
+from pathlib import Path
+
+import pytest
+
+from eth_defi.uniswap_v2.fees import UniswapV2FeeCalculator
+from eth_defi.uniswap_v2.reserve_index import InsufficientLiquidity, ReserveIndex, UnknownPair
+
+WETH = "0xc02aaa39b223fe8d0a0e5c4f27ead9083c756cc2"
+USDC = "0xa0b86991c6218b36c1d19d4a2e9eb0ce3606eb48"
+DAI = "0x6b175474e89094c44da98b954eedeac495271d0f"
+
+WETH_USDC = "0xb4e16d0168e52d35cacd2c6185b44281ec28c9dc"
+WETH_DAI = "0xa478c2975ab1ea89e8196811f51a7b7ade33eb11"
+USDC_DAI = "0xae461ca67b15dc8dc81ce7615e0320da1a9ab8d5"
+
+
+def _sync_log(pair: str, block_number: int, log_index: int, reserve0: int, reserve1: int) -> dict:
+    return {
+        "address": pair,
+        "blockNumber": hex(block_number),
+        "logIndex": hex(log_index),
+        "data": "0x" + reserve0.to_bytes(32, "big").hex() + reserve1.to_bytes(32, "big").hex(),
+    }
+
+
+def test_reserve_index(tmp_path: Path):
+    """Quote single and multi-hop swaps at the latest and historical blocks, persist and resume."""
+    index = ReserveIndex(fee=30)
+    # USDC sorts before WETH
+    index.add_pair(WETH_USDC, USDC, WETH)
+    index.add_pair(WETH_DAI, DAI, WETH)
+    index.add_pair(USDC_DAI, DAI, USDC)
+
+    index.handle_sync_log(_sync_log(WETH_USDC, 100, 0, 1_700_000 * 10**6, 1_000 * 10**18))
+    index.handle_sync_log(_sync_log(WETH_DAI, 100, 1, 1_800_000 * 10**18, 1_000 * 10**18))
+    index.handle_sync_log(_sync_log(USDC_DAI, 100, 2, 10_000_000 * 10**18, 10_000_000 * 10**6))
+
+    # Price moves in block 200, two syncs in the same block
+    index.handle_sync_log(_sync_log(WETH_USDC, 200, 5, 1_750_000 * 10**6, 990 * 10**18))
+    index.handle_sync_log(_sync_log(WETH_USDC, 200, 7, 1_800_000 * 10**6, 980 * 10**18))
+    assert index.get_last_block() == 200
+
+    reserve_weth, reserve_usdc, block = index.get_reserves(WETH, USDC)
+    assert (reserve_weth, reserve_usdc, block) == (980 * 10**18, 1_800_000 * 10**6, 200)
+
+    amount_out = index.get_amount_out(10**18, [WETH, USDC])
+    assert amount_out == UniswapV2FeeCalculator.get_amount_out_from_reserves(10**18, reserve_weth, reserve_usdc)
+
+    # Historical lookups
+    assert index.get_reserves(WETH, USDC, block_number=150)[0] == 1_000 * 10**18
+    assert index.get_amount_out(10**18, [WETH, USDC], block_number=199) / 10**6 == pytest.approx(1693.2, rel=0.001)
+    with pytest.raises(UnknownPair):
+        index.get_reserves(WETH, USDC, block_number=99)
+
+    amount_in = index.get_amount_in(1_000 * 10**6, [WETH, USDC])
+    assert index.get_amount_out(amount_in, [WETH, USDC]) >= 1_000 * 10**6
+
+    # WETH -> DAI is better through USDC after the price move
+    amount_out, path = index.find_best_route(10**18, WETH, DAI, intermediate_tokens=[USDC])
+    assert path == [WETH, USDC, DAI]
+    assert amount_out == index.get_amount_out(10**18, [WETH, USDC, DAI])
+    amount_out, path = index.find_best_route(10**18, WETH, DAI, block_number=150)
+    assert path == [WETH, DAI]
+
+    # 1 wei of WETH gives zero USDC, so only the direct route works
+    with pytest.raises(InsufficientLiquidity):
+        index.get_amount_out(1, [WETH, USDC, DAI])
+    assert index.find_best_route(1, WETH, DAI)[1] == [WETH, DAI]
+    with pytest.raises(InsufficientLiquidity):
+        index.get_amount_in(980 * 10**18, [USDC, WETH])
+
+    # Persist and resume
+    index_file = tmp_path / "reserves.json"
+    index.save(index_file)
+    resumed = ReserveIndex.load(index_file)
+    assert resumed.get_last_block() == 200
+    assert resumed.get_reserves(WETH, USDC, block_number=150) == index.get_reserves(WETH, USDC, block_number=150)
+
+    # Replayed events are ignored
+    resumed.handle_sync_log(_sync_log(WETH_USDC, 200, 5, 1_750_000 * 10**6, 990 * 10**18))
+    assert resumed.get_reserves(WETH, USDC) == index.get_reserves(WETH, USDC)
+
+    # Chain reorganisation
+    index.rollback(150)
+    assert index.get_last_block() == 150
+    assert index.get_reserves(WETH, USDC)[2] == 100
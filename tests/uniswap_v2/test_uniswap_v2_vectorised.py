@@ -0,0 +1,54 @@
+"""Vectorised Uniswap v2 quoting."""
+
+import random
+
+import numpy as np
+import pytest
+
+from eth_defi.uniswap_v2.fees import UniswapV2FeeCalculator
+from eth_defi.uniswap_v2.vectorised import (
+    as_integer_array,
+    get_amount_in_from_reserves_batch,
+    get_amount_out_from_reserves_batch,
+    get_price_impact_batch,
+)
+
+
+@pytest.mark.parametrize("max_reserve", [10**7, 2**112 - 1])
+def test_batch_quotes_match_scalar(max_reserve: int):
+    """int64 and uint112 reserves give the same results as the scalar functions."""
+    rng = random.Random(1)
+    reserve_in = [rng.randint(10**6, max_reserve) for _ in range(200)]
+    reserve_out = [rng.randint(10**6, max_reserve) for _ in range(200)]
+    amount_in = [rng.randint(1, r // 10) for r in reserve_in]
+    amount_out_wanted = [rng.randint(1, r // 10) for r in reserve_out]
+
+    amount_out = get_amount_out_from_reserves_batch(amount_in, reserve_in, reserve_out, fee=25)
+    assert amount_out.dtype == (np.int64 if max_reserve < 2**63 else object)
+    assert amount_out.tolist() == [UniswapV2FeeCalculator.get_amount_out_from_reserves(a, r0, r1, fee=25) for a, r0, r1 in zip(amount_in, reserve_in, reserve_out)]
+
+    amount_in_needed = get_amount_in_from_reserves_batch(amount_out_wanted, reserve_in, reserve_out)
+    assert amount_in_needed.tolist() == [UniswapV2FeeCalculator.get_amount_in_from_reserves(a, r0, r1) for a, r0, r1 in zip(amount_out_wanted, reserve_in, reserve_out)]
+
+
+def test_batch_invalid_rows_and_price_impact():
+    """Bad pairs do not fail the batch, price impact includes the fee."""
+    amount_in = np.array([10**18, 10**18, 0, 500 * 10**18])
+    reserve_in = np.array([1_000 * 10**18, 0, 1_000 * 10**18, 1_000 * 10**18])
+    reserve_out = np.array([1_700_000 * 10**6, 1_700_000 * 10**6, 1_700_000 * 10**6, 1_700_000 * 10**6])
+
+    amount_out = get_amount_out_from_reserves_batch(amount_in, reserve_in, reserve_out)
+    assert amount_out[1] == 0
+    assert amount_out[2] == 0
+
+    impact = get_price_impact_batch(amount_in, reserve_in, reserve_out, amount_out)
+    assert impact[0] == pytest.approx(0.004, abs=0.0001)
+    assert np.isnan(impact[1])
+    assert np.isnan(impact[2])
+    assert impact[3] == pytest.approx(1 - 0.997 / 1.4985, rel=0.001)
+
+    # Cannot buy out the whole reserve
+    assert get_amount_in_from_reserves_batch([1_700_000 * 10**6], [1_000 * 10**18], [1_700_000 * 10**6]).tolist() == [0]
+
+    # Lists of large Python ints do not silently become floats
+    assert as_integer_array([1, 2**63]).dtype == object
@@ -0,0 +1,118 @@
+"""Local Uniswap v3 pool state from events."""
+
+from math import isqrt
+from pathlib import Path
+
+import pytest
+
+from eth_defi.uniswap_v3.pool_state_engine import PoolStateEngine
+from eth_defi.uniswap_v3.tick_math import Q96, compute_swap_step, get_sqrt_ratio_at_tick, get_tick_at_sqrt_ratio
+from eth_defi.uniswap_v3.utils import get_default_tick_range
+
+POOL = "0x8ad599c3a0ff1de082011efddc58f1908eb6e6d8"
+
+
+def test_compute_swap_step():
+    """Vectors from Uniswap v3 core SwapMath tests."""
+    price = 2**96
+    price_target = isqrt((101 << 192) // 100)
+
+    # Exact amount in that gets capped at price target in one for zero
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(price, price_target, 2 * 10**18, 10**18, 600)
+    assert sqrt_q == price_target
+    assert amount_in == 9975124224178055
+    assert amount_out == 9925619580021728
+    assert fee_amount == 5988667735148
+
+    # Exact amount in that is fully spent in one for zero
+    price_target = isqrt((1000 << 192) // 100)
+    sqrt_q, amount_in, amount_out, fee_amount = compute_swap_step(price, price_target, 2 * 10**18, 10**18, 600)
+    assert amount_in == 999400000000000000
+    assert amount_out == 666399946655997866
+    assert fee_amount == 600000000000000
+    assert get_tick_at_sqrt_ratio(sqrt_q) < get_tick_at_sqrt_ratio(price_target)
+
+
+def _event(block_number: int, log_index: int, **kwargs) -> dict:
+    return {"block_number": block_number, "log_index": log_index, "pool_contract_address": POOL, **kwargs}
+
+
+def test_pool_state_engine(tmp_path: Path):
+    """Quote swaps and depth at the latest and a historical block, persist the state."""
+    full_range_lower, full_range_upper = get_default_tick_range(3000)
+    liquidity = 10**21
+
+    engine = PoolStateEngine(POOL, fee=3000, checkpoint_interval=10)
+    engine.handle_initialize(_event(1, 0, sqrt_price_x96=Q96, tick=0))
+    engine.handle_mint(_event(1, 1, tick_lower=full_range_lower, tick_upper=full_range_upper, amount=liquidity))
+
+    # Full range position works like a constant product pool
+    state = engine.get_state()
+    assert state.liquidity == liquidity
+    quote = state.quote_exact_input(10**18, zero_for_one=True)
+    expected = liquidity * 10**18 * 997 // (liquidity * 1000 + 10**18 * 997)
+    assert quote.amount_out == pytest.approx(expected, rel=1e-9)
+    assert quote.price_impact == pytest.approx(0.003 + 0.001, rel=0.01)
+    assert quote.ticks_crossed == 0
+
+    # Concentrated liquidity around the price, deeper market
+    engine.handle_mint(_event(20, 0, tick_lower=-600, tick_upper=600, amount=liquidity * 10))
+    assert engine.get_state().liquidity == liquidity * 11
+    deep_quote = engine.get_state().quote_exact_input(10**18, zero_for_one=True)
+    assert deep_quote.amount_out > quote.amount_out
+
+    # Swap through the concentrated range
+    big_quote = engine.get_state().quote_exact_input(10**21, zero_for_one=True)
+    assert big_quote.ticks_crossed == 1
+    assert big_quote.tick_after < -600
+    engine.handle_swap(_event(30, 0, sqrt_price_x96=big_quote.sqrt_price_x96_after, tick=big_quote.tick_after, liquidity=liquidity))
+    assert engine.get_state().tick < -600
+
+    # Historical queries replay from the checkpoints
+    assert engine.get_state(25).tick == 0
+    assert engine.get_state(25).liquidity == liquidity * 11
+    assert engine.get_state(10).liquidity == liquidity
+    depths = dict(engine.get_state(25).estimate_liquidity_depth([-1, 1]))
+    assert depths[1] == pytest.approx(liquidity * 11 * (1 - 1 / 1.01**0.5), rel=1e-6)
+    assert depths[-1] > 0
+
+    # Replayed events are ignored
+    engine.handle_mint(_event(20, 0, tick_lower=-600, tick_upper=600, amount=liquidity * 10))
+    assert engine.get_state().get_tick_liquidity(600) == (-liquidity * 10, liquidity * 10)
+
+    # Restart from a snapshot
+    snapshot = tmp_path / "pool.json"
+    engine.save_snapshot(snapshot)
+    restored = PoolStateEngine.load_snapshot(snapshot)
+    assert restored.get_state() == engine.get_state()
+    restored.handle_burn(_event(40, 0, tick_lower=-600, tick_upper=600, amount=liquidity * 10))
+    assert restored.get_state().ticks == [full_range_lower, full_range_upper]
+
+    # Chain reorganisation
+    engine.rollback(25)
+    assert engine.get_last_block() == 20
+    assert engine.get_state().tick == 0
+    assert engine.get_state().sqrt_price_x96 == get_sqrt_ratio_at_tick(0)
+
+
+def test_pool_state_engine_bad_arguments():
+    """Price limits on the wrong side of the price revert like the pool contract."""
+    lower, upper = get_default_tick_range(3000)
+    engine = PoolStateEngine(POOL, fee=3000)
+    engine.handle_initialize(_event(1, 0, sqrt_price_x96=get_sqrt_ratio_at_tick(20), tick=20))
+    engine.handle_mint(_event(1, 1, tick_lower=lower, tick_upper=upper, amount=10**21))
+    state = engine.get_state()
+
+    with pytest.raises(AssertionError):
+        state.quote_exact_input(10**18, zero_for_one=True, sqrt_price_limit_x96=get_sqrt_ratio_at_tick(100))
+    with pytest.raises(AssertionError):
+        state.quote_exact_input(10**18, zero_for_one=False, sqrt_price_limit_x96=get_sqrt_ratio_at_tick(-100))
+    with pytest.raises(AssertionError):
+        state.quote_exact_input(10**18, zero_for_one=True, sqrt_price_limit_x96=state.sqrt_price_x96)
+
+    # Limit on the right side stops the swap there
+    quote = state.quote_exact_input(10**21, zero_for_one=True, sqrt_price_limit_x96=get_sqrt_ratio_at_tick(-100))
+    assert quote.tick_after == -100
+
+    with pytest.raises(AssertionError):
+        state.estimate_liquidity_depth([-100])
@@ -0,0 +1,40 @@
+"""Vectorised Uniswap v3 helpers."""
+
+import numpy as np
+import pytest
+
+from eth_defi.uniswap_v3.pool_state_engine import PoolTickState
+from eth_defi.uniswap_v3.tick_math import get_sqrt_ratio_at_tick
+from eth_defi.uniswap_v3.utils import get_token0_amount_in_range, get_token1_amount_in_range, tick_to_price, tick_to_sqrt_price
+from eth_defi.uniswap_v3.vectorised import (
+    estimate_in_range_depth_batch,
+    get_token0_amount_in_range_batch,
+    get_token1_amount_in_range_batch,
+    tick_to_price_batch,
+    tick_to_sqrt_price_batch,
+)
+
+
+def test_vectorised_helpers_match_scalar():
+    ticks = np.array([-200_000, -60, 0, 1, 887_000])
+    liquidity = [10**18, 2**127, 5, 10**30, 1]
+
+    assert tick_to_price_batch(ticks) == pytest.approx([tick_to_price(t) for t in ticks], rel=1e-12)
+    sp = tick_to_sqrt_price_batch(ticks)
+    assert sp == pytest.approx([tick_to_sqrt_price(t) for t in ticks], rel=1e-12)
+
+    sb = tick_to_sqrt_price_batch(ticks + 60)
+    sa = tick_to_sqrt_price_batch(ticks - 60)
+    assert get_token0_amount_in_range_batch(liquidity, sp, sb) == pytest.approx([get_token0_amount_in_range(l, p, b) for l, p, b in zip(liquidity, sp, sb)], rel=1e-12)
+    assert get_token1_amount_in_range_batch(liquidity, sp, sa) == pytest.approx([get_token1_amount_in_range(l, p, a) for l, p, a in zip(liquidity, sp, sa)], rel=1e-12)
+
+
+def test_in_range_depth_matches_pool_state():
+    """Without tick crossings the approximation matches the exact depth."""
+    liquidity = 10**22
+    state = PoolTickState(fee=3000, sqrt_price_x96=get_sqrt_ratio_at_tick(0), tick=0)
+    state.update_position(-6000, 6000, liquidity)
+
+    exact = dict(state.estimate_liquidity_depth([-1, 1]))
+    assert estimate_in_range_depth_batch([liquidity], [0], 1)[0] == pytest.approx(exact[1], rel=1e-6)
+    assert estimate_in_range_depth_batch([liquidity], [0], -1)[0] == pytest.approx(exact[-1], rel=1e-6)